@@ -1,8 +1,14 @@
 import streamlit as st
 import requests
+import hashlib
 import json
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
 from io import BytesIO
+from requests.adapters import HTTPAdapter
 
 # Page configuration
 st.set_page_config(
@@ -16,6 +22,18 @@ st.set_page_config(
 # When running locally, use localhost
 API_GATEWAY_URL = os.getenv("API_GATEWAY_URL", "http://localhost:8080")
 
+# Batch mode sends resumes in /resume/rank/batch calls of this many, so the
+# job description is uploaded and parsed once per call instead of per resume
+BATCH_SIZE = int(os.getenv("FRONTEND_BATCH_SIZE", "10"))
+# Batch calls in flight at once; the service answers 429 with Retry-After
+# when it is saturated, so keep this modest
+MAX_PARALLEL_UPLOADS = int(os.getenv("FRONTEND_MAX_PARALLEL_UPLOADS", "4"))
+# Retries of a ranking turned away with 429, and the wait between them when
+# Retry-After is missing or unreadable
+MAX_RATE_LIMIT_RETRIES = 3
+DEFAULT_RETRY_DELAY_S = 1.0
+MAX_RETRY_DELAY_S = 30.0
+
 # Initialize session state
 if 'token' not in st.session_state:
     st.session_state.token = None
@@ -23,11 +41,34 @@ if 'user_email' not in st.session_state:
     st.session_state.user_email = None
 if 'logged_in' not in st.session_state:
     st.session_state.logged_in = False
+# Ranking results by (resume hash, job description hash), kept across reruns
+if 'results' not in st.session_state:
+    st.session_state.results = {}
+# Content hashes of uploaded files by upload id, so reruns do not rehash them
+if 'file_hashes' not in st.session_state:
+    st.session_state.file_hashes = {}
+
+@st.cache_resource
+def get_http_session():
+    """HTTP session shared by all reruns, with a connection pool sized for batch mode"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=MAX_PARALLEL_UPLOADS)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+def file_hash(uploaded_file):
+    """Content hash of an uploaded file, computed once per upload"""
+    digest = st.session_state.file_hashes.get(uploaded_file.file_id)
+    if digest is None:
+        digest = hashlib.sha256(uploaded_file.getvalue()).hexdigest()
+        st.session_state.file_hashes[uploaded_file.file_id] = digest
+    return digest
 
 def register_user(name, email, password):
     """Register a new user"""
     try:
-        response = requests.post(
+        response = get_http_session().post(
             f"{API_GATEWAY_URL}/auth/register",
             json={"name": name, "email": email, "password": password},
             headers={"Content-Type": "application/json"},
@@ -44,7 +85,7 @@ def register_user(name, email, password):
 def login_user(email, password):
     """Login user and get JWT token"""
     try:
-        response = requests.post(
+        response = get_http_session().post(
             f"{API_GATEWAY_URL}/auth/login",
             json={"email": email, "password": password},
             headers={"Content-Type": "application/json"},
@@ -58,31 +99,129 @@ def login_user(email, password):
     except Exception as e:
         return False, None, f"Error: {str(e)}"
 
-def rank_resume(resume_file, job_description_file, token):
+def retry_delay(response):
+    """Seconds to wait before retrying a 429, from Retry-After as seconds or an HTTP date"""
+    retry_after = response.headers.get("Retry-After", "").strip()
+    if retry_after.isdigit():
+        delay = float(retry_after)
+    else:
+        try:
+            delay = (parsedate_to_datetime(retry_after) - datetime.now(timezone.utc)).total_seconds()
+        except (TypeError, ValueError):
+            # Missing, malformed or without a time zone
+            delay = DEFAULT_RETRY_DELAY_S
+    return min(max(delay, 0.0), MAX_RETRY_DELAY_S)
+
+def post_with_retries(session, url, files, token, timeout, params=None):
+    """POST an upload, retrying while the service answers 429"""
+    headers = {
+        'Authorization': f'Bearer {token}'
+    }
+    for attempt in range(MAX_RATE_LIMIT_RETRIES + 1):
+        response = session.post(url, files=files, params=params, headers=headers, timeout=timeout)
+        if response.status_code != 429 or attempt == MAX_RATE_LIMIT_RETRIES:
+            return response
+        # The service is saturated; wait as long as it asks
+        time.sleep(retry_delay(response))
+
+def rank_resume(resume_file, job_description_file, token, resume_name='resume.pdf', jd_name='job_description.pdf', session=None):
     """Upload resume and job description for ranking"""
+    session = session or get_http_session()
     try:
         files = {
-            'resume': ('resume.pdf', resume_file, 'application/pdf'),
-            'job_description': ('job_description.pdf', job_description_file, 'application/pdf')
-        }
-        headers = {
-            'Authorization': f'Bearer {token}'
+            'resume': (resume_name, resume_file, 'application/pdf'),
+            'job_description': (jd_name, job_description_file, 'application/pdf')
         }
+        response = post_with_retries(session, f"{API_GATEWAY_URL}/resume/rank", files, token, timeout=60)
         
-        response = requests.post(
-            f"{API_GATEWAY_URL}/resume/rank",
-            files=files,
-            headers=headers,
-            timeout=60
+        if response.status_code == 200:
+            return True, response.json(), None
+        else:
+            return False, None, f"Error: {response.status_code} - {response.text}"
+    except (requests.RequestException, ValueError) as e:
+        return False, None, f"Error: {str(e)}"
+
+def rank_resume_batch(resumes, job_description_file, token, jd_name='job_description.pdf', session=None):
+    """Rank (name, content) resumes against one job description in one call; results are aligned with resumes, None where missing"""
+    session = session or get_http_session()
+    # Numbered names tell apart resumes uploaded under the same name
+    names = [f"{i}_{name}" for i, (name, _) in enumerate(resumes)]
+    try:
+        files = [('resumes', (name, content, 'application/pdf')) for name, (_, content) in zip(names, resumes)]
+        files.append(('job_description', (jd_name, job_description_file, 'application/pdf')))
+        response = post_with_retries(
+            session,
+            f"{API_GATEWAY_URL}/resume/rank/batch",
+            files,
+            token,
+            timeout=60 * len(resumes),
+            # Every resume gets an analysis, as in single mode
+            params={"analyze_top_k": len(resumes)}
         )
         
         if response.status_code == 200:
-            return True, response.json(), None
+            by_name = {result.get('filename'): result for result in response.json().get('results') or []}
+            return True, [by_name.get(name) for name in names], None
         else:
             return False, None, f"Error: {response.status_code} - {response.text}"
-    except Exception as e:
+    except (requests.RequestException, ValueError) as e:
         return False, None, f"Error: {str(e)}"
 
+def result_value(result, snake_name, camel_name, default=None):
+    """Read a result field in either snake_case or camelCase"""
+    value = result.get(snake_name)
+    if value is None:
+        value = result.get(camel_name, default)
+    return value
+
+def batch_rows(resume_files, cache_keys, errors):
+    """(file name, result or None, status) per uploaded resume"""
+    rows = []
+    for resume_file, cache_key in zip(resume_files, cache_keys):
+        result = st.session_state.results.get(cache_key)
+        status = "scored" if result is not None else errors.get(cache_key, "pending")
+        rows.append((resume_file.name, result, status))
+    return rows
+
+def results_table(rows):
+    """Rows of the batch results table, best hybrid score first"""
+    table = []
+    for name, result, status in rows:
+        if result is None:
+            table.append({"Resume": name, "Hybrid score": None, "Similarity": None, "Lexical": None,
+                          "Matched skills": "", "Missing skills": "", "Analysis": "", "Status": status})
+            continue
+        table.append({
+            "Resume": name,
+            "Hybrid score": result_value(result, 'hybrid_score', 'hybridScore'),
+            "Similarity": result_value(result, 'similarity_score', 'similarityScore'),
+            "Lexical": result_value(result, 'lexical_score', 'lexicalScore'),
+            "Matched skills": ", ".join(result_value(result, 'matched_skills', 'matchedSkills') or []),
+            "Missing skills": ", ".join(result_value(result, 'missing_skills', 'missingSkills') or []),
+            "Analysis": result_value(result, 'analysis_path', 'analysisPath') or "",
+            "Status": status,
+        })
+    def score(row):
+        for column in ("Hybrid score", "Similarity"):
+            if row[column] is not None:
+                return row[column]
+        return -1.0
+    table.sort(key=score, reverse=True)
+    return table
+
+def show_results_table(placeholder, rows):
+    """Render the sortable results table; columns sort by clicking their header"""
+    placeholder.dataframe(
+        results_table(rows),
+        use_container_width=True,
+        hide_index=True,
+        column_config={
+            "Hybrid score": st.column_config.ProgressColumn("Hybrid score", min_value=0.0, max_value=1.0, format="%.3f"),
+            "Similarity": st.column_config.NumberColumn("Similarity", format="%.3f"),
+            "Lexical": st.column_config.NumberColumn("Lexical", format="%.3f"),
+        }
+    )
+
 # Main App
 st.title("📄 AI Resume Ranker Platform")
 st.markdown("---")
@@ -138,99 +277,221 @@ with st.sidebar:
             st.session_state.token = None
             st.session_state.user_email = None
             st.session_state.logged_in = False
+            st.session_state.results = {}
             st.rerun()
 
 # Main Content
 if st.session_state.logged_in:
-    st.header("Upload Resume & Job Description")
-    st.markdown("Upload your resume and job description PDFs to get AI-powered analysis and similarity score.")
+    mode = st.radio("Mode", ["Single resume", "Batch screening"], horizontal=True, label_visibility="collapsed")
     
-    col1, col2 = st.columns(2)
+    if mode == "Single resume":
+        st.header("Upload Resume & Job Description")
+        st.markdown("Upload your resume and job description PDFs to get AI-powered analysis and similarity score.")
     
-    with col1:
-        st.subheader("📄 Resume")
-        resume_file = st.file_uploader(
-            "Upload Resume (PDF)",
-            type=['pdf'],
-            key="resume_uploader",
-            help="Upload your resume in PDF format"
-        )
-        if resume_file:
-            st.success(f"✅ Resume uploaded: {resume_file.name}")
-            st.info(f"Size: {len(resume_file.getvalue()) / 1024:.2f} KB")
+        col1, col2 = st.columns(2)
     
-    with col2:
-        st.subheader("📋 Job Description")
-        job_description_file = st.file_uploader(
-            "Upload Job Description (PDF)",
-            type=['pdf'],
-            key="jd_uploader",
-            help="Upload the job description in PDF format"
-        )
-        if job_description_file:
-            st.success(f"✅ Job Description uploaded: {job_description_file.name}")
-            st.info(f"Size: {len(job_description_file.getvalue()) / 1024:.2f} KB")
+        with col1:
+            st.subheader("📄 Resume")
+            resume_file = st.file_uploader(
+                "Upload Resume (PDF)",
+                type=['pdf'],
+                key="resume_uploader",
+                help="Upload your resume in PDF format"
+            )
+            if resume_file:
+                st.success(f"✅ Resume uploaded: {resume_file.name}")
+                st.info(f"Size: {len(resume_file.getvalue()) / 1024:.2f} KB")
     
-    st.markdown("---")
+        with col2:
+            st.subheader("📋 Job Description")
+            job_description_file = st.file_uploader(
+                "Upload Job Description (PDF)",
+                type=['pdf'],
+                key="jd_uploader",
+                help="Upload the job description in PDF format"
+            )
+            if job_description_file:
+                st.success(f"✅ Job Description uploaded: {job_description_file.name}")
+                st.info(f"Size: {len(job_description_file.getvalue()) / 1024:.2f} KB")
     
-    # Rank Button
-    if st.button("🚀 Rank Resume", type="primary", use_container_width=True, disabled=not (resume_file and job_description_file)):
-        if resume_file and job_description_file:
-            with st.spinner("Analyzing resume... This may take a few moments."):
-                # Reset file pointers
-                resume_file.seek(0)
-                job_description_file.seek(0)
-                
-                success, result, error = rank_resume(
-                    resume_file.read(),
-                    job_description_file.read(),
-                    st.session_state.token
-                )
+        st.markdown("---")
+    
+        # Rank Button
+        if st.button("🚀 Rank Resume", type="primary", use_container_width=True, disabled=not (resume_file and job_description_file)):
+            if resume_file and job_description_file:
+                with st.spinner("Analyzing resume... This may take a few moments."):
+                    # Reuse the result of an identical earlier ranking
+                    cache_key = (file_hash(resume_file), file_hash(job_description_file))
+                    result = st.session_state.results.get(cache_key)
+                    success, error = result is not None, None
+                    if result is None:
+                        success, result, error = rank_resume(
+                            resume_file.getvalue(),
+                            job_description_file.getvalue(),
+                            st.session_state.token,
+                            resume_file.name,
+                            job_description_file.name
+                        )
+                        if success:
+                            st.session_state.results[cache_key] = result
                 
-                if success:
-                    st.success("✅ Analysis Complete!")
-                    st.markdown("---")
+                    if success:
+                        st.success("✅ Analysis Complete!")
+                        st.markdown("---")
                     
-                    # Display Results
-                    col1, col2 = st.columns([1, 2])
+                        # Display Results
+                        col1, col2 = st.columns([1, 2])
                     
-                    with col1:
-                        # Handle both snake_case and camelCase response formats
-                        similarity_score = result.get('similarity_score') or result.get('similarityScore', 0)
-                        if isinstance(similarity_score, str):
-                            try:
-                                similarity_score = float(similarity_score)
-                            except:
-                                similarity_score = 0
-                        st.metric(
-                            "Similarity Score",
-                            f"{similarity_score:.2%}",
-                            help="How well your resume matches the job description (0-100%)"
-                        )
+                        with col1:
+                            # Handle both snake_case and camelCase response formats
+                            similarity_score = result.get('similarity_score') or result.get('similarityScore', 0)
+                            if isinstance(similarity_score, str):
+                                try:
+                                    similarity_score = float(similarity_score)
+                                except ValueError:
+                                    similarity_score = 0
+                            st.metric(
+                                "Similarity Score",
+                                f"{similarity_score:.2%}",
+                                help="How well your resume matches the job description (0-100%)"
+                            )
+                            matched_skills = result.get('matched_skills') or result.get('matchedSkills') or []
+                            missing_skills = result.get('missing_skills') or result.get('missingSkills') or []
+                            if matched_skills:
+                                st.caption("Matched skills: " + ", ".join(matched_skills))
+                            if missing_skills:
+                                st.caption("Missing skills: " + ", ".join(missing_skills))
                     
-                    with col2:
-                        st.markdown("### 📊 Detailed Analysis")
-                        st.markdown("---")
-                        # Handle both snake_case and camelCase response formats
-                        analysis = result.get('llm_analysis') or result.get('llmAnalysis', 'No analysis available')
-                        st.markdown(f"<div style='background-color: #f0f2f6; padding: 15px; border-radius: 5px;'>{analysis}</div>", unsafe_allow_html=True)
+                        with col2:
+                            st.markdown("### 📊 Detailed Analysis")
+                            st.markdown("---")
+                            # Handle both snake_case and camelCase response formats
+                            analysis = result.get('llm_analysis') or result.get('llmAnalysis', 'No analysis available')
+                            if result.get('degraded'):
+                                st.info("AI analysis is temporarily unavailable; the score is based on embedding similarity only.")
+                            elif (result.get('analysis_path') or result.get('analysisPath')) == "template":
+                                st.info("AI analysis was skipped for this match; the summary is based on the scores and skills.")
+                            st.markdown(f"<div style='background-color: #f0f2f6; padding: 15px; border-radius: 5px;'>{analysis}</div>", unsafe_allow_html=True)
                     
-                    # Download Results
-                    results_json = json.dumps(result, indent=2)
-                    st.download_button(
-                        label="📥 Download Results (JSON)",
-                        data=results_json,
-                        file_name="resume_analysis_results.json",
-                        mime="application/json"
-                    )
-                else:
-                    st.error(f"❌ {error}")
-                    if "401" in error or "Unauthorized" in error:
-                        st.warning("Your session may have expired. Please log in again.")
-                        st.session_state.logged_in = False
-                        st.rerun()
-        else:
-            st.warning("⚠️ Please upload both resume and job description files")
+                        # Download Results
+                        results_json = json.dumps(result, indent=2)
+                        st.download_button(
+                            label="📥 Download Results (JSON)",
+                            data=results_json,
+                            file_name="resume_analysis_results.json",
+                            mime="application/json"
+                        )
+                    else:
+                        st.error(f"❌ {error}")
+                        if "401" in error or "Unauthorized" in error:
+                            st.warning("Your session may have expired. Please log in again.")
+                            st.session_state.logged_in = False
+                            st.rerun()
+            else:
+                st.warning("⚠️ Please upload both resume and job description files")
+    
+    else:
+        st.header("Screen Many Resumes")
+        st.markdown("Rank a folder of resumes against one job description. Resumes already scored against the same job description are not sent again.")
+        
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            st.subheader("📚 Resumes")
+            resume_files = st.file_uploader(
+                "Upload Resumes (PDF)",
+                type=['pdf'],
+                accept_multiple_files=True,
+                key="batch_resume_uploader",
+                help="Select any number of resume PDFs"
+            )
+            if resume_files:
+                st.success(f"✅ {len(resume_files)} resumes uploaded")
+        
+        with col2:
+            st.subheader("📋 Job Description")
+            batch_jd_file = st.file_uploader(
+                "Upload Job Description (PDF)",
+                type=['pdf'],
+                key="batch_jd_uploader",
+                help="Upload the job description in PDF format"
+            )
+            if batch_jd_file:
+                st.success(f"✅ Job Description uploaded: {batch_jd_file.name}")
+        
+        st.markdown("---")
+        
+        cache_keys, pending = [], {}
+        if resume_files and batch_jd_file:
+            jd_hash = file_hash(batch_jd_file)
+            cache_keys = [(file_hash(resume_file), jd_hash) for resume_file in resume_files]
+            # A file uploaded twice is ranked once
+            for resume_file, cache_key in zip(resume_files, cache_keys):
+                if cache_key not in st.session_state.results:
+                    pending.setdefault(cache_key, resume_file)
+            scored = sum(cache_key in st.session_state.results for cache_key in cache_keys)
+            st.caption(f"{scored} of {len(resume_files)} resumes already scored against this job description")
+        
+        col1, col2 = st.columns([3, 1])
+        with col1:
+            rank_clicked = st.button("🚀 Rank Resumes", type="primary", use_container_width=True, disabled=not pending)
+        with col2:
+            if st.button("Clear cached results", use_container_width=True):
+                st.session_state.results = {}
+                st.rerun()
+        
+        table_placeholder = st.empty()
+        errors = {}
+        if rank_clicked and pending:
+            progress = st.progress(0.0, text=f"Ranking {len(pending)} resumes...")
+            token = st.session_state.token
+            session = get_http_session()
+            jd_content = batch_jd_file.getvalue()
+            items = list(pending.items())
+            chunks = [items[start:start + BATCH_SIZE] for start in range(0, len(items), BATCH_SIZE)]
+            # Bounded parallel batch calls over the shared connection pool;
+            # the table is redrawn as each batch arrives
+            with ThreadPoolExecutor(max_workers=MAX_PARALLEL_UPLOADS) as pool:
+                futures = {
+                    pool.submit(
+                        rank_resume_batch,
+                        [(resume_file.name, resume_file.getvalue()) for _, resume_file in chunk],
+                        jd_content, token, batch_jd_file.name, session
+                    ): chunk
+                    for chunk in chunks
+                }
+                done = 0
+                for future in as_completed(futures):
+                    chunk = futures[future]
+                    success, results, error = future.result()
+                    for position, (cache_key, _) in enumerate(chunk):
+                        result = results[position] if success else None
+                        if result is not None and not result.get('error'):
+                            st.session_state.results[cache_key] = result
+                        else:
+                            errors[cache_key] = error or (result or {}).get('error') or "Missing from the response"
+                    done += len(chunk)
+                    progress.progress(done / len(items), text=f"Ranked {done} of {len(items)} resumes")
+                    show_results_table(table_placeholder, batch_rows(resume_files, cache_keys, errors))
+            if errors:
+                st.error(f"❌ {len(errors)} resumes could not be ranked; click Rank Resumes to retry them")
+                if any("401" in error or "Unauthorized" in error for error in errors.values()):
+                    st.warning("Your session may have expired. Please log in again.")
+        
+        if cache_keys:
+            rows = batch_rows(resume_files, cache_keys, errors)
+            show_results_table(table_placeholder, rows)
+            scored = [(name, result) for name, result, _ in rows if result is not None]
+            if scored:
+                selected = st.selectbox("Show analysis for", [name for name, _ in scored])
+                analysis = dict(scored)[selected]
+                st.markdown(f"<div style='background-color: #f0f2f6; padding: 15px; border-radius: 5px;'>{result_value(analysis, 'llm_analysis', 'llmAnalysis', 'No analysis available')}</div>", unsafe_allow_html=True)
+                st.download_button(
+                    label="📥 Download Results (JSON)",
+                    data=json.dumps([{"filename": name, **result} for name, result in scored], indent=2),
+                    file_name="batch_ranking_results.json",
+                    mime="application/json"
+                )
     
     # Instructions
     with st.expander("📖 How to Use"):
@@ -243,6 +504,10 @@ if st.session_state.logged_in:
         4. **Click Rank Resume**: The AI will analyze your resume against the job description
         5. **View Results**: See your similarity score and detailed HR-style analysis
         
+        ### Batch Screening:
+        
+        Switch to **Batch screening** to upload many resumes and one job description. Resumes are ranked a few at a time, the table fills in as results arrive, and clicking a column header sorts it. Resumes already scored against the same job description are not sent again until you clear the cached results.
+        
         ### Tips:
         - Ensure both files are in PDF format
         - Maximum file size: 10MB per file
@@ -253,9 +518,9 @@ if st.session_state.logged_in:
     # API Status Check
     with st.expander("🔍 API Status"):
         try:
-            response = requests.get(f"{API_GATEWAY_URL}/auth/register", timeout=3)
+            response = get_http_session().get(f"{API_GATEWAY_URL}/auth/register", timeout=3)
             st.success("✅ API Gateway is reachable")
-        except:
+        except requests.RequestException:
             st.error("❌ API Gateway is not reachable. Please ensure services are running.")
             st.info("Run: `docker compose -p resumeranker up -d`")
 
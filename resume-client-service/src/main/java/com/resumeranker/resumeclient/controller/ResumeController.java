@@ -1,18 +1,24 @@
 package com.resumeranker.resumeclient.controller;
 
+import com.resumeranker.resumeclient.dto.BatchRankResponse;
 import com.resumeranker.resumeclient.dto.RankResponse;
 import com.resumeranker.resumeclient.dto.TokenValidationResponse;
 import com.resumeranker.resumeclient.service.AuthValidationService;
 import com.resumeranker.resumeclient.service.ResumeRankerService;
 import org.springframework.beans.factory.annotation.Autowired;
+import org.springframework.core.io.buffer.DataBuffer;
+import org.springframework.core.io.buffer.DefaultDataBufferFactory;
 import org.springframework.http.HttpHeaders;
 import org.springframework.http.HttpStatus;
 import org.springframework.http.MediaType;
 import org.springframework.http.ResponseEntity;
 import org.springframework.http.codec.multipart.FilePart;
 import org.springframework.web.bind.annotation.*;
+import reactor.core.publisher.Flux;
 import reactor.core.publisher.Mono;
 
+import java.nio.charset.StandardCharsets;
+
 @RestController
 @RequestMapping("/resume")
 @CrossOrigin(origins = "*")
@@ -46,6 +52,117 @@ public class ResumeController {
                 });
     }
     
+    @PostMapping(value = "/rank/stream", consumes = MediaType.MULTIPART_FORM_DATA_VALUE, produces = MediaType.APPLICATION_NDJSON_VALUE)
+    public Mono<ResponseEntity<Flux<DataBuffer>>> rankResumeStream(
+            @RequestHeader(HttpHeaders.AUTHORIZATION) String authHeader,
+            @RequestPart("resume") FilePart resume,
+            @RequestPart("job_description") FilePart jobDescription) {
+        
+        String token = authHeader.startsWith("Bearer ") ? authHeader.substring(7) : authHeader;
+        
+        return authValidationService.validateTokenWithDetails(token)
+                .map(validationResponse -> {
+                    if (!validationResponse.isValid()) {
+                        return ResponseEntity.status(HttpStatus.UNAUTHORIZED)
+                                .contentType(MediaType.TEXT_PLAIN)
+                                .body(Flux.just(DefaultDataBufferFactory.sharedInstance
+                                        .wrap("Invalid or expired token".getBytes(StandardCharsets.UTF_8))));
+                    }
+                    
+                    return ResponseEntity.ok()
+                            .contentType(MediaType.APPLICATION_NDJSON)
+                            .body(resumeRankerService.rankResumeStream(resume, jobDescription));
+                });
+    }
+    
+    @PostMapping(value = "/rank/batch", consumes = MediaType.MULTIPART_FORM_DATA_VALUE)
+    public Mono<ResponseEntity<?>> rankResumesBatch(
+            @RequestHeader(HttpHeaders.AUTHORIZATION) String authHeader,
+            @RequestPart("resumes") Flux<FilePart> resumes,
+            @RequestPart("job_description") FilePart jobDescription,
+            @RequestParam(value = "analyze_top_k", defaultValue = "0") int analyzeTopK) {
+        
+        String token = authHeader.startsWith("Bearer ") ? authHeader.substring(7) : authHeader;
+        
+        return authValidationService.validateTokenWithDetails(token)
+                .flatMap(validationResponse -> {
+                    if (!validationResponse.isValid()) {
+                        return Mono.<ResponseEntity<?>>just(ResponseEntity.status(HttpStatus.UNAUTHORIZED)
+                                .body("Invalid or expired token"));
+                    }
+                    
+                    return resumeRankerService.rankResumesBatch(resumes, jobDescription, analyzeTopK)
+                            .<ResponseEntity<?>>map(ResponseEntity::ok)
+                            .onErrorResume(e -> Mono.<ResponseEntity<?>>just(ResponseEntity.status(HttpStatus.INTERNAL_SERVER_ERROR)
+                                    .body("Error ranking resumes: " + e.getMessage())));
+                });
+    }
+    
+    @PostMapping(value = "/jobs/rank", consumes = MediaType.MULTIPART_FORM_DATA_VALUE)
+    public Mono<ResponseEntity<?>> submitRankJob(
+            @RequestHeader(HttpHeaders.AUTHORIZATION) String authHeader,
+            @RequestPart("resumes") Flux<FilePart> resumes,
+            @RequestPart("job_description") FilePart jobDescription,
+            @RequestParam(value = "analyze_top_k", defaultValue = "0") int analyzeTopK) {
+        
+        String token = authHeader.startsWith("Bearer ") ? authHeader.substring(7) : authHeader;
+        
+        return authValidationService.validateTokenWithDetails(token)
+                .flatMap(validationResponse -> {
+                    if (!validationResponse.isValid()) {
+                        return Mono.<ResponseEntity<?>>just(ResponseEntity.status(HttpStatus.UNAUTHORIZED)
+                                .body("Invalid or expired token"));
+                    }
+                    
+                    return resumeRankerService.submitRankJob(resumes, jobDescription, analyzeTopK)
+                            .<ResponseEntity<?>>map(job -> ResponseEntity.status(HttpStatus.ACCEPTED).body(job))
+                            .onErrorResume(e -> Mono.<ResponseEntity<?>>just(ResponseEntity.status(HttpStatus.INTERNAL_SERVER_ERROR)
+                                    .body("Error submitting ranking job: " + e.getMessage())));
+                });
+    }
+    
+    @GetMapping("/jobs/{jobId}")
+    public Mono<ResponseEntity<?>> getJob(
+            @RequestHeader(HttpHeaders.AUTHORIZATION) String authHeader,
+            @PathVariable String jobId) {
+        
+        String token = authHeader.startsWith("Bearer ") ? authHeader.substring(7) : authHeader;
+        
+        return authValidationService.validateTokenWithDetails(token)
+                .flatMap(validationResponse -> {
+                    if (!validationResponse.isValid()) {
+                        return Mono.<ResponseEntity<?>>just(ResponseEntity.status(HttpStatus.UNAUTHORIZED)
+                                .body("Invalid or expired token"));
+                    }
+                    
+                    return resumeRankerService.getJob(jobId)
+                            .<ResponseEntity<?>>map(ResponseEntity::ok)
+                            .onErrorResume(e -> Mono.<ResponseEntity<?>>just(ResponseEntity.status(HttpStatus.INTERNAL_SERVER_ERROR)
+                                    .body("Error fetching ranking job: " + e.getMessage())));
+                });
+    }
+    
+    @DeleteMapping("/jobs/{jobId}")
+    public Mono<ResponseEntity<?>> cancelJob(
+            @RequestHeader(HttpHeaders.AUTHORIZATION) String authHeader,
+            @PathVariable String jobId) {
+        
+        String token = authHeader.startsWith("Bearer ") ? authHeader.substring(7) : authHeader;
+        
+        return authValidationService.validateTokenWithDetails(token)
+                .flatMap(validationResponse -> {
+                    if (!validationResponse.isValid()) {
+                        return Mono.<ResponseEntity<?>>just(ResponseEntity.status(HttpStatus.UNAUTHORIZED)
+                                .body("Invalid or expired token"));
+                    }
+                    
+                    return resumeRankerService.cancelJob(jobId)
+                            .<ResponseEntity<?>>map(ResponseEntity::ok)
+                            .onErrorResume(e -> Mono.<ResponseEntity<?>>just(ResponseEntity.status(HttpStatus.INTERNAL_SERVER_ERROR)
+                                    .body("Error cancelling ranking job: " + e.getMessage())));
+                });
+    }
+    
     @GetMapping("/health")
     public ResponseEntity<String> health() {
         return ResponseEntity.ok("Resume Client Service is healthy");
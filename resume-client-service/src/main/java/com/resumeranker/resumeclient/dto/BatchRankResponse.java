@@ -0,0 +1,60 @@
+package com.resumeranker.resumeclient.dto;
+
+import com.fasterxml.jackson.annotation.JsonProperty;
+import lombok.AllArgsConstructor;
+import lombok.Data;
+import lombok.NoArgsConstructor;
+
+import java.util.List;
+
+@Data
+@NoArgsConstructor
+@AllArgsConstructor
+public class BatchRankResponse {
+    private Integer total;
+    
+    private Integer ranked;
+    
+    private Integer prefiltered;
+    
+    private List<RankedResume> results;
+    
+    @Data
+    @NoArgsConstructor
+    @AllArgsConstructor
+    public static class RankedResume {
+        private Integer rank;
+        
+        private String filename;
+        
+        @JsonProperty("similarity_score")
+        private Double similarityScore;
+        
+        @JsonProperty("llm_analysis")
+        private String llmAnalysis;
+        
+        @JsonProperty("analysis_cached")
+        private Boolean analysisCached;
+        
+        private Boolean degraded;
+        
+        @JsonProperty("analysis_path")
+        private String analysisPath;
+        
+        @JsonProperty("lexical_score")
+        private Double lexicalScore;
+        
+        @JsonProperty("hybrid_score")
+        private Double hybridScore;
+        
+        @JsonProperty("matched_skills")
+        private List<String> matchedSkills;
+        
+        @JsonProperty("missing_skills")
+        private List<String> missingSkills;
+        
+        private Boolean shortlisted;
+        
+        private String error;
+    }
+}
@@ -0,0 +1,43 @@
+package com.resumeranker.resumeclient.dto;
+
+import com.fasterxml.jackson.annotation.JsonProperty;
+import lombok.AllArgsConstructor;
+import lombok.Data;
+import lombok.NoArgsConstructor;
+
+@Data
+@NoArgsConstructor
+@AllArgsConstructor
+public class JobStatusResponse {
+    @JsonProperty("job_id")
+    private String jobId;
+
+    private String status;
+
+    @JsonProperty("progress_done")
+    private Integer progressDone;
+
+    @JsonProperty("progress_total")
+    private Integer progressTotal;
+
+    private Integer attempts;
+
+    @JsonProperty("max_attempts")
+    private Integer maxAttempts;
+
+    private String error;
+
+    @JsonProperty("created_at")
+    private Double createdAt;
+
+    @JsonProperty("updated_at")
+    private Double updatedAt;
+
+    @JsonProperty("started_at")
+    private Double startedAt;
+
+    @JsonProperty("finished_at")
+    private Double finishedAt;
+
+    private BatchRankResponse result;
+}
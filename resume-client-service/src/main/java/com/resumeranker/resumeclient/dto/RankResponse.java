@@ -5,6 +5,8 @@ import lombok.AllArgsConstructor;
 import lombok.Data;
 import lombok.NoArgsConstructor;
 
+import java.util.List;
+
 @Data
 @NoArgsConstructor
 @AllArgsConstructor
@@ -14,5 +16,25 @@ public class RankResponse {
     
     @JsonProperty("llm_analysis")
     private String llmAnalysis;
+    
+    @JsonProperty("analysis_cached")
+    private Boolean analysisCached;
+    
+    private Boolean degraded;
+    
+    @JsonProperty("analysis_path")
+    private String analysisPath;
+    
+    @JsonProperty("lexical_score")
+    private Double lexicalScore;
+    
+    @JsonProperty("hybrid_score")
+    private Double hybridScore;
+    
+    @JsonProperty("matched_skills")
+    private List<String> matchedSkills;
+    
+    @JsonProperty("missing_skills")
+    private List<String> missingSkills;
 }
 
@@ -1,5 +1,7 @@
 package com.resumeranker.resumeclient.service;
 
+import com.resumeranker.resumeclient.dto.BatchRankResponse;
+import com.resumeranker.resumeclient.dto.JobStatusResponse;
 import com.resumeranker.resumeclient.dto.RankResponse;
 import org.springframework.beans.factory.annotation.Value;
 import org.springframework.core.io.ByteArrayResource;
@@ -12,6 +14,7 @@ import org.springframework.util.LinkedMultiValueMap;
 import org.springframework.util.MultiValueMap;
 import org.springframework.web.reactive.function.BodyInserters;
 import org.springframework.web.reactive.function.client.WebClient;
+import reactor.core.publisher.Flux;
 import reactor.core.publisher.Mono;
 
 @Service
@@ -69,6 +72,109 @@ public class ResumeRankerService {
         });
     }
     
+    public Flux<DataBuffer> rankResumeStream(FilePart resume, FilePart jobDescription) {
+        return Mono.zip(
+                readFilePart(resume),
+                readFilePart(jobDescription)
+        ).flatMapMany(tuple -> {
+            MultiValueMap<String, Object> parts = new LinkedMultiValueMap<>();
+            parts.add("resume", toResource(tuple.getT1(), resume.filename(), "resume.pdf"));
+            parts.add("job_description", toResource(tuple.getT2(), jobDescription.filename(), "job_description.pdf"));
+            
+            // Pass the NDJSON events through as they arrive instead of buffering the body
+            return webClient.post()
+                    .uri("/rank/stream")
+                    .contentType(MediaType.MULTIPART_FORM_DATA)
+                    .accept(MediaType.APPLICATION_NDJSON)
+                    .body(BodyInserters.fromMultipartData(parts))
+                    .retrieve()
+                    .onStatus(status -> status.is4xxClientError() || status.is5xxServerError(), 
+                            response -> response.bodyToMono(String.class)
+                                    .flatMap(errorBody -> Mono.error(new RuntimeException("Error from resume-ranker-service: " + 
+                                            response.statusCode() + " - " + errorBody))))
+                    .bodyToFlux(DataBuffer.class);
+        });
+    }
+    
+    public Mono<BatchRankResponse> rankResumesBatch(Flux<FilePart> resumes, FilePart jobDescription, int analyzeTopK) {
+        return Mono.zip(
+                resumes.concatMap(resume -> readFilePart(resume)
+                        .map(bytes -> toResource(bytes, resume.filename(), "resume.pdf"))).collectList(),
+                readFilePart(jobDescription)
+        ).flatMap(tuple -> {
+            MultiValueMap<String, Object> parts = new LinkedMultiValueMap<>();
+            tuple.getT1().forEach(resource -> parts.add("resumes", resource));
+            parts.add("job_description", toResource(tuple.getT2(), jobDescription.filename(), "job_description.pdf"));
+            parts.add("analyze_top_k", String.valueOf(analyzeTopK));
+            
+            return webClient.post()
+                    .uri("/rank/batch")
+                    .contentType(MediaType.MULTIPART_FORM_DATA)
+                    .body(BodyInserters.fromMultipartData(parts))
+                    .retrieve()
+                    .onStatus(status -> status.is4xxClientError() || status.is5xxServerError(), 
+                            response -> response.bodyToMono(String.class)
+                                    .flatMap(errorBody -> Mono.error(new RuntimeException("Error from resume-ranker-service: " + 
+                                            response.statusCode() + " - " + errorBody))))
+                    .bodyToMono(BatchRankResponse.class);
+        });
+    }
+    
+    public Mono<JobStatusResponse> submitRankJob(Flux<FilePart> resumes, FilePart jobDescription, int analyzeTopK) {
+        return Mono.zip(
+                resumes.concatMap(resume -> readFilePart(resume)
+                        .map(bytes -> toResource(bytes, resume.filename(), "resume.pdf"))).collectList(),
+                readFilePart(jobDescription)
+        ).flatMap(tuple -> {
+            MultiValueMap<String, Object> parts = new LinkedMultiValueMap<>();
+            tuple.getT1().forEach(resource -> parts.add("resumes", resource));
+            parts.add("job_description", toResource(tuple.getT2(), jobDescription.filename(), "job_description.pdf"));
+            parts.add("analyze_top_k", String.valueOf(analyzeTopK));
+            
+            return webClient.post()
+                    .uri("/jobs/rank")
+                    .contentType(MediaType.MULTIPART_FORM_DATA)
+                    .body(BodyInserters.fromMultipartData(parts))
+                    .retrieve()
+                    .onStatus(status -> status.is4xxClientError() || status.is5xxServerError(), 
+                            response -> response.bodyToMono(String.class)
+                                    .flatMap(errorBody -> Mono.error(new RuntimeException("Error from resume-ranker-service: " + 
+                                            response.statusCode() + " - " + errorBody))))
+                    .bodyToMono(JobStatusResponse.class);
+        });
+    }
+    
+    public Mono<JobStatusResponse> getJob(String jobId) {
+        return webClient.get()
+                .uri("/jobs/{jobId}", jobId)
+                .retrieve()
+                .onStatus(status -> status.is4xxClientError() || status.is5xxServerError(), 
+                        response -> response.bodyToMono(String.class)
+                                .flatMap(errorBody -> Mono.error(new RuntimeException("Error from resume-ranker-service: " + 
+                                        response.statusCode() + " - " + errorBody))))
+                .bodyToMono(JobStatusResponse.class);
+    }
+    
+    public Mono<JobStatusResponse> cancelJob(String jobId) {
+        return webClient.delete()
+                .uri("/jobs/{jobId}", jobId)
+                .retrieve()
+                .onStatus(status -> status.is4xxClientError() || status.is5xxServerError(), 
+                        response -> response.bodyToMono(String.class)
+                                .flatMap(errorBody -> Mono.error(new RuntimeException("Error from resume-ranker-service: " + 
+                                        response.statusCode() + " - " + errorBody))))
+                .bodyToMono(JobStatusResponse.class);
+    }
+    
+    private ByteArrayResource toResource(byte[] bytes, String filename, String defaultFilename) {
+        return new ByteArrayResource(bytes) {
+            @Override
+            public String getFilename() {
+                return filename != null ? filename : defaultFilename;
+            }
+        };
+    }
+    
     private Mono<byte[]> readFilePart(FilePart filePart) {
         return DataBufferUtils.join(filePart.content())
                 .map(dataBuffer -> {
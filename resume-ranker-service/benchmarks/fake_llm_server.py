@@ -0,0 +1,264 @@
+"""
+Local stand-in for the Gemini REST API, for testing the LLM client's
+timeouts, retries and circuit breaker without network access.
+
+    python -m benchmarks.fake_llm_server --port 8090 --latency-ms 800 --error-rate 0.2
+    RANKER_LLM_API_ENDPOINT=http://127.0.0.1:8090 uvicorn main:app
+
+Failure modes can be changed while it runs:
+
+    curl -X POST localhost:8090/control -d '{"error_rate": 1.0, "error_status": 503}'
+    curl localhost:8090/stats
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import urlsplit
+
+_GENERATE_PATH = re.compile(r"^/v1(?:beta)?\d*/models/[^/:]+:(generateContent|streamGenerateContent)$")
+
+_ANALYSIS = (
+    "1. Overall match assessment: fake LLM analysis.\n",
+    "2. Key strengths: the resume mentions relevant experience.\n",
+    "3. Potential gaps or concerns: none detected by the fake server.\n",
+    "4. Recommendations: replace the fake server with Gemini.\n",
+)
+
+
+class FakeLLMState:
+    def __init__(
+        self,
+        latency_ms: float = 500.0,
+        jitter_ms: float = 0.0,
+        error_rate: float = 0.0,
+        error_status: int = 503,
+        hang_rate: float = 0.0,
+        seed: int = 0
+    ):
+        """
+        Behaviour of the fake server, shared by its request threads.
+
+        Args:
+            latency_ms: Mean latency of a response (spread over the chunks when streaming)
+            jitter_ms: Latency is drawn uniformly from latency_ms +/- jitter_ms
+            error_rate: Fraction of requests answered with error_status
+            error_status: HTTP status of injected errors (e.g. 429, 500, 503)
+            hang_rate: Fraction of requests that never answer until the client gives up
+            seed: Seed of the random generator
+        """
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.hang_rate = hang_rate
+        self.counters = {"requests": 0, "succeeded": 0, "errors": 0, "hangs": 0}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+
+    def update(self, changes: dict) -> None:
+        """Change failure modes at runtime; unknown keys raise ValueError."""
+        with self._lock:
+            for key, value in changes.items():
+                if key not in ("latency_ms", "jitter_ms", "error_rate", "error_status", "hang_rate"):
+                    raise ValueError(f"Unknown setting {key!r}")
+                setattr(self, key, int(value) if key == "error_status" else float(value))
+
+    def draw(self) -> tuple:
+        """Decide the fate of one request: (outcome, latency in seconds)."""
+        with self._lock:
+            self.counters["requests"] += 1
+            roll = self._rng.random()
+            jitter = self._rng.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0.0
+            latency_s = max(0.0, self.latency_ms + jitter) / 1000.0
+            if roll < self.hang_rate:
+                outcome = "hangs"
+            elif roll < self.hang_rate + self.error_rate:
+                outcome = "errors"
+            else:
+                outcome = "succeeded"
+            self.counters[outcome] += 1
+        return outcome, latency_s
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                **self.counters,
+                "latency_ms": self.latency_ms,
+                "jitter_ms": self.jitter_ms,
+                "error_rate": self.error_rate,
+                "error_status": self.error_status,
+                "hang_rate": self.hang_rate,
+            }
+
+    def hang(self) -> None:
+        # Wait until shutdown; the client's timeout ends the request
+        self._stopped.wait()
+
+    def stop(self) -> None:
+        self._stopped.set()
+
+
+def _candidate(text: str) -> dict:
+    return {
+        "candidates": [{
+            "content": {"parts": [{"text": text}], "role": "model"},
+            "finishReason": "STOP",
+            "index": 0,
+        }]
+    }
+
+
+class FakeLLMHandler(BaseHTTPRequestHandler):
+    server_version = "FakeLLM/1.0"
+    protocol_version = "HTTP/1.1"
+
+    @property
+    def state(self) -> FakeLLMState:
+        return self.server.state
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, body: dict) -> None:
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _read_body(self) -> bytes:
+        return self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+    def do_GET(self):
+        if urlsplit(self.path).path == "/stats":
+            self._send_json(200, self.state.stats())
+        else:
+            self._send_json(404, {"error": {"code": 404, "message": "Not found", "status": "NOT_FOUND"}})
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        body = self._read_body()
+        if url.path == "/control":
+            try:
+                self.state.update(json.loads(body or b"{}"))
+            except (ValueError, TypeError) as e:
+                self._send_json(400, {"error": {"code": 400, "message": str(e), "status": "INVALID_ARGUMENT"}})
+                return
+            self._send_json(200, self.state.stats())
+            return
+
+        match = _GENERATE_PATH.match(url.path)
+        if match is None:
+            self._send_json(404, {"error": {"code": 404, "message": "Not found", "status": "NOT_FOUND"}})
+            return
+        outcome, latency_s = self.state.draw()
+        if outcome == "hangs":
+            self.state.hang()
+            self.close_connection = True
+            return
+        if outcome == "errors":
+            time.sleep(latency_s)
+            status = self.state.error_status
+            self._send_json(status, {"error": {"code": status, "message": "Injected failure", "status": "UNAVAILABLE"}})
+            return
+        if match.group(1) == "generateContent":
+            time.sleep(latency_s)
+            self._send_json(200, _candidate("".join(_ANALYSIS)))
+        else:
+            self._stream(latency_s, sse="alt=sse" in url.query)
+
+    def _stream(self, latency_s: float, sse: bool) -> None:
+        """Send the analysis in chunks, as server-sent events or as a streamed JSON array."""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream" if sse else "application/json")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        delay = latency_s / len(_ANALYSIS)
+        for index, text in enumerate(_ANALYSIS):
+            time.sleep(delay)
+            chunk = json.dumps(_candidate(text))
+            if sse:
+                data = f"data: {chunk}\r\n\r\n"
+            else:
+                data = ("[" if index == 0 else ",\r\n") + chunk
+            self._write_chunk(data.encode("utf-8"))
+        if not sse:
+            self._write_chunk(b"]")
+        self._write_chunk(b"")
+
+    def _write_chunk(self, data: bytes) -> None:
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+
+class FakeLLMServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, state: Optional[FakeLLMState] = None):
+        """
+        Threaded HTTP server answering Gemini generateContent requests.
+
+        Args:
+            host: Interface to listen on
+            port: Port to listen on (0 picks a free one)
+            state: Failure modes (defaults to a healthy server with 500 ms latency)
+        """
+        super().__init__((host, port), FakeLLMHandler)
+        self.state = state or FakeLLMState()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> threading.Thread:
+        """Serve from a background thread."""
+        thread = threading.Thread(target=self.serve_forever, name="fake-llm", daemon=True)
+        thread.start()
+        return thread
+
+    def stop(self) -> None:
+        self.state.stop()
+        self.shutdown()
+        self.server_close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Fake Gemini API server for resilience tests")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--latency-ms", type=float, default=500.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests failing with --error-status")
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--hang-rate", type=float, default=0.0, help="fraction of requests that never answer")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    state = FakeLLMState(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        hang_rate=args.hang_rate,
+        seed=args.seed
+    )
+    server = FakeLLMServer(args.host, args.port, state)
+    print(f"Fake Gemini API listening on {server.url}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,347 @@
+import http.client
+import logging
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
+
+import numpy as np
+
+from benchmarks.report import summarize, tree_memory_mb
+from benchmarks.synthetic import synthetic_job_description, synthetic_resume
+
+
+logger = logging.getLogger(__name__)
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _multipart(resume: bytes, job_description: bytes, embedding_mode: Optional[str]) -> Tuple[bytes, str]:
+    boundary = uuid.uuid4().hex
+    parts = []
+    for field, filename, content in (
+        ("resume", "resume.pdf", resume),
+        ("job_description", "job_description.pdf", job_description),
+    ):
+        parts.append(
+            f"--{boundary}\r\nContent-Disposition: form-data; name=\"{field}\"; filename=\"{filename}\"\r\n"
+            "Content-Type: application/pdf\r\n\r\n".encode("ascii") + content + b"\r\n"
+        )
+    if embedding_mode:
+        parts.append(
+            f"--{boundary}\r\nContent-Disposition: form-data; name=\"embedding_mode\"\r\n\r\n"
+            f"{embedding_mode}\r\n".encode("ascii")
+        )
+    parts.append(f"--{boundary}--\r\n".encode("ascii"))
+    return b"".join(parts), f"multipart/form-data; boundary={boundary}"
+
+
+def _parse_server_timing(header: Optional[str]) -> Dict[str, float]:
+    timings = {}
+    for entry in (header or "").split(","):
+        name, _, params = entry.strip().partition(";")
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "dur" and name:
+                try:
+                    timings[name] = float(value)
+                except ValueError:
+                    pass
+    return timings
+
+
+class ServerProcess:
+    def __init__(
+        self,
+        llm_latency_ms: float,
+        llm_jitter_ms: float = 0.0,
+        env: Optional[Dict[str, str]] = None,
+        startup_timeout_s: float = 300.0
+    ):
+        """
+        The ranker service with a stub LLM, running in a child process.
+
+        Every server gets fresh data directories, so caches start empty and
+        its peak memory covers one run only.
+
+        Args:
+            llm_latency_ms: Mean latency of the stub LLM
+            llm_jitter_ms: Jitter of the stub LLM latency
+            env: Extra environment variables, e.g. RANKER_* settings
+            startup_timeout_s: Time allowed for the model to load
+        """
+        self.llm_latency_ms = llm_latency_ms
+        self.llm_jitter_ms = llm_jitter_ms
+        self.env = env or {}
+        self.startup_timeout_s = startup_timeout_s
+        self.port = _free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        self._data_dir: Optional[tempfile.TemporaryDirectory] = None
+        self._process: Optional[subprocess.Popen] = None
+        self._log = None
+
+    def start(self) -> None:
+        """Start the server and wait until it answers /health."""
+        self._data_dir = tempfile.TemporaryDirectory(prefix="ranker-bench-")
+        data = self._data_dir.name
+        env = {
+            **os.environ,
+            "RANKER_LLM_CACHE_PATH": os.path.join(data, "llm_cache.sqlite3"),
+            "RANKER_JOB_DB_PATH": os.path.join(data, "jobs.sqlite3"),
+            "RANKER_INDEX_DIR": os.path.join(data, "index"),
+            "RANKER_CACHE_DIR": "",
+            **self.env,
+        }
+        self._log = open(os.path.join(data, "server.log"), "wb")
+        self._process = subprocess.Popen(
+            [
+                sys.executable, "-m", "benchmarks.serve",
+                "--port", str(self.port),
+                "--llm-latency-ms", str(self.llm_latency_ms),
+                "--llm-jitter-ms", str(self.llm_jitter_ms),
+            ],
+            cwd=SERVICE_DIR,
+            env=env,
+            stdout=self._log,
+            stderr=subprocess.STDOUT
+        )
+
+        deadline = time.time() + self.startup_timeout_s
+        while time.time() < deadline:
+            if self._process.poll() is not None:
+                code = self._process.returncode
+                output = self.log_tail()
+                self.stop()
+                raise RuntimeError(f"Benchmark server exited with code {code}:\n{output}")
+            connection = http.client.HTTPConnection("127.0.0.1", self.port, timeout=2)
+            try:
+                connection.request("GET", "/health")
+                if connection.getresponse().status == 200:
+                    return
+            except OSError:
+                pass
+            finally:
+                connection.close()
+            time.sleep(0.25)
+        output = self.log_tail()
+        self.stop()
+        raise RuntimeError(f"Benchmark server did not start within {self.startup_timeout_s} s:\n{output}")
+
+    def log_tail(self, lines: int = 40) -> str:
+        """Last lines of the server output, which is kept out of the benchmark console."""
+        if self._data_dir is None:
+            return ""
+        self._log.flush()
+        with open(os.path.join(self._data_dir.name, "server.log"), encoding="utf-8", errors="replace") as f:
+            return "".join(f.readlines()[-lines:])
+
+    def memory_mb(self) -> dict:
+        """Memory of the server and its worker processes, see tree_memory_mb."""
+        return tree_memory_mb(self._process.pid) if self._process else {}
+
+    def stop(self) -> None:
+        """Stop the server and remove its data."""
+        if self._process is not None:
+            self._process.terminate()
+            try:
+                self._process.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                self._process.kill()
+                self._process.wait()
+            self._process = None
+        if self._data_dir is not None:
+            self._log.close()
+            self._data_dir.cleanup()
+            self._data_dir = None
+
+
+class LoadGenerator:
+    def __init__(self, url: str, endpoint: str = "/rank", embedding_mode: Optional[str] = None, timeout_s: float = 300.0):
+        """
+        Closed-loop load generator posting resumes to a ranking endpoint.
+
+        Each worker thread keeps one HTTP connection and sends its next
+        request as soon as the previous one completes.
+
+        Args:
+            url: Base URL of the ranker service
+            endpoint: "/rank" or "/rank/stream"
+            embedding_mode: embedding_mode form field, or None for the server default
+            timeout_s: Timeout of a single request
+        """
+        parts = urlsplit(url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.endpoint = endpoint
+        self.embedding_mode = embedding_mode
+        self.timeout_s = timeout_s
+        self._local = threading.local()
+
+    def _connection(self) -> http.client.HTTPConnection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout_s)
+            self._local.connection = connection
+        return connection
+
+    def post(self, resume: bytes, job_description: bytes) -> Tuple[float, float, Dict[str, float]]:
+        """
+        Send one ranking request and read the whole response.
+
+        Args:
+            resume: Resume PDF
+            job_description: Job description PDF
+
+        Returns:
+            Tuple of (latency in ms, time to response headers in ms,
+            Server-Timing stage durations in ms)
+        """
+        body, content_type = _multipart(resume, job_description, self.embedding_mode)
+        connection = self._connection()
+        started = time.perf_counter()
+        try:
+            connection.request("POST", self.endpoint, body=body, headers={"Content-Type": content_type})
+            response = connection.getresponse()
+            first_byte_ms = (time.perf_counter() - started) * 1000.0
+            payload = response.read()
+        except (OSError, http.client.HTTPException):
+            connection.close()
+            self._local.connection = None
+            raise
+        latency_ms = (time.perf_counter() - started) * 1000.0
+        if response.status != 200:
+            raise RuntimeError(f"HTTP {response.status}: {payload[:200]!r}")
+        return latency_ms, first_byte_ms, _parse_server_timing(response.getheader("Server-Timing"))
+
+    def run(self, resumes: Sequence[bytes], job_description: bytes, concurrency: int) -> dict:
+        """
+        Send every resume once with a fixed number of requests in flight.
+
+        Args:
+            resumes: Resume PDFs, one request each
+            job_description: Job description PDF sent with every resume
+            concurrency: Requests in flight
+
+        Returns:
+            Summary of the run, with time-to-headers percentiles and the
+            mean Server-Timing duration of every stage
+        """
+        latencies: List[float] = []
+        first_bytes: List[float] = []
+        stages: Dict[str, List[float]] = defaultdict(list)
+        errors = []
+        lock = threading.Lock()
+
+        def send(resume: bytes) -> None:
+            try:
+                latency_ms, first_byte_ms, timings = self.post(resume, job_description)
+            except Exception as e:
+                with lock:
+                    errors.append(str(e))
+                return
+            with lock:
+                latencies.append(latency_ms)
+                first_bytes.append(first_byte_ms)
+                for name, ms in timings.items():
+                    stages[name].append(ms)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="bench-client") as pool:
+            list(pool.map(send, resumes))
+        wall_s = time.perf_counter() - started
+
+        if errors:
+            logger.warning(f"{len(errors)} of {len(resumes)} requests failed, first error: {errors[0]}")
+        summary = summarize(latencies, wall_s, errors=len(errors))
+        if first_bytes:
+            p50, p95 = np.percentile(first_bytes, [50, 95])
+            summary["first_byte_p50_ms"] = round(float(p50), 3)
+            summary["first_byte_p95_ms"] = round(float(p95), 3)
+        summary["server_timing_mean_ms"] = {
+            name: round(float(np.mean(values)), 3) for name, values in sorted(stages.items())
+        }
+        return summary
+
+
+def run_endpoint_benchmarks(
+    concurrency_levels: Sequence[int],
+    requests: int = 40,
+    pages: int = 2,
+    words_per_page: int = 350,
+    llm_latency_ms: float = 500.0,
+    llm_jitter_ms: float = 0.0,
+    seed: int = 0,
+    endpoint: str = "/rank",
+    embedding_mode: Optional[str] = None,
+    url: Optional[str] = None,
+    env: Optional[Dict[str, str]] = None
+) -> Dict[str, dict]:
+    """
+    Load-test a ranking endpoint at several concurrency levels.
+
+    Without a URL, every level gets its own server with the stub LLM and
+    empty caches, and reports the memory of the server's processes (with
+    RANKER_WEB_WORKERS in env, several workers). Each level sends the
+    same distinct resumes against one job description, after one warm-up
+    request.
+
+    Args:
+        concurrency_levels: Requests in flight of each run
+        requests: Measured requests per level
+        pages: Pages per resume
+        words_per_page: Words of text per resume page
+        llm_latency_ms: Mean latency of the stub LLM
+        llm_jitter_ms: Jitter of the stub LLM latency
+        seed: Seed of the synthetic documents
+        endpoint: "/rank" or "/rank/stream"
+        embedding_mode: embedding_mode form field, or None for the server default
+        url: Existing server to load instead of starting one (its caches and LLM are used as is)
+        env: Extra environment variables of the started servers
+
+    Returns:
+        Summary of every level by name
+    """
+    if requests < 1:
+        raise ValueError("requests must be at least 1")
+    job_description = synthetic_job_description(seed)
+    resumes = [synthetic_resume(seed + i, pages, words_per_page) for i in range(requests)]
+    warmup_resume = synthetic_resume(seed + requests, pages, words_per_page)
+
+    prefix = f"endpoint{endpoint.replace('/', '.')}"
+    if not url:
+        prefix += f".w{(env or {}).get('RANKER_WEB_WORKERS') or os.environ.get('RANKER_WEB_WORKERS') or 1}"
+
+    results = {}
+    for concurrency in concurrency_levels:
+        server = None if url else ServerProcess(llm_latency_ms, llm_jitter_ms, env)
+        try:
+            if server is not None:
+                server.start()
+            generator = LoadGenerator(url or server.url, endpoint, embedding_mode)
+            generator.post(warmup_resume, job_description)
+            summary = generator.run(resumes, job_description, concurrency)
+            summary.update(server.memory_mb() if server is not None else {"peak_rss_mb": None})
+        finally:
+            if server is not None:
+                server.stop()
+        name = f"{prefix}.c{concurrency}"
+        results[name] = summary
+        logger.info(
+            f"{name}: p50 {summary.get('p50_ms', float('nan')):.1f} ms, "
+            f"{summary['throughput_per_s']} req/s, {summary['errors']} errors"
+        )
+    return results
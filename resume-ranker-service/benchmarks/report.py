@@ -0,0 +1,256 @@
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+
+RESULTS_VERSION = 1
+
+# Metrics compared against the baseline and whether a higher value is better
+COMPARED_METRICS = (
+    ("p50_ms", False),
+    ("p95_ms", False),
+    ("p99_ms", False),
+    ("throughput_per_s", True),
+    ("peak_rss_mb", False),
+    ("pss_mb", False),
+)
+
+
+def summarize(latencies_ms: Sequence[float], wall_s: float, errors: int = 0, items: Optional[int] = None) -> dict:
+    """
+    Reduce the latencies of one benchmark to its headline numbers.
+
+    Args:
+        latencies_ms: Latency of every measured operation
+        wall_s: Wall-clock time of the whole measured run
+        errors: Operations that failed (not included in latencies_ms)
+        items: Items processed, when an operation handles several (defaults to one per operation)
+
+    Returns:
+        Count, error count, mean, p50/p95/p99/max latency and throughput in items per second
+    """
+    samples = np.asarray(latencies_ms, dtype=np.float64)
+    items = len(samples) if items is None else items
+    summary = {"count": int(len(samples)), "errors": int(errors)}
+    if len(samples):
+        p50, p95, p99 = np.percentile(samples, [50, 95, 99])
+        summary.update({
+            "mean_ms": round(float(samples.mean()), 3),
+            "p50_ms": round(float(p50), 3),
+            "p95_ms": round(float(p95), 3),
+            "p99_ms": round(float(p99), 3),
+            "max_ms": round(float(samples.max()), 3),
+        })
+    summary["throughput_per_s"] = round(items / wall_s, 3) if wall_s > 0 else None
+    return summary
+
+
+def peak_rss_mb(pid: Optional[int] = None) -> Optional[float]:
+    """
+    High-water mark of a process's resident memory.
+
+    Args:
+        pid: Process id (defaults to this process)
+
+    Returns:
+        Peak RSS in MiB, or None if the platform does not expose it
+    """
+    if pid is None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in KiB on Linux and in bytes on macOS
+        return round(peak / (1024.0 * 1024.0 if sys.platform == "darwin" else 1024.0), 1)
+    try:
+        with open(f"/proc/{pid}/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 1024.0, 1)
+    except OSError:
+        pass
+    return None
+
+
+def _process_tree(pid: int) -> List[int]:
+    pids, pending = [], [pid]
+    while pending:
+        current = pending.pop()
+        pids.append(current)
+        try:
+            for task in os.listdir(f"/proc/{current}/task"):
+                with open(f"/proc/{current}/task/{task}/children", encoding="ascii") as f:
+                    pending.extend(int(child) for child in f.read().split())
+        except OSError:
+            continue
+    return pids
+
+
+def tree_memory_mb(pid: int) -> dict:
+    """
+    Memory of a process and all its descendants, e.g. a server and its workers.
+
+    Resident set sizes count pages shared between processes (such as model
+    weights inherited over fork) once per process; proportional set sizes
+    split them, so their sum is the real footprint.
+
+    Args:
+        pid: Process id of the root process
+
+    Returns:
+        Process count, the largest peak RSS of a single process and the
+        summed current PSS, in MiB (values are None where /proc is unavailable)
+    """
+    pids = _process_tree(pid)
+    peaks = [peak for peak in (peak_rss_mb(current) for current in pids) if peak is not None]
+    pss_kb = 0
+    for current in pids:
+        try:
+            with open(f"/proc/{current}/smaps_rollup", encoding="ascii") as f:
+                pss_kb += sum(int(line.split()[1]) for line in f if line.startswith("Pss:"))
+        except OSError:
+            pss_kb = None
+            break
+    return {
+        "processes": len(pids),
+        "peak_rss_mb": max(peaks) if peaks else None,
+        "pss_mb": round(pss_kb / 1024.0, 1) if pss_kb is not None else None,
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return result.stdout.strip() or None
+
+
+def environment(settings: dict) -> dict:
+    """
+    Describe the machine and settings of a run, so results are compared like for like.
+
+    Args:
+        settings: Benchmark parameters
+
+    Returns:
+        Metadata stored next to the results
+    """
+    return {
+        "version": RESULTS_VERSION,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "settings": settings,
+    }
+
+
+def save_results(path: str, meta: dict, benchmarks: Dict[str, dict]) -> None:
+    """
+    Write results as JSON.
+
+    Args:
+        path: Output file
+        meta: Run metadata from environment()
+        benchmarks: Summary of every benchmark by name
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"meta": meta, "benchmarks": benchmarks}, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def load_results(path: str) -> dict:
+    """
+    Read results written by save_results.
+
+    Args:
+        path: Results file
+
+    Returns:
+        Dictionary with "meta" and "benchmarks"
+    """
+    with open(path, encoding="utf-8") as f:
+        results = json.load(f)
+    if results.get("meta", {}).get("version") != RESULTS_VERSION:
+        raise ValueError(f"{path} was written by an incompatible benchmark version")
+    return results
+
+
+def compare(current: dict, baseline: dict, tolerance: float = 0.15) -> List[dict]:
+    """
+    Compare two runs benchmark by benchmark.
+
+    Args:
+        current: Results of this run
+        baseline: Stored baseline results
+        tolerance: Relative change treated as noise
+
+    Returns:
+        One row per benchmark and metric present in both runs, with the
+        relative change and a status of "regression", "improvement" or "ok"
+    """
+    rows = []
+    for name, summary in sorted(current["benchmarks"].items()):
+        reference = baseline["benchmarks"].get(name)
+        if reference is None:
+            continue
+        for metric, higher_is_better in COMPARED_METRICS:
+            value, base = summary.get(metric), reference.get(metric)
+            if value is None or not base:
+                continue
+            change = (value - base) / base
+            worse = -change if higher_is_better else change
+            status = "ok"
+            if worse > tolerance:
+                status = "regression"
+            elif worse < -tolerance:
+                status = "improvement"
+            rows.append({
+                "benchmark": name,
+                "metric": metric,
+                "baseline": base,
+                "current": value,
+                "change": round(change, 4),
+                "status": status,
+            })
+    return rows
+
+
+def format_summaries(benchmarks: Dict[str, dict]) -> str:
+    """Render benchmark summaries as a fixed-width table."""
+    header = f"{'benchmark':<40} {'count':>6} {'err':>4} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'ops/s':>9} {'rss MiB':>8}"
+    lines = [header, "-" * len(header)]
+    for name, s in sorted(benchmarks.items()):
+        lines.append(
+            f"{name:<40} {s['count']:>6} {s['errors']:>4} {s.get('p50_ms', float('nan')):>10.2f} "
+            f"{s.get('p95_ms', float('nan')):>10.2f} {s.get('p99_ms', float('nan')):>10.2f} "
+            f"{s.get('throughput_per_s') or 0.0:>9.2f} {s.get('peak_rss_mb') or float('nan'):>8.1f}"
+        )
+    return "\n".join(lines)
+
+
+def format_comparison(rows: List[dict]) -> str:
+    """Render the rows of compare() as a fixed-width table, worst first."""
+    if not rows:
+        return "No benchmarks in common with the baseline"
+    order = {"regression": 0, "improvement": 1, "ok": 2}
+    header = f"{'benchmark':<40} {'metric':<17} {'baseline':>10} {'current':>10} {'change':>8}  status"
+    lines = [header, "-" * len(header)]
+    for row in sorted(rows, key=lambda r: (order[r["status"]], r["benchmark"], r["metric"])):
+        lines.append(
+            f"{row['benchmark']:<40} {row['metric']:<17} {row['baseline']:>10.2f} {row['current']:>10.2f} "
+            f"{row['change'] * 100:>+7.1f}%  {row['status']}"
+        )
+    return "\n".join(lines)
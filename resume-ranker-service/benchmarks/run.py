@@ -0,0 +1,117 @@
+import argparse
+import logging
+import os
+import sys
+import time
+from typing import List
+
+from benchmarks.report import (
+    compare,
+    environment,
+    format_comparison,
+    format_summaries,
+    load_results,
+    save_results,
+)
+
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+SUITES = ("stages", "endpoint")
+
+
+def _int_list(value: str) -> List[int]:
+    try:
+        numbers = [int(part) for part in value.split(",") if part.strip()]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected comma-separated integers, got {value!r}")
+    if not numbers or min(numbers) < 1:
+        raise argparse.ArgumentTypeError("values must be at least 1")
+    return numbers
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the ranking pipeline and compare against a baseline")
+    parser.add_argument("--suite", action="append", choices=SUITES,
+                        help="Suite to run (repeatable, defaults to all)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--words-per-page", type=int, default=350)
+    parser.add_argument("--pages", type=_int_list, default=[1, 4, 16],
+                        help="Resume page counts of the stage benchmarks")
+    parser.add_argument("--iterations", type=int, default=20, help="Measured calls per stage benchmark")
+    parser.add_argument("--concurrency", type=_int_list, default=[1, 4, 16],
+                        help="Requests in flight of each endpoint run")
+    parser.add_argument("--requests", type=int, default=48, help="Measured requests per concurrency level")
+    parser.add_argument("--resume-pages", type=int, default=2, help="Pages per resume of the endpoint runs")
+    parser.add_argument("--endpoint", default="/rank", choices=("/rank", "/rank/stream"))
+    parser.add_argument("--embedding-mode", help="embedding_mode sent to the endpoint")
+    parser.add_argument("--llm-latency-ms", type=float, default=500.0)
+    parser.add_argument("--llm-jitter-ms", type=float, default=100.0)
+    parser.add_argument("--web-workers", type=int,
+                        help="RANKER_WEB_WORKERS of the started servers (defaults to the environment)")
+    parser.add_argument("--url", help="Load an already running service instead of starting one per level")
+    parser.add_argument("--output", help="Results file (defaults to benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--baseline", help="Baseline results to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="Also write the results to --baseline")
+    parser.add_argument("--tolerance", type=float, default=0.15,
+                        help="Relative change treated as noise when comparing")
+    parser.add_argument("--fail-on-regression", action="store_true",
+                        help="Exit with status 1 when a metric regressed beyond the tolerance")
+    args = parser.parse_args()
+
+    if args.save_baseline and not args.baseline:
+        parser.error("--save-baseline needs --baseline")
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s:%(name)s:%(message)s")
+    suites = args.suite or list(SUITES)
+
+    meta = environment({
+        key: value for key, value in vars(args).items()
+        if key not in ("output", "baseline", "save_baseline", "fail_on_regression", "suite")
+    })
+    meta["suites"] = suites
+    meta["ranker_env"] = {key: value for key, value in sorted(os.environ.items()) if key.startswith("RANKER_")}
+
+    benchmarks = {}
+    if "stages" in suites:
+        # Imported here so an endpoint-only run does not load the model in this process
+        from benchmarks.stages import run_stage_benchmarks
+        benchmarks.update(run_stage_benchmarks(args.pages, args.words_per_page, args.iterations, args.seed))
+    if "endpoint" in suites:
+        from benchmarks.load import run_endpoint_benchmarks
+        benchmarks.update(run_endpoint_benchmarks(
+            args.concurrency,
+            requests=args.requests,
+            pages=args.resume_pages,
+            words_per_page=args.words_per_page,
+            llm_latency_ms=args.llm_latency_ms,
+            llm_jitter_ms=args.llm_jitter_ms,
+            seed=args.seed,
+            endpoint=args.endpoint,
+            embedding_mode=args.embedding_mode,
+            url=args.url,
+            env={"RANKER_WEB_WORKERS": str(args.web_workers)} if args.web_workers else None
+        ))
+
+    output = args.output or os.path.join(RESULTS_DIR, time.strftime("%Y%m%d-%H%M%S") + ".json")
+    save_results(output, meta, benchmarks)
+    print(format_summaries(benchmarks))
+    print(f"\nResults written to {output}")
+
+    if not args.baseline:
+        return
+    if args.save_baseline:
+        save_results(args.baseline, meta, benchmarks)
+        print(f"Baseline written to {args.baseline}")
+        return
+    baseline = load_results(args.baseline)
+    if baseline["meta"].get("platform") != meta["platform"] or baseline["meta"].get("cpu_count") != meta["cpu_count"]:
+        print("Warning: the baseline was recorded on a different machine, timings may not be comparable")
+    rows = compare({"benchmarks": benchmarks}, baseline, args.tolerance)
+    print()
+    print(format_comparison(rows))
+    regressions = [row for row in rows if row["status"] == "regression"]
+    if regressions and args.fail_on_regression:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
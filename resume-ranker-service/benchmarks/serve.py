@@ -0,0 +1,65 @@
+import argparse
+import functools
+import os
+
+import uvicorn
+from gunicorn.app.base import Application
+
+from benchmarks.stub_llm import StubLLMAnalyzer
+from config import settings
+
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class StubbedGunicorn(Application):
+    def __init__(self, bind: str, analyzer_factory):
+        """
+        gunicorn with the service configuration and a stub LLM analyzer.
+
+        Args:
+            bind: Address to listen on
+            analyzer_factory: Replacement of LLMAnalyzer, set before the workers fork
+        """
+        self.bind = bind
+        self.analyzer_factory = analyzer_factory
+        super().__init__()
+
+    def init(self, parser, opts, args):
+        return None
+
+    def load_config(self):
+        # Not Application.load_config, which would parse this script's arguments
+        self.load_config_from_file(os.path.join(SERVICE_DIR, "gunicorn.conf.py"))
+        self.cfg.set("bind", self.bind)
+
+    def load(self):
+        import main as service
+        service.LLMAnalyzer = self.analyzer_factory
+        return service.app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the ranker service with a stub LLM")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--llm-latency-ms", type=float, default=500.0)
+    parser.add_argument("--llm-jitter-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    analyzer_factory = functools.partial(
+        StubLLMAnalyzer, latency_ms=args.llm_latency_ms, jitter_ms=args.llm_jitter_ms
+    )
+    if settings.web_workers > 1:
+        StubbedGunicorn(f"{args.host}:{args.port}", analyzer_factory).run()
+        return
+
+    import main as service
+
+    # startup_event creates the analyzer, so swap the class before it runs
+    service.LLMAnalyzer = analyzer_factory
+    uvicorn.run(service.app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+import logging
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from config import settings
+from logic.embedder import Embedder
+from logic.extract_text import extract_pdf
+from logic.lexical_index import LexicalIndex
+from logic.prompt_builder import PromptBuilder
+from logic.similarity import calculate_cosine_similarity, top_k_similar
+
+from benchmarks.report import peak_rss_mb, summarize
+from benchmarks.stub_llm import StubLLMAnalyzer
+from benchmarks.synthetic import synthetic_job_description, synthetic_resume, synthetic_text
+
+
+logger = logging.getLogger(__name__)
+
+# Rows of the corpus scored by the top-k benchmark
+TOP_K_CORPUS_ROWS = 50000
+
+# Documents in the lexical index searched by the lexical benchmark
+LEXICAL_CORPUS_DOCS = 20000
+
+
+def _measure(operation: Callable, inputs: Sequence, warmup: int = 1) -> Tuple[List[float], float]:
+    """
+    Time an operation once per input.
+
+    Args:
+        operation: Callable taking one input
+        inputs: Inputs of the measured calls
+        warmup: Calls on the first input made before measuring
+
+    Returns:
+        Tuple of (latency of every call in ms, wall-clock time in seconds)
+    """
+    for _ in range(warmup):
+        operation(inputs[0])
+    latencies = []
+    started = time.perf_counter()
+    for item in inputs:
+        call_started = time.perf_counter()
+        operation(item)
+        latencies.append((time.perf_counter() - call_started) * 1000.0)
+    return latencies, time.perf_counter() - started
+
+
+def _record(results: Dict[str, dict], name: str, latencies: List[float], wall_s: float, items: Optional[int] = None) -> None:
+    summary = summarize(latencies, wall_s, items=items)
+    # Process-wide high-water mark once the stage has run
+    summary["peak_rss_mb"] = peak_rss_mb()
+    results[name] = summary
+    logger.info(f"{name}: p50 {summary['p50_ms']:.2f} ms, p95 {summary['p95_ms']:.2f} ms")
+
+
+def run_stage_benchmarks(
+    pages: Sequence[int],
+    words_per_page: int = 350,
+    iterations: int = 20,
+    seed: int = 0
+) -> Dict[str, dict]:
+    """
+    Benchmark each pipeline stage in isolation, without the service caches.
+
+    Stages run in this process with the embedding backend and limits from
+    the RANKER_* settings, on synthetic documents that are distinct per
+    iteration.
+
+    Args:
+        pages: Page counts of the resumes to extract
+        words_per_page: Words of text per resume page
+        iterations: Measured calls per benchmark
+        seed: Seed of the synthetic documents
+
+    Returns:
+        Summary of every benchmark by name
+    """
+    if iterations < 1:
+        raise ValueError("iterations must be at least 1")
+    results: Dict[str, dict] = {}
+
+    texts_by_pages = {}
+    for page_count in pages:
+        documents = [synthetic_resume(seed + i, page_count, words_per_page) for i in range(iterations)]
+        texts_by_pages[page_count] = [extract_pdf(document).text for document in documents]
+        latencies, wall_s = _measure(
+            lambda document: extract_pdf(document, max_pages=settings.pdf_max_pages), documents
+        )
+        _record(results, f"extract.{page_count}p", latencies, wall_s)
+
+    jd_text = extract_pdf(synthetic_job_description(seed)).text
+    texts = texts_by_pages[sorted(pages)[len(pages) // 2]]
+    longest = texts_by_pages[max(pages)]
+
+    embedder = Embedder(
+        settings.model_name,
+        backend=settings.embed_backend,
+        model_dir=settings.model_dir,
+        threads=settings.embed_threads
+    )
+    embedder.warm_up()
+
+    latencies, wall_s = _measure(embedder.embed, texts)
+    _record(results, "embed.document", latencies, wall_s)
+
+    latencies, wall_s = _measure(
+        lambda text: embedder.embed_chunks(
+            text, settings.chunk_tokens or None, settings.chunk_overlap_tokens, settings.chunk_max
+        ),
+        longest
+    )
+    _record(results, f"embed.chunks.{max(pages)}p", latencies, wall_s)
+
+    batch_size = settings.embed_max_batch_size
+    batches = [[texts[(i * batch_size + j) % len(texts)] for j in range(batch_size)] for i in range(iterations)]
+    latencies, wall_s = _measure(embedder.embed_batch, batches)
+    _record(results, f"embed.batch{batch_size}", latencies, wall_s, items=batch_size * iterations)
+
+    rng = np.random.default_rng(seed)
+    dimension = embedder.dimension
+    pairs = [rng.standard_normal((2, dimension)).astype(np.float32) for _ in range(iterations * 50)]
+    latencies, wall_s = _measure(lambda pair: calculate_cosine_similarity(pair[0], pair[1]), pairs)
+    _record(results, "similarity.pair", latencies, wall_s)
+
+    corpus = rng.standard_normal((TOP_K_CORPUS_ROWS, dimension)).astype(np.float32)
+    corpus /= np.linalg.norm(corpus, axis=1, keepdims=True)
+    queries = list(corpus[:iterations])
+    latencies, wall_s = _measure(lambda query: top_k_similar(query, corpus, 10, normalized=True), queries)
+    _record(results, f"similarity.top10_of_{TOP_K_CORPUS_ROWS}", latencies, wall_s)
+    del corpus
+
+    lexical = LexicalIndex()
+    latencies, wall_s = _measure(lexical.analyze, texts)
+    _record(results, "lexical.analyze", latencies, wall_s)
+    lexical.add(
+        [synthetic_text(seed + i) for i in range(LEXICAL_CORPUS_DOCS)],
+        [str(i) for i in range(LEXICAL_CORPUS_DOCS)]
+    )
+    queries = [jd_text] + [synthetic_text(seed - i, 250) for i in range(1, iterations)]
+    latencies, wall_s = _measure(lambda query: lexical.search(query, 200), queries)
+    _record(results, f"lexical.top200_of_{LEXICAL_CORPUS_DOCS}", latencies, wall_s)
+    del lexical
+
+    builder = PromptBuilder(
+        embedder,
+        token_budget=settings.prompt_token_budget,
+        passage_tokens=settings.prompt_passage_tokens,
+        jd_share=settings.prompt_jd_share
+    )
+    template = StubLLMAnalyzer().build_prompt("", "")
+    latencies, wall_s = _measure(lambda text: builder.build(text, jd_text, template), longest)
+    _record(results, f"prompt_budget.{max(pages)}p", latencies, wall_s)
+
+    return results
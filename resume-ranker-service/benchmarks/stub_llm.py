@@ -0,0 +1,57 @@
+import random
+import threading
+import time
+from typing import Iterator
+
+from logic.llm_analyzer import LLMAnalyzer
+
+
+class StubLLMAnalyzer(LLMAnalyzer):
+    def __init__(self, latency_ms: float = 500.0, jitter_ms: float = 0.0, seed: int = 0):
+        """
+        Stand-in for the Gemini analyzer with a configurable latency.
+
+        It builds the same prompt as LLMAnalyzer, sleeps like a provider call
+        and returns a canned analysis, so benchmarks exercise the real
+        prompt path without network access or an API key.
+
+        Args:
+            latency_ms: Mean latency of one analysis
+            jitter_ms: Latency is drawn uniformly from latency_ms +/- jitter_ms
+            seed: Seed of the latency generator
+        """
+        if latency_ms < 0 or jitter_ms < 0:
+            raise ValueError("latency_ms and jitter_ms cannot be negative")
+        self.model_name = "stub"
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.calls = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _latency_s(self) -> float:
+        with self._lock:
+            self.calls += 1
+            jitter = self._rng.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0.0
+        return max(0.0, self.latency_ms + jitter) / 1000.0
+
+    def _analysis(self, resume_text: str, job_description: str) -> str:
+        prompt = self.build_prompt(resume_text, job_description)
+        return (
+            "1. Overall match assessment: synthetic benchmark analysis.\n"
+            f"2. Key strengths: resume of {len(resume_text.split())} words.\n"
+            f"3. Potential gaps or concerns: job description of {len(job_description.split())} words.\n"
+            f"4. Recommendations: prompt of {len(prompt)} characters."
+        )
+
+    def analyze_resume(self, resume_text: str, job_description: str) -> str:
+        time.sleep(self._latency_s())
+        return self._analysis(resume_text, job_description)
+
+    def stream_analysis(self, resume_text: str, job_description: str) -> Iterator[str]:
+        # Spread the latency over the chunks like a streamed provider response
+        parts = self._analysis(resume_text, job_description).split("\n")
+        delay = self._latency_s() / len(parts)
+        for part in parts:
+            time.sleep(delay)
+            yield part + "\n"
@@ -0,0 +1,140 @@
+import random
+from typing import List
+
+
+SKILLS = [
+    "Python", "Java", "Kotlin", "Go", "TypeScript", "React", "FastAPI", "Spring Boot", "Django",
+    "PostgreSQL", "MySQL", "Redis", "Kafka", "RabbitMQ", "Docker", "Kubernetes", "Terraform",
+    "AWS", "GCP", "Azure", "CI/CD", "GraphQL", "REST APIs", "microservices", "machine learning",
+    "PyTorch", "TensorFlow", "NLP", "data pipelines", "Airflow", "Spark", "Linux", "observability",
+]
+
+FILLER = [
+    "designed", "built", "maintained", "improved", "delivered", "led", "owned", "migrated",
+    "scaled", "automated", "reduced", "latency", "costs", "team", "platform", "services",
+    "customers", "production", "reliability", "features", "across", "with", "using", "for",
+    "the", "a", "and", "of", "to", "in", "on", "new", "large", "internal", "critical",
+]
+
+SECTIONS = ["Experience", "Projects", "Skills", "Education", "Certifications", "Summary"]
+
+# Letter-size page, 12pt Helvetica, about 12 words per line
+_LINES_PER_PAGE = 50
+_WORDS_PER_LINE = 12
+
+
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def make_pdf(pages: List[List[str]]) -> bytes:
+    """
+    Write a minimal text-only PDF.
+
+    Args:
+        pages: Lines of text of each page
+
+    Returns:
+        PDF document as bytes
+    """
+    if not pages:
+        raise ValueError("A PDF needs at least one page")
+
+    font_ref = 3 + 2 * len(pages)
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        "<< /Type /Pages /Kids [{}] /Count {} >>".format(
+            " ".join(f"{3 + 2 * i} 0 R" for i in range(len(pages))), len(pages)
+        ),
+    ]
+    for i, lines in enumerate(pages):
+        text = " T* ".join(f"({_escape(line)}) Tj" for line in lines)
+        stream = f"BT /F1 11 Tf 14 TL 54 750 Td {text} ET"
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents {4 + 2 * i} 0 R "
+            f"/Resources << /Font << /F1 {font_ref} 0 R >> >> >>"
+        )
+        objects.append(f"<< /Length {len(stream.encode('latin-1'))} >>\nstream\n{stream}\nendstream")
+    objects.append("<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1")
+    for offset in offsets:
+        out += f"{offset:010d} 00000 n \n".encode("latin-1")
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("latin-1")
+    return bytes(out)
+
+
+def _sentence_lines(rng: random.Random, words: int) -> List[str]:
+    tokens = []
+    while len(tokens) < words:
+        tokens.extend(rng.choices(FILLER, k=rng.randint(4, 9)))
+        tokens.append(rng.choice(SKILLS))
+    tokens = tokens[:words]
+    return [" ".join(tokens[i:i + _WORDS_PER_LINE]) for i in range(0, len(tokens), _WORDS_PER_LINE)]
+
+
+def _paginate(rng: random.Random, title: str, pages: int, words_per_page: int) -> List[List[str]]:
+    if pages < 1 or words_per_page < 1:
+        raise ValueError("pages and words_per_page must be at least 1")
+    words_per_page = min(words_per_page, (_LINES_PER_PAGE - 2) * _WORDS_PER_LINE)
+    result = []
+    for index in range(pages):
+        heading = title if index == 0 else rng.choice(SECTIONS)
+        result.append([heading, ""] + _sentence_lines(rng, words_per_page))
+    return result
+
+
+def synthetic_resume(seed: int, pages: int = 2, words_per_page: int = 350) -> bytes:
+    """
+    Generate a resume PDF of a given page count and text density.
+
+    The same seed always produces the same document, and different seeds
+    produce different documents, so they do not share cache entries.
+
+    Args:
+        seed: Seed of the random generator
+        pages: Number of pages
+        words_per_page: Words of text per page (at most a full page)
+
+    Returns:
+        PDF document as bytes
+    """
+    rng = random.Random(f"resume-{seed}")
+    return make_pdf(_paginate(rng, f"Candidate {seed} - Software Engineer", pages, words_per_page))
+
+
+def synthetic_text(seed: int, words: int = 700) -> str:
+    """
+    Generate resume-like plain text, for benchmarks that skip PDF extraction.
+
+    Args:
+        seed: Seed of the random generator
+        words: Number of words
+
+    Returns:
+        Text with one line per line of a synthetic page
+    """
+    rng = random.Random(f"text-{seed}")
+    return "\n".join(_sentence_lines(rng, words))
+
+
+def synthetic_job_description(seed: int, pages: int = 1, words_per_page: int = 250) -> bytes:
+    """
+    Generate a job description PDF of a given page count and text density.
+
+    Args:
+        seed: Seed of the random generator
+        pages: Number of pages
+        words_per_page: Words of text per page (at most a full page)
+
+    Returns:
+        PDF document as bytes
+    """
+    rng = random.Random(f"jd-{seed}")
+    return make_pdf(_paginate(rng, f"Job {seed} - Senior Backend Engineer", pages, words_per_page))
@@ -0,0 +1,275 @@
+import os
+from typing import Optional
+
+
+def _get_int(name: str, default: int) -> int:
+    """
+    Read an integer setting from the environment.
+
+    Args:
+        name: Environment variable name
+        default: Value used when the variable is unset or empty
+
+    Returns:
+        Parsed integer value
+    """
+    value = os.getenv(name)
+    if value is None or value.strip() == "":
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"{name} must be an integer, got {value!r}")
+
+
+def _get_float(name: str, default: float) -> float:
+    """
+    Read a float setting from the environment.
+
+    Args:
+        name: Environment variable name
+        default: Value used when the variable is unset or empty
+
+    Returns:
+        Parsed float value
+    """
+    value = os.getenv(name)
+    if value is None or value.strip() == "":
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        raise ValueError(f"{name} must be a number, got {value!r}")
+
+
+def _get_str(name: str, default: Optional[str] = None) -> Optional[str]:
+    """
+    Read a string setting from the environment.
+
+    Args:
+        name: Environment variable name
+        default: Value used when the variable is unset or empty
+
+    Returns:
+        Setting value
+    """
+    value = os.getenv(name)
+    if value is None or value.strip() == "":
+        return default
+    return value.strip()
+
+
+# How documents are embedded: "document" encodes the text once (the model
+# truncates long texts), "mean" and "max_sim" embed overlapping chunks and
+# score their mean or their best chunk matches
+EMBEDDING_MODES = ("document", "mean", "max_sim")
+
+# Which candidates get an LLM analysis: all of them, those whose hybrid
+# score reaches a threshold, or the best few per job description; the
+# others get a templated summary of their scores and skills
+ANALYSIS_POLICIES = ("always", "threshold", "top_k")
+
+
+class Settings:
+    def __init__(self):
+        """
+        Load service settings from environment variables.
+        """
+        cpu_count = os.cpu_count() or 1
+
+        # HTTP worker processes forked by gunicorn from a parent that has
+        # already loaded the embedding model; per-process pools default to
+        # an equal share of the cores
+        self.web_workers = _get_int("RANKER_WEB_WORKERS", 1)
+        self.bind = _get_str("RANKER_BIND", "0.0.0.0:8000")
+        self.metrics_dir = _get_str("RANKER_METRICS_DIR", os.path.join("data", "metrics"))
+        cores_per_worker = max(1, cpu_count // max(self.web_workers, 1))
+
+        # Executor used for PDF parsing: "thread" or "process"
+        self.cpu_executor = _get_str("RANKER_CPU_EXECUTOR", "thread").lower()
+        self.cpu_workers = _get_int("RANKER_CPU_WORKERS", cores_per_worker)
+        # Threads running SentenceTransformer encode calls
+        self.embed_workers = _get_int("RANKER_EMBED_WORKERS", 2)
+        # Threads running (blocking) Gemini calls
+        self.llm_workers = _get_int("RANKER_LLM_WORKERS", 8)
+        # Threads running local storage calls (job queue, job descriptions,
+        # talent pool index)
+        self.storage_workers = _get_int("RANKER_STORAGE_WORKERS", 4)
+
+        # Resilience of Gemini calls: calls in flight, timeout of one attempt,
+        # overall deadline including retries, start rate (0 = unlimited) and
+        # retries of transient failures with jittered exponential backoff
+        self.llm_max_concurrency = _get_int("RANKER_LLM_MAX_CONCURRENCY", self.llm_workers)
+        self.llm_call_timeout_s = _get_float("RANKER_LLM_CALL_TIMEOUT_S", 30.0)
+        self.llm_deadline_s = _get_float("RANKER_LLM_DEADLINE_S", 60.0)
+        self.llm_rate_per_s = _get_float("RANKER_LLM_RATE_PER_S", 0.0)
+        self.llm_burst = _get_int("RANKER_LLM_BURST", 5)
+        self.llm_max_retries = _get_int("RANKER_LLM_MAX_RETRIES", 2)
+        self.llm_backoff_base_s = _get_float("RANKER_LLM_BACKOFF_BASE_S", 0.5)
+        self.llm_backoff_max_s = _get_float("RANKER_LLM_BACKOFF_MAX_S", 8.0)
+        # Circuit breaker: consecutive failures that stop calls to the
+        # provider and how long before a trial call
+        self.llm_breaker_failures = _get_int("RANKER_LLM_BREAKER_FAILURES", 5)
+        self.llm_breaker_reset_s = _get_float("RANKER_LLM_BREAKER_RESET_S", 30.0)
+        # Alternative Gemini API endpoint, e.g. a local fake server for tests
+        self.llm_api_endpoint = _get_str("RANKER_LLM_API_ENDPOINT")
+
+        # PDF extraction limits; documents are split across the process
+        # pool by page range once they reach pdf_parallel_min_pages
+        self.pdf_max_pages = _get_int("RANKER_PDF_MAX_PAGES", 50)
+        self.pdf_max_bytes = _get_int("RANKER_PDF_MAX_BYTES", 10 * 1024 * 1024)
+        self.pdf_time_budget_s = _get_float("RANKER_PDF_TIME_BUDGET_S", 10.0)
+        self.pdf_parallel_min_pages = _get_int("RANKER_PDF_PARALLEL_MIN_PAGES", 16)
+        self.pdf_pages_per_task = _get_int("RANKER_PDF_PAGES_PER_TASK", 8)
+
+        # Embedding model and the engine running it: "torch" (float32
+        # reference), "onnx" (ONNX Runtime) or "int8" (dynamically quantized)
+        self.model_name = _get_str("RANKER_MODEL_NAME", "all-MiniLM-L6-v2")
+        self.model_dir = _get_str("RANKER_MODEL_DIR", os.path.join("models", self.model_name))
+        self.embed_backend = _get_str("RANKER_EMBED_BACKEND", "torch").lower()
+        self.embed_threads = _get_int("RANKER_EMBED_THREADS", 0 if self.web_workers == 1 else cores_per_worker)
+
+        # Micro-batching of embedding requests across concurrent calls
+        self.embed_max_batch_size = _get_int("RANKER_EMBED_MAX_BATCH_SIZE", 32)
+        self.embed_max_wait_ms = _get_int("RANKER_EMBED_MAX_WAIT_MS", 5)
+
+        # Chunked embedding of long documents; chunk_tokens 0 uses the model limit
+        self.embed_mode = _get_str("RANKER_EMBED_MODE", "document").lower()
+        self.chunk_tokens = _get_int("RANKER_CHUNK_TOKENS", 0)
+        self.chunk_overlap_tokens = _get_int("RANKER_CHUNK_OVERLAP_TOKENS", 32)
+        self.chunk_max = _get_int("RANKER_CHUNK_MAX", 16)
+
+        # Content-addressed cache of extracted text and embeddings
+        self.cache_max_mb = _get_int("RANKER_CACHE_MAX_MB", 256)
+        self.cache_dir = _get_str("RANKER_CACHE_DIR")
+
+        # Cache of LLM analyses, shared by workers through SQLite
+        self.llm_cache_path = _get_str("RANKER_LLM_CACHE_PATH", os.path.join("data", "llm_cache.sqlite3"))
+        self.llm_cache_ttl_s = _get_float("RANKER_LLM_CACHE_TTL_S", 86400.0)
+        self.llm_cache_max_entries = _get_int("RANKER_LLM_CACHE_MAX_ENTRIES", 10000)
+
+        # Token budget of the LLM prompt; longer documents keep only the
+        # passages most relevant to the job description
+        self.prompt_token_budget = _get_int("RANKER_PROMPT_TOKEN_BUDGET", 6000)
+        self.prompt_passage_tokens = _get_int("RANKER_PROMPT_PASSAGE_TOKENS", 120)
+        self.prompt_jd_share = _get_float("RANKER_PROMPT_JD_SHARE", 0.35)
+
+        # Upload limits enforced while the body streams in, the size above
+        # which an uploaded file is spooled to a temporary file instead of
+        # memory, and admission control of upload requests per worker
+        # process: requests served at once, requests waiting for a slot
+        # (beyond that 429 with Retry-After) and the longest wait
+        self.upload_max_file_bytes = _get_int("RANKER_UPLOAD_MAX_FILE_BYTES", self.pdf_max_bytes)
+        self.upload_max_request_bytes = _get_int("RANKER_UPLOAD_MAX_REQUEST_BYTES", 256 * 1024 * 1024)
+        self.upload_spool_bytes = _get_int("RANKER_UPLOAD_SPOOL_BYTES", 1024 * 1024)
+        self.admission_max_in_flight = _get_int("RANKER_ADMISSION_MAX_IN_FLIGHT", 16)
+        self.admission_max_queue = _get_int("RANKER_ADMISSION_MAX_QUEUE", 32)
+        self.admission_queue_timeout_s = _get_float("RANKER_ADMISSION_QUEUE_TIMEOUT_S", 10.0)
+
+        # Default analysis policy (one of ANALYSIS_POLICIES), the hybrid
+        # score analyzed under "threshold" and the candidates analyzed per
+        # job description under "top_k"
+        self.analysis_policy = _get_str("RANKER_ANALYSIS_POLICY", "always").lower()
+        self.analysis_min_score = _get_float("RANKER_ANALYSIS_MIN_SCORE", 0.5)
+        self.analysis_top_k = _get_int("RANKER_ANALYSIS_TOP_K", 10)
+
+        # Upper bound on resumes accepted by /rank/batch, and resumes of a
+        # batch, index or job request read and extracted at once
+        self.batch_max_resumes = _get_int("RANKER_BATCH_MAX_RESUMES", 500)
+        self.batch_extract_window = _get_int("RANKER_BATCH_EXTRACT_WINDOW", 16)
+
+        # Durable queue of ranking jobs and the workers draining it
+        self.job_db_path = _get_str("RANKER_JOB_DB_PATH", os.path.join("data", "jobs.sqlite3"))
+        self.job_workers = _get_int("RANKER_JOB_WORKERS", 2)
+        self.job_max_attempts = _get_int("RANKER_JOB_MAX_ATTEMPTS", 3)
+        self.job_retry_backoff_s = _get_float("RANKER_JOB_RETRY_BACKOFF_S", 5.0)
+        self.job_lease_s = _get_float("RANKER_JOB_LEASE_S", 120.0)
+        self.job_retention_s = _get_float("RANKER_JOB_RETENTION_S", 7 * 86400.0)
+
+        # Persistent talent pool index
+        self.index_dir = _get_str("RANKER_INDEX_DIR", os.path.join("data", "index"))
+        self.index_block_rows = _get_int("RANKER_INDEX_BLOCK_ROWS", 16384)
+        self.index_max_top_k = _get_int("RANKER_INDEX_MAX_TOP_K", 1000)
+
+        # Registered job descriptions with precomputed embeddings, skills and
+        # prompt passages: ids kept before the least recently used are
+        # evicted, versions kept per id, expiry after the last use and
+        # decoded versions held in memory per worker process
+        self.jd_db_path = _get_str("RANKER_JD_DB_PATH", os.path.join("data", "job_descriptions.sqlite3"))
+        self.jd_max_entries = _get_int("RANKER_JD_MAX_ENTRIES", 1000)
+        self.jd_max_versions = _get_int("RANKER_JD_MAX_VERSIONS", 5)
+        self.jd_ttl_s = _get_float("RANKER_JD_TTL_S", 30 * 86400.0)
+        self.jd_memory_entries = _get_int("RANKER_JD_MEMORY_ENTRIES", 64)
+
+        # Hybrid ranking: share of the BM25/skill score in the fused score,
+        # shortlist size of the lexical prefilter that runs before any
+        # embedding work (0 disables it; it only runs when the lexical
+        # weight is above 0) and an optional file of extra skills
+        # ("name|spelling|spelling" per line)
+        self.hybrid_lexical_weight = _get_float("RANKER_HYBRID_LEXICAL_WEIGHT", 0.0)
+        self.lexical_prefilter_k = _get_int("RANKER_LEXICAL_PREFILTER_K", 200)
+        self.skills_path = _get_str("RANKER_SKILLS_PATH")
+
+        if self.cpu_executor not in ("thread", "process"):
+            raise ValueError("RANKER_CPU_EXECUTOR must be 'thread' or 'process'")
+        for name in ("web_workers", "cpu_workers", "embed_workers", "llm_workers", "storage_workers",
+                     "embed_max_batch_size",
+                     "batch_max_resumes", "batch_extract_window", "index_block_rows", "index_max_top_k",
+                     "pdf_max_pages", "pdf_max_bytes", "pdf_parallel_min_pages", "pdf_pages_per_task",
+                     "llm_cache_max_entries", "prompt_token_budget", "prompt_passage_tokens",
+                     "job_workers", "job_max_attempts", "chunk_max",
+                     "llm_max_concurrency", "llm_burst", "llm_breaker_failures",
+                     "jd_max_entries", "jd_max_versions", "upload_max_file_bytes", "upload_max_request_bytes",
+                     "upload_spool_bytes", "admission_max_in_flight", "analysis_top_k"):
+            if getattr(self, name) < 1:
+                raise ValueError(f"{name} must be at least 1")
+        if self.embed_backend not in ("torch", "onnx", "int8"):
+            raise ValueError("RANKER_EMBED_BACKEND must be 'torch', 'onnx' or 'int8'")
+        if self.embed_threads < 0:
+            raise ValueError("embed_threads cannot be negative")
+        if self.embed_mode not in EMBEDDING_MODES:
+            raise ValueError(f"RANKER_EMBED_MODE must be one of {', '.join(EMBEDDING_MODES)}")
+        if self.analysis_policy not in ANALYSIS_POLICIES:
+            raise ValueError(f"RANKER_ANALYSIS_POLICY must be one of {', '.join(ANALYSIS_POLICIES)}")
+        if self.analysis_policy == "top_k" and self.web_workers > 1:
+            # Each worker would only know its own share of the best scores
+            raise ValueError("RANKER_ANALYSIS_POLICY=top_k needs RANKER_WEB_WORKERS=1")
+        if self.chunk_tokens < 0 or self.chunk_overlap_tokens < 0:
+            raise ValueError("chunk_tokens and chunk_overlap_tokens cannot be negative")
+        if self.embed_max_wait_ms < 0:
+            raise ValueError("embed_max_wait_ms cannot be negative")
+        if self.pdf_time_budget_s <= 0:
+            raise ValueError("pdf_time_budget_s must be positive")
+        if self.llm_cache_ttl_s <= 0:
+            raise ValueError("llm_cache_ttl_s must be positive")
+        if self.job_retry_backoff_s < 0:
+            raise ValueError("job_retry_backoff_s cannot be negative")
+        if self.job_lease_s <= 0 or self.job_retention_s <= 0:
+            raise ValueError("job_lease_s and job_retention_s must be positive")
+        if not 0.0 < self.prompt_jd_share < 1.0:
+            raise ValueError("prompt_jd_share must be between 0 and 1")
+        if self.llm_call_timeout_s <= 0 or self.llm_deadline_s <= 0 or self.llm_breaker_reset_s <= 0:
+            raise ValueError("llm_call_timeout_s, llm_deadline_s and llm_breaker_reset_s must be positive")
+        if self.llm_rate_per_s < 0 or self.llm_max_retries < 0:
+            raise ValueError("llm_rate_per_s and llm_max_retries cannot be negative")
+        if self.llm_backoff_base_s < 0 or self.llm_backoff_max_s < 0:
+            raise ValueError("llm_backoff_base_s and llm_backoff_max_s cannot be negative")
+        if not 0.0 <= self.hybrid_lexical_weight <= 1.0:
+            raise ValueError("hybrid_lexical_weight must be between 0 and 1")
+        if self.lexical_prefilter_k < 0:
+            raise ValueError("lexical_prefilter_k cannot be negative")
+        if self.jd_ttl_s <= 0:
+            raise ValueError("jd_ttl_s must be positive")
+        if self.jd_memory_entries < 0:
+            raise ValueError("jd_memory_entries cannot be negative")
+        if self.upload_max_file_bytes > self.upload_max_request_bytes:
+            raise ValueError("upload_max_file_bytes cannot exceed upload_max_request_bytes")
+        if self.admission_max_queue < 0:
+            raise ValueError("admission_max_queue cannot be negative")
+        if self.admission_queue_timeout_s <= 0:
+            raise ValueError("admission_queue_timeout_s must be positive")
+        if self.cache_max_mb < 0:
+            raise ValueError("cache_max_mb cannot be negative")
+
+
+settings = Settings()
@@ -0,0 +1,40 @@
+# Multi-process serving: gunicorn imports the app once, the parent loads the
+# embedding model and forks RANKER_WEB_WORKERS uvicorn workers that share its
+# weights copy-on-write.
+#
+#   gunicorn -c gunicorn.conf.py main:app
+import os
+import shutil
+
+from config import settings
+
+bind = settings.bind
+workers = settings.web_workers
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+# Requests wait on the LLM for a long time; the event loop keeps heartbeating
+timeout = 120
+graceful_timeout = 30
+keepalive = 5
+
+# Workers write their metrics to files that /metrics aggregates. The variable
+# has to be set before prometheus_client is imported by the preloaded app, and
+# the directory starts empty because files of old workers would add up.
+os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", settings.metrics_dir)
+shutil.rmtree(os.environ["PROMETHEUS_MULTIPROC_DIR"], ignore_errors=True)
+os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"], exist_ok=True)
+
+
+def when_ready(server):
+    import main
+    main.prepare_fork()
+
+
+def post_fork(server, worker):
+    import main
+    main.after_fork()
+
+
+def child_exit(server, worker):
+    from logic.metrics import mark_worker_dead
+    mark_worker_dead(worker.pid)
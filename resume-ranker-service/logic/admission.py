@@ -0,0 +1,280 @@
+import asyncio
+import math
+import re
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict
+
+from starlette.exceptions import HTTPException
+from starlette.responses import JSONResponse
+
+from logic.metrics import record_admission_queued, record_admission_rejected, record_stage, stage
+
+
+_BOUNDARY_PATTERN = re.compile(rb'boundary="?([^";,]+)"?', re.IGNORECASE)
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, reason: str, retry_after_s: int):
+        """
+        Raised when a request cannot be admitted.
+
+        Args:
+            reason: "queue_full" or "queue_timeout"
+            retry_after_s: Seconds the client should wait before retrying
+        """
+        super().__init__(f"Service is saturated ({reason})")
+        self.reason = reason
+        self.retry_after_s = retry_after_s
+
+
+class AdmissionController:
+    def __init__(self, max_in_flight: int, max_queue: int, queue_timeout_s: float):
+        """
+        Limit the requests served at once by this worker process.
+
+        Requests beyond max_in_flight wait in a FIFO queue of at most
+        max_queue entries for up to queue_timeout_s; anything beyond that is
+        rejected with a Retry-After estimated from recent service times.
+
+        Args:
+            max_in_flight: Requests served concurrently
+            max_queue: Requests allowed to wait for a slot (0 rejects at once)
+            queue_timeout_s: Longest wait for a slot
+        """
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout_s = queue_timeout_s
+        self._in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        # Moving average of the time an admitted request holds its slot
+        self._service_s = 1.0
+        self._lock = threading.Lock()
+        self._counters: Dict[str, int] = {
+            "admitted": 0, "queued": 0, "queue_full": 0, "queue_timeout": 0, "request_too_large": 0,
+            "file_too_large": 0,
+        }
+
+    def retry_after_s(self) -> int:
+        """Seconds until a slot is likely to free up, between 1 and 60."""
+        backlog = len(self._waiters) + 1
+        return int(min(60.0, max(1.0, math.ceil(self._service_s * backlog / self.max_in_flight))))
+
+    async def acquire(self) -> None:
+        """
+        Wait for a slot.
+
+        Raises:
+            AdmissionRejected: If the queue is full or the wait timed out
+        """
+        if self._in_flight < self.max_in_flight and not self._waiters:
+            self._in_flight += 1
+            self._count("admitted")
+            return
+        if len(self._waiters) >= self.max_queue:
+            self._reject("queue_full")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self._count("queued")
+        record_admission_queued(1)
+        try:
+            with stage("admission_wait"):
+                await asyncio.wait_for(asyncio.shield(waiter), self.queue_timeout_s)
+        except asyncio.TimeoutError:
+            if not waiter.done():
+                waiter.cancel()
+                self._reject("queue_timeout")
+        except asyncio.CancelledError:
+            # Client gone; pass on a slot handed over in the meantime
+            if waiter.done() and not waiter.cancelled():
+                self.release(0.0)
+            else:
+                waiter.cancel()
+            raise
+        finally:
+            record_admission_queued(-1)
+            try:
+                self._waiters.remove(waiter)
+            except ValueError:
+                pass
+        self._count("admitted")
+
+    def release(self, service_s: float) -> None:
+        """
+        Free a slot, handing it to the oldest waiting request.
+
+        Args:
+            service_s: Time the request held the slot
+        """
+        if service_s > 0:
+            self._service_s = 0.8 * self._service_s + 0.2 * service_s
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                # The slot moves to the waiter; in_flight is unchanged
+                waiter.set_result(None)
+                return
+        self._in_flight -= 1
+
+    def count_too_large(self, reason: str) -> None:
+        """Count a request rejected for its size ("request_too_large" or "file_too_large")."""
+        self._count(reason)
+        record_admission_rejected(reason)
+
+    def _reject(self, reason: str) -> None:
+        self._count(reason)
+        record_admission_rejected(reason)
+        raise AdmissionRejected(reason, self.retry_after_s())
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counters[name] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            counters = dict(self._counters)
+        return {
+            **counters,
+            "in_flight": self._in_flight,
+            "waiting": len(self._waiters),
+            "max_in_flight": self.max_in_flight,
+            "max_queue": self.max_queue,
+            "queue_timeout_s": self.queue_timeout_s,
+            "avg_service_s": round(self._service_s, 3),
+            "retry_after_s": self.retry_after_s(),
+        }
+
+
+class _PartSizeLimit:
+    def __init__(self, boundary: bytes, max_part_bytes: int):
+        """
+        Track the size of each part of a multipart body as it streams in.
+
+        Parts end at "--" followed by the boundary; the tail of each chunk
+        is kept so that delimiters split across chunks are found.
+
+        Args:
+            boundary: Multipart boundary from the Content-Type header
+            max_part_bytes: Largest part allowed, including its part headers
+        """
+        self._delimiter = b"--" + boundary
+        self._max_part_bytes = max_part_bytes
+        self._tail = b""
+        self._offset = 0
+        self._part_start = 0
+
+    def feed(self, chunk: bytes) -> bool:
+        """
+        Account for the next chunk of the body.
+
+        Returns:
+            False once a part exceeds the limit
+        """
+        buffer = self._tail + chunk
+        buffer_start = self._offset - len(self._tail)
+        self._offset += len(chunk)
+        self._tail = buffer[-(len(self._delimiter) - 1):]
+        position = buffer.find(self._delimiter)
+        while position != -1:
+            # A part ending inside this chunk
+            if buffer_start + position - self._part_start > self._max_part_bytes:
+                return False
+            self._part_start = buffer_start + position + len(self._delimiter)
+            position = buffer.find(self._delimiter, position + len(self._delimiter))
+        # The tail may be the start of the next delimiter
+        return self._offset - len(self._tail) - self._part_start <= self._max_part_bytes
+
+
+class AdmissionMiddleware:
+    def __init__(self, app, controller: AdmissionController, max_request_bytes: int, max_file_bytes: int):
+        """
+        ASGI middleware applying admission control and upload size limits.
+
+        Only multipart POST requests (the upload endpoints) are limited;
+        health, stats, metrics and job polling always get through. Sizes
+        are enforced while the body streams in: a Content-Length above
+        max_request_bytes is refused before reading anything, and a body or
+        a single part growing past its limit ends the read with 413. The
+        time spent waiting for the body is recorded as the upload_read stage.
+
+        Args:
+            app: ASGI application
+            controller: Admission controller of this worker process
+            max_request_bytes: Largest request body
+            max_file_bytes: Largest uploaded file
+        """
+        self.app = app
+        self.controller = controller
+        self.max_request_bytes = max_request_bytes
+        self.max_file_bytes = max_file_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST":
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope.get("headers", []))
+        content_type = headers.get(b"content-type", b"")
+        if not content_type.lower().startswith(b"multipart/"):
+            await self.app(scope, receive, send)
+            return
+
+        controller = self.controller
+        content_length = headers.get(b"content-length", b"")
+        if content_length.isdigit() and int(content_length) > self.max_request_bytes:
+            controller.count_too_large("request_too_large")
+            response = JSONResponse(
+                {"detail": f"Request body exceeds {self.max_request_bytes} bytes"},
+                status_code=413,
+                headers={"Connection": "close"}
+            )
+            await response(scope, receive, send)
+            return
+
+        try:
+            await controller.acquire()
+        except AdmissionRejected as e:
+            response = JSONResponse(
+                {"detail": f"{e}; retry later"},
+                status_code=429,
+                headers={"Retry-After": str(e.retry_after_s)}
+            )
+            await response(scope, receive, send)
+            return
+
+        match = _BOUNDARY_PATTERN.search(content_type)
+        parts = _PartSizeLimit(match.group(1), self.max_file_bytes) if match else None
+        received = 0
+        reading = 0.0
+        body_done = False
+
+        async def limited_receive():
+            nonlocal received, reading, body_done
+            if body_done:
+                # Later receives only wait for a disconnect
+                return await receive()
+            read_started = time.perf_counter()
+            message = await receive()
+            reading += time.perf_counter() - read_started
+            if message["type"] != "http.request":
+                body_done = True
+            else:
+                chunk = message.get("body", b"")
+                received += len(chunk)
+                if received > self.max_request_bytes:
+                    controller.count_too_large("request_too_large")
+                    raise HTTPException(413, f"Request body exceeds {self.max_request_bytes} bytes")
+                if parts is not None and not parts.feed(chunk):
+                    controller.count_too_large("file_too_large")
+                    raise HTTPException(413, f"Uploaded file exceeds {self.max_file_bytes} bytes")
+                if not message.get("more_body", False):
+                    body_done = True
+                    record_stage("upload_read", reading)
+            return message
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, limited_receive, send)
+        finally:
+            controller.release(time.perf_counter() - started)
@@ -0,0 +1,195 @@
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+from logic.metrics import record_analysis_decision
+
+
+# Hybrid scores at or above these read as a strong or moderate match in
+# templated summaries
+STRONG_MATCH_SCORE = 0.6
+MODERATE_MATCH_SCORE = 0.4
+
+# Skills listed per section of a templated summary
+_SUMMARY_SKILLS = 8
+
+
+@dataclass
+class AnalysisDecision:
+    analyze: bool
+    # Why the LLM was skipped: "below_threshold" or "outside_top_k"
+    reason: Optional[str] = None
+
+
+class AnalysisGate:
+    def __init__(self, min_score: float = 0.5, top_k: int = 10, max_jds: int = 1024):
+        """
+        Decide which candidates are worth an LLM analysis.
+
+        Policies:
+            "always": every candidate is analyzed
+            "threshold": candidates whose hybrid score reaches min_score
+            "top_k": candidates among the top_k best scores seen so far for
+                the same job description, across requests; a candidate
+                already in its top_k keeps its place when ranked again
+
+        Args:
+            min_score: Lowest hybrid score analyzed under "threshold"
+            top_k: Candidates analyzed per job description under "top_k"
+            max_jds: Job descriptions whose best scores are remembered; the
+                least recently used are forgotten first
+        """
+        if top_k < 1 or max_jds < 1:
+            raise ValueError("top_k and max_jds must be at least 1")
+        self.min_score = min_score
+        self.top_k = top_k
+        self.max_jds = max_jds
+        # Job description key -> candidate key -> score, per JD at most top_k
+        self._best: "OrderedDict[str, Dict[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[str, int]] = {}
+
+    def decide(
+        self, policy: str, jd_key: str, candidate_keys: Sequence[str], scores: Sequence[float]
+    ) -> List[AnalysisDecision]:
+        """
+        Decide for a group of candidates ranked against one job description.
+
+        Args:
+            policy: "always", "threshold" or "top_k"
+            jd_key: Key of the job description, e.g. its text digest
+            candidate_keys: Keys of the candidates, e.g. their text digests
+            scores: Hybrid scores, aligned with candidate_keys
+
+        Returns:
+            AnalysisDecision per candidate, aligned with candidate_keys
+        """
+        if policy == "always":
+            decisions = [AnalysisDecision(True) for _ in scores]
+        elif policy == "threshold":
+            decisions = [
+                AnalysisDecision(True) if score >= self.min_score else AnalysisDecision(False, "below_threshold")
+                for score in scores
+            ]
+        elif policy == "top_k":
+            decisions = self._decide_top_k(jd_key, candidate_keys, scores)
+        else:
+            raise ValueError(f"Unknown analysis policy {policy!r}")
+
+        with self._lock:
+            counters = self._counters.setdefault(policy, {"llm": 0, "template": 0})
+            for decision in decisions:
+                counters["llm" if decision.analyze else "template"] += 1
+        for decision in decisions:
+            record_analysis_decision(policy, "llm" if decision.analyze else "template")
+        return decisions
+
+    def _decide_top_k(
+        self, jd_key: str, candidate_keys: Sequence[str], scores: Sequence[float]
+    ) -> List[AnalysisDecision]:
+        decisions: List[Optional[AnalysisDecision]] = [None] * len(scores)
+        with self._lock:
+            best = self._best.pop(jd_key, None)
+            if best is None:
+                best = {}
+                while len(self._best) >= self.max_jds:
+                    self._best.popitem(last=False)
+            self._best[jd_key] = best
+            # Best candidates first, so a group fills the top_k in rank order
+            for i in sorted(range(len(scores)), key=lambda i: -scores[i]):
+                key, score = candidate_keys[i], float(scores[i])
+                if key in best:
+                    best[key] = max(best[key], score)
+                elif len(best) < self.top_k:
+                    best[key] = score
+                else:
+                    weakest = min(best, key=best.get)
+                    if score <= best[weakest]:
+                        decisions[i] = AnalysisDecision(False, "outside_top_k")
+                        continue
+                    del best[weakest]
+                    best[key] = score
+                decisions[i] = AnalysisDecision(True)
+        return decisions
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "min_score": self.min_score,
+                "top_k": self.top_k,
+                "jds_tracked": len(self._best),
+                "decisions": {policy: dict(counters) for policy, counters in self._counters.items()},
+            }
+
+
+def templated_summary(
+    similarity_score: float,
+    lexical_score: Optional[float],
+    hybrid_score: float,
+    matched_skills: Sequence[str],
+    missing_skills: Sequence[str],
+    reason: Optional[str] = None
+) -> str:
+    """
+    Summarize a candidate from its scores and skill overlap, without the LLM.
+
+    The sections follow those of the LLM analysis.
+
+    Args:
+        similarity_score: Embedding similarity
+        lexical_score: BM25 and skill score, if computed
+        hybrid_score: Fused score the candidate is ranked by
+        matched_skills: Job description skills found in the resume
+        missing_skills: Job description skills not found in the resume
+        reason: Why the LLM analysis was skipped ("below_threshold" or
+            "outside_top_k")
+
+    Returns:
+        Summary text
+    """
+    if hybrid_score >= STRONG_MATCH_SCORE:
+        assessment = "Strong match"
+    elif hybrid_score >= MODERATE_MATCH_SCORE:
+        assessment = "Moderate match"
+    else:
+        assessment = "Weak match"
+    signals = f"embedding similarity {similarity_score:.2f}"
+    if lexical_score is not None:
+        signals += f", keyword overlap {lexical_score:.2f}"
+
+    listed = len(matched_skills) + len(missing_skills)
+    if matched_skills:
+        strengths = f"Mentions {len(matched_skills)} of {listed} skills listed in the job description: " \
+                    f"{_skill_list(matched_skills)}."
+    elif listed:
+        strengths = "Mentions none of the skills listed in the job description."
+    else:
+        strengths = "The job description lists no recognised skills to compare."
+    if missing_skills:
+        gaps = f"No mention of {_skill_list(missing_skills)}."
+    elif listed:
+        gaps = "None found in the skills listed."
+    else:
+        gaps = "Not assessed without listed skills."
+
+    if reason == "below_threshold":
+        skipped = "the score is below the analysis threshold"
+    elif reason == "outside_top_k":
+        skipped = "the candidate is outside the top candidates for this job description"
+    else:
+        skipped = "of the analysis policy"
+    return (
+        f"1. Overall match assessment: {assessment} (hybrid score {hybrid_score:.2f}: {signals}).\n"
+        f"2. Key strengths: {strengths}\n"
+        f"3. Potential gaps or concerns: {gaps}\n"
+        f"4. Recommendations: Detailed LLM analysis was skipped because {skipped}; "
+        f"review the resume manually if the scores look borderline.\n"
+    )
+
+
+def _skill_list(skills: Sequence[str]) -> str:
+    shown = ", ".join(skills[:_SUMMARY_SKILLS])
+    if len(skills) > _SUMMARY_SKILLS:
+        shown += f" and {len(skills) - _SUMMARY_SKILLS} more"
+    return shown
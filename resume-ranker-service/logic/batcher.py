@@ -0,0 +1,205 @@
+import asyncio
+import time
+from collections import Counter, deque
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from logic.embedder import Embedder
+from logic.executors import Executors
+
+
+class EmbeddingBatcher:
+    def __init__(
+        self,
+        embedder: Embedder,
+        executors: Executors,
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0,
+        stats_window: int = 1000
+    ):
+        """
+        Collect texts from concurrent requests into batched encode calls.
+
+        A batch is closed when it reaches max_batch_size or when its oldest
+        text has waited max_wait_ms. At most one batch per embedding thread
+        is in flight, so under load the queue grows and batches get larger.
+
+        Args:
+            embedder: Embedder whose embed_batch is called once per batch
+            executors: Pools used to run the encode call
+            max_batch_size: Maximum number of texts per encode call
+            max_wait_ms: Maximum time a text waits for its batch to fill
+            stats_window: Number of recent samples kept for percentiles
+        """
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        if max_wait_ms < 0:
+            raise ValueError("max_wait_ms cannot be negative")
+
+        self.embedder = embedder
+        self.executors = executors
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._collector: Optional[asyncio.Task] = None
+        self._inflight: set = set()
+
+        self._batches = 0
+        self._items = 0
+        self._batch_sizes: Counter = Counter()
+        self._waits = deque(maxlen=stats_window)
+        self._encode_times = deque(maxlen=stats_window)
+
+    async def start(self) -> None:
+        """Start the collector task on the running event loop."""
+        if self._collector is not None:
+            return
+        self._queue = asyncio.Queue()
+        self._slots = asyncio.Semaphore(self.executors.embed_workers)
+        self._collector = asyncio.create_task(self._collect())
+
+    async def stop(self) -> None:
+        """Stop collecting and fail any texts still waiting."""
+        if self._collector is None:
+            return
+        self._collector.cancel()
+        try:
+            await self._collector
+        except asyncio.CancelledError:
+            pass
+        self._collector = None
+        if self._inflight:
+            await asyncio.gather(*self._inflight, return_exceptions=True)
+        while not self._queue.empty():
+            _, future, _ = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError("Embedding batcher stopped"))
+
+    async def embed(self, text: str) -> np.ndarray:
+        """
+        Queue a text for the next batch and wait for its embedding.
+
+        Args:
+            text: Input text to embed
+
+        Returns:
+            Embedding vector as numpy array
+        """
+        if not text or not text.strip():
+            raise ValueError("Text cannot be empty")
+        if self._collector is None:
+            raise RuntimeError("Embedding batcher has not been started")
+
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((text, future, time.perf_counter()))
+        return await future
+
+    async def embed_many(self, texts: List[str]) -> np.ndarray:
+        """
+        Queue several texts at once and wait for all their embeddings.
+
+        The texts share batches with those of concurrent requests, split
+        at max_batch_size like any other queued texts.
+
+        Args:
+            texts: Input texts to embed
+
+        Returns:
+            Matrix with one embedding per row, aligned with texts
+        """
+        if not texts:
+            raise ValueError("Texts list cannot be empty")
+        return np.vstack(await asyncio.gather(*(self.embed(text) for text in texts)))
+
+    async def _collect(self) -> None:
+        while True:
+            # Wait for a free embedding thread first so the queue keeps
+            # filling while every thread is busy encoding.
+            await self._slots.acquire()
+            batch = []
+            try:
+                batch.append(await self._queue.get())
+                deadline = batch[0][2] + self.max_wait
+                while len(batch) < self.max_batch_size:
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        # Take whatever is already queued without waiting
+                        if self._queue.empty():
+                            break
+                        batch.append(self._queue.get_nowait())
+                        continue
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                    except asyncio.TimeoutError:
+                        break
+            except BaseException:
+                self._slots.release()
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(RuntimeError("Embedding batcher stopped"))
+                raise
+
+            task = asyncio.create_task(self._run_batch(batch))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def _run_batch(self, batch: List[Tuple[str, asyncio.Future, float]]) -> None:
+        try:
+            started = time.perf_counter()
+            for _, _, enqueued in batch:
+                self._waits.append(started - enqueued)
+
+            texts = [text for text, _, _ in batch]
+            try:
+                vectors = await self.executors.run_embed(self.embedder.embed_batch, texts)
+            except Exception as e:
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+
+            self._encode_times.append(time.perf_counter() - started)
+            self._batches += 1
+            self._items += len(batch)
+            self._batch_sizes[len(batch)] += 1
+
+            for i, (_, future, _) in enumerate(batch):
+                if not future.done():
+                    future.set_result(np.array(vectors[i], copy=True))
+        finally:
+            self._slots.release()
+
+    def stats(self) -> dict:
+        """
+        Report batch-size and queue-wait statistics.
+
+        Returns:
+            Dictionary of counters, batch-size distribution and wait times in ms
+        """
+        waits = np.asarray(self._waits, dtype=np.float64) * 1000.0
+        encode = np.asarray(self._encode_times, dtype=np.float64) * 1000.0
+
+        def summary(values: np.ndarray) -> dict:
+            if values.size == 0:
+                return {"mean": 0.0, "p50": 0.0, "p95": 0.0, "max": 0.0}
+            return {
+                "mean": round(float(values.mean()), 3),
+                "p50": round(float(np.percentile(values, 50)), 3),
+                "p95": round(float(np.percentile(values, 95)), 3),
+                "max": round(float(values.max()), 3),
+            }
+
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+            "batches": self._batches,
+            "items": self._items,
+            "mean_batch_size": round(self._items / self._batches, 3) if self._batches else 0.0,
+            "batch_sizes": {str(size): count for size, count in sorted(self._batch_sizes.items())},
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "queue_wait_ms": summary(waits),
+            "encode_ms": summary(encode),
+        }
@@ -0,0 +1,237 @@
+import hashlib
+import os
+import re
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, BinaryIO, Optional, Union
+
+import numpy as np
+
+
+# Read size when hashing file objects
+_DIGEST_CHUNK_BYTES = 64 * 1024
+
+
+def content_digest(data: Union[bytes, BinaryIO]) -> str:
+    """
+    Compute the content address of an uploaded file.
+
+    File objects are hashed in chunks from the start and rewound
+    afterwards, so large uploads are never copied into memory.
+
+    Args:
+        data: Raw file bytes or a seekable binary file object
+
+    Returns:
+        Hex SHA-256 digest
+    """
+    if isinstance(data, (bytes, bytearray)):
+        return hashlib.sha256(data).hexdigest()
+    digest = hashlib.sha256()
+    data.seek(0)
+    for chunk in iter(lambda: data.read(_DIGEST_CHUNK_BYTES), b""):
+        digest.update(chunk)
+    data.seek(0)
+    return digest.hexdigest()
+
+
+def _slug(value: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", value)
+
+
+class ContentCache:
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024, disk_dir: Optional[str] = None):
+        """
+        Content-addressed cache for extracted text and embeddings.
+
+        Entries live in an in-memory LRU bounded by max_bytes. When disk_dir
+        is set every entry is also written there, so the cache survives
+        restarts and memory evictions fall back to disk. Disk reads and
+        writes block; on the event loop, look up with memory_only=True and
+        leave the disk store to a thread.
+
+        Args:
+            max_bytes: Memory budget for cached entries
+            disk_dir: Optional directory for the persistent store
+        """
+        if max_bytes < 0:
+            raise ValueError("max_bytes cannot be negative")
+
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self._entries: "OrderedDict[str, Any]" = OrderedDict()
+        self._sizes = {}
+        self._used_bytes = 0
+        self._lock = threading.Lock()
+        self._counters = {
+            kind: {"hits": 0, "disk_hits": 0, "misses": 0}
+            for kind in ("text", "embedding")
+        }
+        self._evictions = 0
+
+        if disk_dir:
+            os.makedirs(os.path.join(disk_dir, "text"), exist_ok=True)
+            os.makedirs(os.path.join(disk_dir, "embedding"), exist_ok=True)
+
+    # -- public API -------------------------------------------------------
+
+    def get_text(self, digest: str, extraction: str = "", memory_only: bool = False) -> Optional[str]:
+        """
+        Look up the extracted text of a document.
+
+        Args:
+            digest: Content digest of the uploaded bytes
+            extraction: Name of the extraction settings the text was produced under
+            memory_only: Skip the disk store; a miss is then only counted
+                when there is no disk store to fall back on
+
+        Returns:
+            Cached text, or None on a miss
+        """
+        key = f"text:{extraction}:{digest}"
+        return self._get("text", key, self._text_path(digest, extraction), memory_only)
+
+    def put_text(self, digest: str, text: str, extraction: str = "") -> None:
+        """
+        Store the extracted text of a document.
+
+        Args:
+            digest: Content digest of the uploaded bytes
+            text: Extracted text
+            extraction: Name of the extraction settings the text was produced under
+        """
+        self._put(f"text:{extraction}:{digest}", text, len(text.encode("utf-8")))
+        path = self._text_path(digest, extraction)
+        if path and not os.path.exists(path):
+            self._write_file(path, text.encode("utf-8"))
+
+    def get_embedding(self, digest: str, model_name: str, memory_only: bool = False) -> Optional[np.ndarray]:
+        """
+        Look up the embedding of a document for a given model.
+
+        Args:
+            digest: Content digest of the uploaded bytes
+            model_name: Name of the embedding model
+            memory_only: Skip the disk store; a miss is then only counted
+                when there is no disk store to fall back on
+
+        Returns:
+            Read-only float32 embedding, or None on a miss
+        """
+        key = f"embedding:{model_name}:{digest}"
+        return self._get("embedding", key, self._embedding_path(digest, model_name), memory_only)
+
+    def put_embedding(self, digest: str, model_name: str, embedding: np.ndarray) -> np.ndarray:
+        """
+        Store the embedding of a document for a given model.
+
+        Args:
+            digest: Content digest of the uploaded bytes
+            model_name: Name of the embedding model
+            embedding: Embedding vector
+
+        Returns:
+            The stored read-only float32 copy
+        """
+        vector = np.array(embedding, dtype=np.float32, copy=True)
+        vector.flags.writeable = False
+        self._put(f"embedding:{model_name}:{digest}", vector, vector.nbytes)
+        path = self._embedding_path(digest, model_name)
+        if path and not os.path.exists(path):
+            self._write_file(path, vector.tobytes())
+        return vector
+
+    def stats(self) -> dict:
+        """
+        Report hit/miss counters and memory usage.
+
+        Returns:
+            Dictionary of per-kind counters and cache occupancy
+        """
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "used_bytes": self._used_bytes,
+                "max_bytes": self.max_bytes,
+                "evictions": self._evictions,
+                "disk_enabled": bool(self.disk_dir),
+                "text": dict(self._counters["text"]),
+                "embedding": dict(self._counters["embedding"]),
+            }
+
+    # -- internals --------------------------------------------------------
+
+    def _text_path(self, digest: str, extraction: str) -> Optional[str]:
+        if not self.disk_dir:
+            return None
+        return os.path.join(self.disk_dir, "text", _slug(extraction) or "default", f"{digest}.txt")
+
+    def _embedding_path(self, digest: str, model_name: str) -> Optional[str]:
+        if not self.disk_dir:
+            return None
+        return os.path.join(self.disk_dir, "embedding", _slug(model_name), f"{digest}.f32")
+
+    def _get(self, kind: str, key: str, path: Optional[str], memory_only: bool) -> Any:
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self._counters[kind]["hits"] += 1
+                return self._entries[key]
+            if memory_only and path:
+                return None
+
+        value = self._read_file(kind, path)
+        with self._lock:
+            if value is None:
+                self._counters[kind]["misses"] += 1
+                return None
+            self._counters[kind]["disk_hits"] += 1
+        size = value.nbytes if kind == "embedding" else len(value.encode("utf-8"))
+        self._put(key, value, size)
+        return value
+
+    def _put(self, key: str, value: Any, size: int) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._used_bytes -= self._sizes.pop(key)
+                del self._entries[key]
+            if size > self.max_bytes:
+                return
+            self._entries[key] = value
+            self._sizes[key] = size
+            self._used_bytes += size
+            while self._used_bytes > self.max_bytes:
+                old_key, _ = self._entries.popitem(last=False)
+                self._used_bytes -= self._sizes.pop(old_key)
+                self._evictions += 1
+
+    @staticmethod
+    def _read_file(kind: str, path: Optional[str]) -> Any:
+        if not path:
+            return None
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        if kind == "text":
+            return data.decode("utf-8")
+        vector = np.frombuffer(data, dtype=np.float32).copy()
+        vector.flags.writeable = False
+        return vector
+
+    @staticmethod
+    def _write_file(path: str, data: bytes) -> None:
+        # Write to a temporary file first so readers never see partial data
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
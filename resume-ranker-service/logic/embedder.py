@@ -1,17 +1,95 @@
-from sentence_transformers import SentenceTransformer
-from typing import List
+from typing import List, Optional
+import threading
+import time
 import numpy as np
 
+from logic.embedding_backends import SAMPLE_TEXTS, EmbeddingBackend, load_backend
+
 
 class Embedder:
-    def __init__(self, model_name: str = "all-MiniLM-L6-v2"):
+    def __init__(
+        self,
+        model_name: str = "all-MiniLM-L6-v2",
+        backend: str = "torch",
+        model_dir: Optional[str] = None,
+        threads: int = 0
+    ):
         """
-        Initialize the sentence transformer model.
+        Initialize the sentence embedding model.
+        
+        The backend is loaded on first use (or by warm_up), so constructing
+        an Embedder is cheap and only the selected engine is imported.
         
         Args:
             model_name: Name of the SentenceTransformer model
+            backend: "torch", "onnx" or "int8"
+            model_dir: Local model directory, prepared on first use
+            threads: Intra-op threads of the backend (0 keeps the library default)
+        """
+        self.base_model_name = model_name
+        self.backend_name = backend
+        # Embeddings of different backends differ slightly, so caches keep them apart
+        self.model_name = model_name if backend == "torch" else f"{model_name}@{backend}"
+        self.model_dir = model_dir
+        self.threads = threads
+        self.load_ms: Optional[float] = None
+        self.warmup_ms: Optional[float] = None
+        self._backend: Optional[EmbeddingBackend] = None
+        self._load_lock = threading.Lock()
+
+    @property
+    def backend(self) -> EmbeddingBackend:
+        """The loaded backend, loading it on first access."""
+        if self._backend is None:
+            with self._load_lock:
+                if self._backend is None:
+                    started = time.perf_counter()
+                    self._backend = load_backend(self.backend_name, self.base_model_name, self.model_dir, self.threads)
+                    self.load_ms = round((time.perf_counter() - started) * 1000.0, 1)
+        return self._backend
+
+    def load(self) -> None:
+        """Load the backend without running it, e.g. before forking workers."""
+        self.backend
+
+    def warm_up(self) -> float:
+        """
+        Load the backend and run a first encode call.
+        
+        Returns:
+            Time taken in milliseconds
+        """
+        started = time.perf_counter()
+        self.embed_batch(SAMPLE_TEXTS)
+        self.warmup_ms = round((time.perf_counter() - started) * 1000.0, 1)
+        return self.warmup_ms
+
+    def stats(self) -> dict:
+        """
+        Report the backend in use and its startup cost.
+        
+        Returns:
+            Dictionary with model, backend, load and warm-up times
         """
-        self.model = SentenceTransformer(model_name)
+        return {
+            "model_name": self.base_model_name,
+            "backend": self.backend_name,
+            "model_dir": self.model_dir,
+            "loaded": self._backend is not None,
+            "load_ms": self.load_ms,
+            "warmup_ms": self.warmup_ms,
+        }
+
+    @property
+    def dimension(self) -> int:
+        """Size of the embedding vectors."""
+        return self.backend.dimension
+
+    @property
+    def max_tokens(self) -> int:
+        """Tokens of text the model reads per input, excluding special tokens."""
+        # [CLS] and [SEP] take two positions of the model's sequence length
+        return max(int(self.backend.max_seq_length) - 2, 1)
     
     def embed(self, text: str) -> np.ndarray:
         """
@@ -21,12 +99,12 @@ class Embedder:
             text: Input text to embed
             
         Returns:
-            Embedding vector as numpy array
+            L2-normalized embedding vector as numpy array
         """
         if not text or not text.strip():
             raise ValueError("Text cannot be empty")
         
-        return self.model.encode(text, convert_to_numpy=True)
+        return self.backend.encode([text])[0]
     
     def embed_batch(self, texts: List[str]) -> np.ndarray:
         """
@@ -36,10 +114,104 @@ class Embedder:
             texts: List of input texts to embed
             
         Returns:
-            Embedding vectors as numpy array
+            L2-normalized embedding vectors as numpy array
         """
         if not texts:
             raise ValueError("Texts list cannot be empty")
         
-        return self.model.encode(texts, convert_to_numpy=True)
+        return self.backend.encode(texts)
+
+    def chunk_text(
+        self,
+        text: str,
+        window_tokens: Optional[int] = None,
+        overlap_tokens: int = 32,
+        max_chunks: int = 16
+    ) -> List[str]:
+        """
+        Split text into overlapping token windows the model reads in full.
 
+        When a document needs more than max_chunks windows, max_chunks
+        windows are spread evenly over it so the beginning and the end are
+        both covered.
+
+        Args:
+            text: Input text
+            window_tokens: Tokens per window (defaults to the model's limit)
+            overlap_tokens: Tokens shared by consecutive windows, at most half a window
+            max_chunks: Maximum number of windows per document
+
+        Returns:
+            List of chunk texts in document order
+        """
+        window_tokens = min(window_tokens or self.max_tokens, self.max_tokens)
+        if overlap_tokens < 0:
+            raise ValueError("overlap_tokens cannot be negative")
+        overlap_tokens = min(overlap_tokens, window_tokens // 2)
+        if max_chunks < 1:
+            raise ValueError("max_chunks must be at least 1")
+        if not text or not text.strip():
+            raise ValueError("Text cannot be empty")
+
+        spans = self.backend.token_spans(text)
+        if len(spans) <= window_tokens:
+            return [text.strip()]
+
+        stride = window_tokens - overlap_tokens
+        last_start = len(spans) - window_tokens
+        starts = list(range(0, last_start, stride)) + [last_start]
+        if len(starts) > max_chunks:
+            starts = np.linspace(0, last_start, max_chunks).round().astype(int).tolist()
+
+        return [
+            text[spans[start][0]:spans[start + window_tokens - 1][1]]
+            for start in starts
+        ]
+
+    def embed_chunks_batch(
+        self,
+        texts: List[str],
+        window_tokens: Optional[int] = None,
+        overlap_tokens: int = 32,
+        max_chunks: int = 16
+    ) -> List[np.ndarray]:
+        """
+        Embed every chunk of several documents in a single encode call.
+
+        Args:
+            texts: List of input texts to embed
+            window_tokens: Tokens per window (defaults to the model's limit)
+            overlap_tokens: Tokens shared by consecutive windows
+            max_chunks: Maximum number of windows per document
+
+        Returns:
+            One matrix of L2-normalized chunk embeddings per document
+        """
+        if not texts:
+            raise ValueError("Texts list cannot be empty")
+
+        chunked = [self.chunk_text(text, window_tokens, overlap_tokens, max_chunks) for text in texts]
+        vectors = self.embed_batch([chunk for chunks in chunked for chunk in chunks])
+        bounds = np.cumsum([len(chunks) for chunks in chunked])[:-1]
+        return np.split(vectors, bounds)
+
+    def embed_chunks(
+        self,
+        text: str,
+        window_tokens: Optional[int] = None,
+        overlap_tokens: int = 32,
+        max_chunks: int = 16
+    ) -> np.ndarray:
+        """
+        Embed all chunks of one document in a single encode call.
+
+        Args:
+            text: Input text to embed
+            window_tokens: Tokens per window (defaults to the model's limit)
+            overlap_tokens: Tokens shared by consecutive windows
+            max_chunks: Maximum number of windows per document
+
+        Returns:
+            Matrix of L2-normalized chunk embeddings, one row per chunk
+        """
+        return self.embed_chunks_batch([text], window_tokens, overlap_tokens, max_chunks)[0]
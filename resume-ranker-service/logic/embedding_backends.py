@@ -0,0 +1,367 @@
+import argparse
+import json
+import os
+import re
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+# Backends selectable with RANKER_EMBED_BACKEND
+BACKENDS = ("torch", "onnx", "int8")
+
+ONNX_FILENAME = os.path.join("onnx", "model.onnx")
+
+# Sample texts used to warm up a backend and to compare backends
+SAMPLE_TEXTS = [
+    "Senior Python developer with eight years of experience building REST APIs in FastAPI and Django.",
+    "Looking for a backend engineer familiar with Spring Boot, PostgreSQL and microservice architectures.",
+    "Led a team of five engineers migrating a monolith to Kubernetes on AWS, cutting deployment time by 70%.",
+    "Data scientist skilled in pandas, scikit-learn and PyTorch; built churn models for a telecom provider.",
+    "Responsibilities include designing CI/CD pipelines, writing Terraform modules and on-call support.",
+    "Bachelor of Science in Computer Science; certified Kubernetes administrator.",
+    "Frontend developer with React, TypeScript and accessibility experience.",
+    "Must have strong communication skills and experience mentoring junior developers.",
+]
+
+
+class EmbeddingBackend:
+    """Runs a sentence embedding model; subclasses wrap one inference engine."""
+
+    name = ""
+    max_seq_length = 256
+    dimension = 0
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed texts.
+
+        Args:
+            texts: Input texts
+
+        Returns:
+            Float32 matrix of L2-normalized embeddings, one row per text
+        """
+        raise NotImplementedError
+
+    def token_spans(self, text: str) -> List[Tuple[int, int]]:
+        """
+        Find the character span of every model token in a text.
+
+        Args:
+            text: Input text
+
+        Returns:
+            List of (start, end) character offsets, without special tokens
+        """
+        # Whitespace words approximate tokens when no fast tokenizer is available
+        return [match.span() for match in re.finditer(r"\S+", text)]
+
+
+def _normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class TorchBackend(EmbeddingBackend):
+    name = "torch"
+
+    def __init__(self, model_path: str, threads: int = 0):
+        """
+        Full-precision SentenceTransformer on PyTorch, the reference backend.
+
+        Args:
+            model_path: Local model directory or model name
+            threads: Torch intra-op threads (0 keeps the library default)
+        """
+        import torch
+        from sentence_transformers import SentenceTransformer
+
+        if threads:
+            torch.set_num_threads(threads)
+        self.model = SentenceTransformer(model_path, device="cpu")
+        self.max_seq_length = int(self.model.max_seq_length)
+        self.dimension = self.model.get_sentence_embedding_dimension()
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        return self.model.encode(texts, convert_to_numpy=True, normalize_embeddings=True)
+
+    def token_spans(self, text: str) -> List[Tuple[int, int]]:
+        tokenizer = getattr(self.model, "tokenizer", None)
+        if tokenizer is None or not getattr(tokenizer, "is_fast", False):
+            return super().token_spans(text)
+        encoding = tokenizer(
+            text, add_special_tokens=False, return_offsets_mapping=True, truncation=False, verbose=False
+        )
+        return [(start, end) for start, end in encoding["offset_mapping"] if end > start]
+
+
+class QuantizedBackend(TorchBackend):
+    name = "int8"
+
+    def __init__(self, model_path: str, threads: int = 0):
+        """
+        SentenceTransformer with its linear layers dynamically quantized to int8.
+
+        Weights are stored as int8 and activations are quantized on the fly,
+        which speeds up CPU inference at a small accuracy cost.
+
+        Args:
+            model_path: Local model directory or model name
+            threads: Torch intra-op threads (0 keeps the library default)
+        """
+        import torch
+
+        super().__init__(model_path, threads)
+        self.model = torch.quantization.quantize_dynamic(self.model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+class OnnxBackend(EmbeddingBackend):
+    name = "onnx"
+
+    def __init__(self, model_path: str, threads: int = 0, batch_size: int = 32):
+        """
+        Transformer exported to ONNX and run with ONNX Runtime, without PyTorch.
+
+        Tokenization uses the tokenizers library and pooling follows the
+        model's sentence-transformers pooling config.
+
+        Args:
+            model_path: Local model directory containing onnx/model.onnx
+            threads: ONNX Runtime intra-op threads (0 keeps the library default)
+            batch_size: Texts per inference call
+        """
+        try:
+            import onnxruntime
+            from tokenizers import Tokenizer
+        except ImportError as e:
+            raise ImportError("The onnx embedding backend requires the onnxruntime and tokenizers packages") from e
+
+        onnx_path = os.path.join(model_path, ONNX_FILENAME)
+        if not os.path.exists(onnx_path):
+            raise FileNotFoundError(
+                f"{onnx_path} not found; run python -m logic.embedding_backends prepare --model-dir {model_path}"
+            )
+
+        options = onnxruntime.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = onnxruntime.InferenceSession(onnx_path, options, providers=["CPUExecutionProvider"])
+        self.input_names = [model_input.name for model_input in self.session.get_inputs()]
+        self.batch_size = batch_size
+
+        st_config = _read_json(os.path.join(model_path, "sentence_bert_config.json"))
+        self.max_seq_length = int(st_config.get("max_seq_length", 256))
+        pooling = _read_json(os.path.join(model_path, "1_Pooling", "config.json"))
+        self.pooling = "cls" if pooling.get("pooling_mode_cls_token") else "mean"
+        self.dimension = int(pooling.get("word_embedding_dimension", 0)) or self.session.get_outputs()[0].shape[-1]
+
+        tokenizer_path = os.path.join(model_path, "tokenizer.json")
+        self.tokenizer = Tokenizer.from_file(tokenizer_path)
+        self.tokenizer.enable_truncation(max_length=self.max_seq_length)
+        if self.tokenizer.padding is None:
+            self.tokenizer.enable_padding()
+        # Separate instance without truncation for chunking long documents
+        self.span_tokenizer = Tokenizer.from_file(tokenizer_path)
+        self.span_tokenizer.no_truncation()
+        self.span_tokenizer.no_padding()
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        # Sort by length so each batch pads to a similar size
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        vectors = np.empty((len(texts), self.dimension), dtype=np.float32)
+        for start in range(0, len(order), self.batch_size):
+            batch = order[start:start + self.batch_size]
+            encodings = self.tokenizer.encode_batch([texts[i] for i in batch])
+            arrays = {
+                "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+                "attention_mask": np.array([e.attention_mask for e in encodings], dtype=np.int64),
+                "token_type_ids": np.array([e.type_ids for e in encodings], dtype=np.int64),
+            }
+            hidden = self.session.run(None, {name: arrays[name] for name in self.input_names})[0]
+            if self.pooling == "cls":
+                pooled = hidden[:, 0]
+            else:
+                mask = arrays["attention_mask"][:, :, None].astype(np.float32)
+                pooled = (hidden * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+            vectors[batch] = pooled
+        return _normalize_rows(vectors)
+
+    def token_spans(self, text: str) -> List[Tuple[int, int]]:
+        encoding = self.span_tokenizer.encode(text, add_special_tokens=False)
+        return [(start, end) for start, end in encoding.offsets if end > start]
+
+
+def _read_json(path: str) -> dict:
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def export_onnx(model_path: str) -> str:
+    """
+    Export the transformer of a SentenceTransformer model to ONNX.
+
+    Args:
+        model_path: Local model directory; the file is written to onnx/model.onnx
+
+    Returns:
+        Path of the exported model
+    """
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    model = SentenceTransformer(model_path, device="cpu")
+    transformer = model[0].auto_model.eval()
+    transformer.config.return_dict = False
+    sample = model.tokenizer(["warm up"], return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+    onnx_path = os.path.join(model_path, ONNX_FILENAME)
+    os.makedirs(os.path.dirname(onnx_path), exist_ok=True)
+    tmp_path = onnx_path + ".tmp"
+    with torch.no_grad():
+        torch.onnx.export(
+            transformer,
+            tuple(sample[name] for name in input_names),
+            tmp_path,
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=14
+        )
+    os.replace(tmp_path, onnx_path)
+    return onnx_path
+
+
+def prepare_model_dir(model_name: str, model_dir: str, export: bool = False) -> str:
+    """
+    Make sure a model is available in a local directory.
+
+    The model is downloaded and saved on first use, so later starts load
+    from disk without network access.
+
+    Args:
+        model_name: SentenceTransformer model name
+        model_dir: Local model directory
+        export: Also export the ONNX model if it is missing
+
+    Returns:
+        The model directory
+    """
+    if not os.path.exists(os.path.join(model_dir, "modules.json")):
+        from sentence_transformers import SentenceTransformer
+
+        SentenceTransformer(model_name, device="cpu").save(model_dir)
+    if export and not os.path.exists(os.path.join(model_dir, ONNX_FILENAME)):
+        export_onnx(model_dir)
+    return model_dir
+
+
+def load_backend(name: str, model_name: str, model_dir: Optional[str] = None, threads: int = 0) -> EmbeddingBackend:
+    """
+    Load an embedding backend.
+
+    Only the requested backend's engine is imported.
+
+    Args:
+        name: One of BACKENDS
+        model_name: SentenceTransformer model name
+        model_dir: Local model directory, prepared on first use
+        threads: Intra-op threads (0 keeps the library default)
+
+    Returns:
+        Loaded backend
+    """
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown embedding backend {name!r}, expected one of {', '.join(BACKENDS)}")
+    model_path = prepare_model_dir(model_name, model_dir, export=name == "onnx") if model_dir else model_name
+    if name == "onnx":
+        if not model_dir:
+            raise ValueError("The onnx embedding backend needs a model directory")
+        return OnnxBackend(model_path, threads)
+    if name == "int8":
+        return QuantizedBackend(model_path, threads)
+    return TorchBackend(model_path, threads)
+
+
+def parity_report(
+    model_name: str,
+    model_dir: Optional[str] = None,
+    backends: Sequence[str] = BACKENDS,
+    texts: Optional[List[str]] = None,
+    threads: int = 0
+) -> Dict[str, dict]:
+    """
+    Measure how far each backend's scores drift from the float32 torch reference.
+
+    Args:
+        model_name: SentenceTransformer model name
+        model_dir: Local model directory
+        backends: Backends to compare
+        texts: Texts to embed (defaults to SAMPLE_TEXTS)
+        threads: Intra-op threads (0 keeps the library default)
+
+    Returns:
+        Per backend: load and encode time, the lowest cosine between its
+        vectors and the reference vectors, and the maximum and mean absolute
+        difference of pairwise similarity scores
+    """
+    texts = texts or SAMPLE_TEXTS
+    reference = load_backend("torch", model_name, model_dir, threads).encode(texts)
+    reference_scores = reference @ reference.T
+
+    report = {}
+    for name in backends:
+        started = time.perf_counter()
+        backend = load_backend(name, model_name, model_dir, threads)
+        load_ms = (time.perf_counter() - started) * 1000.0
+        backend.encode(texts[:1])
+
+        started = time.perf_counter()
+        vectors = backend.encode(texts)
+        encode_ms = (time.perf_counter() - started) * 1000.0
+
+        drift = np.abs(vectors @ vectors.T - reference_scores)
+        report[name] = {
+            "load_ms": round(load_ms, 1),
+            "encode_ms": round(encode_ms, 1),
+            "min_vector_cosine": round(float((vectors * reference).sum(axis=1).min()), 6),
+            "max_score_drift": round(float(drift.max()), 6),
+            "mean_score_drift": round(float(drift.mean()), 6),
+        }
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Prepare embedding models and compare backends")
+    parser.add_argument("command", choices=("prepare", "parity"))
+    parser.add_argument("--model-name", default="all-MiniLM-L6-v2")
+    parser.add_argument("--model-dir", required=True)
+    parser.add_argument("--backend", action="append", choices=BACKENDS,
+                        help="Backend to compare (repeatable, defaults to all)")
+    parser.add_argument("--texts-file", help="File with one text per line for the parity check")
+    parser.add_argument("--threads", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.command == "prepare":
+        prepare_model_dir(args.model_name, args.model_dir, export=True)
+        print(f"Model ready in {args.model_dir}")
+        return
+
+    texts = None
+    if args.texts_file:
+        with open(args.texts_file, encoding="utf-8") as f:
+            texts = [line.strip() for line in f if line.strip()]
+    report = parity_report(args.model_name, args.model_dir, args.backend or BACKENDS, texts, args.threads)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+import asyncio
+import functools
+import multiprocessing
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Iterator, Optional
+
+
+class Executors:
+    def __init__(
+        self,
+        cpu_executor: str = "thread",
+        cpu_workers: int = 4,
+        embed_workers: int = 2,
+        llm_workers: int = 8,
+        storage_workers: int = 4
+    ):
+        """
+        Bounded executors that keep blocking work off the event loop.
+
+        PDF parsing runs on a thread or process pool. Embedding always runs
+        on threads because the model lives in this process, and LLM calls
+        get their own pool so slow provider calls cannot starve parsing.
+        Local storage (SQLite stores and index files) has a pool of its own
+        so that hung provider calls cannot starve it either.
+
+        Args:
+            cpu_executor: "thread" or "process" for the PDF parsing pool
+            cpu_workers: Size of the PDF parsing pool
+            embed_workers: Number of threads running model encode calls
+            llm_workers: Number of threads running LLM calls
+            storage_workers: Number of threads running local storage calls
+        """
+        self.cpu_executor = cpu_executor
+        self.cpu_workers = cpu_workers
+        self.embed_workers = embed_workers
+        self.llm_workers = llm_workers
+        self.storage_workers = storage_workers
+        self._cpu: Optional[Executor] = None
+        self._embed: Optional[Executor] = None
+        self._llm: Optional[Executor] = None
+        self._storage: Optional[Executor] = None
+
+    def start(self) -> None:
+        """Create the pools. Called once the event loop is running."""
+        if self._cpu is not None:
+            return
+        if self.cpu_executor == "process":
+            # spawn avoids forking a process that already holds torch threads
+            self._cpu = ProcessPoolExecutor(
+                max_workers=self.cpu_workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        else:
+            self._cpu = ThreadPoolExecutor(
+                max_workers=self.cpu_workers, thread_name_prefix="ranker-cpu"
+            )
+        self._embed = ThreadPoolExecutor(
+            max_workers=self.embed_workers, thread_name_prefix="ranker-embed"
+        )
+        self._llm = ThreadPoolExecutor(
+            max_workers=self.llm_workers, thread_name_prefix="ranker-llm"
+        )
+        self._storage = ThreadPoolExecutor(
+            max_workers=self.storage_workers, thread_name_prefix="ranker-storage"
+        )
+
+    def shutdown(self) -> None:
+        """Shut down all pools, cancelling queued work."""
+        for pool in (self._cpu, self._embed, self._llm, self._storage):
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
+        self._cpu = self._embed = self._llm = self._storage = None
+
+    async def _run(self, pool: Optional[Executor], func: Callable, *args, **kwargs) -> Any:
+        if pool is None:
+            raise RuntimeError("Executors have not been started")
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(pool, functools.partial(func, *args, **kwargs))
+
+    async def run_cpu(self, func: Callable, *args, **kwargs) -> Any:
+        """
+        Run a CPU-bound function on the parsing pool.
+
+        With the process executor, func and its arguments must be picklable.
+        """
+        return await self._run(self._cpu, func, *args, **kwargs)
+
+    async def run_embed(self, func: Callable, *args, **kwargs) -> Any:
+        """Run a model encode call or other in-process numeric work on the embedding threads."""
+        return await self._run(self._embed, func, *args, **kwargs)
+
+    async def run_io(self, func: Callable, *args, **kwargs) -> Any:
+        """Run a blocking LLM provider call on the LLM threads."""
+        return await self._run(self._llm, func, *args, **kwargs)
+
+    async def run_storage(self, func: Callable, *args, **kwargs) -> Any:
+        """Run a blocking local storage call (SQLite, index files) on the storage threads."""
+        return await self._run(self._storage, func, *args, **kwargs)
+
+    async def stream_io(self, func: Callable[..., Iterator], *args, **kwargs) -> AsyncIterator:
+        """
+        Drain a blocking iterator on the LLM threads, yielding items as they arrive.
+
+        If the consumer stops early (e.g. the client disconnected), the
+        producer thread stops at the next item.
+        """
+        if self._llm is None:
+            raise RuntimeError("Executors have not been started")
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        stopped = threading.Event()
+        finished = object()
+
+        def produce() -> None:
+            try:
+                for item in func(*args, **kwargs):
+                    if stopped.is_set():
+                        return
+                    loop.call_soon_threadsafe(queue.put_nowait, (item, None))
+            except Exception as e:
+                loop.call_soon_threadsafe(queue.put_nowait, (finished, e))
+                return
+            loop.call_soon_threadsafe(queue.put_nowait, (finished, None))
+
+        producer = loop.run_in_executor(self._llm, produce)
+        try:
+            while True:
+                item, error = await queue.get()
+                if item is finished:
+                    if error is not None:
+                        raise error
+                    return
+                yield item
+        finally:
+            stopped.set()
+            if producer.done():
+                producer.result()
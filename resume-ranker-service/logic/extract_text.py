@@ -1,27 +1,344 @@
-import PyPDF2
+import asyncio
+import os
+import shutil
+import tempfile
+import time
+from dataclasses import dataclass, field
 from io import BytesIO
-from typing import Optional
+from typing import BinaryIO, Iterator, List, Optional, Tuple, Union
+
+import PyPDF2
+
+
+# PDF content as bytes, a binary file object or the path of a file
+PdfSource = Union[bytes, BinaryIO, str]
+
+
+class ExtractionLimitError(ValueError):
+    """Raised when a document exceeds a configured extraction limit."""
+
+
+class UnreadablePDFError(ValueError):
+    """Raised when an uploaded file cannot be parsed as a PDF."""
+
+
+@dataclass
+class ExtractionResult:
+    text: str
+    pages_total: int
+    pages_extracted: int
+    truncated: bool = False
+    truncation_reason: Optional[str] = None
+    page_timings_ms: List[float] = field(default_factory=list)
+    elapsed_ms: float = 0.0
+
 
+def _open_reader(pdf_content: PdfSource) -> PyPDF2.PdfReader:
+    stream = BytesIO(pdf_content) if isinstance(pdf_content, (bytes, bytearray)) else pdf_content
+    return PyPDF2.PdfReader(stream)
 
-def extract_text_from_pdf(pdf_content: bytes) -> str:
+
+def _iter_pages(
+    reader: PyPDF2.PdfReader,
+    start: int,
+    stop: int,
+    deadline: Optional[float]
+) -> Iterator[Tuple[int, str, float]]:
+    for index in range(start, stop):
+        if deadline is not None and time.time() >= deadline:
+            return
+        started = time.perf_counter()
+        text = reader.pages[index].extract_text() or ""
+        yield index, text, (time.perf_counter() - started) * 1000.0
+
+
+def count_pages(pdf_content: PdfSource) -> int:
     """
-    Extract text from PDF file content.
-    
+    Count the pages of a PDF without extracting any text.
+
     Args:
-        pdf_content: PDF file as bytes
-        
+        pdf_content: PDF file as bytes, a binary file object or a file path
+
     Returns:
-        Extracted text as string
+        Number of pages
+    """
+    try:
+        return len(_open_reader(pdf_content).pages)
+    except Exception as e:
+        raise UnreadablePDFError(f"Error extracting text from PDF: {str(e)}")
+
+
+def iter_page_text(
+    pdf_content: PdfSource,
+    start: int = 0,
+    stop: Optional[int] = None,
+    deadline: Optional[float] = None
+) -> Iterator[Tuple[int, str, float]]:
+    """
+    Lazily extract text page by page.
+
+    Pages are parsed only when the iterator reaches them, and iteration
+    stops before a page once the wall-clock deadline has passed. A page
+    already started is extracted to the end, however long it takes.
+
+    Args:
+        pdf_content: PDF file as bytes, a binary file object or a file path
+        start: Index of the first page
+        stop: Index after the last page (defaults to the end)
+        deadline: Optional time.time() value after which no page is started
+
+    Yields:
+        Tuples of (page index, page text, extraction time in ms)
+    """
+    reader = _open_reader(pdf_content)
+    pages_total = len(reader.pages)
+    stop = pages_total if stop is None else min(stop, pages_total)
+    yield from _iter_pages(reader, start, stop, deadline)
+
+
+def extract_page_range(
+    pdf_content: PdfSource,
+    start: int,
+    stop: int,
+    deadline: Optional[float] = None
+) -> List[Tuple[str, float]]:
+    """
+    Extract a range of pages; the unit of work for parallel extraction.
+
+    Args:
+        pdf_content: PDF file as bytes, a binary file object or a file path
+        start: Index of the first page
+        stop: Index after the last page
+        deadline: Optional time.time() value after which no page is started
+
+    Returns:
+        List of (page text, extraction time in ms), shorter than the range
+        if the deadline was hit
     """
     try:
-        pdf_file = BytesIO(pdf_content)
-        pdf_reader = PyPDF2.PdfReader(pdf_file)
-        
-        text = ""
-        for page in pdf_reader.pages:
-            text += page.extract_text() + "\n"
-        
-        return text.strip()
+        return [(text, ms) for _, text, ms in iter_page_text(pdf_content, start, stop, deadline)]
     except Exception as e:
-        raise ValueError(f"Error extracting text from PDF: {str(e)}")
+        raise UnreadablePDFError(f"Error extracting text from PDF: {str(e)}")
+
+
+def pdf_size(pdf_content: PdfSource) -> int:
+    """
+    Size of a PDF in bytes, without reading it.
+
+    Args:
+        pdf_content: PDF file as bytes, a seekable binary file object or a file path
+
+    Returns:
+        Size in bytes
+    """
+    if isinstance(pdf_content, (bytes, bytearray)):
+        return len(pdf_content)
+    if isinstance(pdf_content, str):
+        return os.path.getsize(pdf_content)
+    position = pdf_content.tell()
+    size = pdf_content.seek(0, os.SEEK_END)
+    pdf_content.seek(position)
+    return size
+
 
+def _check_size(pdf_content: PdfSource, max_bytes: Optional[int]) -> None:
+    if max_bytes is None:
+        return
+    size = pdf_size(pdf_content)
+    if size > max_bytes:
+        raise ExtractionLimitError(f"PDF is {size} bytes, the limit is {max_bytes} bytes")
+
+
+def _deadline(time_budget_s: Optional[float]) -> Optional[float]:
+    return time.time() + time_budget_s if time_budget_s else None
+
+
+@dataclass
+class _Pages:
+    """Pages extracted so far, readable while a thread is still extracting."""
+
+    total: int = 0
+    planned: int = 0
+    parts: List[Tuple[str, float]] = field(default_factory=list)
+
+
+def _extract_into(
+    pages: _Pages,
+    pdf_content: PdfSource,
+    max_pages: Optional[int],
+    deadline: Optional[float]
+) -> None:
+    try:
+        reader = _open_reader(pdf_content)
+        total = len(reader.pages)
+        pages.planned = min(total, max_pages) if max_pages else total
+        pages.total = total
+        for _, text, ms in _iter_pages(reader, 0, pages.planned, deadline):
+            pages.parts.append((text, ms))
+    except Exception as e:
+        raise UnreadablePDFError(f"Error extracting text from PDF: {str(e)}")
+
+
+def _build_result(
+    parts: List[Tuple[str, float]],
+    pages_total: int,
+    pages_planned: int,
+    started: float,
+    timed_out: bool = False
+) -> ExtractionResult:
+    reason = None
+    if timed_out or len(parts) < pages_planned:
+        reason = "time_budget"
+    elif pages_planned < pages_total:
+        reason = "max_pages"
+    return ExtractionResult(
+        # One join instead of repeated concatenation across pages
+        text="\n".join(text for text, _ in parts).strip(),
+        pages_total=pages_total,
+        pages_extracted=len(parts),
+        truncated=reason is not None,
+        truncation_reason=reason,
+        page_timings_ms=[round(ms, 3) for _, ms in parts],
+        elapsed_ms=round((time.perf_counter() - started) * 1000.0, 3)
+    )
+
+
+def extract_pdf(
+    pdf_content: PdfSource,
+    max_pages: Optional[int] = None,
+    max_bytes: Optional[int] = None,
+    time_budget_s: Optional[float] = None
+) -> ExtractionResult:
+    """
+    Extract text from a PDF page by page, honouring extraction limits.
+
+    The time budget is checked between pages: a page started before it
+    runs out is extracted to the end.
+
+    Args:
+        pdf_content: PDF file as bytes, a binary file object or a file path
+        max_pages: Only the first max_pages pages are extracted
+        max_bytes: Documents larger than this are rejected
+        time_budget_s: Stop starting new pages after this many seconds
+
+    Returns:
+        ExtractionResult with the text and per-page timings
+    """
+    started = time.perf_counter()
+    _check_size(pdf_content, max_bytes)
+    pages = _Pages()
+    _extract_into(pages, pdf_content, max_pages, _deadline(time_budget_s))
+    return _build_result(pages.parts, pages.total, pages.planned, started)
+
+
+def _spool_to_file(pdf_content: PdfSource) -> str:
+    # Process pool tasks get a path instead of a pickled copy of the document
+    with tempfile.NamedTemporaryFile(prefix="ranker-", suffix=".pdf", delete=False) as spooled:
+        if isinstance(pdf_content, (bytes, bytearray)):
+            spooled.write(pdf_content)
+        else:
+            pdf_content.seek(0)
+            shutil.copyfileobj(pdf_content, spooled)
+    return spooled.name
+
+
+async def extract_pdf_parallel(
+    pdf_content: PdfSource,
+    executors,
+    max_pages: Optional[int] = None,
+    max_bytes: Optional[int] = None,
+    time_budget_s: Optional[float] = None,
+    parallel_min_pages: int = 16,
+    pages_per_task: int = 8
+) -> ExtractionResult:
+    """
+    Extract text from a PDF, splitting long documents across the CPU pool.
+
+    Page ranges only run in parallel on a process pool; with threads the
+    document is extracted sequentially because PyPDF2 holds the GIL.
+
+    On a process pool the document is written to a temporary file once and
+    each task opens it by path. The time budget is enforced on the tasks'
+    futures: ranges not finished when it runs out are dropped (and not
+    started if still queued). On threads the pages finished when it runs
+    out are returned. Either way a page that hangs the parser cannot hold
+    up the result, though its worker stays busy until the page is done.
+
+    Args:
+        pdf_content: PDF file as bytes or a binary file object
+        executors: Executors whose CPU pool (and storage threads, for the
+            temporary file) run the extraction
+        max_pages: Only the first max_pages pages are extracted
+        max_bytes: Documents larger than this are rejected
+        time_budget_s: Stop starting new pages after this many seconds
+        parallel_min_pages: Minimum page count before splitting a document
+        pages_per_task: Number of pages per parallel task
+
+    Returns:
+        ExtractionResult with the text and per-page timings
+    """
+    _check_size(pdf_content, max_bytes)
+    started = time.perf_counter()
+    deadline = _deadline(time_budget_s)
+    if executors.cpu_executor != "process":
+        pages = _Pages()
+        task = asyncio.ensure_future(executors.run_cpu(_extract_into, pages, pdf_content, max_pages, deadline))
+        try:
+            remaining = max(deadline - time.time(), 0.0) if deadline is not None else None
+            await asyncio.wait([task], timeout=remaining)
+        finally:
+            task.cancel()
+        if task.done() and not task.cancelled():
+            task.result()
+            return _build_result(pages.parts, pages.total, pages.planned, started)
+        # The thread is stuck in a page; it stops before the next one
+        return _build_result(list(pages.parts), pages.total, pages.planned, started, timed_out=True)
+
+    path = await executors.run_storage(_spool_to_file, pdf_content)
+    try:
+        pages_total = await executors.run_cpu(count_pages, path)
+        pages_planned = min(pages_total, max_pages) if max_pages else pages_total
+        ranges = [
+            (start, min(start + pages_per_task, pages_planned))
+            for start in range(0, pages_planned, pages_per_task)
+        ] if pages_planned >= parallel_min_pages else [(0, pages_planned)]
+        tasks = [
+            asyncio.ensure_future(executors.run_cpu(extract_page_range, path, start, stop, deadline))
+            for start, stop in ranges
+        ]
+        try:
+            remaining = max(deadline - time.time(), 0.0) if deadline is not None else None
+            done = (await asyncio.wait(tasks, timeout=remaining))[0] if tasks else set()
+        finally:
+            for task in tasks:
+                task.cancel()
+        for task in done:
+            # Mark failures as retrieved; those of kept ranges are raised below
+            task.exception()
+
+        # Keep the contiguous prefix: stop at the first range cut short or
+        # still running when the budget ran out
+        parts = []
+        for (start, stop), task in zip(ranges, tasks):
+            if task not in done:
+                break
+            chunk = task.result()
+            parts.extend(chunk)
+            if len(chunk) < stop - start:
+                break
+        return _build_result(parts, pages_total, pages_planned, started)
+    finally:
+        os.unlink(path)
+
+
+def extract_text_from_pdf(pdf_content: PdfSource) -> str:
+    """
+    Extract text from PDF file content.
+
+    Args:
+        pdf_content: PDF file as bytes, a binary file object or a file path
+
+    Returns:
+        Extracted text as string
+    """
+    return extract_pdf(pdf_content).text
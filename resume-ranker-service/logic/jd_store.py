@@ -0,0 +1,445 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, replace
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from logic.lexical_index import AnalyzedText
+from logic.prompt_builder import JDPassages
+
+
+@dataclass
+class JDFeatures:
+    # Settings the features were derived under (model, chunking, passages, skills)
+    derivation: str
+    embedding: np.ndarray
+    chunks: np.ndarray
+    lexical: AnalyzedText
+    passages: JDPassages
+
+
+@dataclass
+class JobDescription:
+    id: str
+    version: int
+    filename: str
+    digest: str
+    text: str
+    created_at: float
+    accessed_at: float
+    # None in listings, which do not load the stored features
+    features: Optional[JDFeatures] = None
+
+
+_SUMMARY_COLUMNS = "id, version, filename, digest, text, created_at, accessed_at"
+_FEATURE_COLUMNS = "derivation, dim, embedding, chunks, passage_vectors, lexical, passages"
+
+
+def _readonly(array: np.ndarray) -> np.ndarray:
+    array.setflags(write=False)
+    return array
+
+
+def _encode_features(features: JDFeatures) -> tuple:
+    dim = int(features.embedding.shape[-1])
+    return (
+        features.derivation,
+        dim,
+        np.ascontiguousarray(features.embedding, dtype=np.float32).tobytes(),
+        np.ascontiguousarray(features.chunks, dtype=np.float32).tobytes(),
+        np.ascontiguousarray(features.passages.vectors, dtype=np.float32).tobytes(),
+        json.dumps({
+            "terms": dict(features.lexical.terms),
+            "length": features.lexical.length,
+            "skills": features.lexical.skills,
+        }),
+        json.dumps({"passages": features.passages.passages, "passage_tokens": features.passages.passage_tokens}),
+    )
+
+
+def _decode_features(row) -> JDFeatures:
+    derivation, dim, embedding, chunks, passage_vectors, lexical, passages = row
+    lexical = json.loads(lexical)
+    passages = json.loads(passages)
+    return JDFeatures(
+        derivation=derivation,
+        embedding=_readonly(np.frombuffer(embedding, dtype=np.float32)),
+        chunks=_readonly(np.frombuffer(chunks, dtype=np.float32).reshape(-1, dim)),
+        lexical=AnalyzedText(terms=Counter(lexical["terms"]), length=lexical["length"], skills=lexical["skills"]),
+        passages=JDPassages(
+            passages=passages["passages"],
+            vectors=_readonly(np.frombuffer(passage_vectors, dtype=np.float32).reshape(-1, dim)),
+            passage_tokens=passages["passage_tokens"]
+        )
+    )
+
+
+def _row_to_summary(row) -> JobDescription:
+    return JobDescription(
+        id=row[0],
+        version=row[1],
+        filename=row[2],
+        digest=row[3],
+        text=row[4],
+        created_at=row[5],
+        accessed_at=row[6]
+    )
+
+
+class JobDescriptionStore:
+    def __init__(
+        self,
+        path: str = ":memory:",
+        max_entries: int = 1000,
+        max_versions: int = 5,
+        ttl_s: float = 30 * 86400.0,
+        memory_entries: int = 64,
+        purge_interval_s: float = 60.0
+    ):
+        """
+        SQLite store of registered job descriptions and their precomputed features.
+
+        Every registration of new content under an id adds a version; the
+        newest max_versions versions of an id are kept. Ids unused for
+        ttl_s are expired and the least recently used ids are evicted
+        beyond max_entries. Decoded entries are also kept in a small
+        in-memory LRU, so ranking against a hot job description does not
+        read and decode its embeddings every time.
+
+        Args:
+            path: SQLite database file, or ":memory:" for a process-local store
+            max_entries: Maximum number of job description ids
+            max_versions: Versions kept per id
+            ttl_s: Time after the last use before an id expires
+            memory_entries: Decoded versions kept in memory per process
+            purge_interval_s: How often expired ids are looked for
+        """
+        if max_entries < 1 or max_versions < 1:
+            raise ValueError("max_entries and max_versions must be at least 1")
+        if ttl_s <= 0:
+            raise ValueError("ttl_s must be positive")
+        if memory_entries < 0:
+            raise ValueError("memory_entries cannot be negative")
+
+        self.path = path
+        self.max_entries = max_entries
+        self.max_versions = max_versions
+        self.ttl_s = ttl_s
+        self.memory_entries = memory_entries
+        self.purge_interval_s = purge_interval_s
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[Tuple[str, int], JobDescription]" = OrderedDict()
+        self._last_purge = 0.0
+        self._counters = {
+            "registered": 0, "unchanged": 0, "hits": 0, "memory_hits": 0, "misses": 0,
+            "rederived": 0, "evictions": 0, "expirations": 0,
+        }
+
+        if path != ":memory:":
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+        self._conn = self._connect()
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS job_descriptions ("
+            " id TEXT NOT NULL,"
+            " version INTEGER NOT NULL,"
+            " filename TEXT NOT NULL,"
+            " digest TEXT NOT NULL,"
+            " text TEXT NOT NULL,"
+            " derivation TEXT NOT NULL,"
+            " dim INTEGER NOT NULL,"
+            " embedding BLOB NOT NULL,"
+            " chunks BLOB NOT NULL,"
+            " passage_vectors BLOB NOT NULL,"
+            " lexical TEXT NOT NULL,"
+            " passages TEXT NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL,"
+            " PRIMARY KEY (id, version))"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS job_descriptions_accessed ON job_descriptions (accessed_at)"
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        if self.path != ":memory:":
+            conn.execute("PRAGMA journal_mode=WAL")
+            # Worker processes share the file, so wait for each other's writes
+            conn.execute("PRAGMA busy_timeout=5000")
+        return conn
+
+    def close(self) -> None:
+        """Close the database connection, e.g. in a parent process before it forks workers."""
+        with self._lock:
+            self._conn.close()
+
+    def reopen(self) -> None:
+        """Open a fresh connection, e.g. in a worker process after fork."""
+        with self._lock:
+            self._conn = self._connect()
+
+    def register(
+        self,
+        jd_id: Optional[str],
+        filename: str,
+        digest: str,
+        text: str,
+        features: JDFeatures
+    ) -> Tuple[JobDescription, bool]:
+        """
+        Store a job description as the newest version of its id.
+
+        Registering the same content as the newest version again does not
+        add a version; its features are refreshed if they were derived
+        under other settings.
+
+        Args:
+            jd_id: Id to add a version to, or None for a new id
+            filename: Uploaded file name
+            digest: Content digest of the uploaded PDF
+            text: Extracted text
+            features: Precomputed embeddings, lexical terms and prompt passages
+
+        Returns:
+            Tuple of (stored job description, True if a new version was added)
+        """
+        jd_id = jd_id or uuid.uuid4().hex
+        now = time.time()
+        encoded = _encode_features(features)
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                latest = self._conn.execute(
+                    "SELECT version, digest, derivation FROM job_descriptions WHERE id = ? "
+                    "ORDER BY version DESC LIMIT 1",
+                    (jd_id,)
+                ).fetchone()
+                if latest is not None and latest[1] == digest:
+                    version, created = latest[0], False
+                    if latest[2] != features.derivation:
+                        self._update_features(jd_id, version, encoded)
+                    self._conn.execute(
+                        "UPDATE job_descriptions SET accessed_at = ? WHERE id = ? AND version = ?",
+                        (now, jd_id, version)
+                    )
+                else:
+                    version, created = (latest[0] + 1 if latest is not None else 1), True
+                    self._conn.execute(
+                        f"INSERT INTO job_descriptions ({_SUMMARY_COLUMNS}, {_FEATURE_COLUMNS})"
+                        " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        (jd_id, version, filename, digest, text, now, now) + encoded
+                    )
+                    self._conn.execute(
+                        "DELETE FROM job_descriptions WHERE id = ? AND version <= ?",
+                        (jd_id, version - self.max_versions)
+                    )
+                    self._evict()
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._counters["registered" if created else "unchanged"] += 1
+            if created:
+                self._forget(jd_id, below=version - self.max_versions + 1)
+            else:
+                self._forget(jd_id, version=version)
+            return self._load(jd_id, version, now), created
+
+    def get(self, jd_id: str, version: Optional[int] = None) -> Optional[JobDescription]:
+        """
+        Look up a registered job description and mark it as used.
+
+        Args:
+            jd_id: Job description id
+            version: Version number, or None for the newest
+
+        Returns:
+            JobDescription with its features, or None if unknown, evicted or expired
+        """
+        now = time.time()
+        with self._lock:
+            if now - self._last_purge >= self.purge_interval_s:
+                self._purge_expired(now)
+            if version is None:
+                row = self._conn.execute(
+                    "SELECT version FROM job_descriptions WHERE id = ? ORDER BY version DESC LIMIT 1",
+                    (jd_id,)
+                ).fetchone()
+            else:
+                row = self._conn.execute(
+                    "SELECT version FROM job_descriptions WHERE id = ? AND version = ?", (jd_id, version)
+                ).fetchone()
+            if row is None:
+                self._counters["misses"] += 1
+                return None
+            self._conn.execute(
+                "UPDATE job_descriptions SET accessed_at = ? WHERE id = ? AND version = ?",
+                (now, jd_id, row[0])
+            )
+            self._counters["hits"] += 1
+            return self._load(jd_id, row[0], now)
+
+    def update_features(self, jd_id: str, version: int, features: JDFeatures) -> None:
+        """
+        Replace the features of a version, e.g. after the embedding model changed.
+
+        Args:
+            jd_id: Job description id
+            version: Version number
+            features: Newly derived features
+        """
+        encoded = _encode_features(features)
+        with self._lock:
+            self._update_features(jd_id, version, encoded)
+            self._forget(jd_id, version=version)
+            self._counters["rederived"] += 1
+
+    def versions(self, jd_id: str) -> List[JobDescription]:
+        """
+        List the stored versions of a job description, newest first.
+
+        Args:
+            jd_id: Job description id
+
+        Returns:
+            JobDescription per version, without features
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {_SUMMARY_COLUMNS} FROM job_descriptions WHERE id = ? ORDER BY version DESC",
+                (jd_id,)
+            ).fetchall()
+        return [_row_to_summary(row) for row in rows]
+
+    def list(self, limit: int = 100) -> List[JobDescription]:
+        """
+        List the newest version of every registered job description.
+
+        Args:
+            limit: Maximum number of entries, most recently registered first
+
+        Returns:
+            JobDescription per id, without features
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT j.id, j.version, j.filename, j.digest, j.text, j.created_at, j.accessed_at"
+                " FROM job_descriptions j JOIN"
+                " (SELECT id, MAX(version) AS version FROM job_descriptions GROUP BY id) latest"
+                " ON j.id = latest.id AND j.version = latest.version"
+                " ORDER BY j.created_at DESC LIMIT ?",
+                (limit,)
+            ).fetchall()
+        return [_row_to_summary(row) for row in rows]
+
+    def delete(self, jd_id: str, version: Optional[int] = None) -> int:
+        """
+        Delete a job description or one of its versions.
+
+        Args:
+            jd_id: Job description id
+            version: Version number, or None for all versions
+
+        Returns:
+            Number of versions deleted
+        """
+        with self._lock:
+            if version is None:
+                deleted = self._conn.execute("DELETE FROM job_descriptions WHERE id = ?", (jd_id,)).rowcount
+                self._forget(jd_id)
+            else:
+                deleted = self._conn.execute(
+                    "DELETE FROM job_descriptions WHERE id = ? AND version = ?", (jd_id, version)
+                ).rowcount
+                self._forget(jd_id, version=version)
+            return deleted
+
+    def stats(self) -> dict:
+        """
+        Report counters and store size.
+
+        Returns:
+            Dictionary of counters, id and version counts and memory entries
+        """
+        with self._lock:
+            ids, versions = self._conn.execute(
+                "SELECT COUNT(DISTINCT id), COUNT(*) FROM job_descriptions"
+            ).fetchone()
+            return {
+                **self._counters,
+                "ids": ids,
+                "versions": versions,
+                "max_entries": self.max_entries,
+                "max_versions": self.max_versions,
+                "ttl_s": self.ttl_s,
+                "memory_entries": len(self._memory),
+            }
+
+    def _load(self, jd_id: str, version: int, now: float) -> JobDescription:
+        # Versions are immutable apart from re-derived features, which
+        # drop the memory entry, so a cached entry is current
+        key = (jd_id, version)
+        cached = self._memory.get(key)
+        if cached is not None:
+            self._memory.move_to_end(key)
+            self._counters["memory_hits"] += 1
+            return replace(cached, accessed_at=now)
+        row = self._conn.execute(
+            f"SELECT {_SUMMARY_COLUMNS}, {_FEATURE_COLUMNS} FROM job_descriptions WHERE id = ? AND version = ?",
+            (jd_id, version)
+        ).fetchone()
+        jd = _row_to_summary(row)
+        jd.features = _decode_features(row[7:])
+        jd.accessed_at = now
+        if self.memory_entries:
+            self._memory[key] = jd
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+        return jd
+
+    def _update_features(self, jd_id: str, version: int, encoded: tuple) -> None:
+        self._conn.execute(
+            "UPDATE job_descriptions SET derivation = ?, dim = ?, embedding = ?, chunks = ?,"
+            " passage_vectors = ?, lexical = ?, passages = ? WHERE id = ? AND version = ?",
+            encoded + (jd_id, version)
+        )
+
+    def _forget(self, jd_id: str, version: Optional[int] = None, below: Optional[int] = None) -> None:
+        # Drop memory entries of one version, of versions below a number, or of every version
+        for key in [key for key in self._memory if key[0] == jd_id]:
+            if (version is None or key[1] == version) and (below is None or key[1] < below):
+                del self._memory[key]
+
+    def _evict(self) -> None:
+        excess = self._conn.execute(
+            "SELECT COUNT(DISTINCT id) FROM job_descriptions"
+        ).fetchone()[0] - self.max_entries
+        if excess <= 0:
+            return
+        evicted = [row[0] for row in self._conn.execute(
+            "SELECT id FROM job_descriptions GROUP BY id ORDER BY MAX(accessed_at) LIMIT ?", (excess,)
+        )]
+        self._conn.executemany("DELETE FROM job_descriptions WHERE id = ?", [(jd_id,) for jd_id in evicted])
+        for jd_id in evicted:
+            self._forget(jd_id)
+        self._counters["evictions"] += len(evicted)
+
+    def _purge_expired(self, now: float) -> None:
+        self._last_purge = now
+        expired = [row[0] for row in self._conn.execute(
+            "SELECT id FROM job_descriptions GROUP BY id HAVING MAX(accessed_at) < ?", (now - self.ttl_s,)
+        )]
+        if not expired:
+            return
+        self._conn.executemany("DELETE FROM job_descriptions WHERE id = ?", [(jd_id,) for jd_id in expired])
+        for jd_id in expired:
+            self._forget(jd_id)
+        self._counters["expirations"] += len(expired)
@@ -0,0 +1,637 @@
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from io import BytesIO
+from typing import Awaitable, BinaryIO, Callable, Dict, List, Optional, Union
+
+from logic.executors import Executors
+
+logger = logging.getLogger(__name__)
+
+# Chunk size when copying input files into the database
+_COPY_CHUNK_BYTES = 64 * 1024
+
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+TERMINAL_STATES = (SUCCEEDED, FAILED, CANCELLED)
+
+
+class JobFailed(Exception):
+    """Raised by a job handler for failures that a retry cannot fix."""
+
+
+@dataclass
+class Job:
+    id: str
+    kind: str
+    status: str
+    params: dict
+    attempts: int
+    max_attempts: int
+    progress_done: int
+    progress_total: int
+    result: Optional[dict]
+    error: Optional[str]
+    cancel_requested: bool
+    created_at: float
+    updated_at: float
+    started_at: Optional[float]
+    finished_at: Optional[float]
+
+
+@dataclass
+class JobFile:
+    role: str
+    filename: str
+    # Bytes, or a seekable file object copied into the database in chunks
+    content: Union[bytes, BinaryIO]
+
+
+@dataclass
+class StoredJobFile:
+    # Input file of a claimed job; its content is read with JobQueue.read_file
+    job_id: str
+    position: int
+    role: str
+    filename: str
+
+
+ProgressCallback = Callable[[int, int], None]
+JobHandler = Callable[[Job, List[StoredJobFile], ProgressCallback], Awaitable[dict]]
+
+_JOB_COLUMNS = (
+    "id, kind, status, params, attempts, max_attempts, progress_done, progress_total, "
+    "result, error, cancel_requested, created_at, updated_at, started_at, finished_at"
+)
+
+
+def _row_to_job(row) -> Job:
+    return Job(
+        id=row[0],
+        kind=row[1],
+        status=row[2],
+        params=json.loads(row[3]),
+        attempts=row[4],
+        max_attempts=row[5],
+        progress_done=row[6],
+        progress_total=row[7],
+        result=json.loads(row[8]) if row[8] is not None else None,
+        error=row[9],
+        cancel_requested=bool(row[10]),
+        created_at=row[11],
+        updated_at=row[12],
+        started_at=row[13],
+        finished_at=row[14]
+    )
+
+
+class JobQueue:
+    def __init__(
+        self,
+        path: str,
+        executors: Executors,
+        workers: int = 2,
+        max_attempts: int = 3,
+        retry_backoff_s: float = 5.0,
+        lease_s: float = 120.0,
+        retention_s: float = 7 * 86400.0,
+        poll_interval_s: float = 1.0
+    ):
+        """
+        Durable job queue in SQLite, drained by a pool of asyncio workers.
+
+        Jobs and their input files are stored before submit() returns, so
+        queued work survives restarts. A worker leases the job it runs and
+        renews the lease while the handler is busy; a job whose lease
+        expires (for example because its process died) is picked up again.
+        Failed attempts are retried with exponential backoff up to
+        max_attempts, and finished jobs are purged after retention_s.
+
+        The workers run every database call on the storage threads, and
+        input files are read one at a time as the handler needs them. Only
+        the current lease owner can finish or requeue a running job, so a
+        worker whose lease expired cannot overwrite the outcome of the
+        worker that picked the job up again.
+
+        Args:
+            path: SQLite database file
+            executors: Pools whose storage threads run the database calls
+            workers: Number of jobs run concurrently by this process
+            max_attempts: Attempts per job before it is marked failed
+            retry_backoff_s: Delay before the first retry, doubled per attempt
+            lease_s: How long a running job stays claimed without renewal
+            retention_s: How long finished jobs and their results are kept
+            poll_interval_s: How often idle workers look for new or retried jobs
+        """
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+        if max_attempts < 1:
+            raise ValueError("max_attempts must be at least 1")
+        if retry_backoff_s < 0:
+            raise ValueError("retry_backoff_s cannot be negative")
+        if lease_s <= 0 or retention_s <= 0 or poll_interval_s <= 0:
+            raise ValueError("lease_s, retention_s and poll_interval_s must be positive")
+
+        self.path = path
+        self.executors = executors
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.retry_backoff_s = retry_backoff_s
+        self.lease_s = lease_s
+        self.retention_s = retention_s
+        self.poll_interval_s = poll_interval_s
+
+        self._owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._handlers: Dict[str, JobHandler] = {}
+        self._running: Dict[str, asyncio.Task] = {}
+        self._worker_tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stopping = False
+        self._last_purge = 0.0
+        self._lock = threading.Lock()
+        self._counters = {"submitted": 0, "succeeded": 0, "failed": 0, "retried": 0, "cancelled": 0}
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = self._connect()
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id TEXT PRIMARY KEY,"
+            " kind TEXT NOT NULL,"
+            " status TEXT NOT NULL,"
+            " params TEXT NOT NULL,"
+            " attempts INTEGER NOT NULL DEFAULT 0,"
+            " max_attempts INTEGER NOT NULL,"
+            " progress_done INTEGER NOT NULL DEFAULT 0,"
+            " progress_total INTEGER NOT NULL DEFAULT 0,"
+            " result TEXT,"
+            " error TEXT,"
+            " cancel_requested INTEGER NOT NULL DEFAULT 0,"
+            " available_at REAL NOT NULL,"
+            " lease_owner TEXT,"
+            " lease_expires_at REAL,"
+            " created_at REAL NOT NULL,"
+            " updated_at REAL NOT NULL,"
+            " started_at REAL,"
+            " finished_at REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, available_at)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS job_files ("
+            " job_id TEXT NOT NULL,"
+            " position INTEGER NOT NULL,"
+            " role TEXT NOT NULL,"
+            " filename TEXT NOT NULL,"
+            " content BLOB NOT NULL,"
+            " PRIMARY KEY (job_id, position))"
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA busy_timeout=5000")
+        return conn
+
+    # -- public API -------------------------------------------------------
+
+    def close(self) -> None:
+        """Close the database connection, e.g. in a parent process before it forks workers."""
+        with self._lock:
+            self._conn.close()
+
+    def reopen(self) -> None:
+        """
+        Open a fresh connection in a forked worker process.
+
+        The worker also gets its own lease owner id, so workers forked from
+        the same parent never mistake each other's leases for their own.
+        """
+        with self._lock:
+            self._conn = self._connect()
+            self._owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+    def register(self, kind: str, handler: JobHandler) -> None:
+        """
+        Register the coroutine that runs jobs of a kind.
+
+        The handler receives the job, its input files and a progress
+        callback, and returns a JSON-serializable result. Raising JobFailed
+        fails the job without retrying.
+
+        Args:
+            kind: Job kind
+            handler: Coroutine function running one job
+        """
+        self._handlers[kind] = handler
+
+    async def start(self) -> None:
+        """Start the worker tasks."""
+        if self._worker_tasks:
+            return
+        self._stopping = False
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._worker_tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        """Stop the workers; interrupted jobs go back to the queue."""
+        self._stopping = True
+        if self._wakeup is not None:
+            self._wakeup.set()
+        for task in list(self._running.values()):
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+
+    def submit(self, kind: str, params: dict, files: List[JobFile]) -> Job:
+        """
+        Store a new job and its input files.
+
+        Args:
+            kind: Job kind, which must have a registered handler
+            params: JSON-serializable job parameters
+            files: Input files of the job
+
+        Returns:
+            The queued job
+        """
+        if kind not in self._handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "INSERT INTO jobs (id, kind, status, params, max_attempts, available_at, created_at, updated_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (job_id, kind, QUEUED, json.dumps(params), self.max_attempts, now, now, now)
+                )
+                for position, f in enumerate(files):
+                    self._store_file(job_id, position, f)
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._counters["submitted"] += 1
+
+        self._wake()
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """
+        Look up a job.
+
+        Args:
+            job_id: Job id
+
+        Returns:
+            The job, or None if it is unknown or was purged
+        """
+        with self._lock:
+            row = self._conn.execute(f"SELECT {_JOB_COLUMNS} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return None if row is None else _row_to_job(row)
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """
+        Cancel a job.
+
+        A queued job is cancelled immediately. A running job is flagged and
+        stopped by the worker holding it, which may live in another process.
+        Safe to call from any thread.
+
+        Args:
+            job_id: Job id
+
+        Returns:
+            The job after the request, or None if it is unknown
+        """
+        now = time.time()
+        with self._lock:
+            # In one transaction with the status check, so a worker cannot
+            # claim the job in between
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute("SELECT status FROM jobs WHERE id = ?", (job_id,)).fetchone()
+                if row is not None and row[0] == QUEUED:
+                    self._finish_locked(job_id, CANCELLED, None, "Cancelled before it started", now)
+                    self._counters["cancelled"] += 1
+                elif row is not None and row[0] == RUNNING:
+                    self._conn.execute(
+                        "UPDATE jobs SET cancel_requested = 1, updated_at = ? WHERE id = ?", (now, job_id)
+                    )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            if row is None:
+                return None
+            row = self._conn.execute(f"SELECT {_JOB_COLUMNS} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+
+        # The running tasks belong to the loop, so look the job up there
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._cancel_running, job_id)
+        return _row_to_job(row)
+
+    async def read_file(self, file: StoredJobFile) -> bytes:
+        """
+        Read the content of a job input file on the storage threads.
+
+        Args:
+            file: Input file passed to the job handler
+
+        Returns:
+            File content as bytes
+        """
+        return await self.executors.run_storage(self._read_file, file.job_id, file.position)
+
+    def stats(self) -> dict:
+        """
+        Report job counts by status and worker activity.
+
+        Returns:
+            Dictionary of counters, jobs per status and running jobs
+        """
+        with self._lock:
+            by_status = dict(self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+            return {
+                **self._counters,
+                "jobs": {status: by_status.get(status, 0) for status in (QUEUED, RUNNING) + TERMINAL_STATES},
+                "workers": self.workers,
+                "running_here": len(self._running),
+            }
+
+    # -- internals --------------------------------------------------------
+
+    def _store_file(self, job_id: str, position: int, file: JobFile) -> None:
+        # Reserve the blob, then stream the content into it, so an uploaded
+        # file is never held in memory as a whole
+        source = BytesIO(file.content) if isinstance(file.content, (bytes, bytearray)) else file.content
+        size = source.seek(0, os.SEEK_END)
+        source.seek(0)
+        rowid = self._conn.execute(
+            "INSERT INTO job_files (job_id, position, role, filename, content) VALUES (?, ?, ?, ?, zeroblob(?))",
+            (job_id, position, file.role, file.filename, size)
+        ).lastrowid
+        with self._conn.blobopen("job_files", "content", rowid) as blob:
+            for chunk in iter(lambda: source.read(_COPY_CHUNK_BYTES), b""):
+                blob.write(chunk)
+
+    def _cancel_running(self, job_id: str) -> None:
+        task = self._running.get(job_id)
+        if task is not None:
+            task.cancel()
+
+    def _wake(self) -> None:
+        # submit() runs on a storage thread, and asyncio events are not thread-safe
+        if self._wakeup is not None and self._loop is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    async def _worker(self) -> None:
+        while not self._stopping:
+            try:
+                job = await self.executors.run_storage(self._claim)
+            except Exception as e:
+                logger.error(f"Error claiming job: {str(e)}")
+                job = None
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval_s)
+                except asyncio.TimeoutError:
+                    pass
+                if not self._stopping:
+                    self._wakeup.clear()
+                continue
+            await self._run(job)
+
+    def _claim(self) -> Optional[Job]:
+        now = time.time()
+        with self._lock:
+            if now - self._last_purge > min(self.retention_s, 3600.0):
+                self._purge_locked(now)
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                while True:
+                    row = self._conn.execute(
+                        "SELECT id, status, attempts, max_attempts FROM jobs"
+                        " WHERE (status = ? AND available_at <= ?) OR (status = ? AND lease_expires_at < ?)"
+                        " ORDER BY created_at LIMIT 1",
+                        (QUEUED, now, RUNNING, now)
+                    ).fetchone()
+                    if row is None:
+                        self._conn.execute("COMMIT")
+                        return None
+                    job_id, status, attempts, max_attempts = row
+                    if status == RUNNING and attempts >= max_attempts:
+                        # Its worker died on the last attempt
+                        self._finish_locked(job_id, FAILED, None, "Worker lost while running the job", now)
+                        self._counters["failed"] += 1
+                        continue
+                    self._conn.execute(
+                        "UPDATE jobs SET status = ?, attempts = attempts + 1, lease_owner = ?,"
+                        " lease_expires_at = ?, started_at = COALESCE(started_at, ?), updated_at = ?"
+                        " WHERE id = ?",
+                        (RUNNING, self._owner, now + self.lease_s, now, now, job_id)
+                    )
+                    self._conn.execute("COMMIT")
+                    break
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            row = self._conn.execute(f"SELECT {_JOB_COLUMNS} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return _row_to_job(row)
+
+    async def _run(self, job: Job) -> None:
+        storage = self.executors.run_storage
+        handler = self._handlers.get(job.kind)
+        if handler is None:
+            await storage(self._finish, job.id, FAILED, None, f"Unknown job kind: {job.kind}")
+            return
+
+        files = await storage(self._list_files, job.id)
+        progress = _ProgressWriter(self, job.id)
+        logger.info(f"Running job {job.id} ({job.kind}), attempt {job.attempts}/{job.max_attempts}")
+        task = asyncio.create_task(handler(job, files, progress))
+        self._running[job.id] = task
+        keeper = asyncio.create_task(self._keep_lease(job.id, task))
+        try:
+            result = await task
+        except asyncio.CancelledError:
+            # The worker itself was cancelled rather than the job
+            worker_cancelled = not task.cancelled()
+            if worker_cancelled or self._stopping:
+                # Shutting down: hand the job back without spending an attempt
+                task.cancel()
+                await storage(self._requeue, job.id, delay_s=0.0, refund_attempt=True)
+                if worker_cancelled:
+                    raise
+            elif await storage(self._finish, job.id, CANCELLED, None, "Cancelled while running"):
+                self._counters["cancelled"] += 1
+        except JobFailed as e:
+            logger.error(f"Job {job.id} failed: {str(e)}")
+            if await storage(self._finish, job.id, FAILED, None, str(e)):
+                self._counters["failed"] += 1
+        except Exception as e:
+            if job.attempts < job.max_attempts:
+                delay_s = self.retry_backoff_s * (2 ** (job.attempts - 1))
+                logger.warning(f"Job {job.id} attempt {job.attempts} failed, retrying in {delay_s:.1f}s: {str(e)}")
+                if await storage(self._requeue, job.id, delay_s=delay_s, error=str(e)):
+                    self._counters["retried"] += 1
+            else:
+                logger.error(f"Job {job.id} failed after {job.attempts} attempts: {str(e)}")
+                if await storage(self._finish, job.id, FAILED, None, str(e)):
+                    self._counters["failed"] += 1
+        else:
+            await progress.flush()
+            if await storage(self._finish, job.id, SUCCEEDED, result, None):
+                self._counters["succeeded"] += 1
+            else:
+                logger.warning(f"Job {job.id} lost its lease before finishing; result discarded")
+        finally:
+            keeper.cancel()
+            self._running.pop(job.id, None)
+
+    async def _keep_lease(self, job_id: str, task: asyncio.Task) -> None:
+        # Renew the lease while the job runs; stop the job when a
+        # cancellation was requested through another process or the lease
+        # was lost to another worker.
+        while not task.done():
+            await asyncio.sleep(self.lease_s / 3)
+            try:
+                keep = await self.executors.run_storage(self._renew_lease, job_id)
+            except Exception as e:
+                logger.error(f"Error renewing the lease of job {job_id}: {str(e)}")
+                continue
+            if not keep:
+                task.cancel()
+
+    def _renew_lease(self, job_id: str) -> bool:
+        with self._lock:
+            renewed = self._conn.execute(
+                "UPDATE jobs SET lease_expires_at = ? WHERE id = ? AND lease_owner = ? AND status = ?",
+                (time.time() + self.lease_s, job_id, self._owner, RUNNING)
+            ).rowcount
+            row = self._conn.execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return bool(renewed) and row is not None and not row[0]
+
+    def _list_files(self, job_id: str) -> List[StoredJobFile]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT position, role, filename FROM job_files WHERE job_id = ? ORDER BY position", (job_id,)
+            ).fetchall()
+        return [StoredJobFile(job_id, position, role, filename) for position, role, filename in rows]
+
+    def _read_file(self, job_id: str, position: int) -> bytes:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content FROM job_files WHERE job_id = ? AND position = ?", (job_id, position)
+            ).fetchone()
+        if row is None:
+            raise JobFailed(f"Input file {position} of job {job_id} is gone")
+        return bytes(row[0])
+
+    def _set_progress(self, job_id: str, done: int, total: int) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET progress_done = ?, progress_total = ?, updated_at = ?"
+                " WHERE id = ? AND lease_owner = ?",
+                (done, total, time.time(), job_id, self._owner)
+            )
+
+    def _requeue(self, job_id: str, delay_s: float, error: Optional[str] = None, refund_attempt: bool = False) -> bool:
+        now = time.time()
+        with self._lock:
+            requeued = self._conn.execute(
+                "UPDATE jobs SET status = ?, available_at = ?, error = COALESCE(?, error),"
+                " attempts = attempts - ?, lease_owner = NULL, lease_expires_at = NULL, updated_at = ?"
+                " WHERE id = ? AND lease_owner = ?",
+                (QUEUED, now + delay_s, error, 1 if refund_attempt else 0, now, job_id, self._owner)
+            ).rowcount
+        return bool(requeued)
+
+    def _finish(self, job_id: str, status: str, result: Optional[dict], error: Optional[str]) -> bool:
+        with self._lock:
+            return self._finish_locked(job_id, status, result, error, time.time(), owner=self._owner)
+
+    def _finish_locked(
+        self,
+        job_id: str,
+        status: str,
+        result: Optional[dict],
+        error: Optional[str],
+        now: float,
+        owner: Optional[str] = None
+    ) -> bool:
+        # With an owner, only a job still leased to it is finished
+        query = (
+            "UPDATE jobs SET status = ?, result = ?, error = ?, lease_owner = NULL, lease_expires_at = NULL,"
+            " finished_at = ?, updated_at = ? WHERE id = ?"
+        )
+        params = [status, json.dumps(result) if result is not None else None, error, now, now, job_id]
+        if owner is not None:
+            query += " AND lease_owner = ?"
+            params.append(owner)
+        if not self._conn.execute(query, params).rowcount:
+            return False
+        # Inputs are only needed until the job reaches a final state
+        self._conn.execute("DELETE FROM job_files WHERE job_id = ?", (job_id,))
+        return True
+
+    def _purge_locked(self, now: float) -> None:
+        self._last_purge = now
+        placeholders = ", ".join("?" for _ in TERMINAL_STATES)
+        self._conn.execute(
+            f"DELETE FROM jobs WHERE status IN ({placeholders}) AND finished_at < ?",
+            (*TERMINAL_STATES, now - self.retention_s)
+        )
+
+
+class _ProgressWriter:
+    def __init__(self, queue: JobQueue, job_id: str):
+        """
+        Progress callback of a running job.
+
+        Writes run on the storage threads one at a time; progress reported
+        while a write is pending replaces any value not yet written, so the
+        handler never waits and the stored progress never goes backwards.
+
+        Args:
+            queue: Queue holding the job
+            job_id: Job id
+        """
+        self._queue = queue
+        self._job_id = job_id
+        self._latest: Optional[tuple] = None
+        self._writer: Optional[asyncio.Task] = None
+
+    def __call__(self, done: int, total: int) -> None:
+        self._latest = (done, total)
+        if self._writer is None or self._writer.done():
+            self._writer = asyncio.create_task(self._write())
+
+    async def flush(self) -> None:
+        """Wait until the latest progress is written."""
+        if self._writer is not None:
+            await asyncio.shield(self._writer)
+
+    async def _write(self) -> None:
+        while self._latest is not None:
+            done, total = self._latest
+            self._latest = None
+            try:
+                await self._queue.executors.run_storage(self._queue._set_progress, self._job_id, done, total)
+            except Exception as e:
+                logger.error(f"Error recording progress of job {self._job_id}: {str(e)}")
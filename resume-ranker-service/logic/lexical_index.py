@@ -0,0 +1,650 @@
+import json
+import math
+import os
+import threading
+import time
+from array import array
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from logic.skills import SkillDictionary, content_terms, tokenize
+
+try:
+    import fcntl
+except ImportError:  # Windows: the index is then only safe within one process
+    fcntl = None
+
+
+# Skills are indexed next to words under this prefix, which tokens never contain
+SKILL_PREFIX = "skill:"
+
+# Share of the lexical score given to skill coverage when the query names skills
+SKILL_WEIGHT = 0.5
+
+# Term frequencies are stored as uint16
+_MAX_TF = 65535
+
+
+@dataclass
+class AnalyzedText:
+    terms: Counter
+    length: int
+    skills: List[str]
+
+
+@dataclass
+class LexicalMatch:
+    id: str
+    score: float
+    bm25: float
+    skill_coverage: Optional[float] = None
+    matched_skills: List[str] = field(default_factory=list)
+    missing_skills: List[str] = field(default_factory=list)
+
+
+@dataclass
+class _Scores:
+    combined: np.ndarray
+    bm25: np.ndarray
+    coverage: Optional[np.ndarray]
+    skill_rows: Dict[str, np.ndarray]
+    skills: List[str]
+
+
+class LexicalIndex:
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        skills: Optional[SkillDictionary] = None,
+        k1: float = 1.2,
+        b: float = 0.75,
+        checkpoint_records: int = 1000
+    ):
+        """
+        Incremental inverted index with BM25 and skill matching.
+
+        Each term maps to two growable arrays, the ascending row numbers of
+        the documents containing it and their term frequencies, so postings
+        cost 6 bytes per entry and are scored with vectorized numpy. Skills
+        found by the skill dictionary are indexed as extra terms.
+
+        Scores are normalized to 0..1: BM25 is divided by the score a
+        document containing every query term very often would reach, and
+        when the query names skills, half of the score is the share of
+        those skills the document mentions. Document frequencies include
+        deleted documents until the next compaction.
+
+        With a directory, the index is persisted like VectorIndex: a
+        compressed snapshot of delta-coded postings plus a JSON-lines log of
+        later adds and deletes, folded into a new snapshot by compact() or
+        once checkpoint_records records have accumulated. Several processes
+        may share the directory. Without a directory the index lives in
+        memory only, e.g. to score one batch of uploads.
+
+        Args:
+            directory: Directory holding the index files, or None for in-memory
+            skills: Skill dictionary (defaults to the built-in skills)
+            k1: BM25 term frequency saturation
+            b: BM25 document length normalization
+            checkpoint_records: Log records that trigger a snapshot
+        """
+        if k1 <= 0 or not 0.0 <= b <= 1.0:
+            raise ValueError("k1 must be positive and b between 0 and 1")
+        if checkpoint_records < 1:
+            raise ValueError("checkpoint_records must be at least 1")
+
+        self.directory = directory
+        self.skills = skills or SkillDictionary()
+        self.k1 = k1
+        self.b = b
+        self.checkpoint_records = checkpoint_records
+        self._lock = threading.RLock()
+        self._generation = 0
+
+        self._reset_documents()
+        # Log bytes applied so far and the manifest they belong to
+        self._log_offset = 0
+        self._log_records = 0
+        self._manifest_stamp: Optional[Tuple[int, int, int]] = None
+
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+            with self._lock, self._file_lock():
+                self._load(repair=True)
+
+    # -- public API -------------------------------------------------------
+
+    def __len__(self) -> int:
+        """Number of live (non-deleted) documents."""
+        with self._lock:
+            self._refresh()
+            return len(self._id_to_row)
+
+    def analyze(self, text: str) -> AnalyzedText:
+        """
+        Tokenize a text the way documents and queries are indexed.
+
+        Args:
+            text: Input text
+
+        Returns:
+            AnalyzedText with term counts, length in terms and skills
+        """
+        tokens = tokenize(text)
+        terms = content_terms(tokens)
+        return AnalyzedText(terms=Counter(terms), length=len(terms), skills=self.skills.extract(tokens))
+
+    def add(self, texts: Sequence[str], ids: Sequence[str]) -> None:
+        """
+        Index documents.
+
+        Adding an id that already exists replaces the previous document.
+
+        Args:
+            texts: Document texts
+            ids: Document ids, aligned with texts
+        """
+        if len(texts) != len(ids):
+            raise ValueError("ids must have one entry per text")
+        if len(set(ids)) != len(ids):
+            raise ValueError("ids must be unique within one add call")
+
+        records = []
+        for item_id, text in zip(ids, texts):
+            analyzed = self.analyze(text)
+            terms = dict(analyzed.terms)
+            for skill in analyzed.skills:
+                terms[SKILL_PREFIX + skill] = 1
+            records.append({"op": "add", "id": item_id, "length": analyzed.length, "terms": terms})
+        if not records:
+            return
+
+        with self._lock, self._writing():
+            self._append_records(records)
+            for record in records:
+                self._apply(record)
+            if self.directory is not None and self._log_records >= self.checkpoint_records:
+                self._checkpoint()
+
+    def delete(self, ids: Sequence[str]) -> int:
+        """
+        Remove documents by id.
+
+        Args:
+            ids: Ids to delete
+
+        Returns:
+            Number of documents deleted
+        """
+        with self._lock, self._writing():
+            records = [
+                {"op": "delete", "id": item_id}
+                for item_id in dict.fromkeys(ids) if item_id in self._id_to_row
+            ]
+            if records:
+                self._append_records(records)
+                for record in records:
+                    self._apply(record)
+            return len(records)
+
+    def search(self, query: Union[str, AnalyzedText], top_k: int = 10) -> List[LexicalMatch]:
+        """
+        Find the documents that best match a query text.
+
+        Args:
+            query: Query text, e.g. a job description, or its analyze() result
+            top_k: Maximum number of results
+
+        Returns:
+            LexicalMatch list, best first (documents without any matching
+            term are included when fewer than top_k documents match)
+        """
+        if top_k < 1:
+            raise ValueError("top_k must be at least 1")
+        analyzed = self._query(query)
+        with self._lock:
+            self._refresh()
+            scores = self._score_all(analyzed)
+            candidates = np.flatnonzero(~self._deleted_mask())
+            if candidates.shape[0] == 0:
+                return []
+            candidate_scores = scores.combined[candidates]
+            if candidates.shape[0] > top_k:
+                keep = np.argpartition(-candidate_scores, top_k - 1)[:top_k]
+                candidates, candidate_scores = candidates[keep], candidate_scores[keep]
+            order = np.lexsort((candidates, -candidate_scores))
+            return [self._match(int(row), scores) for row in candidates[order]]
+
+    def score(self, query: Union[str, AnalyzedText], ids: Sequence[str]) -> Dict[str, LexicalMatch]:
+        """
+        Score given documents against a query text.
+
+        Args:
+            query: Query text or its analyze() result
+            ids: Document ids; unknown ids are skipped
+
+        Returns:
+            LexicalMatch by id
+        """
+        analyzed = self._query(query)
+        with self._lock:
+            self._refresh()
+            scores = self._score_all(analyzed)
+            return {
+                item_id: self._match(self._id_to_row[item_id], scores)
+                for item_id in ids if item_id in self._id_to_row
+            }
+
+    def score_text(self, query: Union[str, AnalyzedText], text: str) -> LexicalMatch:
+        """
+        Score a document that is not indexed against a query text.
+
+        Term rarity comes from the indexed documents, so e.g. the talent
+        pool tells which job description words are distinctive. With an
+        empty index every term counts the same.
+
+        Args:
+            query: Query text or its analyze() result
+            text: Document text
+
+        Returns:
+            LexicalMatch with an empty id
+        """
+        analyzed_query = self._query(query)
+        document = self.analyze(text)
+        with self._lock:
+            self._refresh()
+            live = len(self._id_to_row)
+            average_length = self._total_length / live if live else max(document.length, 1)
+            idfs = {term: self._idf(term, live) for term in analyzed_query.terms}
+        norm = self.k1 * (1.0 - self.b + self.b * document.length / max(average_length, 1.0))
+        score = upper = 0.0
+        for term, weight in analyzed_query.terms.items():
+            tf = min(document.terms.get(term, 0), _MAX_TF)
+            score += weight * idfs[term] * tf * (self.k1 + 1.0) / (tf + norm)
+            upper += weight * idfs[term] * (self.k1 + 1.0)
+        bm25 = score / upper if upper > 0 else 0.0
+        document_skills = set(document.skills)
+        matched = [skill for skill in analyzed_query.skills if skill in document_skills]
+        coverage = len(matched) / len(analyzed_query.skills) if analyzed_query.skills else None
+        return LexicalMatch(
+            id="",
+            score=self._combine(bm25, coverage),
+            bm25=round(bm25, 4),
+            skill_coverage=None if coverage is None else round(coverage, 4),
+            matched_skills=matched,
+            missing_skills=[skill for skill in analyzed_query.skills if skill not in matched]
+        )
+
+    def compact(self) -> int:
+        """
+        Fold the log into a new snapshot without deleted documents.
+
+        Returns:
+            Number of deleted documents reclaimed
+        """
+        with self._lock, self._writing():
+            reclaimed = len(self._ids) - len(self._id_to_row)
+            if self.directory is None:
+                if reclaimed:
+                    self._rebuild(*self._live_arrays())
+            elif reclaimed or self._log_records:
+                self._checkpoint()
+            return reclaimed
+
+    def stats(self) -> dict:
+        """
+        Report index size.
+
+        Returns:
+            Dictionary with document, term and posting counts
+        """
+        with self._lock:
+            self._refresh()
+            postings = sum(len(rows) for rows, _ in self._postings.values())
+            return {
+                "live": len(self._id_to_row),
+                "deleted": len(self._ids) - len(self._id_to_row),
+                "terms": len(self._postings),
+                "postings": postings,
+                "postings_bytes": postings * 6,
+                "log_records": self._log_records,
+                "generation": self._generation,
+            }
+
+    # -- scoring ----------------------------------------------------------
+
+    def _query(self, query: Union[str, AnalyzedText]) -> AnalyzedText:
+        return query if isinstance(query, AnalyzedText) else self.analyze(query)
+
+    def _idf(self, term: str, live: int) -> float:
+        if not live:
+            return 1.0
+        postings = self._postings.get(term)
+        df = min(len(postings[0]), live) if postings is not None else 0
+        return math.log(1.0 + (live - df + 0.5) / (df + 0.5))
+
+    def _combine(self, bm25: float, coverage: Optional[float]) -> float:
+        if coverage is None:
+            return round(bm25, 4)
+        return round((1.0 - SKILL_WEIGHT) * bm25 + SKILL_WEIGHT * coverage, 4)
+
+    def _deleted_mask(self) -> np.ndarray:
+        return np.frombuffer(bytes(self._deleted), dtype=bool)
+
+    def _score_all(self, query: AnalyzedText) -> "_Scores":
+        """Score every row against an analyzed query."""
+        count = len(self._ids)
+        bm25 = np.zeros(count, dtype=np.float32)
+        coverage = np.zeros(count, dtype=np.float32) if query.skills else None
+        live = len(self._id_to_row)
+        if count == 0 or live == 0:
+            return _Scores(bm25, bm25, coverage, {}, query.skills)
+
+        lengths = np.array(self._lengths, dtype=np.float32)
+        average_length = max(self._total_length / live, 1.0)
+        norms = self.k1 * (1.0 - self.b + self.b * lengths / average_length)
+        upper = 0.0
+        for term, weight in query.terms.items():
+            postings = self._postings.get(term)
+            idf = self._idf(term, live)
+            upper += weight * idf * (self.k1 + 1.0)
+            if postings is None:
+                continue
+            rows = np.array(postings[0], dtype=np.int64)
+            tfs = np.array(postings[1], dtype=np.float32)
+            bm25[rows] += weight * idf * tfs * (self.k1 + 1.0) / (tfs + norms[rows])
+        if upper > 0:
+            bm25 /= upper
+
+        if coverage is None:
+            return _Scores(bm25, bm25, None, {}, query.skills)
+        skill_rows = {}
+        for skill in query.skills:
+            postings = self._postings.get(SKILL_PREFIX + skill)
+            if postings is not None:
+                skill_rows[skill] = np.array(postings[0], dtype=np.int64)
+                coverage[skill_rows[skill]] += 1.0
+        coverage /= len(query.skills)
+        return _Scores((1.0 - SKILL_WEIGHT) * bm25 + SKILL_WEIGHT * coverage, bm25, coverage, skill_rows, query.skills)
+
+    def _match(self, row: int, scores: "_Scores") -> LexicalMatch:
+        matched = []
+        for skill in scores.skills:
+            rows = scores.skill_rows.get(skill)
+            if rows is not None:
+                position = int(np.searchsorted(rows, row))
+                if position < rows.shape[0] and rows[position] == row:
+                    matched.append(skill)
+        return LexicalMatch(
+            id=self._ids[row],
+            score=round(float(scores.combined[row]), 4),
+            bm25=round(float(scores.bm25[row]), 4),
+            skill_coverage=None if scores.coverage is None else round(float(scores.coverage[row]), 4),
+            matched_skills=matched,
+            missing_skills=[skill for skill in scores.skills if skill not in matched]
+        )
+
+    # -- documents --------------------------------------------------------
+
+    def _reset_documents(self) -> None:
+        self._ids: List[Optional[str]] = []
+        self._id_to_row: Dict[str, int] = {}
+        self._lengths = array("I")
+        self._deleted = bytearray()
+        self._total_length = 0
+        self._postings: Dict[str, Tuple[array, array]] = {}
+
+    def _apply(self, record: Dict) -> None:
+        item_id = record["id"]
+        previous = self._id_to_row.pop(item_id, None)
+        if previous is not None:
+            self._ids[previous] = None
+            self._deleted[previous] = 1
+            self._total_length -= self._lengths[previous]
+        if record["op"] == "delete":
+            return
+
+        row = len(self._ids)
+        self._ids.append(item_id)
+        self._id_to_row[item_id] = row
+        self._lengths.append(record["length"])
+        self._deleted.append(0)
+        self._total_length += record["length"]
+        for term, tf in record["terms"].items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = (array("I"), array("H"))
+            # Rows only grow, so every posting list stays sorted
+            postings[0].append(row)
+            postings[1].append(min(tf, _MAX_TF))
+
+    def _live_arrays(self) -> Tuple[List[str], np.ndarray, List[str], np.ndarray, np.ndarray, np.ndarray]:
+        """Live documents with rows renumbered: ids, lengths, terms, offsets, rows and frequencies."""
+        live_rows = np.array([row for row, item_id in enumerate(self._ids) if item_id is not None], dtype=np.int64)
+        new_row = np.full(len(self._ids), -1, dtype=np.int64)
+        new_row[live_rows] = np.arange(live_rows.shape[0])
+        ids = [self._ids[row] for row in live_rows]
+        lengths = np.array(self._lengths, dtype=np.uint32)[live_rows]
+
+        terms, offsets, all_rows, all_tfs = [], [0], [], []
+        for term in sorted(self._postings):
+            rows, tfs = self._postings[term]
+            mapped = new_row[np.array(rows, dtype=np.int64)]
+            keep = mapped >= 0
+            if not keep.any():
+                continue
+            terms.append(term)
+            all_rows.append(mapped[keep].astype(np.uint32))
+            all_tfs.append(np.array(tfs, dtype=np.uint16)[keep])
+            offsets.append(offsets[-1] + int(keep.sum()))
+        rows = np.concatenate(all_rows) if all_rows else np.zeros(0, dtype=np.uint32)
+        tfs = np.concatenate(all_tfs) if all_tfs else np.zeros(0, dtype=np.uint16)
+        return ids, lengths, terms, np.array(offsets, dtype=np.int64), rows, tfs
+
+    def _rebuild(
+        self,
+        ids: List[str],
+        lengths: np.ndarray,
+        terms: List[str],
+        offsets: np.ndarray,
+        rows: np.ndarray,
+        tfs: np.ndarray
+    ) -> None:
+        self._reset_documents()
+        self._ids = list(ids)
+        self._id_to_row = {item_id: row for row, item_id in enumerate(ids)}
+        self._lengths = array("I", lengths.astype(np.uint32).tobytes())
+        self._deleted = bytearray(len(ids))
+        self._total_length = int(lengths.sum())
+        rows = rows.astype(np.uint32)
+        tfs = tfs.astype(np.uint16)
+        for index, term in enumerate(terms):
+            start, end = int(offsets[index]), int(offsets[index + 1])
+            postings = (array("I"), array("H"))
+            postings[0].frombytes(rows[start:end].tobytes())
+            postings[1].frombytes(tfs[start:end].tobytes())
+            self._postings[term] = postings
+
+    # -- persistence ------------------------------------------------------
+
+    def _manifest_path(self) -> str:
+        return os.path.join(self.directory, "lexical.json")
+
+    def _snapshot_path(self, generation: Optional[int] = None) -> str:
+        generation = self._generation if generation is None else generation
+        return os.path.join(self.directory, f"lexical-{generation}.npz")
+
+    def _log_path(self, generation: Optional[int] = None) -> str:
+        generation = self._generation if generation is None else generation
+        return os.path.join(self.directory, f"lexical-{generation}.jsonl")
+
+    def _manifest_stat(self) -> Optional[Tuple[int, int, int]]:
+        try:
+            stat = os.stat(self._manifest_path())
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def _append_records(self, records: List[Dict]) -> None:
+        if self.directory is None:
+            return
+        if self._manifest_stamp is None:
+            self._write_manifest()
+        with open(self._log_path(), "ab") as f:
+            f.write("".join(json.dumps(record) + "\n" for record in records).encode("utf-8"))
+            f.flush()
+            os.fsync(f.fileno())
+            self._log_offset = f.tell()
+        self._log_records += len(records)
+
+    def _write_manifest(self) -> None:
+        tmp_path = self._manifest_path() + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"generation": self._generation, "updated_at": time.time()}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self._manifest_path())
+        self._manifest_stamp = self._manifest_stat()
+
+    def _checkpoint(self) -> None:
+        """Write live documents to a snapshot of the next generation and switch to it."""
+        ids, lengths, terms, offsets, rows, tfs = self._live_arrays()
+        # Rows ascend within each term: store gaps, which compress well
+        gaps = rows.astype(np.int64)
+        if gaps.shape[0]:
+            starts = offsets[:-1][offsets[:-1] < offsets[1:]]
+            previous = np.concatenate([[0], gaps[:-1]])
+            previous[starts] = 0
+            gaps = gaps - previous
+
+        old_generation = self._generation
+        self._generation += 1
+        tmp_path = self._snapshot_path() + ".tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez_compressed(
+                f,
+                ids=np.array(ids, dtype=str),
+                lengths=lengths.astype(np.uint32),
+                terms=np.array(terms, dtype=str),
+                offsets=offsets,
+                gaps=gaps.astype(np.uint32),
+                tfs=tfs.astype(np.uint16)
+            )
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self._snapshot_path())
+        open(self._log_path(), "wb").close()
+
+        # Switching the manifest is the commit point of the checkpoint
+        self._write_manifest()
+        for path in (self._snapshot_path(old_generation), self._log_path(old_generation)):
+            if os.path.exists(path):
+                os.remove(path)
+        self._rebuild(ids, lengths, terms, offsets, rows, tfs)
+        self._log_offset = 0
+        self._log_records = 0
+
+    def _read_snapshot(self) -> None:
+        path = self._snapshot_path()
+        if not os.path.exists(path):
+            self._reset_documents()
+            return
+        with np.load(path, allow_pickle=False) as snapshot:
+            offsets = snapshot["offsets"]
+            gaps = snapshot["gaps"].astype(np.int64)
+            # Undo the gap coding: cumulative sum restarted at every term
+            rows = np.cumsum(gaps)
+            if rows.shape[0]:
+                starts = offsets[:-1][(offsets[:-1] < offsets[1:]) & (offsets[:-1] > 0)]
+                bases = np.zeros(rows.shape[0], dtype=np.int64)
+                bases[starts] = rows[starts - 1]
+                rows = rows - np.maximum.accumulate(bases)
+            self._rebuild(
+                [str(item_id) for item_id in snapshot["ids"]],
+                snapshot["lengths"],
+                [str(term) for term in snapshot["terms"]],
+                offsets,
+                rows,
+                snapshot["tfs"]
+            )
+
+    @contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        """Exclusive lock shared by all processes writing to the directory."""
+        if fcntl is None or self.directory is None:
+            yield
+            return
+        with open(os.path.join(self.directory, "lexical.lock"), "a") as f:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+    @contextmanager
+    def _writing(self) -> Iterator[None]:
+        """Lock out other writers and catch up with their changes first."""
+        with self._file_lock():
+            self._refresh(repair=True)
+            yield
+
+    def _refresh(self, repair: bool = False) -> None:
+        """
+        Apply changes made by other processes since the last call.
+
+        Args:
+            repair: Truncate torn writes; only safe while holding the file lock
+        """
+        if self.directory is None:
+            return
+        stamp = self._manifest_stat()
+        if stamp is None:
+            return
+        if stamp != self._manifest_stamp:
+            with open(self._manifest_path(), encoding="utf-8") as f:
+                manifest = json.load(f)
+            if manifest.get("generation", 0) != self._generation or self._manifest_stamp is None:
+                # Checkpointed elsewhere: reload the new snapshot
+                self._load(repair)
+                return
+            self._manifest_stamp = stamp
+        self._read_log(repair)
+
+    def _read_log(self, repair: bool) -> None:
+        path = self._log_path()
+        if not os.path.exists(path) or os.path.getsize(path) <= self._log_offset:
+            return
+        with open(path, "r+b" if repair else "rb") as f:
+            f.seek(self._log_offset)
+            for line in f:
+                try:
+                    record = json.loads(line) if line.strip() else None
+                except (json.JSONDecodeError, UnicodeDecodeError):
+                    record = None
+                if record is None or not line.endswith(b"\n"):
+                    # Torn final write; keep everything before it. Without
+                    # the lock it may be another process's write in progress.
+                    if repair:
+                        f.truncate(self._log_offset)
+                    break
+                self._apply(record)
+                self._log_offset += len(line)
+                self._log_records += 1
+
+    def _load(self, repair: bool) -> None:
+        stamp = self._manifest_stat()
+        if stamp is None:
+            return
+        with open(self._manifest_path(), encoding="utf-8") as f:
+            manifest = json.load(f)
+        self._generation = manifest.get("generation", 0)
+        self._manifest_stamp = stamp
+        self._read_snapshot()
+        self._log_offset = 0
+        self._log_records = 0
+        self._read_log(repair)
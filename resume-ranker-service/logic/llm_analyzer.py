@@ -1,35 +1,83 @@
 import os
 import google.generativeai as genai
-from typing import Optional
+from typing import Iterator, Optional
+
+
+# Bump whenever build_prompt changes so cached analyses are not reused
+PROMPT_VERSION = "1"
+
+# HTTP statuses of provider errors worth retrying: timeouts, rate limits and server errors
+RETRYABLE_STATUS_CODES = frozenset((408, 429, 500, 502, 503, 504))
+
+
+class LLMProviderError(ValueError):
+    """Raised when the LLM provider call fails; retryable marks transient failures."""
+
+    def __init__(self, message: str, retryable: bool = False):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+def is_retryable(error: Exception) -> bool:
+    """
+    Decide whether a provider error is transient.
+
+    Google API errors carry their HTTP status in code; connection
+    failures and timeouts are always transient.
+
+    Args:
+        error: Exception raised by the provider client
+
+    Returns:
+        True if the call may succeed when retried
+    """
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    code = getattr(error, "code", None)
+    try:
+        return int(code) in RETRYABLE_STATUS_CODES
+    except (TypeError, ValueError):
+        return False
+
+
+def _request_options(timeout: Optional[float]) -> dict:
+    # Passed to the API call, so a hung request ends instead of holding its thread
+    return {"timeout": timeout} if timeout is not None else {}
 
 
 class LLMAnalyzer:
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, api_endpoint: Optional[str] = None):
         """
         Initialize the Gemini LLM analyzer.
         
         Args:
             api_key: Gemini API key (if None, will try to get from environment)
+            api_endpoint: Alternative API endpoint (e.g. a local fake server),
+                spoken to over REST
         """
         self.api_key = api_key or os.getenv("GEMINI_API_KEY")
         if not self.api_key:
             raise ValueError("GEMINI_API_KEY environment variable is required")
         
-        genai.configure(api_key=self.api_key)
-        self.model = genai.GenerativeModel("gemini-1.5-flash")
+        if api_endpoint:
+            genai.configure(api_key=self.api_key, transport="rest", client_options={"api_endpoint": api_endpoint})
+        else:
+            genai.configure(api_key=self.api_key)
+        self.model_name = "gemini-1.5-flash"
+        self.model = genai.GenerativeModel(self.model_name)
     
-    def analyze_resume(self, resume_text: str, job_description: str) -> str:
+    def build_prompt(self, resume_text: str, job_description: str) -> str:
         """
-        Analyze resume against job description using Gemini LLM.
+        Build the HR analysis prompt for a resume and job description.
         
         Args:
             resume_text: Extracted resume text
             job_description: Job description text
             
         Returns:
-            HR-style analysis as string
+            Prompt text
         """
-        prompt = f"""As an HR professional, analyze the following resume against the job description.
+        return f"""As an HR professional, analyze the following resume against the job description.
         
 Job Description:
 {job_description}
@@ -45,9 +93,45 @@ Please provide a comprehensive HR-style analysis including:
 
 Be professional and constructive in your analysis."""
 
+    def analyze_resume(self, resume_text: str, job_description: str, timeout: Optional[float] = None) -> str:
+        """
+        Analyze resume against job description using Gemini LLM.
+        
+        Args:
+            resume_text: Extracted resume text
+            job_description: Job description text
+            timeout: Seconds the provider request may take (None for the client default)
+            
+        Returns:
+            HR-style analysis as string
+        """
+        prompt = self.build_prompt(resume_text, job_description)
+
         try:
-            response = self.model.generate_content(prompt)
+            response = self.model.generate_content(prompt, request_options=_request_options(timeout))
             return response.text
         except Exception as e:
-            raise ValueError(f"Error generating LLM analysis: {str(e)}")
+            raise LLMProviderError(f"Error generating LLM analysis: {str(e)}", is_retryable(e)) from e
+
+    def stream_analysis(
+        self, resume_text: str, job_description: str, timeout: Optional[float] = None
+    ) -> Iterator[str]:
+        """
+        Analyze resume against job description, yielding text as Gemini produces it.
+        
+        Args:
+            resume_text: Extracted resume text
+            job_description: Job description text
+            timeout: Seconds the provider request may take (None for the client default)
+            
+        Yields:
+            Successive chunks of the HR-style analysis
+        """
+        prompt = self.build_prompt(resume_text, job_description)
 
+        try:
+            for chunk in self.model.generate_content(prompt, stream=True, request_options=_request_options(timeout)):
+                if chunk.text:
+                    yield chunk.text
+        except Exception as e:
+            raise LLMProviderError(f"Error generating LLM analysis: {str(e)}", is_retryable(e)) from e
@@ -0,0 +1,217 @@
+import asyncio
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from logic.executors import Executors
+
+
+def text_digest(text: str) -> str:
+    """
+    Hash a text for use in cache keys.
+
+    Args:
+        text: Input text
+
+    Returns:
+        Hex SHA-256 digest of the UTF-8 encoded text
+    """
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class AnalysisCache:
+    def __init__(
+        self,
+        executors: Executors,
+        path: str = ":memory:",
+        ttl_s: float = 86400.0,
+        max_entries: int = 10000
+    ):
+        """
+        SQLite-backed cache of LLM analyses with single-flight coalescing.
+
+        Entries expire after ttl_s and the least recently used entries are
+        evicted beyond max_entries. Identical requests that arrive while an
+        analysis is being generated wait for that call instead of issuing
+        their own.
+
+        get() and put() block on SQLite, which may wait up to the busy
+        timeout for another worker process; get_or_compute() runs them on
+        the storage threads, and async callers should do the same.
+
+        Args:
+            executors: Pools whose storage threads run the database calls
+            path: SQLite database file, or ":memory:" for a process-local cache
+            ttl_s: Time to live of an entry in seconds
+            max_entries: Maximum number of stored analyses
+        """
+        if ttl_s <= 0:
+            raise ValueError("ttl_s must be positive")
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+
+        self.executors = executors
+        self.path = path
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._counters = {"hits": 0, "misses": 0, "coalesced": 0, "evictions": 0}
+
+        if path != ":memory:":
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+        self._conn = self._connect()
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS analyses ("
+            " key TEXT PRIMARY KEY,"
+            " analysis TEXT NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS analyses_accessed ON analyses (accessed_at)")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        if self.path != ":memory:":
+            conn.execute("PRAGMA journal_mode=WAL")
+            # Worker processes share the file, so wait for each other's writes
+            conn.execute("PRAGMA busy_timeout=5000")
+        return conn
+
+    def close(self) -> None:
+        """Close the database connection, e.g. in a parent process before it forks workers."""
+        with self._lock:
+            self._conn.close()
+
+    def reopen(self) -> None:
+        """Open a fresh connection, e.g. in a worker process after fork."""
+        with self._lock:
+            self._conn = self._connect()
+
+    @staticmethod
+    def make_key(resume_text: str, jd_text: str, model_name: str, prompt_version: str) -> str:
+        """
+        Build the cache key of an analysis request.
+
+        Args:
+            resume_text: Resume text sent to the LLM
+            jd_text: Job description text sent to the LLM
+            model_name: LLM model name
+            prompt_version: Version of the prompt template
+
+        Returns:
+            Cache key
+        """
+        return ":".join((text_digest(resume_text), text_digest(jd_text), model_name, prompt_version))
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Look up a cached analysis.
+
+        Args:
+            key: Cache key from make_key
+
+        Returns:
+            Cached analysis, or None if missing or expired
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT analysis, created_at FROM analyses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[1] > self.ttl_s:
+                if row is not None:
+                    self._conn.execute("DELETE FROM analyses WHERE key = ?", (key,))
+                self._counters["misses"] += 1
+                return None
+            self._conn.execute("UPDATE analyses SET accessed_at = ? WHERE key = ?", (now, key))
+            self._counters["hits"] += 1
+            return row[0]
+
+    def put(self, key: str, analysis: str) -> None:
+        """
+        Store an analysis, evicting the least recently used entries if full.
+
+        Args:
+            key: Cache key from make_key
+            analysis: Analysis text
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO analyses (key, analysis, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, analysis, now, now)
+            )
+            excess = self._conn.execute("SELECT COUNT(*) FROM analyses").fetchone()[0] - self.max_entries
+            if excess > 0:
+                self._conn.execute(
+                    "DELETE FROM analyses WHERE key IN "
+                    "(SELECT key FROM analyses ORDER BY accessed_at LIMIT ?)",
+                    (excess,)
+                )
+                self._counters["evictions"] += excess
+
+    async def get_or_compute(self, key: str, compute: Callable[[], Awaitable[str]]) -> Tuple[str, bool]:
+        """
+        Return the cached analysis or compute it once for all concurrent callers.
+
+        The computation runs as its own task, so a caller that disconnects
+        does not cancel it for the others. Failures reach every waiting
+        caller and are not cached.
+
+        Args:
+            key: Cache key from make_key
+            compute: Coroutine factory generating the analysis on a miss
+
+        Returns:
+            Tuple of (analysis, True if it came from the cache or a shared call)
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            cached = await self.executors.run_storage(self.get, key)
+            if cached is not None:
+                return cached, True
+            # Another caller may have started the call during the lookup
+            task = self._inflight.get(key)
+        if task is not None:
+            self._counters["coalesced"] += 1
+            return await asyncio.shield(task), True
+
+        task = asyncio.create_task(self._compute_and_store(key, compute))
+        self._inflight[key] = task
+        task.add_done_callback(lambda done: self._finish(key, done))
+        return await asyncio.shield(task), False
+
+    async def _compute_and_store(self, key: str, compute: Callable[[], Awaitable[str]]) -> str:
+        analysis = await compute()
+        await self.executors.run_storage(self.put, key, analysis)
+        return analysis
+
+    def _finish(self, key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            # Mark the exception as retrieved even if every caller went away
+            task.exception()
+
+    def stats(self) -> dict:
+        """
+        Report hit/miss counters and cache size.
+
+        Returns:
+            Dictionary of counters, entry count and in-flight calls
+        """
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM analyses").fetchone()[0]
+            return {
+                **self._counters,
+                "entries": entries,
+                "max_entries": self.max_entries,
+                "ttl_s": self.ttl_s,
+                "inflight": len(self._inflight),
+            }
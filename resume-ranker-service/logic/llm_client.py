@@ -0,0 +1,418 @@
+import asyncio
+import logging
+import random
+import time
+from typing import AsyncIterator, Callable, Iterator, Optional
+
+from logic.executors import Executors
+from logic.metrics import record_llm_call
+
+logger = logging.getLogger(__name__)
+
+
+class LLMUnavailable(Exception):
+    """Raised when the LLM cannot answer in time: the circuit is open, or slots, rate or deadline ran out."""
+
+
+class LLMTimeout(Exception):
+    """Raised when a single LLM call exceeds its timeout."""
+
+    retryable = True
+
+
+class TokenBucket:
+    def __init__(self, rate_per_s: float, burst: int = 1):
+        """
+        Token-bucket rate limiter for coroutines on one event loop.
+
+        Callers reserve a token and sleep until it is due, so waiters are
+        served in arrival order without a background task.
+
+        Args:
+            rate_per_s: Tokens added per second, 0 for no limit
+            burst: Maximum tokens available at once
+        """
+        if rate_per_s < 0:
+            raise ValueError("rate_per_s cannot be negative")
+        if burst < 1:
+            raise ValueError("burst must be at least 1")
+        self.rate_per_s = rate_per_s
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+
+    async def acquire(self, deadline: float) -> None:
+        """
+        Take one token, waiting for it if necessary.
+
+        Args:
+            deadline: time.monotonic() value by which the token must be granted
+
+        Raises:
+            LLMUnavailable: If the token would only be granted after the deadline
+        """
+        if not self.rate_per_s:
+            return
+        now = time.monotonic()
+        self._tokens = min(float(self.burst), self._tokens + (now - self._updated) * self.rate_per_s)
+        self._updated = now
+        wait_s = max(0.0, (1.0 - self._tokens) / self.rate_per_s)
+        if now + wait_s > deadline:
+            raise LLMUnavailable("LLM rate limit reached")
+        # Reserve the token now; later callers queue behind it
+        self._tokens -= 1.0
+        if wait_s > 0:
+            await asyncio.sleep(wait_s)
+
+
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout_s: float = 30.0):
+        """
+        Stop calling an unhealthy provider and probe it again after a pause.
+
+        The circuit opens after failure_threshold consecutive transient
+        failures. Once reset_timeout_s has passed, one trial call is let
+        through: success closes the circuit, failure opens it again.
+
+        Args:
+            failure_threshold: Consecutive failures that open the circuit
+            reset_timeout_s: Time the circuit stays open before a trial call
+        """
+        if failure_threshold < 1:
+            raise ValueError("failure_threshold must be at least 1")
+        if reset_timeout_s <= 0:
+            raise ValueError("reset_timeout_s must be positive")
+        self.failure_threshold = failure_threshold
+        self.reset_timeout_s = reset_timeout_s
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_running = False
+        self._counters = {"opened": 0, "short_circuited": 0}
+
+    def available(self) -> bool:
+        """True unless the circuit is open and not yet due for a trial call."""
+        if self.state == self.OPEN:
+            return time.monotonic() - self._opened_at >= self.reset_timeout_s
+        return not (self.state == self.HALF_OPEN and self._trial_running)
+
+    def allow(self) -> bool:
+        """
+        Ask for permission to call the provider.
+
+        Returns:
+            True if the call may go ahead; it must then be followed by record()
+        """
+        if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout_s:
+            self.state = self.HALF_OPEN
+            self._trial_running = False
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.HALF_OPEN and not self._trial_running:
+            self._trial_running = True
+            return True
+        self._counters["short_circuited"] += 1
+        return False
+
+    def cancel(self) -> None:
+        """Hand back permission that was granted by allow() but not used to call the provider."""
+        self._trial_running = False
+
+    def record(self, healthy: bool) -> None:
+        """
+        Report the outcome of an allowed call.
+
+        Args:
+            healthy: False for transient failures (timeouts, 429/5xx), True otherwise
+        """
+        if healthy:
+            if self.state != self.CLOSED:
+                logger.info("LLM circuit closed")
+            self.state = self.CLOSED
+            self._failures = 0
+            self._trial_running = False
+            return
+        self._failures += 1
+        if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                logger.warning(f"LLM circuit opened after {self._failures} consecutive failures")
+                self._counters["opened"] += 1
+            self.state = self.OPEN
+            self._opened_at = time.monotonic()
+            self._trial_running = False
+
+    def stats(self) -> dict:
+        """
+        Report the circuit state.
+
+        Returns:
+            Dictionary with the state, consecutive failures and counters
+        """
+        return {"state": self.state, "consecutive_failures": self._failures, **self._counters}
+
+
+class ResilientLLMClient:
+    def __init__(
+        self,
+        executors: Executors,
+        max_concurrency: int = 8,
+        call_timeout_s: float = 30.0,
+        deadline_s: float = 60.0,
+        rate_per_s: float = 0.0,
+        burst: int = 5,
+        max_retries: int = 2,
+        backoff_base_s: float = 0.5,
+        backoff_max_s: float = 8.0,
+        breaker: Optional[CircuitBreaker] = None
+    ):
+        """
+        Bounded, rate-limited and retrying wrapper around blocking LLM calls.
+
+        Calls run on the LLM threads. At most max_concurrency provider calls
+        are in flight; a call that times out keeps its slot until its
+        thread returns, so abandoned calls still count. The provider request
+        is given a timeout as well (the attempt timeout for calls, deadline_s
+        for a whole stream), so a hung request frees its thread and slot
+        instead of holding them forever. Transient failures
+        are retried with full-jitter exponential backoff while the overall
+        deadline allows, and feed the circuit breaker. When no answer can
+        be produced in time, LLMUnavailable is raised so callers can fall
+        back to an embedding-only result.
+
+        Args:
+            executors: Executors whose LLM threads run the calls
+            max_concurrency: Provider calls in flight at once
+            call_timeout_s: Timeout of one attempt (for streams: of each chunk)
+            deadline_s: Time budget of a call including queueing and retries
+                (for streams: until the first chunk)
+            rate_per_s: Calls started per second, 0 for no limit
+            burst: Calls that may start at once under the rate limit
+            max_retries: Retries of transient failures
+            backoff_base_s: Backoff cap of the first retry, doubled per retry
+            backoff_max_s: Upper bound of the backoff cap
+            breaker: Circuit breaker (a default one is created when omitted)
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        if call_timeout_s <= 0 or deadline_s <= 0:
+            raise ValueError("call_timeout_s and deadline_s must be positive")
+        if max_retries < 0:
+            raise ValueError("max_retries cannot be negative")
+        if backoff_base_s < 0 or backoff_max_s < 0:
+            raise ValueError("backoff_base_s and backoff_max_s cannot be negative")
+
+        self.executors = executors
+        self.max_concurrency = max_concurrency
+        self.call_timeout_s = call_timeout_s
+        self.deadline_s = deadline_s
+        self.max_retries = max_retries
+        self.backoff_base_s = backoff_base_s
+        self.backoff_max_s = backoff_max_s
+        self.rate_limiter = TokenBucket(rate_per_s, burst)
+        self.breaker = breaker or CircuitBreaker()
+        # Created lazily so it binds to the serving event loop
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._in_flight = 0
+        self._counters = {"calls": 0, "succeeded": 0, "retries": 0, "timeouts": 0, "errors": 0, "unavailable": 0}
+
+    def available(self) -> bool:
+        """False while the circuit is open, so callers can skip preparing a call."""
+        return self.breaker.available()
+
+    async def call(self, func: Callable[..., str], *args) -> str:
+        """
+        Run a blocking LLM call with the concurrency, rate, timeout and retry policy.
+
+        Args:
+            func: Blocking function performing one provider call; it takes a
+                timeout keyword, the seconds the provider request may take
+            *args: Arguments of func
+
+        Returns:
+            The call's result
+
+        Raises:
+            LLMUnavailable: If the circuit is open or the deadline ran out
+        """
+        self._counters["calls"] += 1
+        deadline = time.monotonic() + self.deadline_s
+        attempt = 0
+        while True:
+            self._check_circuit()
+            try:
+                result = await self._attempt(func, args, deadline)
+            except asyncio.CancelledError:
+                self.breaker.cancel()
+                raise
+            except Exception as e:
+                await self._after_failure(e, attempt, deadline)
+                attempt += 1
+                continue
+            self.breaker.record(True)
+            self._record("succeeded")
+            return result
+
+    async def stream(self, func: Callable[..., Iterator[str]], *args) -> AsyncIterator[str]:
+        """
+        Stream a blocking LLM iterator with the same policy as call().
+
+        Failures before the first chunk are retried; once output has been
+        yielded, a failure ends the stream with the error (or LLMUnavailable
+        for timeouts), since the caller already has partial text.
+
+        Args:
+            func: Blocking function returning an iterator of text chunks; it
+                takes a timeout keyword, the seconds the provider request may take
+            *args: Arguments of func
+
+        Yields:
+            Text chunks as the provider produces them
+        """
+        self._counters["calls"] += 1
+        deadline = time.monotonic() + self.deadline_s
+        attempt = 0
+        while True:
+            self._check_circuit()
+            started = False
+            try:
+                await self._acquire(deadline)
+                try:
+                    chunks = self.executors.stream_io(func, *args, timeout=self.deadline_s).__aiter__()
+                    try:
+                        while True:
+                            # Time to first chunk counts against the deadline, then each chunk gets the call timeout
+                            timeout = self.call_timeout_s if started else self._timeout(deadline)
+                            try:
+                                chunk = await asyncio.wait_for(chunks.__anext__(), timeout)
+                            except asyncio.TimeoutError:
+                                raise LLMTimeout(f"No LLM output within {timeout:.1f} s")
+                            except StopAsyncIteration:
+                                break
+                            started = True
+                            yield chunk
+                    finally:
+                        await chunks.aclose()
+                finally:
+                    self._release()
+            except LLMUnavailable:
+                self.breaker.cancel()
+                self._record("unavailable")
+                raise
+            except (GeneratorExit, asyncio.CancelledError):
+                # The consumer went away; output already received proves the provider healthy
+                if started:
+                    self.breaker.record(True)
+                else:
+                    self.breaker.cancel()
+                raise
+            except Exception as e:
+                if started:
+                    self.breaker.record(not getattr(e, "retryable", False))
+                    self._record("timeouts" if isinstance(e, LLMTimeout) else "errors")
+                    if isinstance(e, LLMTimeout):
+                        raise LLMUnavailable(str(e)) from e
+                    raise
+                await self._after_failure(e, attempt, deadline)
+                attempt += 1
+                continue
+            self.breaker.record(True)
+            self._record("succeeded")
+            return
+
+    def stats(self) -> dict:
+        """
+        Report call counters, slots in use and the circuit state.
+
+        Returns:
+            Dictionary of counters and settings
+        """
+        return {
+            **self._counters,
+            "in_flight": self._in_flight,
+            "max_concurrency": self.max_concurrency,
+            "circuit": self.breaker.stats(),
+        }
+
+    # -- internals --------------------------------------------------------
+
+    def _record(self, outcome: str) -> None:
+        self._counters[outcome] += 1
+        record_llm_call(outcome)
+
+    def _check_circuit(self) -> None:
+        if not self.breaker.allow():
+            self._record("unavailable")
+            raise LLMUnavailable("LLM circuit is open")
+
+    def _timeout(self, deadline: float) -> float:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise LLMUnavailable("LLM deadline exceeded")
+        return min(self.call_timeout_s, remaining)
+
+    async def _acquire(self, deadline: float) -> None:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self._timeout(deadline))
+        except asyncio.TimeoutError:
+            raise LLMUnavailable("Timed out waiting for a free LLM slot")
+        self._in_flight += 1
+        try:
+            await self.rate_limiter.acquire(deadline)
+        except BaseException:
+            self._release()
+            raise
+
+    def _release(self, _future: Optional[asyncio.Future] = None) -> None:
+        self._in_flight -= 1
+        self._slots.release()
+
+    async def _attempt(self, func: Callable[..., str], args: tuple, deadline: float) -> str:
+        await self._acquire(deadline)
+        try:
+            timeout = self._timeout(deadline)
+            future = asyncio.ensure_future(self.executors.run_io(func, *args, timeout=timeout))
+        except BaseException:
+            self._release()
+            raise
+        # The slot is freed when the thread returns, even after a timeout
+        future.add_done_callback(self._release)
+        future.add_done_callback(_consume_result)
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            raise LLMTimeout(f"LLM call timed out after {timeout:.1f} s")
+
+    async def _after_failure(self, error: Exception, attempt: int, deadline: float) -> None:
+        """Record a failed attempt and sleep before the retry, or raise if there is none."""
+        if isinstance(error, LLMUnavailable):
+            # Waiting for a slot or the rate limit ran out of time; the provider was not called
+            self.breaker.cancel()
+            self._record("unavailable")
+            raise error
+        retryable = getattr(error, "retryable", False)
+        self.breaker.record(not retryable)
+        if isinstance(error, LLMTimeout):
+            self._counters["timeouts"] += 1
+            record_llm_call("timeouts")
+        if not retryable:
+            self._record("errors")
+            raise error
+        delay = random.uniform(0.0, min(self.backoff_max_s, self.backoff_base_s * 2 ** attempt))
+        if attempt >= self.max_retries or time.monotonic() + delay >= deadline:
+            self._record("unavailable")
+            raise LLMUnavailable(f"LLM unavailable after {attempt + 1} attempts: {error}") from error
+        logger.warning(f"LLM call failed ({error}), retrying in {delay:.2f} s")
+        self._record("retries")
+        await asyncio.sleep(delay)
+
+
+def _consume_result(future: asyncio.Future) -> None:
+    # Retrieve the outcome of calls abandoned after a timeout so errors are not reported as unhandled
+    if not future.cancelled():
+        future.exception()
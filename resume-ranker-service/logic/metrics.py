@@ -0,0 +1,261 @@
+import logging
+import os
+import re
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Optional, Tuple
+
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+from prometheus_client import multiprocess
+
+
+# Stage durations range from sub-millisecond similarity to minute-long LLM calls
+_SECONDS_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+STAGE_SECONDS = Histogram(
+    "ranker_stage_duration_seconds", "Time spent in each pipeline stage", ["stage"], buckets=_SECONDS_BUCKETS
+)
+# With several worker processes, gauges are summed over the live workers
+STAGE_IN_FLIGHT = Gauge(
+    "ranker_stage_in_flight", "Pipeline stages currently running", ["stage"], multiprocess_mode="livesum"
+)
+STAGE_ERRORS = Counter("ranker_stage_errors_total", "Pipeline stages that raised an error", ["stage"])
+
+REQUEST_SECONDS = Histogram(
+    "ranker_request_duration_seconds", "HTTP request latency", ["endpoint"], buckets=_SECONDS_BUCKETS
+)
+REQUESTS = Counter("ranker_requests_total", "HTTP requests by endpoint and status", ["endpoint", "status"])
+REQUESTS_IN_FLIGHT = Gauge(
+    "ranker_requests_in_flight", "HTTP requests currently being served", multiprocess_mode="livesum"
+)
+
+UPLOAD_BYTES = Counter("ranker_upload_bytes_total", "Bytes of uploaded files read")
+PDF_DOCUMENTS = Counter("ranker_pdf_documents_total", "PDF documents extracted (cache misses)")
+PDF_PAGES = Counter("ranker_pdf_pages_total", "PDF pages extracted")
+PDF_BYTES = Counter("ranker_pdf_bytes_total", "Bytes of PDF documents extracted")
+EXTRACTED_CHARS = Counter("ranker_extracted_chars_total", "Characters of text extracted from PDFs")
+LLM_CALLS = Counter("ranker_llm_calls_total", "LLM call attempts by outcome", ["outcome"])
+ANALYSIS_DECISIONS = Counter(
+    "ranker_analysis_decisions_total", "Candidates sent to the LLM or summarized by template", ["policy", "path"]
+)
+ADMISSION_REJECTED = Counter("ranker_admission_rejected_total", "Upload requests turned away", ["reason"])
+ADMISSION_WAITING = Gauge(
+    "ranker_admission_waiting", "Upload requests waiting for an admission slot", multiprocess_mode="livesum"
+)
+
+_REQUEST_ID_PATTERN = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+
+_request_id: ContextVar[str] = ContextVar("request_id", default="-")
+_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar("timings", default=None)
+
+
+def current_request_id() -> str:
+    """Id of the request (or job) being served by the current task."""
+    return _request_id.get()
+
+
+def set_request_id(request_id: str) -> None:
+    """
+    Tag log lines and stage timings of the current task with an id.
+
+    Args:
+        request_id: Request or job id
+    """
+    _request_id.set(request_id)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """
+    Time a pipeline stage.
+
+    The duration goes to the stage histogram and, inside a request, to its
+    Server-Timing header. Stages that run several times in one request
+    (e.g. extraction of each document) add up.
+
+    Args:
+        name: Stage name
+    """
+    in_flight = STAGE_IN_FLIGHT.labels(name)
+    in_flight.inc()
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        STAGE_ERRORS.labels(name).inc()
+        raise
+    finally:
+        in_flight.dec()
+        record_stage(name, time.perf_counter() - started)
+
+
+def record_stage(name: str, seconds: float) -> None:
+    """
+    Record the duration of a stage timed in pieces rather than in one block.
+
+    Args:
+        name: Stage name
+        seconds: Duration in seconds
+    """
+    STAGE_SECONDS.labels(name).observe(seconds)
+    timings = _timings.get()
+    if timings is not None:
+        timings[name] = timings.get(name, 0.0) + seconds
+
+
+def record_upload(size: int) -> None:
+    """Count the bytes of an uploaded file."""
+    UPLOAD_BYTES.inc(size)
+
+
+def record_extraction(pages: int, size: int, chars: int) -> None:
+    """
+    Count an extracted PDF document.
+
+    Args:
+        pages: Pages extracted
+        size: Size of the PDF in bytes
+        chars: Characters of extracted text
+    """
+    PDF_DOCUMENTS.inc()
+    PDF_PAGES.inc(pages)
+    PDF_BYTES.inc(size)
+    EXTRACTED_CHARS.inc(chars)
+
+
+def record_llm_call(outcome: str) -> None:
+    """
+    Count an LLM call outcome.
+
+    Args:
+        outcome: "succeeded", "retries", "timeouts", "errors" or "unavailable"
+    """
+    LLM_CALLS.labels(outcome).inc()
+
+
+def record_analysis_decision(policy: str, path: str) -> None:
+    """
+    Count an analysis policy decision.
+
+    Args:
+        policy: "always", "threshold" or "top_k"
+        path: "llm" or "template"
+    """
+    ANALYSIS_DECISIONS.labels(policy, path).inc()
+
+
+def record_admission_rejected(reason: str) -> None:
+    """
+    Count an upload request turned away.
+
+    Args:
+        reason: "queue_full", "queue_timeout", "request_too_large" or "file_too_large"
+    """
+    ADMISSION_REJECTED.labels(reason).inc()
+
+
+def record_admission_queued(delta: int) -> None:
+    """Track requests entering (1) or leaving (-1) the admission queue."""
+    ADMISSION_WAITING.inc(delta)
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """
+    Render all metrics in the Prometheus text format.
+
+    Under gunicorn, PROMETHEUS_MULTIPROC_DIR is set and the metrics of all
+    worker processes are aggregated from their files there.
+
+    Returns:
+        Tuple of (body, content type)
+    """
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
+
+
+def mark_worker_dead(pid: int) -> None:
+    """
+    Drop the live gauges of a worker process that exited.
+
+    Args:
+        pid: Process id of the worker
+    """
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(pid)
+
+
+def install_log_request_ids() -> None:
+    """Add the current request id to every log record as %(request_id)s."""
+    factory = logging.getLogRecordFactory()
+
+    def record_factory(*args, **kwargs) -> logging.LogRecord:
+        record = factory(*args, **kwargs)
+        record.request_id = _request_id.get()
+        return record
+
+    logging.setLogRecordFactory(record_factory)
+
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        """
+        ASGI middleware timing requests and tagging them with a request id.
+
+        The id is taken from an incoming X-Request-ID header or generated,
+        and returned in X-Request-ID. Stage timings collected while the
+        request runs are returned in a Server-Timing header; for streaming
+        responses it covers the stages finished before the first byte.
+
+        Args:
+            app: ASGI application
+        """
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope.get("headers", []):
+            if name == b"x-request-id":
+                candidate = value.decode("latin-1")
+                if _REQUEST_ID_PATTERN.match(candidate):
+                    request_id = candidate
+                break
+        request_id = request_id or uuid.uuid4().hex[:16]
+        id_token = _request_id.set(request_id)
+        timings: Dict[str, float] = {}
+        timings_token = _timings.set(timings)
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_headers(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                entries = [f"{name};dur={seconds * 1000.0:.1f}" for name, seconds in timings.items()]
+                entries.append(f"total;dur={(time.perf_counter() - started) * 1000.0:.1f}")
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", ", ".join(entries).encode("latin-1")))
+                headers.append((b"x-request-id", request_id.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        REQUESTS_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            REQUESTS_IN_FLIGHT.dec()
+            endpoint = scope.get("endpoint")
+            endpoint_name = getattr(endpoint, "__name__", "unmatched")
+            REQUEST_SECONDS.labels(endpoint_name).observe(time.perf_counter() - started)
+            REQUESTS.labels(endpoint_name, str(status)).inc()
+            _timings.reset(timings_token)
+            _request_id.reset(id_token)
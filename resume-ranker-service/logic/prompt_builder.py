@@ -0,0 +1,242 @@
+from dataclasses import dataclass
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from logic.embedder import Embedder
+from logic.similarity import normalize, similarity_matrix
+
+
+# Rough characters-per-token ratio for English text; avoids a tokenizer call
+CHARS_PER_TOKEN = 4
+
+# Inserted where passages were dropped between two kept ones
+GAP_MARKER = "\n[...]\n"
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the LLM token count of a text.
+
+    Args:
+        text: Input text
+
+    Returns:
+        Approximate number of tokens
+    """
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def split_passages(text: str, passage_tokens: int) -> List[str]:
+    """
+    Split text into passages of roughly passage_tokens tokens.
+
+    Consecutive lines are grouped until a passage is full; lines longer
+    than a passage are cut at whitespace.
+
+    Args:
+        text: Input text
+        passage_tokens: Target passage size in tokens
+
+    Returns:
+        List of passages in document order
+    """
+    limit = passage_tokens * CHARS_PER_TOKEN
+    passages: List[str] = []
+    current: List[str] = []
+    size = 0
+
+    def flush() -> None:
+        nonlocal current, size
+        if current:
+            passages.append("\n".join(current))
+        current, size = [], 0
+
+    for line in text.splitlines():
+        line = line.strip()
+        while len(line) > limit:
+            cut = line.rfind(" ", 0, limit)
+            cut = limit if cut <= 0 else cut
+            flush()
+            passages.append(line[:cut])
+            line = line[cut:].strip()
+        if not line:
+            continue
+        if size + len(line) > limit:
+            flush()
+        current.append(line)
+        size += len(line) + 1
+    flush()
+    return passages
+
+
+def _select(passages: Sequence[str], scores: np.ndarray, budget_tokens: int) -> List[int]:
+    # Greedily keep the best-scoring passages that still fit the budget,
+    # then restore document order. Each passage is charged for the widest
+    # separator _join() may put before it.
+    kept, used = [], 0
+    for index in np.argsort(-scores, kind="stable"):
+        cost = estimate_tokens(passages[index] + GAP_MARKER)
+        if used + cost <= budget_tokens:
+            kept.append(int(index))
+            used += cost
+    return sorted(kept)
+
+
+def _join(passages: Sequence[str], kept: List[int]) -> str:
+    parts = []
+    for position, index in enumerate(kept):
+        if position > 0:
+            parts.append(GAP_MARKER if index != kept[position - 1] + 1 else "\n")
+        parts.append(passages[index])
+    return "".join(parts)
+
+
+@dataclass
+class BudgetedPrompt:
+    resume_text: str
+    jd_text: str
+    trimmed: bool
+    input_tokens: int
+    prompt_tokens: int
+    token_budget: int
+    resume_passages_kept: int = 0
+    resume_passages_total: int = 0
+    jd_passages_kept: int = 0
+    jd_passages_total: int = 0
+
+
+@dataclass
+class JDPassages:
+    passages: List[str]
+    vectors: np.ndarray
+    passage_tokens: int
+
+
+class PromptBuilder:
+    def __init__(
+        self,
+        embedder: Embedder,
+        token_budget: int = 6000,
+        passage_tokens: int = 120,
+        jd_share: float = 0.35
+    ):
+        """
+        Fit resume and job description text into an LLM token budget.
+
+        When the texts are too long, both are split into passages that are
+        encoded in a single batch. The resume keeps the passages closest to
+        any job description passage, and an over-long job description keeps
+        the passages closest to its own centroid.
+
+        Args:
+            embedder: Embedder used to score passages
+            token_budget: Maximum estimated tokens of the whole prompt
+            passage_tokens: Target passage size in tokens
+            jd_share: Share of the budget reserved for the job description
+        """
+        if token_budget < 1:
+            raise ValueError("token_budget must be at least 1")
+        if passage_tokens < 1:
+            raise ValueError("passage_tokens must be at least 1")
+        if not 0.0 < jd_share < 1.0:
+            raise ValueError("jd_share must be between 0 and 1")
+
+        self.embedder = embedder
+        self.token_budget = token_budget
+        self.passage_tokens = passage_tokens
+        self.jd_share = jd_share
+
+    def prepare_jd(self, jd_text: str) -> JDPassages:
+        """
+        Split and encode a job description's passages ahead of build().
+
+        Args:
+            jd_text: Extracted job description text
+
+        Returns:
+            JDPassages with normalized passage embeddings
+        """
+        passages = split_passages(jd_text, self.passage_tokens)
+        if passages:
+            vectors = normalize(self.embedder.embed_batch(passages))
+        else:
+            vectors = np.zeros((0, self.embedder.dimension), dtype=np.float32)
+        return JDPassages(passages=passages, vectors=vectors, passage_tokens=self.passage_tokens)
+
+    def build(
+        self,
+        resume_text: str,
+        jd_text: str,
+        template: str = "",
+        jd_passages: Optional[JDPassages] = None
+    ) -> BudgetedPrompt:
+        """
+        Trim resume and job description text to fit the token budget.
+
+        Args:
+            resume_text: Extracted resume text
+            jd_text: Extracted job description text
+            template: Prompt text surrounding the documents, counted against the budget
+            jd_passages: Passages of jd_text from prepare_jd(), so that only
+                the resume is encoded (ignored if split with other settings)
+
+        Returns:
+            BudgetedPrompt with the texts to send and how much was trimmed
+        """
+        overhead = estimate_tokens(template)
+        resume_tokens = estimate_tokens(resume_text)
+        jd_tokens = estimate_tokens(jd_text)
+        input_tokens = overhead + resume_tokens + jd_tokens
+        available = max(self.token_budget - overhead, 0)
+
+        if input_tokens <= self.token_budget:
+            return BudgetedPrompt(
+                resume_text=resume_text,
+                jd_text=jd_text,
+                trimmed=False,
+                input_tokens=input_tokens,
+                prompt_tokens=input_tokens,
+                token_budget=self.token_budget
+            )
+
+        # The job description gets its share, or more if the resume is short
+        jd_budget = min(jd_tokens, max(int(available * self.jd_share), available - resume_tokens))
+        resume_passages = split_passages(resume_text, self.passage_tokens)
+        if jd_passages is not None and jd_passages.passage_tokens == self.passage_tokens:
+            resume_vectors = normalize(self.embedder.embed_batch(resume_passages))
+            jd_vectors = jd_passages.vectors
+            jd_passages = jd_passages.passages
+        else:
+            jd_passages = split_passages(jd_text, self.passage_tokens)
+            # One encode call for the passages of both documents
+            vectors = normalize(self.embedder.embed_batch(resume_passages + jd_passages))
+            resume_vectors = vectors[:len(resume_passages)]
+            jd_vectors = vectors[len(resume_passages):]
+
+        jd_kept = list(range(len(jd_passages)))
+        if jd_tokens > jd_budget:
+            centroid = normalize(jd_vectors.mean(axis=0))
+            jd_kept = _select(jd_passages, jd_vectors @ centroid, jd_budget)
+        trimmed_jd = _join(jd_passages, jd_kept)
+
+        resume_budget = max(available - estimate_tokens(trimmed_jd), 0)
+        if jd_kept:
+            relevance = similarity_matrix(resume_vectors, jd_vectors[jd_kept], normalized=True).max(axis=1)
+        else:
+            relevance = np.zeros(len(resume_passages), dtype=np.float32)
+        resume_kept = _select(resume_passages, relevance, resume_budget)
+        trimmed_resume = _join(resume_passages, resume_kept)
+
+        return BudgetedPrompt(
+            resume_text=trimmed_resume,
+            jd_text=trimmed_jd,
+            trimmed=True,
+            input_tokens=input_tokens,
+            prompt_tokens=overhead + estimate_tokens(trimmed_resume) + estimate_tokens(trimmed_jd),
+            token_budget=self.token_budget,
+            resume_passages_kept=len(resume_kept),
+            resume_passages_total=len(resume_passages),
+            jd_passages_kept=len(jd_kept),
+            jd_passages_total=len(jd_passages)
+        )
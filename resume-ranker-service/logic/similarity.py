@@ -1,27 +1,230 @@
 import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
-from typing import Union
+from typing import List, Optional, Tuple
+
+
+# Rows scored per matrix product; bounds temporary memory for large N
+DEFAULT_BLOCK_ROWS = 16384
+
+
+def normalize(embeddings: np.ndarray) -> np.ndarray:
+    """
+    L2-normalize embeddings so cosine similarity becomes a dot product.
+
+    Args:
+        embeddings: Embedding vector or matrix with one embedding per row
+
+    Returns:
+        Float32 copy with unit-length rows (zero rows stay zero)
+    """
+    normalized = np.array(embeddings, dtype=np.float32, copy=True)
+    squeeze = normalized.ndim == 1
+    normalized = np.atleast_2d(normalized)
+
+    norms = np.linalg.norm(normalized, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    normalized /= norms
+
+    return normalized[0] if squeeze else normalized
+
+
+def _as_rows(embeddings: np.ndarray) -> np.ndarray:
+    if embeddings.ndim == 1:
+        return embeddings.reshape(1, -1)
+    return embeddings
+
+
+def similarity_matrix(
+    queries: np.ndarray,
+    embeddings: np.ndarray,
+    normalized: bool = False,
+    block_rows: int = DEFAULT_BLOCK_ROWS
+) -> np.ndarray:
+    """
+    Calculate cosine similarity between every query and every embedding.
+
+    Covers 1x1, 1xN and MxN scoring. Embeddings are processed in blocks of
+    block_rows, so they may be a memory-mapped matrix.
+
+    Args:
+        queries: Query vector or matrix with one query per row
+        embeddings: Embedding vector or matrix with one embedding per row
+        normalized: True if both inputs are already L2-normalized
+        block_rows: Number of embedding rows scored per matrix product
+
+    Returns:
+        Float32 matrix of shape (M, N) with scores between 0 and 1
+    """
+    queries = _as_rows(np.asarray(queries, dtype=np.float32))
+    if not normalized:
+        queries = normalize(queries)
+    embeddings = _as_rows(embeddings)
+
+    scores = np.empty((queries.shape[0], embeddings.shape[0]), dtype=np.float32)
+    for start in range(0, embeddings.shape[0], block_rows):
+        block = np.asarray(embeddings[start:start + block_rows], dtype=np.float32)
+        if not normalized:
+            block = normalize(block)
+        scores[:, start:start + block.shape[0]] = queries @ block.T
+
+    # Ensure the results are between 0 and 1
+    return np.clip(scores, 0.0, 1.0, out=scores)
+
+
+def top_k_similar(
+    query: np.ndarray,
+    embeddings: np.ndarray,
+    k: int,
+    normalized: bool = False,
+    exclude: Optional[np.ndarray] = None,
+    block_rows: int = DEFAULT_BLOCK_ROWS
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Find the k embeddings most similar to a query.
+
+    Each block is reduced to its best k rows with argpartition, so memory
+    stays bounded by block_rows regardless of the number of embeddings.
+
+    Args:
+        query: Query embedding vector
+        embeddings: Matrix with one embedding per row (may be memory-mapped)
+        k: Maximum number of results
+        normalized: True if query and embeddings are already L2-normalized
+        exclude: Optional boolean mask of rows to skip
+        block_rows: Number of embedding rows scored per matrix product
+
+    Returns:
+        Tuple of (row indices, scores between 0 and 1), best first
+    """
+    if k < 1:
+        raise ValueError("k must be at least 1")
+
+    query = np.asarray(query, dtype=np.float32).ravel()
+    if not normalized:
+        query = normalize(query)
+    embeddings = _as_rows(embeddings)
+
+    best_rows = np.empty(0, dtype=np.int64)
+    best_scores = np.empty(0, dtype=np.float32)
+    for start in range(0, embeddings.shape[0], block_rows):
+        block = np.asarray(embeddings[start:start + block_rows], dtype=np.float32)
+        if not normalized:
+            block = normalize(block)
+        scores = block @ query
+        if exclude is not None:
+            scores[exclude[start:start + block.shape[0]]] = -np.inf
+
+        block_k = min(k, scores.shape[0])
+        candidates = np.argpartition(-scores, block_k - 1)[:block_k]
+        best_rows = np.concatenate([best_rows, candidates + start])
+        best_scores = np.concatenate([best_scores, scores[candidates]])
+        if best_scores.shape[0] > k:
+            keep = np.argpartition(-best_scores, k - 1)[:k]
+            best_rows, best_scores = best_rows[keep], best_scores[keep]
+
+    order = np.argsort(-best_scores, kind="stable")
+    best_rows, best_scores = best_rows[order], best_scores[order]
+
+    # Excluded rows can only surface when fewer than k rows remain
+    finite = np.isfinite(best_scores)
+    return best_rows[finite], np.clip(best_scores[finite], 0.0, 1.0)
+
+
+def mean_pool(chunk_embeddings: np.ndarray) -> np.ndarray:
+    """
+    Combine the chunk embeddings of a document into one embedding.
+
+    Args:
+        chunk_embeddings: Matrix with one chunk embedding per row
+
+    Returns:
+        L2-normalized float32 mean of the chunk embeddings
+    """
+    chunk_embeddings = _as_rows(np.asarray(chunk_embeddings, dtype=np.float32))
+    return normalize(chunk_embeddings.mean(axis=0))
+
+
+def max_sim_scores(
+    query_chunks: np.ndarray,
+    documents_chunks: List[np.ndarray],
+    normalized: bool = False
+) -> np.ndarray:
+    """
+    Score documents by how well they cover every chunk of a query.
+
+    Each query chunk is matched to its most similar chunk of a document and
+    the document score is the mean of those best matches. All documents are
+    scored with one matrix product over their concatenated chunks.
+
+    Args:
+        query_chunks: Matrix with one query chunk embedding per row
+        documents_chunks: One chunk embedding matrix per document
+        normalized: True if all inputs are already L2-normalized
+
+    Returns:
+        Array of scores between 0 and 1, one per document
+    """
+    if not documents_chunks:
+        return np.empty(0, dtype=np.float32)
+
+    documents_chunks = [_as_rows(np.asarray(chunks, dtype=np.float32)) for chunks in documents_chunks]
+    stacked = np.vstack(documents_chunks)
+    starts = np.cumsum([0] + [chunks.shape[0] for chunks in documents_chunks[:-1]])
+
+    scores = similarity_matrix(query_chunks, stacked, normalized=normalized)
+    best = np.maximum.reduceat(scores, starts, axis=1)
+    return best.mean(axis=0)
+
+
+def hybrid_scores(dense: np.ndarray, lexical: np.ndarray, lexical_weight: float) -> np.ndarray:
+    """
+    Fuse dense and lexical scores into one ranking score.
+
+    Both inputs are on a 0..1 scale, so a weighted mean keeps the fused
+    score comparable across requests, unlike rank-based fusion.
+
+    Args:
+        dense: Cosine similarity scores
+        lexical: Lexical scores aligned with dense
+        lexical_weight: Weight of the lexical score between 0 and 1
+
+    Returns:
+        Float32 array of fused scores between 0 and 1
+    """
+    if not 0.0 <= lexical_weight <= 1.0:
+        raise ValueError("lexical_weight must be between 0 and 1")
+    dense = np.asarray(dense, dtype=np.float32)
+    lexical = np.asarray(lexical, dtype=np.float32)
+    return (1.0 - lexical_weight) * dense + lexical_weight * lexical
+
+
+def calculate_cosine_similarities(
+    query: np.ndarray,
+    embeddings: np.ndarray,
+    normalized: bool = False
+) -> np.ndarray:
+    """
+    Calculate cosine similarity between one embedding and many.
+
+    Args:
+        query: Query embedding vector
+        embeddings: Matrix with one embedding per row
+        normalized: True if both inputs are already L2-normalized
+
+    Returns:
+        Array of cosine similarity scores between 0 and 1
+    """
+    return similarity_matrix(query, embeddings, normalized=normalized)[0]
 
 
 def calculate_cosine_similarity(embedding1: np.ndarray, embedding2: np.ndarray) -> float:
     """
     Calculate cosine similarity between two embeddings.
-    
+
     Args:
         embedding1: First embedding vector
         embedding2: Second embedding vector
-        
+
     Returns:
         Cosine similarity score between 0 and 1
     """
-    # Reshape to ensure 2D arrays
-    if embedding1.ndim == 1:
-        embedding1 = embedding1.reshape(1, -1)
-    if embedding2.ndim == 1:
-        embedding2 = embedding2.reshape(1, -1)
-    
-    similarity = cosine_similarity(embedding1, embedding2)[0][0]
-    
-    # Ensure the result is between 0 and 1
-    return float(max(0.0, min(1.0, similarity)))
-
+    return float(similarity_matrix(embedding1, embedding2)[0, 0])
@@ -0,0 +1,217 @@
+import re
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+
+# Words, plus tokens such as "c++", "c#", "node.js", "ci/cd" and "scikit-learn";
+# a dot opening a word is kept (".net"), so it stays distinct from "net"
+_TOKEN_PATTERN = re.compile(r"(?:(?<![a-z0-9])\.(?=[a-z]))?[a-z0-9][a-z0-9+#]*(?:[./-][a-z0-9+#]+)*")
+
+STOPWORDS = frozenset("""
+a about above after all also an and any are as at be been being both but by can could did do does
+doing during each either etc for from had has have having he her here his how i if in into is it its
+just may me might more most must my no nor not of off on once only or other our out over own per
+same she should so some such than that the their them then there these they this those through to
+too under until up upon us very via was we were what when where which while who whom why will with
+within without would you your
+""".split())
+
+# Canonical skill name and the spellings that refer to it; the name itself
+# is matched too. Ambiguous words ("go", "rest", "spring", "excel") are
+# only matched in longer forms.
+DEFAULT_SKILLS: Dict[str, Sequence[str]] = {
+    # Languages
+    "python": ("python", "python3"),
+    "java": ("java",),
+    "javascript": ("javascript", "js", "ecmascript"),
+    "typescript": ("typescript",),
+    "golang": ("golang", "go lang"),
+    "c++": ("c++", "cpp"),
+    "c#": ("c#", "csharp"),
+    "kotlin": ("kotlin",),
+    "scala": ("scala",),
+    "rust": ("rust", "rustlang"),
+    "ruby": ("ruby",),
+    "php": ("php",),
+    "swift": ("swift",),
+    "sql": ("sql", "t-sql", "pl/sql"),
+    "bash": ("bash", "shell scripting"),
+    # Frameworks
+    "react": ("react", "react.js", "reactjs"),
+    "angular": ("angular", "angularjs"),
+    "vue": ("vue", "vue.js", "vuejs"),
+    "node.js": ("node.js", "nodejs"),
+    "django": ("django",),
+    "flask": ("flask",),
+    "fastapi": ("fastapi",),
+    "spring boot": ("spring boot", "spring-boot", "springboot"),
+    "dotnet": ("dotnet", ".net", "asp.net", ".net core", ".net framework"),
+    "ruby on rails": ("ruby on rails", "rails"),
+    # Data
+    "postgresql": ("postgresql", "postgres"),
+    "mysql": ("mysql",),
+    "mongodb": ("mongodb", "mongo"),
+    "redis": ("redis",),
+    "elasticsearch": ("elasticsearch", "elastic search", "opensearch"),
+    "kafka": ("kafka", "apache kafka"),
+    "rabbitmq": ("rabbitmq",),
+    "spark": ("spark", "apache spark", "pyspark"),
+    "hadoop": ("hadoop",),
+    "airflow": ("airflow", "apache airflow"),
+    "snowflake": ("snowflake",),
+    "bigquery": ("bigquery",),
+    "dbt": ("dbt",),
+    "pandas": ("pandas",),
+    "numpy": ("numpy",),
+    "data pipelines": ("data pipelines", "data pipeline", "etl"),
+    # Machine learning
+    "machine learning": ("machine learning", "ml"),
+    "deep learning": ("deep learning",),
+    "pytorch": ("pytorch", "torch"),
+    "tensorflow": ("tensorflow",),
+    "scikit-learn": ("scikit-learn", "sklearn", "scikit learn"),
+    "nlp": ("nlp", "natural language processing"),
+    "computer vision": ("computer vision",),
+    "llm": ("llm", "llms", "large language models"),
+    # Cloud and operations
+    "aws": ("aws", "amazon web services"),
+    "gcp": ("gcp", "google cloud", "google cloud platform"),
+    "azure": ("azure", "microsoft azure"),
+    "docker": ("docker",),
+    "kubernetes": ("kubernetes", "k8s"),
+    "terraform": ("terraform",),
+    "ansible": ("ansible",),
+    "jenkins": ("jenkins",),
+    "ci/cd": ("ci/cd", "cicd", "continuous integration"),
+    "git": ("git",),
+    "linux": ("linux",),
+    "microservices": ("microservices", "microservice"),
+    "graphql": ("graphql",),
+    "rest apis": ("rest api", "rest apis", "restful"),
+    "grpc": ("grpc",),
+    "observability": ("observability", "prometheus", "grafana"),
+    # Certifications, methods and business tools
+    "cpa": ("cpa", "certified public accountant"),
+    "cfa": ("cfa", "chartered financial analyst"),
+    "pmp": ("pmp", "project management professional"),
+    "cissp": ("cissp",),
+    "six sigma": ("six sigma",),
+    "scrum": ("scrum", "scrum master"),
+    "agile": ("agile",),
+    "gaap": ("gaap",),
+    "ifrs": ("ifrs",),
+    "microsoft excel": ("microsoft excel", "ms excel"),
+    "sap": ("sap",),
+    "salesforce": ("salesforce",),
+    "tableau": ("tableau",),
+    "power bi": ("power bi", "powerbi"),
+    "figma": ("figma",),
+    "seo": ("seo", "search engine optimization"),
+    "hipaa": ("hipaa",),
+}
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lowercase word tokens for lexical matching.
+
+    Args:
+        text: Input text
+
+    Returns:
+        Tokens in document order, including stopwords
+    """
+    return _TOKEN_PATTERN.findall(text.lower())
+
+
+class SkillDictionary:
+    def __init__(self, skills: Optional[Dict[str, Sequence[str]]] = None):
+        """
+        Recognise skill and certification mentions in tokenized text.
+
+        Spellings are matched as token sequences, longest first, so "spring
+        boot" is one skill and "apache kafka" does not also count as a
+        separate "kafka" mention.
+
+        Args:
+            skills: Canonical skill names mapped to their spellings
+                (defaults to DEFAULT_SKILLS)
+        """
+        phrases: Dict[Tuple[str, ...], str] = {}
+        for name, spellings in (DEFAULT_SKILLS if skills is None else skills).items():
+            for spelling in (name, *spellings):
+                phrase = tuple(tokenize(spelling))
+                if phrase:
+                    phrases[phrase] = name
+        # Phrases by first token, longest first; most tokens start none
+        self._by_first: Dict[str, List[Tuple[Tuple[str, ...], str]]] = {}
+        for phrase, name in sorted(phrases.items(), key=lambda item: -len(item[0])):
+            self._by_first.setdefault(phrase[0], []).append((phrase[1:], name))
+        self.names = sorted(set(phrases.values()))
+
+    @classmethod
+    def from_file(cls, path: Optional[str]) -> "SkillDictionary":
+        """
+        Build the default dictionary extended with skills from a text file.
+
+        Each non-empty line that does not start with "#" holds a canonical
+        name followed by optional spellings, separated by "|", e.g.
+        "kubernetes|k8s|kube".
+
+        Args:
+            path: Text file, or None for the defaults only
+
+        Returns:
+            SkillDictionary
+        """
+        skills = {name: tuple(spellings) for name, spellings in DEFAULT_SKILLS.items()}
+        if path:
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line or line.startswith("#"):
+                        continue
+                    name, *spellings = [part.strip().lower() for part in line.split("|")]
+                    if name:
+                        skills[name] = tuple(skills.get(name, ())) + tuple(s for s in spellings if s)
+        return cls(skills)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def extract(self, tokens: Sequence[str]) -> List[str]:
+        """
+        Find the skills mentioned in a token sequence.
+
+        Args:
+            tokens: Tokens from tokenize()
+
+        Returns:
+            Canonical skill names, each once, in order of first mention
+        """
+        by_first = self._by_first
+        found: Dict[str, None] = {}
+        consumed = 0
+        for position in [i for i, token in enumerate(tokens) if token in by_first]:
+            if position < consumed:
+                # Inside a longer phrase matched already
+                continue
+            for rest, name in by_first[tokens[position]]:
+                end = position + 1 + len(rest)
+                if not rest or tuple(tokens[position + 1:end]) == rest:
+                    found.setdefault(name)
+                    consumed = end
+                    break
+        return list(found)
+
+
+def content_terms(tokens: Iterable[str]) -> List[str]:
+    """
+    Drop stopwords and bare numbers from a token sequence.
+
+    Args:
+        tokens: Tokens from tokenize()
+
+    Returns:
+        Tokens worth indexing
+    """
+    return [token for token in tokens if token not in STOPWORDS and not token.isdigit()]
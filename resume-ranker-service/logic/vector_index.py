@@ -0,0 +1,481 @@
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from logic.similarity import normalize, top_k_similar
+
+try:
+    import fcntl
+except ImportError:  # Windows: the index is then only safe within one process
+    fcntl = None
+
+
+class VectorIndex:
+    def __init__(self, directory: str, block_rows: int = 16384):
+        """
+        Persistent, append-only index of resume embeddings.
+
+        Vectors are stored L2-normalized as a raw float32 matrix that is
+        memory-mapped for search, so queries stream over the file in blocks
+        instead of loading it into RAM. Ids and metadata live in a JSON-lines
+        sidecar that also records deletes as tombstones; compact() rewrites
+        both files without the deleted rows.
+
+        Several processes may share the directory: writers take an
+        exclusive file lock, and every call first applies what other
+        processes appended to the sidecar (or reloads after a compaction).
+
+        Args:
+            directory: Directory holding the index files
+            block_rows: Number of rows scored per matrix-vector product
+        """
+        if block_rows < 1:
+            raise ValueError("block_rows must be at least 1")
+
+        self.directory = directory
+        self.block_rows = block_rows
+        self.dim: Optional[int] = None
+        self._generation = 0
+        self._lock = threading.RLock()
+
+        self._rows: List[Optional[Dict]] = []
+        self._id_to_row: Dict[str, int] = {}
+        self._deleted = np.zeros(0, dtype=bool)
+        self._matrix: Optional[np.memmap] = None
+        # Sidecar bytes applied so far and the manifest they belong to
+        self._rows_offset = 0
+        self._manifest_stamp: Optional[Tuple[int, int, int]] = None
+
+        os.makedirs(directory, exist_ok=True)
+        with self._lock, self._file_lock():
+            self._load(repair=True)
+
+    # -- public API -------------------------------------------------------
+
+    def __len__(self) -> int:
+        """Number of live (non-deleted) vectors."""
+        with self._lock:
+            self._refresh()
+            return len(self._id_to_row)
+
+    def add(
+        self,
+        vectors: np.ndarray,
+        ids: Optional[List[str]] = None,
+        metadata: Optional[List[Dict]] = None
+    ) -> List[str]:
+        """
+        Append vectors to the index.
+
+        Adding an id that already exists replaces the previous vector.
+
+        Args:
+            vectors: Matrix with one embedding per row
+            ids: Optional ids, generated when omitted
+            metadata: Optional JSON-serializable metadata per vector
+
+        Returns:
+            Ids of the added vectors
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.ndim == 1:
+            vectors = vectors.reshape(1, -1)
+        count = vectors.shape[0]
+        if count == 0:
+            return []
+        if ids is None:
+            ids = [uuid.uuid4().hex for _ in range(count)]
+        if metadata is None:
+            metadata = [{} for _ in range(count)]
+        if len(ids) != count or len(metadata) != count:
+            raise ValueError("ids and metadata must match the number of vectors")
+        if len(set(ids)) != count:
+            raise ValueError("ids must be unique within one add call")
+
+        vectors = normalize(vectors)
+
+        with self._lock, self._writing():
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+                self._write_manifest()
+            elif vectors.shape[1] != self.dim:
+                raise ValueError(f"Expected vectors of dimension {self.dim}, got {vectors.shape[1]}")
+
+            first_row = len(self._rows)
+            # Vectors go to disk before the sidecar so a crash in between
+            # leaves only trailing rows that _load() truncates.
+            with open(self._vectors_path(), "ab") as f:
+                f.write(vectors.tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+
+            records = []
+            for offset, (item_id, meta) in enumerate(zip(ids, metadata)):
+                previous = self._id_to_row.get(item_id)
+                if previous is not None:
+                    records.append({"op": "delete", "row": previous})
+                records.append({"op": "add", "row": first_row + offset, "id": item_id, "metadata": meta})
+            self._append_records(records)
+            for record in records:
+                self._apply(record)
+            self._matrix = None
+
+        return list(ids)
+
+    def delete(self, ids: List[str]) -> int:
+        """
+        Tombstone vectors by id.
+
+        Args:
+            ids: Ids to delete
+
+        Returns:
+            Number of vectors deleted
+        """
+        with self._lock, self._writing():
+            records = [
+                {"op": "delete", "row": self._id_to_row[item_id]}
+                for item_id in dict.fromkeys(ids) if item_id in self._id_to_row
+            ]
+            if records:
+                self._append_records(records)
+                for record in records:
+                    self._apply(record)
+            return len(records)
+
+    def get(self, item_id: str) -> Optional[Dict]:
+        """
+        Look up the metadata of a stored vector.
+
+        Args:
+            item_id: Vector id
+
+        Returns:
+            Metadata dictionary, or None if the id is unknown
+        """
+        with self._lock:
+            self._refresh()
+            row = self._id_to_row.get(item_id)
+            return None if row is None else self._rows[row]["metadata"]
+
+    def search(
+        self, query: np.ndarray, top_k: int = 10, where: Optional[Dict] = None
+    ) -> List[Tuple[str, float, Dict]]:
+        """
+        Find the stored vectors most similar to a query.
+
+        Args:
+            query: Query embedding vector
+            top_k: Maximum number of results
+            where: Only consider vectors whose metadata has all these items
+
+        Returns:
+            List of (id, cosine similarity between 0 and 1, metadata), best first
+        """
+        if top_k < 1:
+            raise ValueError("top_k must be at least 1")
+
+        with self._lock:
+            self._refresh()
+            count = len(self._rows)
+            if count == 0 or not self._id_to_row:
+                return []
+            matrix = self._open_matrix()
+            deleted = self._deleted[:count].copy()
+            if where:
+                deleted |= ~self._matching(where, count)
+            generation = self._generation
+
+        query = np.asarray(query, dtype=np.float32).ravel()
+        if query.shape[0] != self.dim:
+            raise ValueError(f"Expected a query of dimension {self.dim}, got {query.shape[0]}")
+
+        rows, scores = top_k_similar(
+            normalize(query), matrix, top_k,
+            normalized=True, exclude=deleted, block_rows=self.block_rows
+        )
+        results = []
+        with self._lock:
+            if self._generation != generation:
+                # Compacted while the search was running; row numbers moved
+                return self.search(query, top_k, where)
+            for row_number, score in zip(rows, scores):
+                row = self._rows[int(row_number)]
+                if row is None:
+                    # Deleted while the search was running
+                    continue
+                results.append((row["id"], float(score), row["metadata"]))
+        return results
+
+    def score(
+        self, query: np.ndarray, ids: List[str], where: Optional[Dict] = None
+    ) -> List[Tuple[str, float, Dict]]:
+        """
+        Score selected stored vectors against a query, e.g. a shortlist.
+
+        Only the rows of the given ids are read from the matrix.
+
+        Args:
+            query: Query embedding vector
+            ids: Ids to score; unknown ids are skipped
+            where: Only score vectors whose metadata has all these items
+
+        Returns:
+            List of (id, cosine similarity between 0 and 1, metadata), best first
+        """
+        query = np.asarray(query, dtype=np.float32).ravel()
+        with self._lock:
+            self._refresh()
+            rows = sorted({self._id_to_row[item_id] for item_id in ids if item_id in self._id_to_row})
+            if where:
+                rows = [row for row in rows if self._metadata_matches(self._rows[row], where)]
+            if not rows:
+                return []
+            if query.shape[0] != self.dim:
+                raise ValueError(f"Expected a query of dimension {self.dim}, got {query.shape[0]}")
+            vectors = np.asarray(self._open_matrix()[rows], dtype=np.float32)
+            records = [self._rows[row] for row in rows]
+
+        scores = np.clip(vectors @ normalize(query), 0.0, 1.0)
+        order = np.argsort(-scores, kind="stable")
+        return [(records[i]["id"], float(scores[i]), records[i]["metadata"]) for i in order]
+
+    def compact(self) -> int:
+        """
+        Rewrite the index without deleted rows.
+
+        Returns:
+            Number of rows reclaimed
+        """
+        with self._lock, self._writing():
+            live_rows = [row for row, record in enumerate(self._rows) if record is not None]
+            reclaimed = len(self._rows) - len(live_rows)
+            if reclaimed == 0:
+                return 0
+
+            old_generation = self._generation
+            matrix = self._open_matrix() if self._rows else None
+            self._generation += 1
+            with open(self._vectors_path(), "wb") as f:
+                for start in range(0, len(live_rows), self.block_rows):
+                    block = live_rows[start:start + self.block_rows]
+                    f.write(np.ascontiguousarray(matrix[block]).tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+
+            records = [
+                {"op": "add", "row": new_row, "id": self._rows[old_row]["id"],
+                 "metadata": self._rows[old_row]["metadata"]}
+                for new_row, old_row in enumerate(live_rows)
+            ]
+            with open(self._rows_path(), "w", encoding="utf-8") as f:
+                for record in records:
+                    f.write(json.dumps(record) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+                self._rows_offset = f.tell()
+
+            # Switching the manifest is the commit point of the compaction
+            self._write_manifest()
+            self._matrix = None
+            for path in (self._vectors_path(old_generation), self._rows_path(old_generation)):
+                if os.path.exists(path):
+                    os.remove(path)
+
+            self._rows = []
+            self._id_to_row = {}
+            self._deleted = np.zeros(len(records), dtype=bool)
+            for record in records:
+                self._apply(record)
+            return reclaimed
+
+    def stats(self) -> dict:
+        """
+        Report index size and occupancy.
+
+        Returns:
+            Dictionary with live, deleted and stored row counts
+        """
+        with self._lock:
+            self._refresh()
+            stored = len(self._rows)
+            return {
+                "dim": self.dim,
+                "live": len(self._id_to_row),
+                "deleted": stored - len(self._id_to_row),
+                "stored_rows": stored,
+                "stored_bytes": stored * (self.dim or 0) * 4,
+                "generation": self._generation,
+            }
+
+    # -- internals --------------------------------------------------------
+
+    @staticmethod
+    def _metadata_matches(record: Optional[Dict], where: Dict) -> bool:
+        return record is not None and all(record["metadata"].get(key) == value for key, value in where.items())
+
+    def _matching(self, where: Dict, count: int) -> np.ndarray:
+        return np.fromiter(
+            (self._metadata_matches(record, where) for record in self._rows[:count]), dtype=bool, count=count
+        )
+
+    def _manifest_path(self) -> str:
+        return os.path.join(self.directory, "index.json")
+
+    def _vectors_path(self, generation: Optional[int] = None) -> str:
+        generation = self._generation if generation is None else generation
+        return os.path.join(self.directory, f"vectors-{generation}.f32")
+
+    def _rows_path(self, generation: Optional[int] = None) -> str:
+        generation = self._generation if generation is None else generation
+        return os.path.join(self.directory, f"rows-{generation}.jsonl")
+
+    def _manifest_stat(self) -> Optional[Tuple[int, int, int]]:
+        try:
+            stat = os.stat(self._manifest_path())
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def _write_manifest(self) -> None:
+        tmp_path = self._manifest_path() + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"dim": self.dim, "generation": self._generation, "updated_at": time.time()}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self._manifest_path())
+        self._manifest_stamp = self._manifest_stat()
+
+    def _append_records(self, records: List[Dict]) -> None:
+        with open(self._rows_path(), "ab") as f:
+            f.write("".join(json.dumps(record) + "\n" for record in records).encode("utf-8"))
+            f.flush()
+            os.fsync(f.fileno())
+            self._rows_offset = f.tell()
+
+    @contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        """Exclusive lock shared by all processes writing to the directory."""
+        if fcntl is None:
+            yield
+            return
+        with open(os.path.join(self.directory, "index.lock"), "a") as f:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+    @contextmanager
+    def _writing(self) -> Iterator[None]:
+        """Lock out other writers and catch up with their changes first."""
+        with self._file_lock():
+            self._refresh(repair=True)
+            yield
+
+    def _reset(self) -> None:
+        self.dim = None
+        self._generation = 0
+        self._rows = []
+        self._id_to_row = {}
+        self._deleted = np.zeros(0, dtype=bool)
+        self._matrix = None
+        self._rows_offset = 0
+        self._manifest_stamp = None
+
+    def _refresh(self, repair: bool = False) -> None:
+        """
+        Apply changes made by other processes since the last call.
+
+        Args:
+            repair: Truncate torn writes; only safe while holding the file lock
+        """
+        stamp = self._manifest_stat()
+        if stamp is None:
+            return
+        if stamp != self._manifest_stamp:
+            with open(self._manifest_path(), encoding="utf-8") as f:
+                manifest = json.load(f)
+            if manifest.get("generation", 0) != self._generation or self._manifest_stamp is None:
+                # Compacted elsewhere: row numbers changed, start over
+                self._reset()
+                self._load(repair)
+                return
+            self.dim = manifest.get("dim")
+            self._manifest_stamp = stamp
+        self._read_records(repair)
+        if repair:
+            self._truncate_vectors()
+
+    def _read_records(self, repair: bool) -> None:
+        path = self._rows_path()
+        if not os.path.exists(path) or os.path.getsize(path) <= self._rows_offset:
+            return
+        with open(path, "r+b" if repair else "rb") as f:
+            f.seek(self._rows_offset)
+            for line in f:
+                try:
+                    record = json.loads(line) if line.strip() else None
+                except (json.JSONDecodeError, UnicodeDecodeError):
+                    record = None
+                if record is None or not line.endswith(b"\n"):
+                    # Torn final write; keep everything before it. Without
+                    # the lock it may be another process's write in progress.
+                    if repair:
+                        f.truncate(self._rows_offset)
+                    break
+                self._apply(record)
+                self._rows_offset += len(line)
+
+    def _truncate_vectors(self) -> None:
+        # Drop vectors whose sidecar records never made it to disk
+        if self.dim and os.path.exists(self._vectors_path()):
+            expected = len(self._rows) * self.dim * 4
+            if os.path.getsize(self._vectors_path()) > expected:
+                with open(self._vectors_path(), "r+b") as f:
+                    f.truncate(expected)
+
+    def _apply(self, record: Dict) -> None:
+        row = record["row"]
+        if record["op"] == "add":
+            if row != len(self._rows):
+                raise ValueError(f"Corrupt index sidecar: expected row {len(self._rows)}, got {row}")
+            self._rows.append({"id": record["id"], "metadata": record.get("metadata") or {}})
+            self._id_to_row[record["id"]] = row
+            if row >= self._deleted.shape[0]:
+                grown = np.zeros(max(1024, 2 * self._deleted.shape[0]), dtype=bool)
+                grown[:self._deleted.shape[0]] = self._deleted
+                self._deleted = grown
+        elif record["op"] == "delete":
+            current = self._rows[row]
+            if current is not None:
+                if self._id_to_row.get(current["id"]) == row:
+                    del self._id_to_row[current["id"]]
+                self._rows[row] = None
+                self._deleted[row] = True
+
+    def _open_matrix(self) -> np.memmap:
+        count = len(self._rows)
+        if self._matrix is None or self._matrix.shape[0] != count:
+            self._matrix = np.memmap(self._vectors_path(), dtype=np.float32, mode="r", shape=(count, self.dim))
+        return self._matrix
+
+    def _load(self, repair: bool) -> None:
+        stamp = self._manifest_stat()
+        if stamp is None:
+            return
+        with open(self._manifest_path(), encoding="utf-8") as f:
+            manifest = json.load(f)
+        self.dim = manifest.get("dim")
+        self._generation = manifest.get("generation", 0)
+        self._manifest_stamp = stamp
+
+        self._read_records(repair)
+        if repair:
+            self._truncate_vectors()
@@ -1,20 +1,79 @@
-from fastapi import FastAPI, File, UploadFile, HTTPException
+from fastapi import FastAPI, File, Form, Request, UploadFile, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import Optional
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from starlette.formparsers import MultiPartParser
+from typing import List, Optional
+import asyncio
+import functools
+import gc
+import json
 import logging
+import os
 
-from logic.extract_text import extract_text_from_pdf
-from logic.embedder import Embedder
-from logic.similarity import calculate_cosine_similarity
+from config import settings
+from logic.admission import AdmissionController, AdmissionMiddleware
+from logic.analysis_policy import templated_summary
+from logic.extract_text import ExtractionLimitError, UnreadablePDFError
 from logic.llm_analyzer import LLMAnalyzer
+from logic.llm_client import LLMUnavailable
+from logic.metrics import MetricsMiddleware, install_log_request_ids, render_metrics, stage
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# Configure logging; every line carries the id of the request being served
+install_log_request_ids()
+logging.basicConfig(level=logging.INFO, format="%(levelname)s:%(name)s:[%(request_id)s] %(message)s")
 logger = logging.getLogger(__name__)
 
+# Imported once logging is configured, since the components log as they load
+import services
+from routers import index, jds, jobs
+from schemas import BatchRankResponse, PromptTrim, RankResponse
+from services import (
+    DEGRADED_ANALYSIS,
+    analysis_cache,
+    analysis_cache_key,
+    analysis_gate,
+    analysis_path,
+    budget_prompt,
+    content_cache,
+    decide_analysis,
+    embedder,
+    embedding_batcher,
+    executors,
+    generate_analysis,
+    hybrid_score,
+    jd_store,
+    job_queue,
+    lexical_index,
+    lexical_query,
+    llm_client,
+    rank_batch,
+    read_upload,
+    resolve_analysis_policy,
+    resolve_embedding_mode,
+    resolve_job_description,
+    resume_index,
+    score_resume
+)
+
 app = FastAPI(title="Resume Ranker Service", version="1.0.0")
 
+# Uploads larger than this are spooled to disk while the form is parsed
+MultiPartParser.max_file_size = settings.upload_spool_bytes
+
+# Upload size limits and admission control; inside CORS so that 413 and
+# 429 responses carry its headers
+admission = AdmissionController(
+    settings.admission_max_in_flight,
+    settings.admission_max_queue,
+    settings.admission_queue_timeout_s
+)
+app.add_middleware(
+    AdmissionMiddleware,
+    controller=admission,
+    max_request_bytes=settings.upload_max_request_bytes,
+    max_file_bytes=settings.upload_max_file_bytes
+)
+
 # CORS configuration
 app.add_middleware(
     CORSMiddleware,
@@ -23,105 +82,381 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(MetricsMiddleware)
+
+app.include_router(jobs.router)
+app.include_router(jds.router)
+app.include_router(index.router)
+
+
+@app.exception_handler(ExtractionLimitError)
+async def extraction_limit_handler(request: Request, exc: ExtractionLimitError):
+    """Documents over an extraction limit are rejected with 413."""
+    logger.error(f"Extraction limit exceeded on {request.method} {request.url.path}: {str(exc)}")
+    return JSONResponse(status_code=413, content={"detail": str(exc)})
 
-# Initialize components
-embedder = Embedder()
-llm_analyzer = None
+
+@app.exception_handler(UnreadablePDFError)
+async def unreadable_pdf_handler(request: Request, exc: UnreadablePDFError):
+    """Uploads that are not readable PDFs are rejected with 400."""
+    logger.error(f"Unreadable PDF on {request.method} {request.url.path}: {str(exc)}")
+    return JSONResponse(status_code=400, content={"detail": str(exc)})
+
+
+@app.exception_handler(Exception)
+async def internal_error_handler(request: Request, exc: Exception):
+    """
+    Anything else is answered with 500.
+
+    Starlette runs this handler outside the middleware stack and re-raises
+    the exception afterwards, so the server logs it once more.
+    """
+    logger.error(f"Error processing {request.method} {request.url.path}: {str(exc)}", exc_info=exc)
+    return JSONResponse(status_code=500, content={"detail": f"Internal server error: {str(exc)}"})
 
 
 @app.on_event("startup")
 async def startup_event():
-    """Initialize LLM analyzer on startup."""
-    global llm_analyzer
+    """Initialize LLM analyzer and worker pools on startup."""
+    executors.start()
+    await embedding_batcher.start()
+    # Load the model and run a first encode before taking traffic
+    warmup_ms = await executors.run_embed(embedder.warm_up)
+    logger.info(
+        f"Embedding backend {embedder.backend_name} ready: loaded in {embedder.load_ms} ms, "
+        f"warm-up {warmup_ms} ms"
+    )
     try:
-        llm_analyzer = LLMAnalyzer()
+        services.llm_analyzer = LLMAnalyzer(api_endpoint=settings.llm_api_endpoint)
+        await job_queue.start()
         logger.info("Resume Ranker Service started successfully")
     except Exception as e:
         logger.error(f"Error initializing LLM analyzer: {str(e)}")
         raise
 
 
-class RankResponse(BaseModel):
-    similarity_score: float
-    llm_analysis: str
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Release worker pools on shutdown."""
+    await job_queue.stop()
+    await embedding_batcher.stop()
+    executors.shutdown()
+
+
+def prepare_fork() -> None:
+    """
+    Get the gunicorn parent process ready to fork HTTP workers.
+
+    The embedding model is loaded here so that all workers share its
+    weights copy-on-write; the first encode runs in each worker, because
+    thread pools do not survive fork(). ONNX Runtime sessions are not
+    fork-safe, so with the onnx backend every worker loads its own model.
+    """
+    if embedder.backend_name != "onnx":
+        embedder.load()
+        logger.info(f"Embedding backend {embedder.backend_name} preloaded in {embedder.load_ms} ms")
+    if not os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        logger.warning("PROMETHEUS_MULTIPROC_DIR is not set; /metrics will only report the worker serving it")
+    # SQLite connections and pool threads must not be used across fork();
+    # workers reopen and recreate them
+    analysis_cache.close()
+    job_queue.close()
+    jd_store.close()
+    executors.shutdown()
+    # Keep the collector from writing to (and so copying) the parent's pages
+    gc.freeze()
+
+
+def after_fork() -> None:
+    """Reopen per-process resources in a freshly forked worker."""
+    analysis_cache.reopen()
+    job_queue.reopen()
+    jd_store.reopen()
+    executors.start()
+    # The parent empties the directory before forking; a worker must still
+    # find it to write its metric files
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"], exist_ok=True)
 
 
 @app.post("/rank", response_model=RankResponse)
 async def rank_resume(
     resume: UploadFile = File(...),
-    job_description: UploadFile = File(...)
+    job_description: UploadFile = File(None),
+    jd_id: str = Form(None),
+    jd_version: int = Form(None),
+    embedding_mode: str = Form(None),
+    analysis_policy: str = Form(None)
 ):
     """
     Rank a resume against a job description.
     
     Args:
         resume: Resume PDF file
-        job_description: Job description PDF file
+        job_description: Job description PDF file (or jd_id)
+        jd_id: Id of a job description registered with POST /jds
+        jd_version: Version of the registered job description (defaults to the newest)
+        embedding_mode: "document", "mean" or "max_sim" (defaults to RANKER_EMBED_MODE)
+        analysis_policy: "always", "threshold" or "top_k" (defaults to RANKER_ANALYSIS_POLICY)
         
     Returns:
-        RankResponse with similarity_score and llm_analysis
+        RankResponse with similarity_score (dense), lexical_score (BM25 and
+        skills), their fused hybrid_score and llm_analysis, which is a
+        templated summary when analysis_path is "template"
     """
-    try:
-        # Read PDF files
-        resume_content = await resume.read()
-        jd_content = await job_description.read()
-        
-        # Extract text from PDFs
-        logger.info("Extracting text from PDFs...")
-        resume_text = extract_text_from_pdf(resume_content)
-        jd_text = extract_text_from_pdf(jd_content)
-        
-        if not resume_text or not jd_text:
-            raise HTTPException(
-                status_code=400,
-                detail="Could not extract text from PDF files"
-            )
-        
-        # Generate embeddings
-        logger.info("Generating embeddings...")
-        resume_embedding = embedder.embed(resume_text)
-        jd_embedding = embedder.embed(jd_text)
-        
-        # Calculate similarity
-        logger.info("Calculating similarity...")
-        similarity_score = calculate_cosine_similarity(resume_embedding, jd_embedding)
-        
-        # Generate LLM analysis
+    mode = resolve_embedding_mode(embedding_mode)
+    policy = resolve_analysis_policy(analysis_policy)
+    # Read PDF files
+    resume_content = await read_upload(resume)
+    jd_content, jd = await resolve_job_description(job_description, jd_id, jd_version)
+    
+    similarity_score, resume_text, jd_text = await score_resume(resume_content, jd_content, mode, jd)
+    with stage("lexical"):
+        lexical = await executors.run_embed(
+            lexical_index.score_text, lexical_query(jd, jd_text), resume_text
+        )
+    
+    fused = hybrid_score(similarity_score, lexical.score)
+    decision = decide_analysis(policy, jd_text, [resume_text], [fused])[0]
+    if decision.analyze:
         logger.info("Generating LLM analysis...")
-        if llm_analyzer is None:
-            raise HTTPException(
-                status_code=500,
-                detail="LLM analyzer not initialized"
+        llm_analysis, analysis_cached, budgeted, degraded = await generate_analysis(
+            resume_text, jd_text, jd.features.passages if jd is not None else None
+        )
+        path = analysis_path(analysis_cached, degraded)
+    else:
+        logger.info(f"Skipping LLM analysis ({decision.reason})")
+        llm_analysis = templated_summary(
+            similarity_score, lexical.score, fused, lexical.matched_skills, lexical.missing_skills,
+            decision.reason
+        )
+        analysis_cached, budgeted, degraded, path = False, None, False, "template"
+    
+    logger.info("Creating response...")
+    response = RankResponse(
+        similarity_score=round(similarity_score, 4),
+        lexical_score=lexical.score,
+        hybrid_score=fused,
+        matched_skills=lexical.matched_skills,
+        missing_skills=lexical.missing_skills,
+        llm_analysis=llm_analysis,
+        analysis_cached=analysis_cached,
+        degraded=degraded,
+        analysis_path=path,
+        analysis_policy=policy,
+        prompt_trim=PromptTrim.from_budgeted(budgeted),
+        embedding_mode=mode,
+        jd_id=jd.id if jd is not None else None,
+        jd_version=jd.version if jd is not None else None
+    )
+    logger.info("Response created successfully")
+    return response
+
+
+@app.post("/rank/stream")
+async def rank_resume_stream(
+    resume: UploadFile = File(...),
+    job_description: UploadFile = File(None),
+    jd_id: str = Form(None),
+    jd_version: int = Form(None),
+    embedding_mode: str = Form(None),
+    analysis_policy: str = Form(None)
+):
+    """
+    Rank a resume against a job description, streaming the result as NDJSON.
+
+    The similarity score is sent as soon as it is computed, followed by the
+    LLM analysis in chunks as Gemini generates it. Each line is one event:
+    {"event": "score"}, {"event": "analysis", "delta": ...}, then
+    {"event": "done"} or {"event": "error"}. When the LLM is unavailable
+    before any output, the degraded placeholder is sent as the analysis and
+    the done event has "degraded": true. The done event's analysis_path
+    tells whether the analysis came from the LLM, the cache, the degraded
+    placeholder or a templated summary.
+
+    Args:
+        resume: Resume PDF file
+        job_description: Job description PDF file (or jd_id)
+        jd_id: Id of a job description registered with POST /jds
+        jd_version: Version of the registered job description (defaults to the newest)
+        embedding_mode: "document", "mean" or "max_sim" (defaults to RANKER_EMBED_MODE)
+        analysis_policy: "always", "threshold" or "top_k" (defaults to RANKER_ANALYSIS_POLICY)
+
+    Returns:
+        StreamingResponse of newline-delimited JSON events
+    """
+    mode = resolve_embedding_mode(embedding_mode)
+    policy = resolve_analysis_policy(analysis_policy)
+    # Fail before any extraction or embedding work
+    if services.llm_analyzer is None:
+        raise HTTPException(
+            status_code=500,
+            detail="LLM analyzer not initialized"
+        )
+    resume_content = await read_upload(resume)
+    jd_content, jd = await resolve_job_description(job_description, jd_id, jd_version)
+    similarity_score, resume_text, jd_text = await score_resume(resume_content, jd_content, mode, jd)
+    with stage("lexical"):
+        lexical = await executors.run_embed(
+            lexical_index.score_text, lexical_query(jd, jd_text), resume_text
+        )
+    fused = hybrid_score(similarity_score, lexical.score)
+    decision = decide_analysis(policy, jd_text, [resume_text], [fused])[0]
+    budgeted = None
+    if decision.analyze and llm_client.available():
+        budgeted = await budget_prompt(resume_text, jd_text, jd.features.passages if jd is not None else None)
+
+    trim = PromptTrim.from_budgeted(budgeted)
+    prompt_trim = trim.model_dump() if trim is not None else None
+
+    def degraded_events() -> List[str]:
+        return [
+            json.dumps({"event": "analysis", "delta": DEGRADED_ANALYSIS}) + "\n",
+            json.dumps({
+                "event": "done", "analysis_length": len(DEGRADED_ANALYSIS), "analysis_cached": False,
+                "degraded": True, "analysis_path": "degraded", "prompt_trim": prompt_trim
+            }) + "\n",
+        ]
+
+    async def events():
+        yield json.dumps({
+            "event": "score", "similarity_score": round(similarity_score, 4), "lexical_score": lexical.score,
+            "hybrid_score": fused, "matched_skills": lexical.matched_skills,
+            "missing_skills": lexical.missing_skills, "embedding_mode": mode, "analysis_policy": policy,
+            "jd_id": jd.id if jd is not None else None, "jd_version": jd.version if jd is not None else None
+        }) + "\n"
+        if not decision.analyze:
+            logger.info(f"Skipping LLM analysis ({decision.reason})")
+            summary = templated_summary(
+                similarity_score, lexical.score, fused, lexical.matched_skills, lexical.missing_skills,
+                decision.reason
             )
-        
+            yield json.dumps({"event": "analysis", "delta": summary}) + "\n"
+            yield json.dumps({
+                "event": "done", "analysis_length": len(summary), "analysis_cached": False,
+                "degraded": False, "analysis_path": "template", "prompt_trim": None
+            }) + "\n"
+            return
+        if budgeted is None:
+            logger.warning("LLM circuit is open, returning similarity only")
+            for event in degraded_events():
+                yield event
+            return
+
+        deltas: "asyncio.Queue[str]" = asyncio.Queue()
+
+        async def analyze() -> str:
+            parts = []
+            logger.info("Streaming LLM analysis...")
+            with stage("llm"):
+                async for delta in llm_client.stream(
+                    services.llm_analyzer.stream_analysis, budgeted.resume_text, budgeted.jd_text
+                ):
+                    parts.append(delta)
+                    deltas.put_nowait(delta)
+            return "".join(parts)
+
+        # Same single flight as /rank: the request that starts the LLM call
+        # streams it, identical ones get the whole analysis once it is done
+        shared_analysis = asyncio.ensure_future(analysis_cache.get_or_compute(
+            analysis_cache_key(budgeted.resume_text, budgeted.jd_text), analyze
+        ))
+        next_delta: Optional[asyncio.Future] = None
+        streamed = 0
         try:
-            llm_analysis = llm_analyzer.analyze_resume(resume_text, jd_text)
-            logger.info(f"LLM analysis generated successfully, length: {len(llm_analysis) if llm_analysis else 0}")
+            while True:
+                if not deltas.empty():
+                    delta = deltas.get_nowait()
+                elif shared_analysis.done():
+                    break
+                else:
+                    next_delta = asyncio.ensure_future(deltas.get())
+                    await asyncio.wait({next_delta, shared_analysis}, return_when=asyncio.FIRST_COMPLETED)
+                    if not next_delta.done():
+                        next_delta.cancel()
+                        continue
+                    delta = next_delta.result()
+                streamed += 1
+                yield json.dumps({"event": "analysis", "delta": delta}) + "\n"
+            analysis, cached = shared_analysis.result()
+        except LLMUnavailable as e:
+            if not streamed:
+                logger.warning(f"LLM unavailable, returning similarity only: {str(e)}")
+                for event in degraded_events():
+                    yield event
+                return
+            logger.error(f"LLM stream interrupted: {str(e)}")
+            yield json.dumps({"event": "error", "detail": f"Error generating analysis: {str(e)}"}) + "\n"
+            return
         except Exception as e:
             logger.error(f"Error generating LLM analysis: {str(e)}")
-            llm_analysis = f"Error generating analysis: {str(e)}"
-        
-        # Ensure llm_analysis is a string
-        if not isinstance(llm_analysis, str):
-            llm_analysis = str(llm_analysis) if llm_analysis is not None else "Analysis unavailable"
-        
-        logger.info("Creating response...")
-        response = RankResponse(
-            similarity_score=round(similarity_score, 4),
-            llm_analysis=llm_analysis
+            yield json.dumps({"event": "error", "detail": f"Error generating analysis: {str(e)}"}) + "\n"
+            return
+        finally:
+            # A client that goes away stops waiting; the shared call goes on
+            if next_delta is not None:
+                next_delta.cancel()
+            shared_analysis.cancel()
+        if cached:
+            yield json.dumps({"event": "analysis", "delta": analysis}) + "\n"
+        else:
+            logger.info(f"LLM analysis streamed successfully, length: {len(analysis)}")
+        yield json.dumps({
+            "event": "done", "analysis_length": len(analysis), "analysis_cached": cached,
+            "degraded": False, "analysis_path": analysis_path(cached, False), "prompt_trim": prompt_trim
+        }) + "\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.post("/rank/batch", response_model=BatchRankResponse)
+async def rank_resumes_batch(
+    resumes: List[UploadFile] = File(...),
+    job_description: UploadFile = File(None),
+    jd_id: str = Form(None),
+    jd_version: int = Form(None),
+    analyze_top_k: int = Form(0),
+    embedding_mode: str = Form(None),
+    analysis_policy: str = Form(None)
+):
+    """
+    Rank many resumes against one job description.
+
+    The job description is parsed and embedded once (or not at all when it
+    is registered), the resumes are embedded in a single batch and scored
+    in one vectorized pass.
+
+    Args:
+        resumes: Resume PDF files
+        job_description: Job description PDF file (or jd_id)
+        jd_id: Id of a job description registered with POST /jds
+        jd_version: Version of the registered job description (defaults to the newest)
+        analyze_top_k: Number of top-ranked resumes to run LLM analysis on
+        embedding_mode: "document", "mean" or "max_sim" (defaults to RANKER_EMBED_MODE)
+        analysis_policy: "always", "threshold" or "top_k" (defaults to
+            RANKER_ANALYSIS_POLICY), applied to the top analyze_top_k
+
+    Returns:
+        BatchRankResponse with results sorted by hybrid_score
+    """
+    mode = resolve_embedding_mode(embedding_mode)
+    policy = resolve_analysis_policy(analysis_policy)
+    if len(resumes) > settings.batch_max_resumes:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.batch_max_resumes} resumes per batch"
         )
-        logger.info("Response created successfully")
-        return response
-    
-    except HTTPException:
-        raise
-    except ValueError as e:
-        logger.error(f"ValueError: {str(e)}")
-        raise HTTPException(status_code=400, detail=str(e))
-    except Exception as e:
-        logger.error(f"Error processing request: {str(e)}")
-        logger.exception("Full traceback:")
-        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+    if analyze_top_k < 0:
+        raise HTTPException(status_code=400, detail="analyze_top_k cannot be negative")
+
+    jd_content, jd = await resolve_job_description(job_description, jd_id, jd_version)
+    filenames = [resume.filename or f"resume_{i + 1}.pdf" for i, resume in enumerate(resumes)]
+    contents = [functools.partial(read_upload, resume) for resume in resumes]
+    return await rank_batch(jd_content, filenames, contents, analyze_top_k, mode, jd=jd, policy=policy)
 
 
 @app.get("/health")
@@ -130,7 +465,32 @@ async def health_check():
     return {"status": "healthy", "service": "resume-ranker-service"}
 
 
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics: per-stage latency histograms, counters and in-flight gauges."""
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
+
+@app.get("/stats")
+async def stats():
+    """Runtime statistics for tuning batching and caching."""
+    return {
+        "worker": {"pid": os.getpid(), "web_workers": settings.web_workers},
+        "admission": admission.stats(),
+        "embedder": embedder.stats(),
+        "embedding_batcher": embedding_batcher.stats(),
+        "content_cache": content_cache.stats(),
+        "resume_index": await executors.run_storage(resume_index.stats),
+        "lexical_index": await executors.run_storage(lexical_index.stats),
+        "analysis_cache": await executors.run_storage(analysis_cache.stats),
+        "analysis_policy": {"default": settings.analysis_policy, **analysis_gate.stats()},
+        "job_descriptions": await executors.run_storage(jd_store.stats),
+        "llm": llm_client.stats(),
+        "jobs": await executors.run_storage(job_queue.stats),
+    }
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
-
@@ -0,0 +1,208 @@
+from fastapi import APIRouter, File, Form, HTTPException, UploadFile
+from typing import List
+import functools
+import time
+
+from config import settings
+from logic.metrics import stage
+from schemas import IndexedResume, IndexIngestResponse, IndexMatch, IndexSearchResponse
+from services import (
+    embed_document,
+    embed_documents,
+    executors,
+    extract_document,
+    extract_documents,
+    hybrid_score,
+    index_embedding_mode,
+    lexical_index,
+    lexical_prefilter_k,
+    lexical_query,
+    read_upload,
+    registered_embedding,
+    resolve_job_description,
+    resume_index
+)
+
+router = APIRouter()
+
+
+@router.post("/index/resumes", response_model=IndexIngestResponse)
+async def index_resumes(
+    resumes: List[UploadFile] = File(...),
+    ids: List[str] = Form(None)
+):
+    """
+    Add resumes to the persistent talent pool index.
+
+    Args:
+        resumes: Resume PDF files
+        ids: Optional ids, one per resume; re-using an id replaces the entry
+
+    Returns:
+        IndexIngestResponse with the id assigned to each resume
+    """
+    if ids and len(ids) != len(resumes):
+        raise HTTPException(status_code=400, detail="ids must have one entry per resume")
+    if len(resumes) > settings.batch_max_resumes:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.batch_max_resumes} resumes per request"
+        )
+
+    filenames = [resume.filename or f"resume_{i + 1}.pdf" for i, resume in enumerate(resumes)]
+    extracted = await extract_documents([functools.partial(read_upload, resume) for resume in resumes])
+
+    results = [IndexedResume(filename=filename) for filename in filenames]
+    valid = []
+    for i, outcome in enumerate(extracted):
+        if isinstance(outcome, Exception):
+            results[i].error = str(outcome)
+        elif not outcome[1]:
+            results[i].error = "Could not extract text from PDF"
+        else:
+            valid.append((i, outcome[0], outcome[1]))
+
+    if valid:
+        mode = index_embedding_mode()
+        embeddings = await embed_documents(
+            [digest for _, digest, _ in valid],
+            [text for _, _, text in valid],
+            mode
+        )
+        indexed_at = time.time()
+        metadata = [
+            {"filename": filenames[i], "digest": digest, "chars": len(text), "indexed_at": indexed_at,
+             "embedding_mode": mode}
+            for i, digest, text in valid
+        ]
+        assigned = await executors.run_storage(
+            resume_index.add,
+            embeddings,
+            [ids[i] for i, _, _ in valid] if ids else None,
+            metadata
+        )
+        await executors.run_embed(lexical_index.add, [text for _, _, text in valid], assigned)
+        for (i, _, _), resume_id in zip(valid, assigned):
+            results[i].id = resume_id
+
+    return IndexIngestResponse(
+        indexed=len(valid),
+        total_indexed=await executors.run_storage(len, resume_index),
+        results=results
+    )
+
+
+@router.delete("/index/resumes/{resume_id}")
+async def delete_indexed_resume(resume_id: str):
+    """Remove a resume from the talent pool index."""
+    deleted = await executors.run_storage(resume_index.delete, [resume_id])
+    await executors.run_storage(lexical_index.delete, [resume_id])
+    if not deleted:
+        raise HTTPException(status_code=404, detail=f"Resume {resume_id} is not indexed")
+    return {"deleted": resume_id}
+
+
+@router.post("/index/search", response_model=IndexSearchResponse)
+async def search_index(
+    job_description: UploadFile = File(None),
+    jd_id: str = Form(None),
+    jd_version: int = Form(None),
+    top_k: int = Form(10)
+):
+    """
+    Find the indexed resumes that best match a job description.
+
+    When lexical matches carry weight and more than
+    RANKER_LEXICAL_PREFILTER_K resumes are indexed, the lexical index
+    picks that many candidates and only their vectors are scored;
+    otherwise the best dense matches are rescored lexically. Candidates
+    are ranked by the fused hybrid_score. Only resumes indexed under the
+    current embedding mode are matched.
+
+    Args:
+        job_description: Job description PDF file (or jd_id)
+        jd_id: Id of a job description registered with POST /jds
+        jd_version: Version of the registered job description (defaults to the newest)
+        top_k: Maximum number of matches to return
+
+    Returns:
+        IndexSearchResponse with matches sorted by hybrid_score
+    """
+    if top_k < 1 or top_k > settings.index_max_top_k:
+        raise HTTPException(
+            status_code=400,
+            detail=f"top_k must be between 1 and {settings.index_max_top_k}"
+        )
+
+    jd_content, jd = await resolve_job_description(job_description, jd_id, jd_version)
+    if jd is not None:
+        jd_text = jd.text
+        jd_embedding = registered_embedding(jd, index_embedding_mode())
+    else:
+        jd_digest, jd_text = await extract_document(jd_content)
+        if not jd_text:
+            raise HTTPException(
+                status_code=400,
+                detail="Could not extract text from job description PDF"
+            )
+        jd_embedding = await embed_document(jd_digest, jd_text, index_embedding_mode())
+    query = lexical_query(jd, jd_text)
+
+    # Both lengths re-read other workers' appends from disk
+    searched = await executors.run_storage(len, resume_index)
+    lexical_count = await executors.run_storage(len, lexical_index)
+    started = time.perf_counter()
+    prefilter_k = lexical_prefilter_k()
+    # Resumes indexed before the lexical index existed would never pass the prefilter
+    prefiltered = bool(prefilter_k) and searched > prefilter_k and lexical_count >= searched
+    # Vectors embedded under another mode are not comparable with the query
+    where = {"embedding_mode": index_embedding_mode()}
+    with stage("index_search"):
+        if prefiltered:
+            with stage("lexical"):
+                shortlist = await executors.run_embed(lexical_index.search, query, prefilter_k)
+            lexical = {match.id: match for match in shortlist}
+            candidates = await executors.run_embed(resume_index.score, jd_embedding, list(lexical), where)
+        else:
+            # A wider dense candidate set leaves room for lexical reranking
+            depth = max(top_k, prefilter_k) if settings.hybrid_lexical_weight > 0 else top_k
+            candidates = await executors.run_embed(resume_index.search, jd_embedding, depth, where)
+            with stage("lexical"):
+                lexical = await executors.run_embed(
+                    lexical_index.score, query, [resume_id for resume_id, _, _ in candidates]
+                )
+        matches = []
+        for resume_id, score, metadata in candidates:
+            match = lexical.get(resume_id)
+            lexical_score = match.score if match is not None else 0.0
+            matches.append(IndexMatch(
+                id=resume_id,
+                similarity_score=round(score, 4),
+                lexical_score=lexical_score,
+                hybrid_score=hybrid_score(score, lexical_score),
+                matched_skills=match.matched_skills if match is not None else [],
+                missing_skills=match.missing_skills if match is not None else [],
+                metadata=metadata
+            ))
+        matches.sort(key=lambda m: -m.hybrid_score)
+    took_ms = (time.perf_counter() - started) * 1000.0
+
+    return IndexSearchResponse(
+        searched=searched,
+        candidates=len(candidates),
+        prefiltered=prefiltered,
+        took_ms=round(took_ms, 3),
+        matches=matches[:top_k]
+    )
+
+
+@router.post("/index/compact")
+async def compact_index():
+    """Rewrite the talent pool and lexical indexes without deleted entries."""
+    reclaimed = await executors.run_storage(resume_index.compact)
+    await executors.run_storage(lexical_index.compact)
+    return {
+        "reclaimed": reclaimed,
+        "index": await executors.run_storage(resume_index.stats),
+        "lexical_index": await executors.run_storage(lexical_index.stats)
+    }
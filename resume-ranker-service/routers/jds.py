@@ -0,0 +1,85 @@
+from fastapi import APIRouter, File, Form, HTTPException, UploadFile
+from typing import Optional
+import logging
+
+from schemas import JobDescriptionListResponse, JobDescriptionResponse, JobDescriptionSummary
+from services import (
+    compute_jd_features,
+    executors,
+    extract_document,
+    jd_store,
+    load_job_description,
+    read_upload
+)
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+@router.post("/jds", response_model=JobDescriptionResponse)
+async def register_job_description(
+    job_description: UploadFile = File(...),
+    jd_id: str = Form(None)
+):
+    """
+    Register a job description once, to rank resumes against it by id.
+
+    Its text, document and chunk embeddings, lexical terms and skills,
+    and encoded prompt passages are computed now and stored, so ranking
+    calls that pass jd_id upload, parse and encode only the resume.
+    Posting new content under an existing jd_id adds a version; posting
+    the newest version's content again does not.
+
+    Args:
+        job_description: Job description PDF file
+        jd_id: Id to add a version to (a new id is assigned when omitted)
+
+    Returns:
+        JobDescriptionResponse with the jd_id and version to rank against
+    """
+    content = await read_upload(job_description)
+    digest, text = await extract_document(content)
+    if not text:
+        raise HTTPException(
+            status_code=400,
+            detail="Could not extract text from job description PDF"
+        )
+    features = await compute_jd_features(digest, text)
+    jd, created = await executors.run_storage(
+        jd_store.register,
+        jd_id,
+        job_description.filename or "job_description.pdf",
+        digest,
+        text,
+        features
+    )
+    versions = [entry.version for entry in await executors.run_storage(jd_store.versions, jd.id)]
+    logger.info(f"Registered job description {jd.id} version {jd.version} (new version: {created})")
+    return JobDescriptionResponse.from_registered(jd, versions, created)
+
+
+@router.get("/jds", response_model=JobDescriptionListResponse)
+async def list_job_descriptions(limit: int = 100):
+    """Newest version of every registered job description, most recently registered first."""
+    if limit < 1:
+        raise HTTPException(status_code=400, detail="limit must be at least 1")
+    entries = await executors.run_storage(jd_store.list, limit)
+    return JobDescriptionListResponse(job_descriptions=[JobDescriptionSummary.from_jd(jd) for jd in entries])
+
+
+@router.get("/jds/{jd_id}", response_model=JobDescriptionResponse)
+async def get_job_description(jd_id: str, version: Optional[int] = None):
+    """A registered job description (the newest version by default) and its stored versions."""
+    jd = await load_job_description(jd_id, version)
+    versions = [entry.version for entry in await executors.run_storage(jd_store.versions, jd.id)]
+    return JobDescriptionResponse.from_registered(jd, versions)
+
+
+@router.delete("/jds/{jd_id}")
+async def delete_job_description(jd_id: str, version: Optional[int] = None):
+    """Delete a registered job description, or only one of its versions."""
+    deleted = await executors.run_storage(jd_store.delete, jd_id, version)
+    if not deleted:
+        raise HTTPException(status_code=404, detail=f"Job description {jd_id} not found")
+    return {"deleted": jd_id, "versions": deleted}
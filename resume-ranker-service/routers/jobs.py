@@ -0,0 +1,154 @@
+from fastapi import APIRouter, File, Form, HTTPException, UploadFile
+from typing import Callable, List
+import functools
+import logging
+
+from config import settings
+from logic.extract_text import ExtractionLimitError, UnreadablePDFError
+from logic.job_queue import Job, JobFailed, JobFile, StoredJobFile
+from logic.metrics import set_request_id
+from schemas import JobStatusResponse
+from services import (
+    executors,
+    job_queue,
+    load_job_description,
+    rank_batch,
+    read_upload,
+    resolve_analysis_policy,
+    resolve_embedding_mode,
+    resolve_job_description
+)
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+async def run_rank_job(job: Job, files: List[StoredJobFile], progress: Callable[[int, int], None]) -> dict:
+    """
+    Job handler running a queued batch ranking.
+
+    Errors caused by the input fail the job right away; anything else is
+    left to the queue to retry.
+
+    Args:
+        job: Job with the analyze_top_k, embedding_mode and analysis_policy
+            parameters, and jd_id and jd_version when the job description is
+            registered
+        files: The job description (unless registered) followed by the
+            resumes, each read from the queue when its extraction starts
+        progress: Callback receiving (steps done, total steps)
+
+    Returns:
+        BatchRankResponse as a dictionary
+    """
+    set_request_id(f"job-{job.id}")
+    resume_files = [f for f in files if f.role == "resume"]
+    try:
+        jd_content, jd = None, None
+        if job.params.get("jd_id"):
+            # The version was pinned at submission; eviction fails the job
+            jd = await load_job_description(job.params["jd_id"], job.params.get("jd_version"))
+        else:
+            jd_content = await job_queue.read_file(next(f for f in files if f.role == "job_description"))
+        response = await rank_batch(
+            jd_content,
+            [f.filename for f in resume_files],
+            [functools.partial(job_queue.read_file, f) for f in resume_files],
+            job.params.get("analyze_top_k", 0),
+            job.params.get("embedding_mode", "document"),
+            progress,
+            jd,
+            job.params.get("analysis_policy", "always")
+        )
+    except HTTPException as e:
+        if e.status_code < 500:
+            raise JobFailed(e.detail)
+        raise
+    except (ExtractionLimitError, UnreadablePDFError) as e:
+        raise JobFailed(str(e))
+    return response.model_dump()
+
+
+job_queue.register("rank_batch", run_rank_job)
+
+
+@router.post("/jobs/rank", response_model=JobStatusResponse, status_code=202)
+async def submit_rank_job(
+    resumes: List[UploadFile] = File(...),
+    job_description: UploadFile = File(None),
+    jd_id: str = Form(None),
+    jd_version: int = Form(None),
+    analyze_top_k: int = Form(0),
+    embedding_mode: str = Form(None),
+    analysis_policy: str = Form(None)
+):
+    """
+    Queue a ranking of one or more resumes against a job description.
+
+    The files are stored durably and ranked by the job workers; poll
+    GET /jobs/{job_id} for progress and the result.
+
+    Args:
+        resumes: Resume PDF files
+        job_description: Job description PDF file (or jd_id)
+        jd_id: Id of a job description registered with POST /jds
+        jd_version: Version of the registered job description (defaults to the
+            newest at submission)
+        analyze_top_k: Number of top-ranked resumes to run LLM analysis on
+        embedding_mode: "document", "mean" or "max_sim" (defaults to RANKER_EMBED_MODE)
+        analysis_policy: "always", "threshold" or "top_k" (defaults to
+            RANKER_ANALYSIS_POLICY at submission)
+
+    Returns:
+        JobStatusResponse of the queued job
+    """
+    mode = resolve_embedding_mode(embedding_mode)
+    policy = resolve_analysis_policy(analysis_policy)
+    if len(resumes) > settings.batch_max_resumes:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.batch_max_resumes} resumes per job"
+        )
+    if analyze_top_k < 0:
+        raise HTTPException(status_code=400, detail="analyze_top_k cannot be negative")
+
+    jd_content, jd = await resolve_job_description(job_description, jd_id, jd_version)
+    files = []
+    if jd_content is not None:
+        files.append(JobFile(
+            role="job_description",
+            filename=job_description.filename or "job_description.pdf",
+            content=jd_content
+        ))
+    for i, resume in enumerate(resumes):
+        files.append(JobFile(
+            role="resume",
+            filename=resume.filename or f"resume_{i + 1}.pdf",
+            content=await read_upload(resume)
+        ))
+
+    params = {"analyze_top_k": analyze_top_k, "embedding_mode": mode, "analysis_policy": policy}
+    if jd is not None:
+        params.update({"jd_id": jd.id, "jd_version": jd.version})
+    job = await executors.run_storage(job_queue.submit, "rank_batch", params, files)
+    logger.info(f"Queued job {job.id} with {len(resumes)} resumes")
+    return JobStatusResponse.from_job(job)
+
+
+@router.get("/jobs/{job_id}", response_model=JobStatusResponse)
+async def get_job(job_id: str):
+    """Status, progress and, once finished, the result of a ranking job."""
+    job = await executors.run_storage(job_queue.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return JobStatusResponse.from_job(job)
+
+
+@router.delete("/jobs/{job_id}", response_model=JobStatusResponse)
+async def cancel_job(job_id: str):
+    """Cancel a queued or running ranking job."""
+    job = await executors.run_storage(job_queue.cancel, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return JobStatusResponse.from_job(job)
@@ -0,0 +1,183 @@
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+from logic.jd_store import JobDescription
+from logic.job_queue import Job
+from logic.prompt_builder import BudgetedPrompt
+
+
+class PromptTrim(BaseModel):
+    trimmed: bool
+    input_tokens: int
+    prompt_tokens: int
+    token_budget: int
+    resume_passages_kept: int
+    resume_passages_total: int
+    jd_passages_kept: int
+    jd_passages_total: int
+
+    @classmethod
+    def from_budgeted(cls, budgeted: Optional[BudgetedPrompt]) -> Optional["PromptTrim"]:
+        if budgeted is None:
+            return None
+        return cls(
+            trimmed=budgeted.trimmed,
+            input_tokens=budgeted.input_tokens,
+            prompt_tokens=budgeted.prompt_tokens,
+            token_budget=budgeted.token_budget,
+            resume_passages_kept=budgeted.resume_passages_kept,
+            resume_passages_total=budgeted.resume_passages_total,
+            jd_passages_kept=budgeted.jd_passages_kept,
+            jd_passages_total=budgeted.jd_passages_total
+        )
+
+
+class RankResponse(BaseModel):
+    similarity_score: float
+    lexical_score: Optional[float] = None
+    hybrid_score: Optional[float] = None
+    matched_skills: List[str] = []
+    missing_skills: List[str] = []
+    llm_analysis: str
+    analysis_cached: bool = False
+    degraded: bool = False
+    analysis_path: Optional[str] = None
+    analysis_policy: Optional[str] = None
+    prompt_trim: Optional[PromptTrim] = None
+    embedding_mode: Optional[str] = None
+    jd_id: Optional[str] = None
+    jd_version: Optional[int] = None
+
+
+class RankedResume(BaseModel):
+    rank: Optional[int] = None
+    filename: str
+    similarity_score: Optional[float] = None
+    lexical_score: Optional[float] = None
+    hybrid_score: Optional[float] = None
+    matched_skills: Optional[List[str]] = None
+    missing_skills: Optional[List[str]] = None
+    shortlisted: Optional[bool] = None
+    llm_analysis: Optional[str] = None
+    analysis_cached: Optional[bool] = None
+    degraded: Optional[bool] = None
+    analysis_path: Optional[str] = None
+    prompt_trim: Optional[PromptTrim] = None
+    error: Optional[str] = None
+
+
+class BatchRankResponse(BaseModel):
+    total: int
+    ranked: int
+    prefiltered: int = 0
+    results: List[RankedResume]
+    embedding_mode: Optional[str] = None
+    analysis_policy: Optional[str] = None
+    jd_id: Optional[str] = None
+    jd_version: Optional[int] = None
+
+
+class JobStatusResponse(BaseModel):
+    job_id: str
+    status: str
+    progress_done: int
+    progress_total: int
+    attempts: int
+    max_attempts: int
+    error: Optional[str] = None
+    created_at: float
+    updated_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Optional[BatchRankResponse] = None
+
+    @classmethod
+    def from_job(cls, job: Job) -> "JobStatusResponse":
+        return cls(
+            job_id=job.id,
+            status=job.status,
+            progress_done=job.progress_done,
+            progress_total=job.progress_total,
+            attempts=job.attempts,
+            max_attempts=job.max_attempts,
+            error=job.error,
+            created_at=job.created_at,
+            updated_at=job.updated_at,
+            started_at=job.started_at,
+            finished_at=job.finished_at,
+            result=job.result
+        )
+
+
+class JobDescriptionSummary(BaseModel):
+    jd_id: str
+    version: int
+    filename: str
+    created_at: float
+    accessed_at: float
+
+    @classmethod
+    def from_jd(cls, jd: JobDescription) -> "JobDescriptionSummary":
+        return cls(
+            jd_id=jd.id,
+            version=jd.version,
+            filename=jd.filename,
+            created_at=jd.created_at,
+            accessed_at=jd.accessed_at
+        )
+
+
+class JobDescriptionResponse(JobDescriptionSummary):
+    created: bool = False
+    versions: List[int]
+    text_chars: int
+    skills: List[str]
+    chunks: int
+    prompt_passages: int
+
+    @classmethod
+    def from_registered(cls, jd: JobDescription, versions: List[int], created: bool = False) -> "JobDescriptionResponse":
+        return cls(
+            **JobDescriptionSummary.from_jd(jd).model_dump(),
+            created=created,
+            versions=versions,
+            text_chars=len(jd.text),
+            skills=jd.features.lexical.skills,
+            chunks=int(jd.features.chunks.shape[0]),
+            prompt_passages=len(jd.features.passages.passages)
+        )
+
+
+class JobDescriptionListResponse(BaseModel):
+    job_descriptions: List[JobDescriptionSummary]
+
+
+class IndexedResume(BaseModel):
+    id: Optional[str] = None
+    filename: str
+    error: Optional[str] = None
+
+
+class IndexIngestResponse(BaseModel):
+    indexed: int
+    total_indexed: int
+    results: List[IndexedResume]
+
+
+class IndexMatch(BaseModel):
+    id: str
+    similarity_score: float
+    lexical_score: Optional[float] = None
+    hybrid_score: Optional[float] = None
+    matched_skills: List[str] = []
+    missing_skills: List[str] = []
+    metadata: dict
+
+
+class IndexSearchResponse(BaseModel):
+    searched: int
+    candidates: int
+    prefiltered: bool = False
+    took_ms: float
+    matches: List[IndexMatch]
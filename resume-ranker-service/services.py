@@ -0,0 +1,885 @@
+from fastapi import HTTPException, UploadFile
+from typing import Any, Awaitable, BinaryIO, Callable, List, Optional, Sequence, Tuple, Union
+import asyncio
+import dataclasses
+import logging
+
+import numpy as np
+
+from config import ANALYSIS_POLICIES, EMBEDDING_MODES, settings
+from logic.analysis_policy import AnalysisDecision, AnalysisGate, templated_summary
+from logic.batcher import EmbeddingBatcher
+from logic.cache import ContentCache, content_digest
+from logic.executors import Executors
+from logic.extract_text import PdfSource, extract_pdf_parallel, pdf_size
+from logic.embedder import Embedder
+from logic.similarity import (
+    calculate_cosine_similarities,
+    calculate_cosine_similarity,
+    hybrid_scores,
+    max_sim_scores,
+    mean_pool
+)
+from logic.llm_analyzer import PROMPT_VERSION
+from logic.jd_store import JDFeatures, JobDescription, JobDescriptionStore
+from logic.job_queue import JobQueue
+from logic.lexical_index import AnalyzedText, LexicalIndex, LexicalMatch
+from logic.llm_cache import AnalysisCache, text_digest
+from logic.llm_client import CircuitBreaker, LLMUnavailable, ResilientLLMClient
+from logic.metrics import record_extraction, record_upload, stage
+from logic.prompt_builder import BudgetedPrompt, JDPassages, PromptBuilder
+from logic.skills import SkillDictionary
+from logic.vector_index import VectorIndex
+from schemas import BatchRankResponse, PromptTrim, RankedResume
+
+logger = logging.getLogger(__name__)
+
+# Initialize components
+embedder = Embedder(
+    settings.model_name,
+    backend=settings.embed_backend,
+    model_dir=settings.model_dir,
+    threads=settings.embed_threads
+)
+# Set by the application on startup
+llm_analyzer = None
+executors = Executors(
+    cpu_executor=settings.cpu_executor,
+    cpu_workers=settings.cpu_workers,
+    embed_workers=settings.embed_workers,
+    llm_workers=settings.llm_workers,
+    storage_workers=settings.storage_workers
+)
+embedding_batcher = EmbeddingBatcher(
+    embedder,
+    executors,
+    max_batch_size=settings.embed_max_batch_size,
+    max_wait_ms=settings.embed_max_wait_ms
+)
+content_cache = ContentCache(
+    max_bytes=settings.cache_max_mb * 1024 * 1024,
+    disk_dir=settings.cache_dir
+)
+analysis_cache = AnalysisCache(
+    executors,
+    settings.llm_cache_path,
+    ttl_s=settings.llm_cache_ttl_s,
+    max_entries=settings.llm_cache_max_entries
+)
+prompt_builder = PromptBuilder(
+    embedder,
+    token_budget=settings.prompt_token_budget,
+    passage_tokens=settings.prompt_passage_tokens,
+    jd_share=settings.prompt_jd_share
+)
+job_queue = JobQueue(
+    settings.job_db_path,
+    executors,
+    workers=settings.job_workers,
+    max_attempts=settings.job_max_attempts,
+    retry_backoff_s=settings.job_retry_backoff_s,
+    lease_s=settings.job_lease_s,
+    retention_s=settings.job_retention_s
+)
+resume_index = VectorIndex(settings.index_dir, block_rows=settings.index_block_rows)
+skill_dictionary = SkillDictionary.from_file(settings.skills_path)
+# BM25/skill postings of the indexed resumes, next to their vectors
+lexical_index = LexicalIndex(settings.index_dir, skills=skill_dictionary)
+jd_store = JobDescriptionStore(
+    settings.jd_db_path,
+    max_entries=settings.jd_max_entries,
+    max_versions=settings.jd_max_versions,
+    ttl_s=settings.jd_ttl_s,
+    memory_entries=settings.jd_memory_entries
+)
+llm_client = ResilientLLMClient(
+    executors,
+    max_concurrency=settings.llm_max_concurrency,
+    call_timeout_s=settings.llm_call_timeout_s,
+    deadline_s=settings.llm_deadline_s,
+    rate_per_s=settings.llm_rate_per_s,
+    burst=settings.llm_burst,
+    max_retries=settings.llm_max_retries,
+    backoff_base_s=settings.llm_backoff_base_s,
+    backoff_max_s=settings.llm_backoff_max_s,
+    breaker=CircuitBreaker(settings.llm_breaker_failures, settings.llm_breaker_reset_s)
+)
+
+# Returned instead of an analysis while the LLM is unavailable; results are
+# then ranked on embedding similarity alone
+DEGRADED_ANALYSIS = "LLM analysis is temporarily unavailable; ranked by embedding similarity only."
+
+# Which candidates get an LLM analysis and which a templated summary
+analysis_gate = AnalysisGate(settings.analysis_min_score, settings.analysis_top_k)
+
+
+async def read_upload(upload: UploadFile) -> BinaryIO:
+    """
+    Hand on an uploaded file without copying it, recording its size.
+
+    The multipart parser has already spooled the file to memory or, above
+    RANKER_UPLOAD_SPOOL_BYTES, to disk; that file object is passed through
+    so the content is only read by hashing and extraction.
+
+    Args:
+        upload: Uploaded file
+
+    Returns:
+        The spooled file, positioned at its start
+    """
+    upload.file.seek(0)
+    record_upload(pdf_size(upload.file))
+    return upload.file
+
+
+def text_cache_name() -> str:
+    """Cache namespace of extracted text under the current extraction settings."""
+    # The other PDF settings change how fast text is extracted, not what it is
+    return f"pypdf2-p{settings.pdf_max_pages}"
+
+
+async def cache_get(lookup: Callable[..., Any], *args) -> Any:
+    """
+    Look up a content cache entry in memory, then on a storage thread on disk.
+
+    Args:
+        lookup: ContentCache.get_text or get_embedding
+        *args: Arguments of the lookup
+
+    Returns:
+        Cached value, or None on a miss
+    """
+    value = lookup(*args, memory_only=True)
+    if value is None and content_cache.disk_dir:
+        value = await executors.run_storage(lookup, *args)
+    return value
+
+
+async def cache_put(store: Callable[..., Any], *args) -> Any:
+    """
+    Store a content cache entry, on a storage thread when it is written to disk.
+
+    Args:
+        store: ContentCache.put_text or put_embedding
+        *args: Arguments of the store call
+
+    Returns:
+        Whatever the store call returns
+    """
+    if content_cache.disk_dir:
+        return await executors.run_storage(store, *args)
+    return store(*args)
+
+
+async def extract_document(content: PdfSource) -> Tuple[str, str]:
+    """
+    Extract text from an uploaded PDF, reusing cached text for known content.
+
+    Args:
+        content: PDF file as bytes or a seekable binary file object
+
+    Returns:
+        Tuple of (content digest, extracted text)
+    """
+    digest = await executors.run_storage(content_digest, content)
+    text = await cache_get(content_cache.get_text, digest, text_cache_name())
+    if text is None:
+        with stage("extract"):
+            result = await extract_pdf_parallel(
+                content,
+                executors,
+                max_pages=settings.pdf_max_pages,
+                max_bytes=settings.pdf_max_bytes,
+                time_budget_s=settings.pdf_time_budget_s,
+                parallel_min_pages=settings.pdf_parallel_min_pages,
+                pages_per_task=settings.pdf_pages_per_task
+            )
+        record_extraction(result.pages_extracted, pdf_size(content), len(result.text))
+        slowest = max(result.page_timings_ms, default=0.0)
+        logger.info(
+            f"Extracted {result.pages_extracted}/{result.pages_total} pages in {result.elapsed_ms:.1f} ms "
+            f"(slowest page {slowest:.1f} ms)"
+        )
+        if result.truncated:
+            logger.warning(f"PDF extraction truncated: {result.truncation_reason}")
+        text = result.text
+        # A time-budget cut depends on load, so only cache deterministic results
+        if text and result.truncation_reason != "time_budget":
+            await cache_put(content_cache.put_text, digest, text, text_cache_name())
+    return digest, text
+
+
+async def extract_documents(
+    reads: Sequence[Callable[[], Awaitable[PdfSource]]],
+    on_done: Optional[Callable[[], None]] = None
+) -> List[Union[Tuple[str, str], Exception]]:
+    """
+    Extract many documents, at most RANKER_BATCH_EXTRACT_WINDOW at a time.
+
+    A document is read only when a slot of the window frees up, so a large
+    batch never has more than a window of documents in memory.
+
+    Args:
+        reads: Coroutine functions returning each PDF
+        on_done: Optional callback run after each document, even a failed one
+
+    Returns:
+        (content digest, extracted text) per document, or the exception
+        that failed it, aligned with reads
+    """
+    window = asyncio.Semaphore(settings.batch_extract_window)
+
+    async def extract_one(read: Callable[[], Awaitable[PdfSource]]) -> Tuple[str, str]:
+        async with window:
+            try:
+                return await extract_document(await read())
+            finally:
+                if on_done is not None:
+                    on_done()
+
+    return await asyncio.gather(*(extract_one(read) for read in reads), return_exceptions=True)
+
+
+def resolve_embedding_mode(mode: Optional[str]) -> str:
+    """
+    Validate the embedding mode requested by a client.
+
+    Args:
+        mode: Requested mode, or None for the configured default
+
+    Returns:
+        One of EMBEDDING_MODES
+    """
+    mode = (mode or settings.embed_mode).strip().lower()
+    if mode not in EMBEDDING_MODES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"embedding_mode must be one of {', '.join(EMBEDDING_MODES)}"
+        )
+    return mode
+
+
+def resolve_analysis_policy(policy: Optional[str]) -> str:
+    """
+    Validate the analysis policy requested by a client.
+
+    Args:
+        policy: Requested policy, or None for the configured default
+
+    Returns:
+        One of ANALYSIS_POLICIES
+    """
+    policy = (policy or settings.analysis_policy).strip().lower()
+    if policy not in ANALYSIS_POLICIES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"analysis_policy must be one of {', '.join(ANALYSIS_POLICIES)}"
+        )
+    if policy == "top_k" and settings.web_workers > 1:
+        # The best scores are remembered per worker process
+        raise HTTPException(
+            status_code=400,
+            detail="analysis_policy top_k is only available with a single web worker"
+        )
+    return policy
+
+
+def index_embedding_mode() -> str:
+    """Single-vector embedding mode used for the talent pool index."""
+    return "mean" if settings.embed_mode == "max_sim" else settings.embed_mode
+
+
+def chunk_cache_name() -> str:
+    """Cache namespace of chunk embeddings under the current chunking settings."""
+    return (
+        f"{embedder.model_name}#chunks-w{settings.chunk_tokens}"
+        f"-o{settings.chunk_overlap_tokens}-n{settings.chunk_max}"
+    )
+
+
+async def embed_document_chunks(digests: List[str], texts: List[str]) -> List[np.ndarray]:
+    """
+    Embed documents as overlapping chunks, queueing the chunks of all cache misses on the batcher.
+
+    Args:
+        digests: Content digests of the uploaded PDFs
+        texts: Extracted texts, aligned with digests
+
+    Returns:
+        One read-only matrix of chunk embeddings per document
+    """
+    name = chunk_cache_name()
+    chunks = await asyncio.gather(*(cache_get(content_cache.get_embedding, digest, name) for digest in digests))
+    # Chunk matrices come back flat from the disk cache
+    chunks = [None if matrix is None else matrix.reshape(-1, embedder.dimension) for matrix in chunks]
+    missing = [i for i, matrix in enumerate(chunks) if matrix is None]
+    if missing:
+        def chunk_missing() -> List[List[str]]:
+            return [
+                embedder.chunk_text(
+                    texts[i], settings.chunk_tokens or None, settings.chunk_overlap_tokens, settings.chunk_max
+                )
+                for i in missing
+            ]
+
+        with stage("embed"):
+            chunked = await executors.run_embed(chunk_missing)
+            vectors = await embedding_batcher.embed_many([chunk for doc_chunks in chunked for chunk in doc_chunks])
+        bounds = np.cumsum([len(doc_chunks) for doc_chunks in chunked])[:-1]
+        for i, matrix in zip(missing, np.split(vectors, bounds)):
+            chunks[i] = await cache_put(content_cache.put_embedding, digests[i], name, matrix)
+    return chunks
+
+
+async def embed_document(digest: str, text: str, mode: str = "document") -> np.ndarray:
+    """
+    Embed a document's text, reusing the cached embedding for known content.
+
+    Args:
+        digest: Content digest of the uploaded PDF
+        text: Extracted text
+        mode: "document" to encode the text once, "mean" to mean-pool its chunks
+
+    Returns:
+        Float32 embedding vector
+    """
+    if mode != "document":
+        return mean_pool((await embed_document_chunks([digest], [text]))[0])
+
+    embedding = await cache_get(content_cache.get_embedding, digest, embedder.model_name)
+    if embedding is None:
+        with stage("embed"):
+            embedding = await embedding_batcher.embed(text)
+        embedding = await cache_put(content_cache.put_embedding, digest, embedder.model_name, embedding)
+    return embedding
+
+
+async def embed_documents(digests: List[str], texts: List[str], mode: str = "document") -> np.ndarray:
+    """
+    Embed many documents, queueing all cache misses on the batcher.
+
+    Args:
+        digests: Content digests of the uploaded PDFs
+        texts: Extracted texts, aligned with digests
+        mode: "document" to encode each text once, "mean" to mean-pool their chunks
+
+    Returns:
+        Float32 matrix with one embedding per row
+    """
+    if mode != "document":
+        return np.vstack([mean_pool(matrix) for matrix in await embed_document_chunks(digests, texts)])
+
+    vectors = await asyncio.gather(
+        *(cache_get(content_cache.get_embedding, digest, embedder.model_name) for digest in digests)
+    )
+    missing = [i for i, vector in enumerate(vectors) if vector is None]
+    if missing:
+        with stage("embed"):
+            encoded = await embedding_batcher.embed_many([texts[i] for i in missing])
+        for i, vector in zip(missing, encoded):
+            vectors[i] = await cache_put(content_cache.put_embedding, digests[i], embedder.model_name, vector)
+    return np.vstack(vectors)
+
+
+def jd_derivation() -> str:
+    """Settings the features of a registered job description are derived under."""
+    return (
+        f"{chunk_cache_name()}|passages-{settings.prompt_passage_tokens}"
+        f"|skills-{text_digest(','.join(skill_dictionary.names))[:16]}"
+    )
+
+
+async def compute_jd_features(digest: str, text: str) -> JDFeatures:
+    """
+    Precompute everything ranking needs from a job description.
+
+    Args:
+        digest: Content digest of the uploaded PDF
+        text: Extracted text
+
+    Returns:
+        JDFeatures with its document and chunk embeddings, lexical query
+        terms and skills, and encoded prompt passages
+    """
+    embedding, chunks = await asyncio.gather(
+        embed_document(digest, text, "document"),
+        embed_document_chunks([digest], [text])
+    )
+    lexical = await executors.run_embed(lexical_index.analyze, text)
+    with stage("prompt_budget"):
+        passages = await executors.run_embed(prompt_builder.prepare_jd, text)
+    return JDFeatures(
+        derivation=jd_derivation(),
+        embedding=embedding,
+        chunks=chunks[0],
+        lexical=lexical,
+        passages=passages
+    )
+
+
+async def load_job_description(jd_id: str, version: Optional[int] = None) -> JobDescription:
+    """
+    Fetch a registered job description, re-deriving stale features.
+
+    Features computed under another embedding model, chunking, passage
+    size or skill dictionary are recomputed from the stored text.
+
+    Args:
+        jd_id: Job description id
+        version: Version number, or None for the newest
+
+    Returns:
+        JobDescription with current features
+    """
+    jd = await executors.run_storage(jd_store.get, jd_id, version)
+    if jd is None:
+        label = jd_id if version is None else f"{jd_id} version {version}"
+        raise HTTPException(status_code=404, detail=f"Job description {label} not found")
+    if jd.features.derivation != jd_derivation():
+        logger.info(f"Re-deriving features of job description {jd.id} version {jd.version}")
+        features = await compute_jd_features(jd.digest, jd.text)
+        await executors.run_storage(jd_store.update_features, jd.id, jd.version, features)
+        jd = dataclasses.replace(jd, features=features)
+    return jd
+
+
+async def resolve_job_description(
+    job_description: Optional[UploadFile],
+    jd_id: Optional[str],
+    jd_version: Optional[int]
+) -> Tuple[Optional[BinaryIO], Optional[JobDescription]]:
+    """
+    Read the job description a request refers to, uploaded or registered.
+
+    Args:
+        job_description: Uploaded job description PDF, if any
+        jd_id: Id of a registered job description, if any
+        jd_version: Version of the registered job description (defaults to the newest)
+
+    Returns:
+        Tuple of (uploaded PDF file, registered job description); exactly one is set
+    """
+    if (job_description is None) == (not jd_id):
+        raise HTTPException(status_code=400, detail="Send either a job_description PDF or a jd_id")
+    if jd_id:
+        return None, await load_job_description(jd_id, jd_version)
+    return await read_upload(job_description), None
+
+
+def registered_embedding(jd: JobDescription, mode: str) -> np.ndarray:
+    """
+    Embedding of a registered job description in an embedding mode.
+
+    Args:
+        jd: Registered job description
+        mode: One of EMBEDDING_MODES
+
+    Returns:
+        Embedding vector, or the chunk matrix for "max_sim"
+    """
+    if mode == "document":
+        return jd.features.embedding
+    if mode == "mean":
+        return mean_pool(jd.features.chunks)
+    return jd.features.chunks
+
+
+def lexical_query(jd: Optional[JobDescription], jd_text: str) -> Union[str, AnalyzedText]:
+    """Lexical query of a job description, pre-analyzed when it is registered."""
+    return jd.features.lexical if jd is not None else jd_text
+
+
+async def score_resume(
+    resume_content: PdfSource,
+    jd_content: Optional[PdfSource],
+    mode: str = "document",
+    jd: Optional[JobDescription] = None
+) -> Tuple[float, str, str]:
+    """
+    Extract, embed and score a resume against a job description.
+
+    Args:
+        resume_content: Resume PDF as bytes or a file object
+        jd_content: Job description PDF as bytes or a file object, or None when jd is given
+        mode: Embedding mode, one of EMBEDDING_MODES
+        jd: Registered job description, whose text and embeddings are reused
+
+    Returns:
+        Tuple of (similarity score, resume text, job description text)
+    """
+    # Extract text from PDFs (both documents in parallel)
+    logger.info("Extracting text from PDFs...")
+    if jd is not None:
+        resume_digest, resume_text = await extract_document(resume_content)
+        jd_digest, jd_text = jd.digest, jd.text
+    else:
+        (resume_digest, resume_text), (jd_digest, jd_text) = await asyncio.gather(
+            extract_document(resume_content),
+            extract_document(jd_content)
+        )
+
+    if not resume_text or not jd_text:
+        raise HTTPException(
+            status_code=400,
+            detail="Could not extract text from PDF files"
+        )
+
+    # Generate embeddings
+    logger.info(f"Generating embeddings ({mode})...")
+    if mode == "max_sim":
+        if jd is not None:
+            resume_chunks = (await embed_document_chunks([resume_digest], [resume_text]))[0]
+            jd_chunks = jd.features.chunks
+        else:
+            resume_chunks, jd_chunks = await embed_document_chunks(
+                [resume_digest, jd_digest], [resume_text, jd_text]
+            )
+        logger.info("Calculating similarity...")
+        with stage("similarity"):
+            similarity_score = float(max_sim_scores(jd_chunks, [resume_chunks], normalized=True)[0])
+        return similarity_score, resume_text, jd_text
+
+    if jd is not None:
+        resume_embedding = await embed_document(resume_digest, resume_text, mode)
+        jd_embedding = registered_embedding(jd, mode)
+    else:
+        resume_embedding, jd_embedding = await asyncio.gather(
+            embed_document(resume_digest, resume_text, mode),
+            embed_document(jd_digest, jd_text, mode)
+        )
+
+    # Calculate similarity
+    logger.info("Calculating similarity...")
+    with stage("similarity"):
+        similarity_score = calculate_cosine_similarity(resume_embedding, jd_embedding)
+    return similarity_score, resume_text, jd_text
+
+
+def lexical_batch(jd_text: Union[str, AnalyzedText], texts: List[str]) -> List[LexicalMatch]:
+    """
+    Score uploaded resumes lexically against a job description.
+
+    The resumes form their own BM25 corpus, so term rarity reflects the
+    pool being screened.
+
+    Args:
+        jd_text: Extracted job description text, or its analyzed terms
+        texts: Extracted resume texts
+
+    Returns:
+        LexicalMatch per resume, aligned with texts
+    """
+    index = LexicalIndex(skills=skill_dictionary)
+    ids = [str(i) for i in range(len(texts))]
+    index.add(texts, ids)
+    matches = index.score(jd_text, ids)
+    return [matches[item_id] for item_id in ids]
+
+
+def hybrid_score(similarity_score: float, lexical_score: float) -> float:
+    """Fused dense and lexical score under RANKER_HYBRID_LEXICAL_WEIGHT."""
+    return round(float(hybrid_scores(similarity_score, lexical_score, settings.hybrid_lexical_weight)), 4)
+
+
+def lexical_prefilter_k() -> int:
+    """Shortlist size of the lexical prefilter, 0 while the fused score ignores lexical matches."""
+    # Without lexical weight, cutting resumes by BM25 would drop good dense matches unseen
+    return settings.lexical_prefilter_k if settings.hybrid_lexical_weight > 0 else 0
+
+
+def analysis_cache_key(resume_text: str, jd_text: str) -> str:
+    """Cache key of the LLM analysis for a resume/job description pair."""
+    return AnalysisCache.make_key(resume_text, jd_text, llm_analyzer.model_name, PROMPT_VERSION)
+
+
+def decide_analysis(
+    policy: str, jd_text: str, resume_texts: List[str], scores: List[float]
+) -> List[AnalysisDecision]:
+    """
+    Apply the analysis policy to candidates ranked against one job description.
+
+    Candidates and job descriptions are keyed by text digest, so uploaded
+    and registered job descriptions share their top-k.
+
+    Args:
+        policy: One of ANALYSIS_POLICIES
+        jd_text: Extracted job description text
+        resume_texts: Extracted resume texts
+        scores: Hybrid scores, aligned with resume_texts
+
+    Returns:
+        AnalysisDecision per resume
+    """
+    return analysis_gate.decide(policy, text_digest(jd_text), [text_digest(text) for text in resume_texts], scores)
+
+
+def analysis_path(cached: bool, degraded: bool) -> str:
+    """Path of an analysis that went to the LLM: "llm", "cache" or "degraded"."""
+    if degraded:
+        return "degraded"
+    return "cache" if cached else "llm"
+
+
+async def budget_prompt(
+    resume_text: str, jd_text: str, jd_passages: Optional[JDPassages] = None
+) -> BudgetedPrompt:
+    """
+    Trim resume and job description text to the LLM token budget.
+
+    Args:
+        resume_text: Extracted resume text
+        jd_text: Extracted job description text
+        jd_passages: Precomputed passages of a registered job description
+
+    Returns:
+        BudgetedPrompt with the texts to send to the LLM
+    """
+    with stage("prompt_budget"):
+        budgeted = await executors.run_embed(
+            prompt_builder.build, resume_text, jd_text, llm_analyzer.build_prompt("", ""), jd_passages
+        )
+    if budgeted.trimmed:
+        logger.info(
+            f"Trimmed prompt from ~{budgeted.input_tokens} to ~{budgeted.prompt_tokens} tokens "
+            f"(resume {budgeted.resume_passages_kept}/{budgeted.resume_passages_total} passages, "
+            f"job description {budgeted.jd_passages_kept}/{budgeted.jd_passages_total})"
+        )
+    return budgeted
+
+
+async def generate_analysis(
+    resume_text: str, jd_text: str, jd_passages: Optional[JDPassages] = None
+) -> Tuple[str, bool, Optional[BudgetedPrompt], bool]:
+    """
+    Generate the LLM analysis, turning provider errors into a message.
+
+    Long documents are trimmed to the prompt token budget first. Identical
+    requests share one LLM call and later ones are served from the
+    analysis cache. When the LLM is unavailable (circuit open, deadline
+    exceeded or retries exhausted) the degraded placeholder is returned
+    and nothing is cached.
+
+    Args:
+        resume_text: Extracted resume text
+        jd_text: Extracted job description text
+        jd_passages: Precomputed passages of a registered job description
+
+    Returns:
+        Tuple of (analysis text, True if it was served from the cache,
+        prompt budgeting details or None if budgeting failed, True if the
+        result is degraded to embedding similarity only)
+    """
+    if llm_analyzer is None:
+        raise HTTPException(
+            status_code=500,
+            detail="LLM analyzer not initialized"
+        )
+
+    budgeted = None
+    try:
+        if not llm_client.available():
+            # Do not spend embedding time on a prompt that will not be sent
+            raise LLMUnavailable("LLM circuit is open")
+        budgeted = await budget_prompt(resume_text, jd_text, jd_passages)
+
+        async def analyze() -> str:
+            with stage("llm"):
+                llm_analysis = await llm_client.call(
+                    llm_analyzer.analyze_resume, budgeted.resume_text, budgeted.jd_text
+                )
+            # Ensure llm_analysis is a string
+            if not isinstance(llm_analysis, str):
+                if llm_analysis is None:
+                    raise ValueError("Analysis unavailable")
+                llm_analysis = str(llm_analysis)
+            return llm_analysis
+
+        llm_analysis, cached = await analysis_cache.get_or_compute(
+            analysis_cache_key(budgeted.resume_text, budgeted.jd_text), analyze
+        )
+        logger.info(f"LLM analysis ready (cached={cached}), length: {len(llm_analysis)}")
+    except LLMUnavailable as e:
+        logger.warning(f"LLM unavailable, returning similarity only: {str(e)}")
+        return DEGRADED_ANALYSIS, False, budgeted, True
+    except Exception as e:
+        logger.error(f"Error generating LLM analysis: {str(e)}")
+        return f"Error generating analysis: {str(e)}", False, budgeted, False
+    return llm_analysis, cached, budgeted, False
+
+
+async def rank_batch(
+    jd_content: Optional[PdfSource],
+    filenames: List[str],
+    contents: List[Callable[[], Awaitable[PdfSource]]],
+    analyze_top_k: int,
+    mode: str = "document",
+    progress: Optional[Callable[[int, int], None]] = None,
+    jd: Optional[JobDescription] = None,
+    policy: str = "always"
+) -> BatchRankResponse:
+    """
+    Rank many resumes against one job description.
+
+    Resumes are scored lexically (BM25 and skills) first. When lexical
+    matches carry weight and there are more than
+    RANKER_LEXICAL_PREFILTER_K resumes, only that many best lexical
+    matches are embedded and ranked; the others are returned after them
+    with shortlisted false. Of the top analyze_top_k, those the
+    analysis policy skips get a templated summary instead of an LLM call.
+
+    Args:
+        jd_content: Job description PDF as bytes or a file object, or None
+            when jd is given
+        filenames: Resume file names
+        contents: Coroutine functions returning each resume PDF, aligned
+            with filenames; a resume is read only when its extraction starts,
+            at most RANKER_BATCH_EXTRACT_WINDOW at a time
+        analyze_top_k: Number of top-ranked resumes to run LLM analysis on
+        mode: Embedding mode, one of EMBEDDING_MODES
+        progress: Optional callback receiving (steps done, total steps)
+        jd: Registered job description, whose text and embeddings are reused
+        policy: Analysis policy, one of ANALYSIS_POLICIES
+
+    Returns:
+        BatchRankResponse with results sorted by hybrid_score
+    """
+    total_steps = len(contents) + min(analyze_top_k, len(contents))
+    done_steps = 0
+
+    def step() -> None:
+        nonlocal done_steps
+        done_steps += 1
+        if progress is not None:
+            progress(done_steps, total_steps)
+
+    if jd is not None:
+        jd_digest, jd_text = jd.digest, jd.text
+    else:
+        jd_digest, jd_text = await extract_document(jd_content)
+    if not jd_text:
+        raise HTTPException(
+            status_code=400,
+            detail="Could not extract text from job description PDF"
+        )
+
+    # Extract resumes in parallel windows; a bad file only fails its own entry
+    logger.info(f"Extracting text from {len(contents)} resumes...")
+    extracted = await extract_documents(contents, step)
+
+    results: List[RankedResume] = []
+    valid = []
+    for filename, outcome in zip(filenames, extracted):
+        if isinstance(outcome, Exception):
+            results.append(RankedResume(filename=filename, error=str(outcome)))
+        elif not outcome[1]:
+            results.append(RankedResume(filename=filename, error="Could not extract text from PDF"))
+        else:
+            valid.append((filename, outcome[0], outcome[1]))
+
+    ranked: List[RankedResume] = []
+    ranked_texts: List[str] = []
+    dropped: List[RankedResume] = []
+    if valid:
+        with stage("lexical"):
+            lexical = await executors.run_embed(
+                lexical_batch, lexical_query(jd, jd_text), [text for _, _, text in valid]
+            )
+        shortlisted = None
+        prefilter_k = lexical_prefilter_k()
+        if prefilter_k and len(valid) > prefilter_k:
+            order = sorted(range(len(valid)), key=lambda i: -lexical[i].score)
+            for i in order[prefilter_k:]:
+                dropped.append(RankedResume(
+                    filename=valid[i][0],
+                    lexical_score=lexical[i].score,
+                    matched_skills=lexical[i].matched_skills,
+                    missing_skills=lexical[i].missing_skills,
+                    shortlisted=False
+                ))
+            keep = sorted(order[:prefilter_k])
+            valid = [valid[i] for i in keep]
+            lexical = [lexical[i] for i in keep]
+            shortlisted = True
+            logger.info(f"Lexical prefilter kept {len(valid)} of {len(valid) + len(dropped)} resumes")
+
+        logger.info(f"Generating embeddings ({mode})...")
+        digests = [digest for _, digest, _ in valid]
+        texts = [text for _, _, text in valid]
+        if mode == "max_sim":
+            if jd is not None:
+                chunks = [jd.features.chunks] + await embed_document_chunks(digests, texts)
+            else:
+                # The job description's chunks are encoded in the same batch
+                chunks = await embed_document_chunks([jd_digest] + digests, [jd_text] + texts)
+            logger.info("Calculating similarity...")
+            with stage("similarity"):
+                scores = max_sim_scores(chunks[0], chunks[1:], normalized=True)
+        else:
+            if jd is not None:
+                jd_embedding = registered_embedding(jd, mode)
+            else:
+                jd_embedding = await embed_document(jd_digest, jd_text, mode)
+            resume_embeddings = await embed_documents(digests, texts, mode)
+            logger.info("Calculating similarity...")
+            with stage("similarity"):
+                scores = calculate_cosine_similarities(jd_embedding, resume_embeddings, normalized=True)
+        fused = hybrid_scores(scores, [match.score for match in lexical], settings.hybrid_lexical_weight)
+        order = np.argsort(-fused, kind="stable")
+        for position, index in enumerate(order):
+            filename, _, text = valid[index]
+            entry = RankedResume(
+                rank=position + 1,
+                filename=filename,
+                similarity_score=round(float(scores[index]), 4),
+                lexical_score=lexical[index].score,
+                hybrid_score=round(float(fused[index]), 4),
+                matched_skills=lexical[index].matched_skills,
+                missing_skills=lexical[index].missing_skills,
+                shortlisted=shortlisted
+            )
+            ranked.append(entry)
+            ranked_texts.append(text)
+
+    top = ranked[:analyze_top_k]
+    decisions = decide_analysis(policy, jd_text, ranked_texts[:len(top)], [entry.hybrid_score for entry in top])
+    analyzed = [(entry, text) for entry, text, decision in zip(top, ranked_texts, decisions) if decision.analyze]
+    for entry, decision in zip(top, decisions):
+        if not decision.analyze:
+            entry.llm_analysis = templated_summary(
+                entry.similarity_score, entry.lexical_score, entry.hybrid_score, entry.matched_skills,
+                entry.missing_skills, decision.reason
+            )
+            entry.analysis_path = "template"
+    # Resumes that failed extraction or were skipped by the policy are not analyzed
+    total_steps = len(contents) + len(analyzed)
+    if progress is not None:
+        progress(done_steps, total_steps)
+    if analyzed:
+        logger.info(f"Generating LLM analysis for {len(analyzed)} of the top {len(top)} resumes...")
+
+        async def analyze_with_progress(text: str) -> Tuple[str, bool, Optional[BudgetedPrompt], bool]:
+            try:
+                return await generate_analysis(text, jd_text, jd.features.passages if jd is not None else None)
+            finally:
+                step()
+
+        analyses = await asyncio.gather(
+            *(analyze_with_progress(text) for _, text in analyzed)
+        )
+        for (entry, _), (analysis, cached, budgeted, degraded) in zip(analyzed, analyses):
+            entry.llm_analysis = analysis
+            entry.analysis_cached = cached
+            entry.degraded = degraded
+            entry.analysis_path = analysis_path(cached, degraded)
+            entry.prompt_trim = PromptTrim.from_budgeted(budgeted)
+
+    return BatchRankResponse(
+        total=len(contents),
+        ranked=len(ranked),
+        prefiltered=len(dropped),
+        results=ranked + dropped + results,
+        embedding_mode=mode,
+        analysis_policy=policy,
+        jd_id=jd.id if jd is not None else None,
+        jd_version=jd.version if jd is not None else None
+    )
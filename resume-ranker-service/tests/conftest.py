@@ -0,0 +1,118 @@
+import os
+import sys
+import zlib
+from typing import Iterator, List, Optional
+
+import numpy as np
+import pytest
+
+# Tests import the service modules the way main.py does
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from logic.embedding_backends import EmbeddingBackend
+from logic.executors import Executors
+
+
+def build_pdf(pages: List[str]) -> bytes:
+    """Minimal PDF with one line of Helvetica text per page."""
+    objects = []
+    kids = " ".join(f"{3 + 2 * i} 0 R" for i in range(len(pages)))
+    font = 3 + 2 * len(pages)
+    objects.append("<< /Type /Catalog /Pages 2 0 R >>")
+    objects.append(f"<< /Type /Pages /Kids [{kids}] /Count {len(pages)} >>")
+    for i, text in enumerate(pages):
+        stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET"
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents {4 + 2 * i} 0 R "
+            f"/Resources << /Font << /F1 {font} 0 R >> >> >>"
+        )
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+    objects.append("<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    pdf = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(pdf))
+        pdf += f"{number} 0 obj\n{body}\nendobj\n".encode()
+    xref = len(pdf)
+    pdf += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    pdf += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode()
+    pdf += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return pdf
+
+
+@pytest.fixture
+def make_pdf():
+    return build_pdf
+
+
+@pytest.fixture
+def executors():
+    pools = Executors(cpu_workers=2, embed_workers=1, llm_workers=2, storage_workers=2)
+    pools.start()
+    yield pools
+    pools.shutdown()
+
+
+class HashingBackend(EmbeddingBackend):
+    """Embeds a text as its bag of words, hashed into 64 dimensions."""
+
+    name = "hashing"
+    dimension = 64
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        vectors = np.full((len(texts), self.dimension), 1e-3, dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in text.lower().split():
+                vectors[row, zlib.crc32(word.encode()) % self.dimension] += 1.0
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+class FakeAnalyzer:
+    """Stands in for the Gemini analyzer and counts its calls."""
+
+    model_name = "fake-llm"
+
+    def __init__(self):
+        self.calls = 0
+
+    def build_prompt(self, resume_text: str, job_description: str) -> str:
+        return f"Job description:\n{job_description}\n\nResume:\n{resume_text}"
+
+    def analyze_resume(self, resume_text: str, job_description: str, timeout: Optional[float] = None) -> str:
+        self.calls += 1
+        return f"Analysis of {len(resume_text.split())} resume words"
+
+    def stream_analysis(
+        self, resume_text: str, job_description: str, timeout: Optional[float] = None
+    ) -> Iterator[str]:
+        self.calls += 1
+        yield "Analysis of "
+        yield f"{len(resume_text.split())} resume words"
+
+
+@pytest.fixture(scope="session")
+def service(tmp_path_factory):
+    """The main module, with its stores in a temporary directory and a hashing embedding backend."""
+    pytest.importorskip("google.generativeai")
+    data = tmp_path_factory.mktemp("data")
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setenv("GEMINI_API_KEY", "test-key")
+        patch.setenv("RANKER_METRICS_DIR", str(data / "metrics"))
+        patch.setenv("RANKER_LLM_CACHE_PATH", str(data / "llm_cache.sqlite3"))
+        patch.setenv("RANKER_JOB_DB_PATH", str(data / "jobs.sqlite3"))
+        patch.setenv("RANKER_INDEX_DIR", str(data / "index"))
+        patch.setenv("RANKER_JD_DB_PATH", str(data / "job_descriptions.sqlite3"))
+        import main
+        main.embedder._backend = HashingBackend()
+        yield main
+
+
+@pytest.fixture
+def client(service):
+    """Test client of the started app, with the LLM replaced by a FakeAnalyzer."""
+    from fastapi.testclient import TestClient
+
+    with TestClient(service.app, raise_server_exceptions=False) as test_client:
+        service.services.llm_analyzer = FakeAnalyzer()
+        yield test_client
@@ -0,0 +1,231 @@
+import asyncio
+
+import pytest
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from logic.admission import AdmissionController, AdmissionMiddleware, AdmissionRejected, _PartSizeLimit
+
+BOUNDARY = "testboundary"
+
+
+def multipart(*files: bytes) -> bytes:
+    body = b""
+    for index, content in enumerate(files):
+        body += (
+            f"--{BOUNDARY}\r\n"
+            f'Content-Disposition: form-data; name="files"; filename="f{index}.pdf"\r\n'
+            "Content-Type: application/pdf\r\n\r\n"
+        ).encode() + content + b"\r\n"
+    return body + f"--{BOUNDARY}--\r\n".encode()
+
+
+def feed_in_chunks(limit: _PartSizeLimit, body: bytes, size: int) -> bool:
+    return all([limit.feed(body[start:start + size]) for start in range(0, len(body), size)])
+
+
+def make_client(controller: AdmissionController, max_request_bytes: int = 4096, max_file_bytes: int = 1024):
+    async def upload(request):
+        size = 0
+        async for chunk in request.stream():
+            size += len(chunk)
+        return JSONResponse({"received": size})
+
+    async def health(request):
+        return JSONResponse({"status": "ok"})
+
+    app = Starlette(
+        routes=[Route("/upload", upload, methods=["POST"]), Route("/health", health)],
+        middleware=[Middleware(
+            AdmissionMiddleware,
+            controller=controller,
+            max_request_bytes=max_request_bytes,
+            max_file_bytes=max_file_bytes
+        )]
+    )
+    return TestClient(app)
+
+
+def post_files(client: TestClient, *files: bytes, **kwargs):
+    return client.post(
+        "/upload",
+        content=multipart(*files),
+        headers={"Content-Type": f"multipart/form-data; boundary={BOUNDARY}"},
+        **kwargs
+    )
+
+
+def test_requests_within_the_limit_are_admitted_at_once():
+    controller = AdmissionController(max_in_flight=2, max_queue=0, queue_timeout_s=1.0)
+
+    async def main():
+        await controller.acquire()
+        await controller.acquire()
+        with pytest.raises(AdmissionRejected) as rejected:
+            await controller.acquire()
+        return rejected.value
+
+    rejected = asyncio.run(main())
+    assert rejected.reason == "queue_full"
+    assert rejected.retry_after_s >= 1
+    stats = controller.stats()
+    assert stats["admitted"] == 2 and stats["queue_full"] == 1 and stats["in_flight"] == 2
+
+
+def test_release_hands_the_slot_to_the_oldest_waiter():
+    controller = AdmissionController(max_in_flight=1, max_queue=2, queue_timeout_s=1.0)
+    order = []
+
+    async def request(name):
+        await controller.acquire()
+        order.append(name)
+
+    async def main():
+        await controller.acquire()
+        waiters = [asyncio.ensure_future(request(name)) for name in ("first", "second")]
+        await asyncio.sleep(0.01)
+        assert controller.stats()["waiting"] == 2
+        controller.release(0.0)
+        await asyncio.sleep(0.01)
+        assert order == ["first"] and controller.stats()["in_flight"] == 1
+        controller.release(0.0)
+        await asyncio.gather(*waiters)
+        controller.release(0.0)
+
+    asyncio.run(main())
+    assert order == ["first", "second"]
+    stats = controller.stats()
+    assert stats["in_flight"] == 0 and stats["waiting"] == 0 and stats["queued"] == 2
+
+
+def test_waiting_too_long_is_rejected():
+    controller = AdmissionController(max_in_flight=1, max_queue=1, queue_timeout_s=0.05)
+
+    async def main():
+        await controller.acquire()
+        with pytest.raises(AdmissionRejected) as rejected:
+            await controller.acquire()
+        return rejected.value
+
+    assert asyncio.run(main()).reason == "queue_timeout"
+    stats = controller.stats()
+    assert stats["queue_timeout"] == 1 and stats["waiting"] == 0 and stats["in_flight"] == 1
+
+
+def test_cancelled_waiter_passes_on_a_handed_over_slot():
+    controller = AdmissionController(max_in_flight=1, max_queue=2, queue_timeout_s=1.0)
+
+    async def main():
+        await controller.acquire()
+        gone = asyncio.ensure_future(controller.acquire())
+        waiting = asyncio.ensure_future(controller.acquire())
+        await asyncio.sleep(0.01)
+        # The slot is handed to the first waiter just as its client goes away
+        controller.release(0.0)
+        gone.cancel()
+        try:
+            await gone
+            # Some Python versions complete the wait despite the cancel; the slot is then the caller's
+            controller.release(0.0)
+        except asyncio.CancelledError:
+            pass
+        await asyncio.wait_for(waiting, 0.5)
+
+    asyncio.run(main())
+    assert controller.stats()["in_flight"] == 1
+
+
+def test_retry_after_follows_service_times_and_backlog():
+    controller = AdmissionController(max_in_flight=2, max_queue=4, queue_timeout_s=1.0)
+    assert controller.retry_after_s() == 1
+    controller._in_flight = 2
+    for _ in range(20):
+        controller.release(10.0)
+        controller._in_flight = 2
+    # About 10 s per request, one request in line, two slots
+    assert controller.retry_after_s() == 5
+    for _ in range(20):
+        controller.release(1000.0)
+        controller._in_flight = 2
+    assert controller.retry_after_s() == 60
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 7, 13, 64, 10000])
+def test_part_limit_finds_delimiters_split_across_chunks(chunk_size):
+    body = multipart(b"a" * 200, b"b" * 300)
+    # Parts are about 100 bytes of headers plus their content; only the second exceeds 350
+    assert feed_in_chunks(_PartSizeLimit(BOUNDARY.encode(), 450), body, chunk_size)
+    assert not feed_in_chunks(_PartSizeLimit(BOUNDARY.encode(), 350), body, chunk_size)
+
+
+def test_part_limit_stops_a_part_before_its_delimiter_arrives():
+    limit = _PartSizeLimit(BOUNDARY.encode(), 100)
+    assert limit.feed(f"--{BOUNDARY}\r\n".encode())
+    assert limit.feed(b"x" * 90)
+    assert not limit.feed(b"x" * 90)
+
+
+def test_middleware_admits_small_uploads():
+    controller = AdmissionController(max_in_flight=1, max_queue=0, queue_timeout_s=1.0)
+    with make_client(controller) as client:
+        response = post_files(client, b"a" * 500, b"b" * 500)
+    assert response.status_code == 200
+    assert response.json()["received"] == len(multipart(b"a" * 500, b"b" * 500))
+    assert controller.stats()["in_flight"] == 0
+
+
+def test_middleware_refuses_a_large_content_length():
+    controller = AdmissionController(max_in_flight=1, max_queue=0, queue_timeout_s=1.0)
+    with make_client(controller, max_request_bytes=1000) as client:
+        response = post_files(client, b"a" * 2000)
+    assert response.status_code == 413
+    assert "1000 bytes" in response.json()["detail"]
+    assert controller.stats()["request_too_large"] == 1
+    assert controller.stats()["admitted"] == 0
+
+
+def test_middleware_stops_a_streamed_body_past_the_limit():
+    controller = AdmissionController(max_in_flight=1, max_queue=0, queue_timeout_s=1.0)
+    body = multipart(b"a" * 900, b"b" * 900)
+
+    def chunks():
+        for start in range(0, len(body), 256):
+            yield body[start:start + 256]
+
+    with make_client(controller, max_request_bytes=1500) as client:
+        response = client.post(
+            "/upload",
+            content=chunks(),
+            headers={"Content-Type": f"multipart/form-data; boundary={BOUNDARY}"}
+        )
+    assert response.status_code == 413
+    # Without a Content-Length the request is admitted and stopped while reading
+    assert controller.stats()["admitted"] == 1
+    assert controller.stats()["request_too_large"] == 1
+    assert controller.stats()["in_flight"] == 0
+
+
+def test_middleware_rejects_an_oversized_file_part():
+    controller = AdmissionController(max_in_flight=1, max_queue=0, queue_timeout_s=1.0)
+    with make_client(controller, max_file_bytes=1024) as client:
+        response = post_files(client, b"a" * 100, b"b" * 2000)
+    assert response.status_code == 413
+    assert "Uploaded file exceeds 1024 bytes" in response.text
+    assert controller.stats()["file_too_large"] == 1
+
+
+def test_middleware_answers_429_with_retry_after_when_saturated():
+    controller = AdmissionController(max_in_flight=1, max_queue=0, queue_timeout_s=1.0)
+    asyncio.run(controller.acquire())
+    with make_client(controller) as client:
+        response = post_files(client, b"a")
+        health = client.get("/health")
+        plain = client.post("/upload", content=b"{}", headers={"Content-Type": "application/json"})
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+    # Only multipart uploads are subject to admission control
+    assert health.status_code == 200
+    assert plain.status_code == 200
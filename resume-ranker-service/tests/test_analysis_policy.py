@@ -0,0 +1,94 @@
+import pytest
+
+from logic.analysis_policy import AnalysisGate, templated_summary
+
+
+def analyzed(decisions):
+    return [decision.analyze for decision in decisions]
+
+
+def test_always_analyzes_everyone():
+    gate = AnalysisGate()
+    assert analyzed(gate.decide("always", "jd", ["a", "b"], [0.0, 0.9])) == [True, True]
+
+
+def test_threshold_skips_low_scores():
+    gate = AnalysisGate(min_score=0.5)
+    decisions = gate.decide("threshold", "jd", ["a", "b", "c"], [0.49, 0.5, 0.8])
+    assert analyzed(decisions) == [False, True, True]
+    assert decisions[0].reason == "below_threshold"
+    assert gate.stats()["decisions"]["threshold"] == {"llm": 2, "template": 1}
+
+
+def test_top_k_within_one_group_follows_rank_order():
+    gate = AnalysisGate(top_k=2)
+    decisions = gate.decide("top_k", "jd", ["a", "b", "c", "d"], [0.3, 0.9, 0.1, 0.7])
+    assert analyzed(decisions) == [False, True, False, True]
+    assert decisions[0].reason == "outside_top_k"
+
+
+def test_top_k_remembers_best_scores_across_calls():
+    gate = AnalysisGate(top_k=2)
+    gate.decide("top_k", "jd", ["a", "b"], [0.8, 0.6])
+    # Weaker than both remembered candidates
+    assert analyzed(gate.decide("top_k", "jd", ["c"], [0.5])) == [False]
+    # Stronger than the weakest one, which it displaces
+    assert analyzed(gate.decide("top_k", "jd", ["d"], [0.7])) == [True]
+    assert analyzed(gate.decide("top_k", "jd", ["b"], [0.6])) == [False]
+    # A candidate in the top_k keeps its place when ranked again
+    assert analyzed(gate.decide("top_k", "jd", ["a"], [0.8])) == [True]
+
+
+def test_top_k_is_kept_per_job_description():
+    gate = AnalysisGate(top_k=1)
+    gate.decide("top_k", "jd1", ["a"], [0.9])
+    assert analyzed(gate.decide("top_k", "jd2", ["b"], [0.1])) == [True]
+    assert analyzed(gate.decide("top_k", "jd1", ["b"], [0.1])) == [False]
+
+
+def test_least_recently_used_job_descriptions_are_forgotten():
+    gate = AnalysisGate(top_k=1, max_jds=2)
+    gate.decide("top_k", "jd1", ["a"], [0.9])
+    gate.decide("top_k", "jd2", ["a"], [0.9])
+    gate.decide("top_k", "jd1", ["b"], [0.1])
+    gate.decide("top_k", "jd3", ["a"], [0.9])
+    assert gate.stats()["jds_tracked"] == 2
+    # jd2 was forgotten, so its top_k starts empty again
+    assert analyzed(gate.decide("top_k", "jd2", ["b"], [0.1])) == [True]
+    assert analyzed(gate.decide("top_k", "jd3", ["b"], [0.1])) == [False]
+
+
+def test_unknown_policy_is_rejected():
+    with pytest.raises(ValueError):
+        AnalysisGate().decide("sometimes", "jd", ["a"], [0.5])
+
+
+@pytest.mark.parametrize("kwargs", [{"top_k": 0}, {"max_jds": 0}])
+def test_invalid_settings_are_rejected(kwargs):
+    with pytest.raises(ValueError):
+        AnalysisGate(**kwargs)
+
+
+def test_templated_summary_follows_the_analysis_sections():
+    summary = templated_summary(0.7, 0.5, 0.65, ["python", "aws"], ["docker"], reason="outside_top_k")
+    lines = summary.splitlines()
+    assert [line[:3] for line in lines] == ["1. ", "2. ", "3. ", "4. "]
+    assert "Strong match (hybrid score 0.65: embedding similarity 0.70, keyword overlap 0.50)" in lines[0]
+    assert "Mentions 2 of 3 skills listed in the job description: python, aws." in lines[1]
+    assert "No mention of docker." in lines[2]
+    assert "outside the top candidates" in lines[3]
+
+
+def test_templated_summary_without_skills_or_lexical_score():
+    summary = templated_summary(0.3, None, 0.3, [], [], reason="below_threshold")
+    assert "Weak match (hybrid score 0.30: embedding similarity 0.30)." in summary
+    assert "lists no recognised skills" in summary
+    assert "below the analysis threshold" in summary
+
+
+def test_templated_summary_shortens_long_skill_lists():
+    missing = [f"skill{i}" for i in range(10)]
+    summary = templated_summary(0.5, 0.4, 0.45, [], missing)
+    assert "Moderate match" in summary
+    assert "Mentions none of the skills" in summary
+    assert "skill7 and 2 more." in summary
@@ -0,0 +1,134 @@
+import asyncio
+import time
+from typing import List
+
+import numpy as np
+import pytest
+
+from logic.batcher import EmbeddingBatcher
+
+
+class RecordingEmbedder:
+    """Embeds a text as [len(text), 1] and records every batch it is given."""
+
+    def __init__(self, delay_s: float = 0.0, fail: bool = False):
+        self.batches: List[List[str]] = []
+        self.delay_s = delay_s
+        self.fail = fail
+
+    def embed_batch(self, texts: List[str]) -> np.ndarray:
+        self.batches.append(list(texts))
+        if self.delay_s:
+            time.sleep(self.delay_s)
+        if self.fail:
+            raise RuntimeError("encode failed")
+        return np.array([[len(text), 1.0] for text in texts])
+
+
+def run_with_batcher(embedder, executors, scenario, **kwargs):
+    async def main():
+        batcher = EmbeddingBatcher(embedder, executors, **kwargs)
+        await batcher.start()
+        try:
+            return await scenario(batcher), batcher.stats()
+        finally:
+            await batcher.stop()
+
+    return asyncio.run(main())
+
+
+def test_concurrent_texts_share_a_batch(executors):
+    embedder = RecordingEmbedder()
+
+    async def scenario(batcher):
+        return await asyncio.gather(*(batcher.embed("x" * n) for n in range(1, 6)))
+
+    vectors, stats = run_with_batcher(embedder, executors, scenario, max_batch_size=8, max_wait_ms=50)
+    assert [v[0] for v in vectors] == [1, 2, 3, 4, 5]
+    assert embedder.batches == [["x", "xx", "xxx", "xxxx", "xxxxx"]]
+    assert stats["batches"] == 1 and stats["items"] == 5
+
+
+def test_batches_are_split_at_max_batch_size(executors):
+    embedder = RecordingEmbedder()
+
+    async def scenario(batcher):
+        return await batcher.embed_many([f"text {i}" for i in range(7)])
+
+    matrix, stats = run_with_batcher(embedder, executors, scenario, max_batch_size=3, max_wait_ms=50)
+    assert matrix.shape == (7, 2)
+    assert all(len(batch) <= 3 for batch in embedder.batches)
+    assert sum(len(batch) for batch in embedder.batches) == 7
+    assert stats["items"] == 7
+
+
+def test_embed_many_keeps_the_order_of_its_texts(executors):
+    embedder = RecordingEmbedder()
+    texts = ["a" * n for n in (5, 1, 3, 2, 4)]
+
+    async def scenario(batcher):
+        return await batcher.embed_many(texts)
+
+    matrix, _ = run_with_batcher(embedder, executors, scenario, max_batch_size=2, max_wait_ms=1)
+    assert matrix[:, 0].tolist() == [5, 1, 3, 2, 4]
+
+
+def test_results_are_copies_not_views_of_the_batch(executors):
+    async def scenario(batcher):
+        first, second = await asyncio.gather(batcher.embed("ab"), batcher.embed("abc"))
+        first[0] = -1
+        return second
+
+    second, _ = run_with_batcher(RecordingEmbedder(), executors, scenario, max_wait_ms=20)
+    assert second[0] == 3
+
+
+def test_encode_errors_fail_every_text_of_the_batch(executors):
+    async def scenario(batcher):
+        return await asyncio.gather(batcher.embed("a"), batcher.embed("b"), return_exceptions=True)
+
+    results, stats = run_with_batcher(RecordingEmbedder(fail=True), executors, scenario, max_wait_ms=20)
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert stats["batches"] == 0
+
+
+def test_empty_input_is_rejected(executors):
+    async def scenario(batcher):
+        with pytest.raises(ValueError):
+            await batcher.embed("   ")
+        with pytest.raises(ValueError):
+            await batcher.embed_many([])
+
+    run_with_batcher(RecordingEmbedder(), executors, scenario)
+
+
+def test_embed_before_start_is_refused(executors):
+    batcher = EmbeddingBatcher(RecordingEmbedder(), executors)
+    with pytest.raises(RuntimeError):
+        asyncio.run(batcher.embed("text"))
+
+
+def test_stop_fails_texts_still_queued(executors):
+    # One embedding thread, busy with a slow batch; the second text waits in the queue
+    embedder = RecordingEmbedder(delay_s=0.2)
+
+    async def main():
+        batcher = EmbeddingBatcher(embedder, executors, max_batch_size=1, max_wait_ms=0)
+        await batcher.start()
+        first = asyncio.ensure_future(batcher.embed("slow"))
+        await asyncio.sleep(0.05)
+        second = asyncio.ensure_future(batcher.embed("queued"))
+        await asyncio.sleep(0.01)
+        await batcher.stop()
+        return await asyncio.gather(first, second, return_exceptions=True)
+
+    first, second = asyncio.run(main())
+    assert first[0] == 4
+    assert isinstance(second, RuntimeError)
+
+
+def test_invalid_settings_are_rejected(executors):
+    with pytest.raises(ValueError):
+        EmbeddingBatcher(RecordingEmbedder(), executors, max_batch_size=0)
+    with pytest.raises(ValueError):
+        EmbeddingBatcher(RecordingEmbedder(), executors, max_wait_ms=-1)
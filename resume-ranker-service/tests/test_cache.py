@@ -0,0 +1,94 @@
+import hashlib
+import io
+
+import numpy as np
+import pytest
+
+from logic.cache import ContentCache, content_digest
+
+
+def test_file_digest_matches_bytes_digest_and_rewinds():
+    data = b"%PDF" + bytes(range(256)) * 1000
+    upload = io.BytesIO(data)
+    upload.seek(100)
+    assert content_digest(upload) == content_digest(data) == hashlib.sha256(data).hexdigest()
+    assert upload.tell() == 0
+
+
+def test_text_round_trip_and_counters():
+    cache = ContentCache(max_bytes=1024)
+    assert cache.get_text("d1") is None
+    cache.put_text("d1", "resume text")
+    assert cache.get_text("d1") == "resume text"
+    stats = cache.stats()
+    assert stats["text"] == {"hits": 1, "disk_hits": 0, "misses": 1}
+    assert stats["used_bytes"] == len("resume text")
+
+
+def test_embeddings_are_stored_read_only_per_model():
+    cache = ContentCache(max_bytes=1024)
+    source = np.array([1.0, 2.0], dtype=np.float64)
+    stored = cache.put_embedding("d1", "model-a", source)
+    source[0] = 9.0
+    assert stored.dtype == np.float32 and not stored.flags.writeable
+    assert cache.get_embedding("d1", "model-a").tolist() == [1.0, 2.0]
+    assert cache.get_embedding("d1", "model-b") is None
+
+
+def test_least_recently_used_entries_are_evicted_first():
+    cache = ContentCache(max_bytes=10)
+    cache.put_text("a", "aaaa")
+    cache.put_text("b", "bbbb")
+    cache.get_text("a")
+    cache.put_text("c", "cccc")
+    assert cache.get_text("b") is None
+    assert cache.get_text("a") == "aaaa"
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["used_bytes"] <= 10
+
+
+def test_entries_larger_than_the_budget_are_not_kept_in_memory():
+    cache = ContentCache(max_bytes=4)
+    cache.put_text("big", "too large")
+    assert cache.stats()["entries"] == 0
+
+
+def test_disk_store_survives_a_new_cache(tmp_path):
+    first = ContentCache(max_bytes=1024, disk_dir=str(tmp_path))
+    first.put_text("d1", "persisted")
+    first.put_embedding("d1", "org/model name", np.array([0.5, 0.25]))
+
+    second = ContentCache(max_bytes=1024, disk_dir=str(tmp_path))
+    assert second.get_text("d1") == "persisted"
+    assert second.get_embedding("d1", "org/model name").tolist() == [0.5, 0.25]
+    assert second.stats()["text"]["disk_hits"] == 1
+    # Served from memory once loaded
+    second.get_text("d1")
+    assert second.stats()["text"]["hits"] == 1
+
+
+def test_text_is_kept_per_extraction_setting():
+    cache = ContentCache(max_bytes=1024)
+    cache.put_text("d1", "first page", "p1")
+    assert cache.get_text("d1", "p1") == "first page"
+    assert cache.get_text("d1", "p50") is None
+
+
+def test_memory_only_lookups_leave_the_disk_alone(tmp_path):
+    ContentCache(max_bytes=1024, disk_dir=str(tmp_path)).put_text("d1", "persisted")
+    cache = ContentCache(max_bytes=1024, disk_dir=str(tmp_path))
+    assert cache.get_text("d1", memory_only=True) is None
+    # The disk lookup that follows decides between a disk hit and a miss
+    assert cache.stats()["text"] == {"hits": 0, "disk_hits": 0, "misses": 0}
+    assert cache.get_text("d1") == "persisted"
+    assert cache.get_text("d1", memory_only=True) == "persisted"
+    assert cache.stats()["text"] == {"hits": 1, "disk_hits": 1, "misses": 0}
+
+    memory = ContentCache(max_bytes=1024)
+    assert memory.get_text("d1", memory_only=True) is None
+    assert memory.stats()["text"]["misses"] == 1
+
+
+def test_negative_budget_is_rejected():
+    with pytest.raises(ValueError):
+        ContentCache(max_bytes=-1)
@@ -0,0 +1,81 @@
+from typing import List
+
+import numpy as np
+import pytest
+
+from logic.embedder import Embedder
+from logic.embedding_backends import EmbeddingBackend
+
+
+class WordBackend(EmbeddingBackend):
+    """Reads 10 whitespace tokens per input and embeds a text as [word count, 1]."""
+
+    name = "words"
+    max_seq_length = 12
+    dimension = 2
+
+    def __init__(self):
+        self.calls: List[List[str]] = []
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        self.calls.append(list(texts))
+        vectors = np.array([[len(text.split()), 1.0] for text in texts], dtype=np.float32)
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def make_embedder() -> Embedder:
+    embedder = Embedder(backend="words")
+    embedder._backend = WordBackend()
+    return embedder
+
+
+def words(count: int, start: int = 0) -> str:
+    return " ".join(f"w{i}" for i in range(start, start + count))
+
+
+def test_max_tokens_leaves_room_for_special_tokens():
+    assert make_embedder().max_tokens == 10
+
+
+def test_short_text_is_one_chunk():
+    assert make_embedder().chunk_text("  " + words(10) + "\n") == [words(10)]
+
+
+def test_windows_overlap_and_the_last_one_ends_the_text():
+    chunks = make_embedder().chunk_text(words(25), overlap_tokens=2)
+    assert chunks == [words(10, 0), words(10, 8), words(10, 15)]
+
+
+def test_overlap_is_capped_at_half_a_window():
+    chunks = make_embedder().chunk_text(words(20), window_tokens=4, overlap_tokens=10, max_chunks=100)
+    assert chunks[:2] == [words(4, 0), words(4, 2)]
+    assert chunks[-1] == words(4, 16)
+
+
+def test_window_cannot_exceed_the_model_limit():
+    chunks = make_embedder().chunk_text(words(30), window_tokens=50, overlap_tokens=0)
+    assert chunks == [words(10, 0), words(10, 10), words(10, 20)]
+
+
+def test_too_many_windows_are_spread_over_the_document():
+    chunks = make_embedder().chunk_text(words(100), overlap_tokens=0, max_chunks=3)
+    assert chunks == [words(10, 0), words(10, 45), words(10, 90)]
+
+
+@pytest.mark.parametrize("kwargs", [{"overlap_tokens": -1}, {"max_chunks": 0}])
+def test_invalid_chunk_settings_are_rejected(kwargs):
+    with pytest.raises(ValueError):
+        make_embedder().chunk_text(words(5), **kwargs)
+
+
+def test_empty_text_is_rejected():
+    with pytest.raises(ValueError):
+        make_embedder().chunk_text("   ")
+
+
+def test_chunks_of_several_documents_share_one_encode_call():
+    embedder = make_embedder()
+    matrices = embedder.embed_chunks_batch([words(5), words(25), words(3)], overlap_tokens=0)
+    assert [matrix.shape for matrix in matrices] == [(1, 2), (3, 2), (1, 2)]
+    assert len(embedder.backend.calls) == 1
+    assert embedder.embed_chunks(words(5)).shape == (1, 2)
@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+
+from logic.embedding_backends import BACKENDS, EmbeddingBackend, _normalize_rows, load_backend, parity_report
+
+
+def test_unknown_backends_are_rejected():
+    with pytest.raises(ValueError, match="Unknown embedding backend"):
+        load_backend("tensorflow", "all-MiniLM-L6-v2")
+
+
+def test_onnx_needs_a_model_directory():
+    with pytest.raises(ValueError, match="model directory"):
+        load_backend("onnx", "all-MiniLM-L6-v2")
+
+
+def test_default_token_spans_are_whitespace_words():
+    text = "Senior  Python\ndeveloper"
+    spans = EmbeddingBackend().token_spans(text)
+    assert [text[start:end] for start, end in spans] == ["Senior", "Python", "developer"]
+
+
+def test_rows_are_normalized_and_zero_rows_kept():
+    rows = _normalize_rows(np.array([[3.0, 4.0], [0.0, 0.0]]))
+    assert rows.dtype == np.float32
+    assert np.allclose(rows, [[0.6, 0.8], [0.0, 0.0]])
+
+
+def test_backends_agree_with_the_torch_reference(tmp_path):
+    # Downloads the model on first use; skipped where the engines are not installed
+    pytest.importorskip("sentence_transformers")
+    pytest.importorskip("onnxruntime")
+    report = parity_report("all-MiniLM-L6-v2", str(tmp_path / "model"), backends=BACKENDS)
+    assert report["torch"]["max_score_drift"] == pytest.approx(0.0, abs=1e-5)
+    for name in ("onnx", "int8"):
+        assert report[name]["min_vector_cosine"] > 0.95
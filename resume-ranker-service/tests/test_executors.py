@@ -0,0 +1,93 @@
+import asyncio
+import threading
+
+import pytest
+
+from logic.executors import Executors
+
+
+def _thread_name() -> str:
+    return threading.current_thread().name
+
+
+def test_each_kind_of_work_runs_on_its_own_pool(executors):
+    async def names():
+        return (
+            await executors.run_cpu(_thread_name),
+            await executors.run_embed(_thread_name),
+            await executors.run_io(_thread_name),
+            await executors.run_storage(_thread_name),
+        )
+
+    cpu, embed, io, storage = asyncio.run(names())
+    assert cpu.startswith("ranker-cpu")
+    assert embed.startswith("ranker-embed")
+    assert io.startswith("ranker-llm")
+    assert storage.startswith("ranker-storage")
+
+
+def test_keyword_arguments_are_passed_through(executors):
+    result = asyncio.run(executors.run_storage(lambda a, b=0: a + b, 1, b=2))
+    assert result == 3
+
+
+def test_calls_before_start_are_refused():
+    pools = Executors()
+    with pytest.raises(RuntimeError):
+        asyncio.run(pools.run_cpu(_thread_name))
+
+
+def test_start_is_idempotent_and_shutdown_resets():
+    pools = Executors(cpu_workers=1)
+    pools.start()
+    cpu = pools._cpu
+    pools.start()
+    assert pools._cpu is cpu
+    pools.shutdown()
+    with pytest.raises(RuntimeError):
+        asyncio.run(pools.run_storage(_thread_name))
+
+
+def test_stream_io_yields_items_in_order(executors):
+    async def collect():
+        return [item async for item in executors.stream_io(iter, [1, 2, 3])]
+
+    assert asyncio.run(collect()) == [1, 2, 3]
+
+
+def test_stream_io_raises_producer_errors_after_earlier_items(executors):
+    def produce():
+        yield "first"
+        raise ValueError("provider failed")
+
+    async def collect(received):
+        async for item in executors.stream_io(produce):
+            received.append(item)
+
+    received = []
+    with pytest.raises(ValueError, match="provider failed"):
+        asyncio.run(collect(received))
+    assert received == ["first"]
+
+
+def test_stream_io_stops_the_producer_when_the_consumer_leaves(executors):
+    produced = []
+    released = threading.Event()
+
+    def produce():
+        for i in range(100):
+            produced.append(i)
+            yield i
+            released.wait(1.0)
+
+    async def take_one():
+        stream = executors.stream_io(produce)
+        async for item in stream:
+            break
+        await stream.aclose()
+        released.set()
+        await asyncio.sleep(0.1)
+        return item
+
+    assert asyncio.run(take_one()) == 0
+    assert len(produced) <= 2
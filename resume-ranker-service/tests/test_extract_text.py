@@ -0,0 +1,132 @@
+import asyncio
+import glob
+import io
+import os
+import tempfile
+import threading
+
+import pytest
+
+from logic import extract_text
+from logic.executors import Executors
+from logic.extract_text import (
+    ExtractionLimitError,
+    count_pages,
+    extract_pdf,
+    extract_pdf_parallel,
+    iter_page_text,
+    pdf_size
+)
+
+
+def page_texts(count):
+    return [f"page {i} text" for i in range(count)]
+
+
+def spooled_files():
+    return set(glob.glob(os.path.join(tempfile.gettempdir(), "ranker-*.pdf")))
+
+
+def test_bytes_file_objects_and_paths_extract_alike(make_pdf, tmp_path):
+    pdf = make_pdf(page_texts(3))
+    path = tmp_path / "doc.pdf"
+    path.write_bytes(pdf)
+    results = [extract_pdf(source) for source in (pdf, io.BytesIO(pdf), str(path))]
+    assert {result.text for result in results} == {"page 0 text\npage 1 text\npage 2 text"}
+    assert all(result.pages_extracted == 3 and not result.truncated for result in results)
+    assert pdf_size(pdf) == pdf_size(io.BytesIO(pdf)) == pdf_size(str(path)) == len(pdf)
+
+
+def test_max_pages_truncates(make_pdf):
+    result = extract_pdf(make_pdf(page_texts(5)), max_pages=2)
+    assert (result.pages_total, result.pages_extracted) == (5, 2)
+    assert result.truncation_reason == "max_pages"
+    assert len(result.page_timings_ms) == 2
+
+
+def test_oversized_documents_are_rejected(make_pdf):
+    pdf = make_pdf(page_texts(1))
+    with pytest.raises(ExtractionLimitError):
+        extract_pdf(pdf, max_bytes=len(pdf) - 1)
+    with pytest.raises(ExtractionLimitError):
+        extract_pdf(io.BytesIO(pdf), max_bytes=len(pdf) - 1)
+
+
+def test_spent_time_budget_stops_before_the_next_page(make_pdf):
+    result = extract_pdf(make_pdf(page_texts(4)), time_budget_s=1e-9)
+    assert result.pages_extracted == 0
+    assert result.truncation_reason == "time_budget"
+
+
+def test_page_iterator_honours_range_and_deadline(make_pdf):
+    pdf = make_pdf(page_texts(6))
+    assert [index for index, _, _ in iter_page_text(pdf, 2, 4)] == [2, 3]
+    assert list(iter_page_text(pdf, deadline=0.0)) == []
+    assert count_pages(pdf) == 6
+
+
+def test_unreadable_pdf_is_a_value_error():
+    with pytest.raises(ValueError):
+        extract_pdf(b"not a pdf")
+
+
+def test_thread_pool_extracts_sequentially(make_pdf, executors):
+    result = asyncio.run(extract_pdf_parallel(make_pdf(page_texts(3)), executors, max_pages=2))
+    assert result.text == "page 0 text\npage 1 text"
+    assert result.truncation_reason == "max_pages"
+
+
+def test_thread_pool_returns_finished_pages_when_a_page_hangs(make_pdf, executors, monkeypatch):
+    release = threading.Event()
+    iter_pages = extract_text._iter_pages
+
+    def hanging_pages(reader, start, stop, deadline):
+        for page in iter_pages(reader, start, stop, deadline):
+            if page[0] == 1:
+                # A page the parser gets stuck in
+                release.wait(5.0)
+            yield page
+
+    monkeypatch.setattr(extract_text, "_iter_pages", hanging_pages)
+    try:
+        result = asyncio.run(extract_pdf_parallel(make_pdf(page_texts(3)), executors, time_budget_s=0.2))
+    finally:
+        release.set()
+    assert result.text == "page 0 text"
+    assert result.pages_total == 3 and result.truncation_reason == "time_budget"
+
+
+@pytest.fixture(scope="module")
+def process_executors():
+    pools = Executors(cpu_executor="process", cpu_workers=2, storage_workers=1)
+    pools.start()
+    yield pools
+    pools.shutdown()
+
+
+def test_process_pool_splits_pages_and_keeps_their_order(make_pdf, process_executors):
+    before = spooled_files()
+    pdf = make_pdf(page_texts(10))
+    result = asyncio.run(extract_pdf_parallel(
+        io.BytesIO(pdf), process_executors, parallel_min_pages=4, pages_per_task=3
+    ))
+    assert result.text.split("\n") == page_texts(10)
+    assert result.pages_extracted == 10 and not result.truncated
+    assert spooled_files() == before
+
+
+def test_process_pool_enforces_the_budget_on_pending_ranges(make_pdf, process_executors):
+    before = spooled_files()
+    result = asyncio.run(extract_pdf_parallel(
+        make_pdf(page_texts(10)), process_executors, time_budget_s=1e-9, parallel_min_pages=4, pages_per_task=3
+    ))
+    assert result.pages_total == 10
+    assert result.pages_extracted < 10
+    assert result.truncation_reason == "time_budget"
+    assert spooled_files() == before
+
+
+def test_process_pool_checks_the_size_before_spooling(make_pdf, process_executors):
+    pdf = make_pdf(page_texts(1))
+    with pytest.raises(ExtractionLimitError):
+        asyncio.run(extract_pdf_parallel(pdf, process_executors, max_bytes=len(pdf) - 1))
@@ -0,0 +1,167 @@
+import time
+from collections import Counter
+
+import numpy as np
+import pytest
+
+from logic.jd_store import JDFeatures, JobDescriptionStore
+from logic.lexical_index import AnalyzedText
+from logic.prompt_builder import JDPassages
+
+
+def make_features(value: float = 1.0, derivation: str = "model-a") -> JDFeatures:
+    return JDFeatures(
+        derivation=derivation,
+        embedding=np.full(3, value, dtype=np.float32),
+        chunks=np.full((2, 3), value, dtype=np.float32),
+        lexical=AnalyzedText(terms=Counter({"python": 2, "aws": 1}), length=3, skills=["python", "aws"]),
+        passages=JDPassages(
+            passages=["Python role", "AWS experience"],
+            vectors=np.full((2, 3), value, dtype=np.float32),
+            passage_tokens=120
+        )
+    )
+
+
+def register(store, jd_id, digest, value=1.0, derivation="model-a"):
+    return store.register(jd_id, f"{digest}.pdf", digest, f"text {digest}", make_features(value, derivation))
+
+
+def test_register_and_get_round_trip_features(tmp_path):
+    store = JobDescriptionStore(str(tmp_path / "jds.db"), memory_entries=0)
+    jd, created = register(store, None, "d1", value=0.5)
+    assert created and jd.version == 1 and len(jd.id) == 32
+
+    loaded = JobDescriptionStore(str(tmp_path / "jds.db")).get(jd.id)
+    assert loaded.text == "text d1" and loaded.filename == "d1.pdf"
+    features = loaded.features
+    assert np.array_equal(features.embedding, np.full(3, 0.5, dtype=np.float32))
+    assert features.chunks.shape == (2, 3)
+    assert features.passages.passages == ["Python role", "AWS experience"]
+    assert features.passages.vectors.shape == (2, 3) and features.passages.passage_tokens == 120
+    assert features.lexical.terms == Counter({"python": 2, "aws": 1})
+    assert features.lexical.skills == ["python", "aws"]
+    # Decoded arrays are shared through the memory cache, so they are read-only
+    assert not features.embedding.flags.writeable
+
+
+def test_new_content_adds_versions():
+    store = JobDescriptionStore()
+    register(store, "jd", "d1")
+    jd, created = register(store, "jd", "d2")
+    assert created and jd.version == 2
+    assert store.get("jd").digest == "d2"
+    assert store.get("jd", version=1).digest == "d1"
+    assert [v.version for v in store.versions("jd")] == [2, 1]
+    assert all(v.features is None for v in store.versions("jd"))
+
+
+def test_identical_content_is_deduplicated():
+    store = JobDescriptionStore()
+    register(store, "jd", "d1")
+    jd, created = register(store, "jd", "d1")
+    assert not created and jd.version == 1
+    assert store.stats()["versions"] == 1
+    assert store.stats()["unchanged"] == 1
+
+
+def test_same_content_with_new_derivation_refreshes_features():
+    store = JobDescriptionStore()
+    register(store, "jd", "d1", value=1.0)
+    assert store.get("jd").features.embedding[0] == 1.0
+
+    jd, created = register(store, "jd", "d1", value=2.0, derivation="model-b")
+    assert not created
+    assert jd.features.derivation == "model-b"
+    assert store.get("jd").features.embedding[0] == 2.0
+
+
+def test_update_features_replaces_the_memory_entry():
+    store = JobDescriptionStore()
+    register(store, "jd", "d1", value=1.0)
+    store.get("jd")
+    store.update_features("jd", 1, make_features(3.0, "model-b"))
+    assert store.get("jd").features.embedding[0] == 3.0
+    assert store.stats()["rederived"] == 1
+
+
+def test_only_the_newest_versions_are_kept():
+    store = JobDescriptionStore(max_versions=2)
+    for digest in ("d1", "d2", "d3"):
+        register(store, "jd", digest)
+    assert [v.version for v in store.versions("jd")] == [3, 2]
+    assert store.get("jd", version=1) is None
+
+
+def test_delete_one_version_or_all():
+    store = JobDescriptionStore()
+    for digest in ("d1", "d2", "d3"):
+        register(store, "jd", digest)
+    assert store.delete("jd", version=3) == 1
+    assert store.get("jd").version == 2
+    assert store.delete("jd") == 2
+    assert store.get("jd") is None
+    assert store.delete("jd") == 0
+
+
+def test_least_recently_used_ids_are_evicted():
+    store = JobDescriptionStore(max_entries=2)
+    register(store, "a", "d1")
+    register(store, "b", "d2")
+    store.get("a")
+    register(store, "c", "d3")
+    assert store.get("b") is None
+    assert store.get("a") is not None and store.get("c") is not None
+    assert store.stats()["evictions"] == 1
+
+
+def test_unused_ids_expire():
+    store = JobDescriptionStore(ttl_s=0.05, purge_interval_s=0.0)
+    register(store, "old", "d1")
+    time.sleep(0.1)
+    register(store, "new", "d2")
+    assert store.get("old") is None
+    assert store.get("new") is not None
+    assert store.stats()["expirations"] == 1
+
+
+def test_memory_entries_serve_repeated_gets():
+    store = JobDescriptionStore(memory_entries=1)
+    register(store, "a", "d1")
+    register(store, "b", "d2")
+    store.get("b")
+    store.get("b")
+    assert store.stats()["memory_hits"] == 2
+    assert store.stats()["memory_entries"] == 1
+
+    store.get("a")
+    assert store.stats()["memory_hits"] == 2
+
+
+def test_list_returns_the_newest_version_per_id():
+    store = JobDescriptionStore()
+    register(store, "a", "d1")
+    register(store, "a", "d2")
+    register(store, "b", "d3")
+    listed = store.list()
+    assert [(jd.id, jd.version) for jd in listed] == [("b", 1), ("a", 2)]
+    assert [jd.id for jd in store.list(limit=1)] == ["b"]
+
+
+def test_reopen_after_close(tmp_path):
+    store = JobDescriptionStore(str(tmp_path / "jds.db"))
+    register(store, "jd", "d1")
+    store.close()
+    store.reopen()
+    assert store.get("jd").version == 1
+
+
+@pytest.mark.parametrize("kwargs", [
+    {"max_entries": 0},
+    {"max_versions": 0},
+    {"ttl_s": 0},
+    {"memory_entries": -1},
+])
+def test_invalid_settings_are_rejected(kwargs):
+    with pytest.raises(ValueError):
+        JobDescriptionStore(**kwargs)
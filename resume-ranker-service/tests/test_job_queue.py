@@ -0,0 +1,256 @@
+import asyncio
+import io
+import threading
+import time
+
+import pytest
+
+from logic.job_queue import CANCELLED, FAILED, QUEUED, RUNNING, SUCCEEDED, JobFailed, JobFile, JobQueue
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "jobs.db")
+
+
+def make_queue(db_path, executors, **kwargs):
+    options = {"workers": 1, "retry_backoff_s": 0.0, "poll_interval_s": 0.05, **kwargs}
+    return JobQueue(db_path, executors, **options)
+
+
+async def wait_for_status(queue, job_id, statuses=(SUCCEEDED, FAILED, CANCELLED), timeout_s=5.0):
+    deadline = time.monotonic() + timeout_s
+    while True:
+        job = await queue.executors.run_storage(queue.get, job_id)
+        if job.status in statuses:
+            return job
+        if time.monotonic() > deadline:
+            raise AssertionError(f"Job stayed {job.status}")
+        await asyncio.sleep(0.02)
+
+
+def run_jobs(queue, handler, scenario):
+    async def main():
+        queue.register("test", handler)
+        await queue.start()
+        try:
+            return await scenario()
+        finally:
+            await queue.stop()
+
+    return asyncio.run(main())
+
+
+def test_job_runs_with_its_files_and_progress(db_path, executors):
+    queue = make_queue(db_path, executors)
+
+    async def handler(job, files, progress):
+        contents = [await queue.read_file(f) for f in files]
+        progress(1, 2)
+        progress(2, 2)
+        return {"param": job.params["n"], "files": [(f.role, f.filename, len(c)) for f, c in zip(files, contents)]}
+
+    async def scenario():
+        job = await executors.run_storage(queue.submit, "test", {"n": 7}, [
+            JobFile("job_description", "jd.pdf", b"jd"),
+            JobFile("resume", "big.pdf", io.BytesIO(b"x" * 200_000)),
+        ])
+        return await wait_for_status(queue, job.id)
+
+    job = run_jobs(queue, handler, scenario)
+    assert job.status == SUCCEEDED
+    assert job.result == {"param": 7, "files": [["job_description", "jd.pdf", 2], ["resume", "big.pdf", 200_000]]}
+    assert (job.progress_done, job.progress_total, job.attempts) == (2, 2, 1)
+    # Inputs are dropped once the job is final
+    assert queue._list_files(job.id) == []
+    assert queue.stats()["succeeded"] == 1
+
+
+def test_failed_attempts_are_retried(db_path, executors):
+    queue = make_queue(db_path, executors, max_attempts=3)
+    attempts = []
+
+    async def handler(job, files, progress):
+        attempts.append(job.attempts)
+        if job.attempts < 2:
+            raise RuntimeError("transient")
+        return {"ok": True}
+
+    async def scenario():
+        job = await executors.run_storage(queue.submit, "test", {}, [])
+        return await wait_for_status(queue, job.id)
+
+    job = run_jobs(queue, handler, scenario)
+    assert job.status == SUCCEEDED and job.attempts == 2
+    assert attempts == [1, 2]
+    assert queue.stats()["retried"] == 1
+
+
+def test_jobs_fail_after_the_last_attempt(db_path, executors):
+    queue = make_queue(db_path, executors, max_attempts=2)
+
+    async def handler(job, files, progress):
+        raise RuntimeError(f"attempt {job.attempts}")
+
+    async def scenario():
+        job = await executors.run_storage(queue.submit, "test", {}, [])
+        return await wait_for_status(queue, job.id)
+
+    job = run_jobs(queue, handler, scenario)
+    assert (job.status, job.attempts, job.error) == (FAILED, 2, "attempt 2")
+
+
+def test_job_failed_is_not_retried(db_path, executors):
+    queue = make_queue(db_path, executors, max_attempts=3)
+
+    async def handler(job, files, progress):
+        raise JobFailed("bad input")
+
+    async def scenario():
+        job = await executors.run_storage(queue.submit, "test", {}, [])
+        return await wait_for_status(queue, job.id)
+
+    job = run_jobs(queue, handler, scenario)
+    assert (job.status, job.attempts, job.error) == (FAILED, 1, "bad input")
+
+
+def test_cancelling_a_queued_job(db_path, executors):
+    queue = make_queue(db_path, executors)
+    queue.register("test", None)
+    job = queue.submit("test", {}, [JobFile("resume", "r.pdf", b"content")])
+
+    cancelled = queue.cancel(job.id)
+    assert cancelled.status == CANCELLED
+    assert queue._list_files(job.id) == []
+    assert queue.cancel("unknown") is None
+
+
+def test_cancelling_a_running_job_stops_its_handler(db_path, executors):
+    queue = make_queue(db_path, executors)
+    started = asyncio.Event()
+
+    async def handler(job, files, progress):
+        started.set()
+        await asyncio.sleep(30)
+        return {}
+
+    async def scenario():
+        job = await executors.run_storage(queue.submit, "test", {}, [])
+        await asyncio.wait_for(started.wait(), 5)
+        flagged = await executors.run_storage(queue.cancel, job.id)
+        assert flagged.status == RUNNING and flagged.cancel_requested
+        return await wait_for_status(queue, job.id)
+
+    job = run_jobs(queue, handler, scenario)
+    assert job.status == CANCELLED
+    assert queue.stats()["cancelled"] == 1
+
+
+def test_running_jobs_are_only_touched_on_the_loop(db_path, executors):
+    queue = make_queue(db_path, executors)
+    started = asyncio.Event()
+    loop_threads = set()
+
+    class LoopOnly(dict):
+        def get(self, *args):
+            loop_threads.add(threading.get_ident())
+            return super().get(*args)
+
+    async def handler(job, files, progress):
+        started.set()
+        await asyncio.sleep(30)
+        return {}
+
+    async def scenario():
+        queue._running = LoopOnly()
+        job = await executors.run_storage(queue.submit, "test", {}, [])
+        await asyncio.wait_for(started.wait(), 5)
+        await executors.run_storage(queue.cancel, job.id)
+        job = await wait_for_status(queue, job.id)
+        assert loop_threads == {threading.get_ident()}
+        return job
+
+    assert run_jobs(queue, handler, scenario).status == CANCELLED
+
+
+def test_an_expired_lease_is_claimed_by_another_worker(db_path, executors):
+    dead = make_queue(db_path, executors, lease_s=0.05)
+    dead.register("test", None)
+    job = dead.submit("test", {}, [])
+    assert dead._claim().id == job.id
+
+    alive = make_queue(db_path, executors, lease_s=60.0)
+    assert alive._claim() is None
+    time.sleep(0.1)
+    reclaimed = alive._claim()
+    assert (reclaimed.id, reclaimed.attempts) == (job.id, 2)
+
+    # The first worker lost its lease: it can neither renew nor overwrite the outcome
+    assert not dead._renew_lease(job.id)
+    assert not dead._finish(job.id, SUCCEEDED, {"stale": True}, None)
+    assert not dead._requeue(job.id, delay_s=0.0)
+    assert alive._renew_lease(job.id)
+    assert alive._finish(job.id, SUCCEEDED, {"fresh": True}, None)
+    assert alive.get(job.id).result == {"fresh": True}
+
+
+def test_a_lease_lost_on_the_last_attempt_fails_the_job(db_path, executors):
+    dead = make_queue(db_path, executors, lease_s=0.05, max_attempts=1)
+    dead.register("test", None)
+    job = dead.submit("test", {}, [])
+    dead._claim()
+    time.sleep(0.1)
+
+    other = make_queue(db_path, executors)
+    assert other._claim() is None
+    failed = other.get(job.id)
+    assert (failed.status, failed.error) == (FAILED, "Worker lost while running the job")
+
+
+def test_stopping_requeues_running_jobs_without_spending_an_attempt(db_path, executors):
+    queue = make_queue(db_path, executors)
+    started = asyncio.Event()
+
+    async def handler(job, files, progress):
+        started.set()
+        await asyncio.sleep(30)
+        return {}
+
+    async def main():
+        queue.register("test", handler)
+        await queue.start()
+        job = await executors.run_storage(queue.submit, "test", {}, [])
+        await asyncio.wait_for(started.wait(), 5)
+        await queue.stop()
+        return job
+
+    job = queue.get(asyncio.run(main()).id)
+    assert (job.status, job.attempts) == (QUEUED, 0)
+
+
+def test_unknown_kinds_are_rejected(db_path, executors):
+    queue = make_queue(db_path, executors)
+    with pytest.raises(ValueError):
+        queue.submit("missing", {}, [])
+
+
+def test_running_jobs_renew_their_lease(db_path, executors):
+    queue = make_queue(db_path, executors, lease_s=0.15)
+    other = make_queue(db_path, executors)
+    started = asyncio.Event()
+
+    async def handler(job, files, progress):
+        started.set()
+        await asyncio.sleep(0.5)
+        return {"done": True}
+
+    async def scenario():
+        job = await executors.run_storage(queue.submit, "test", {}, [])
+        await asyncio.wait_for(started.wait(), 5)
+        for _ in range(4):
+            await asyncio.sleep(0.1)
+            assert await executors.run_storage(other._claim) is None
+        return await wait_for_status(queue, job.id)
+
+    job = run_jobs(queue, handler, scenario)
+    assert (job.status, job.attempts) == (SUCCEEDED, 1)
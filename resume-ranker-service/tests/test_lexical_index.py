@@ -0,0 +1,195 @@
+import os
+
+import numpy as np
+import pytest
+
+from logic.lexical_index import SKILL_PREFIX, LexicalIndex
+
+DOCUMENTS = {
+    "py": "Python developer building Django services on AWS with Docker",
+    "java": "Java engineer working on Spring Boot microservices and Kafka",
+    "data": "Data engineer with Python, Spark and Airflow pipelines on AWS",
+    "sales": "Account executive managing enterprise sales and Salesforce",
+}
+
+QUERIES = [
+    "Python engineer with AWS and Docker experience",
+    "Kafka and Spring Boot microservices",
+    "Spark pipelines",
+    "enterprise sales",
+]
+
+
+def build(directory=None, **kwargs) -> LexicalIndex:
+    index = LexicalIndex(directory, **kwargs)
+    index.add(list(DOCUMENTS.values()), ids=list(DOCUMENTS))
+    return index
+
+
+def results(index: LexicalIndex, query: str, top_k: int = 4):
+    return [(match.id, match.score) for match in index.search(query, top_k=top_k)]
+
+
+def test_search_ranks_matching_documents_first():
+    index = build()
+    matches = index.search("Kafka and Spring Boot microservices", top_k=2)
+    assert matches[0].id == "java"
+    assert all(0.0 <= match.score <= 1.0 for match in matches)
+    assert matches[0].matched_skills == ["kafka", "spring boot", "microservices"]
+    assert matches[0].skill_coverage == pytest.approx(1.0)
+    assert matches[1].missing_skills == ["kafka", "spring boot", "microservices"]
+
+
+def test_search_without_skills_uses_bm25_only():
+    index = build()
+    match = index.search("enterprise account executive", top_k=1)[0]
+    assert match.id == "sales"
+    assert match.skill_coverage is None
+    assert match.score == match.bm25
+
+
+def test_score_skips_unknown_ids():
+    index = build()
+    scores = index.score("Python on AWS", ["py", "data", "missing"])
+    assert set(scores) == {"py", "data"}
+    assert scores["py"].score > 0 and scores["data"].score > 0
+
+
+def test_score_text_matches_indexed_scoring():
+    index = build()
+    indexed = index.score("Spark pipelines on AWS", ["data"])["data"]
+    external = index.score_text("Spark pipelines on AWS", DOCUMENTS["data"] + " extra")
+    assert external.matched_skills == indexed.matched_skills
+    assert external.score == pytest.approx(indexed.score, abs=0.05)
+
+
+def test_score_text_on_an_empty_index():
+    match = LexicalIndex().score_text("python docker", "python and docker")
+    assert match.bm25 > 0
+    assert match.skill_coverage == pytest.approx(1.0)
+
+
+def test_adding_an_existing_id_replaces_it():
+    index = build()
+    index.add(["Salesforce administrator"], ids=["py"])
+    assert len(index) == 4
+    assert index.score("Django", ["py"])["py"].bm25 == 0
+    assert index.stats()["deleted"] == 1
+
+
+def test_deleted_documents_are_tombstoned_until_compaction():
+    index = build()
+    assert index.delete(["java", "missing", "java"]) == 1
+    assert len(index) == 3
+    assert "java" not in [match.id for match in index.search("Kafka microservices", top_k=4)]
+    stats = index.stats()
+    assert stats["deleted"] == 1 and stats["live"] == 3
+
+    before = results(index, "Python on AWS")
+    assert index.compact() == 1
+    stats = index.stats()
+    assert stats["deleted"] == 0 and stats["live"] == 3
+    assert SKILL_PREFIX + "kafka" not in index._postings
+    assert [item_id for item_id, _ in results(index, "Python on AWS")] == [item_id for item_id, _ in before]
+
+
+def test_invalid_arguments_are_rejected():
+    index = LexicalIndex()
+    with pytest.raises(ValueError):
+        index.add(["a", "b"], ids=["x"])
+    with pytest.raises(ValueError):
+        index.add(["a", "b"], ids=["x", "x"])
+    with pytest.raises(ValueError):
+        index.search("a", top_k=0)
+    with pytest.raises(ValueError):
+        LexicalIndex(k1=0)
+
+
+def test_log_round_trip(tmp_path):
+    index = build(str(tmp_path))
+    index.delete(["sales"])
+    reopened = LexicalIndex(str(tmp_path))
+    assert len(reopened) == 3
+    for query in QUERIES:
+        assert results(reopened, query) == results(index, query)
+
+
+def test_snapshot_round_trip(tmp_path):
+    index = build(str(tmp_path))
+    index.delete(["java"])
+    index.add(["Python and Kafka consultant"], ids=["consultant"])
+    assert index.compact() == 1
+    assert index.stats()["generation"] == 1
+    # Document frequencies no longer count the deleted document
+    expected = {query: results(index, query) for query in QUERIES}
+
+    reopened = LexicalIndex(str(tmp_path))
+    assert reopened.stats() == index.stats()
+    assert {term: (list(rows), list(tfs)) for term, (rows, tfs) in reopened._postings.items()} == \
+        {term: (list(rows), list(tfs)) for term, (rows, tfs) in index._postings.items()}
+    for query in QUERIES:
+        assert results(reopened, query) == expected[query]
+    assert sorted(os.listdir(tmp_path)) == ["lexical-1.jsonl", "lexical-1.npz", "lexical.json", "lexical.lock"]
+
+
+def test_snapshot_postings_are_gap_coded(tmp_path):
+    index = LexicalIndex(str(tmp_path))
+    texts = {f"d{i}": "common" + (" rare" if i in (1, 4, 9) else "") for i in range(10)}
+    index.add(list(texts.values()), ids=list(texts))
+    index.compact()
+
+    with np.load(tmp_path / "lexical-1.npz") as snapshot:
+        terms = [str(term) for term in snapshot["terms"]]
+        offsets, gaps = snapshot["offsets"], snapshot["gaps"]
+    rare = terms.index("rare")
+    common = terms.index("common")
+    assert list(gaps[offsets[rare]:offsets[rare + 1]]) == [1, 3, 5]
+    assert list(gaps[offsets[common]:offsets[common + 1]]) == [0] + [1] * 9
+
+    reopened = LexicalIndex(str(tmp_path))
+    assert list(reopened._postings["rare"][0]) == [1, 4, 9]
+    assert list(reopened._postings["common"][0]) == list(range(10))
+
+
+def test_checkpoint_after_enough_log_records(tmp_path):
+    index = LexicalIndex(str(tmp_path), checkpoint_records=3)
+    index.add(["python", "java"], ids=["a", "b"])
+    assert index.stats()["generation"] == 0
+    index.add(["rust"], ids=["c"])
+    assert index.stats()["generation"] == 1
+    assert index.stats()["log_records"] == 0
+    assert len(LexicalIndex(str(tmp_path))) == 3
+
+
+def test_other_instances_see_changes(tmp_path):
+    writer = build(str(tmp_path))
+    reader = LexicalIndex(str(tmp_path))
+    writer.add(["Rust systems programmer"], ids=["rust"])
+    assert reader.search("Rust", top_k=1)[0].id == "rust"
+
+    writer.compact()
+    writer.delete(["rust"])
+    assert len(reader) == 4
+    assert "rust" not in [match.id for match in reader.search("Rust", top_k=5)]
+
+
+def test_torn_log_write_is_truncated(tmp_path):
+    build(str(tmp_path))
+    log_path = tmp_path / "lexical-0.jsonl"
+    intact = log_path.stat().st_size
+    with open(log_path, "ab") as f:
+        f.write(b'{"op": "add", "id": "half')
+
+    reopened = LexicalIndex(str(tmp_path))
+    assert len(reopened) == 4
+    assert log_path.stat().st_size == intact
+    reopened.add(["Go developer"], ids=["go"])
+    assert len(LexicalIndex(str(tmp_path))) == 5
+
+
+def test_in_memory_compaction_renumbers_rows():
+    index = build()
+    index.delete(["py", "data"])
+    assert index.compact() == 2
+    assert index._ids == ["java", "sales"]
+    assert results(index, "sales", top_k=1)[0][0] == "sales"
@@ -0,0 +1,114 @@
+import asyncio
+import time
+
+import pytest
+
+from logic.llm_cache import AnalysisCache
+
+
+@pytest.fixture
+def cache(executors, tmp_path):
+    cache = AnalysisCache(executors, str(tmp_path / "llm.db"), ttl_s=60.0, max_entries=3)
+    yield cache
+    cache.close()
+
+
+def test_keys_cover_texts_model_and_prompt_version():
+    key = AnalysisCache.make_key("resume", "jd", "model", "v1")
+    assert key != AnalysisCache.make_key("resume", "jd", "model", "v2")
+    assert key != AnalysisCache.make_key("resume", "jd", "other-model", "v1")
+    assert key != AnalysisCache.make_key("resume 2", "jd", "model", "v1")
+
+
+def test_put_then_get_and_counters(cache):
+    assert cache.get("k") is None
+    cache.put("k", "analysis")
+    assert cache.get("k") == "analysis"
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+
+
+def test_expired_entries_are_dropped(cache):
+    cache.put("k", "analysis")
+    cache.ttl_s = 0.01
+    time.sleep(0.02)
+    assert cache.get("k") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_least_recently_used_entries_are_evicted(cache):
+    for key in ("a", "b", "c"):
+        cache.put(key, key)
+        time.sleep(0.002)
+    cache.get("a")
+    cache.put("d", "d")
+    assert cache.get("b") is None
+    assert [cache.get(key) for key in ("a", "c", "d")] == ["a", "c", "d"]
+    assert cache.stats()["evictions"] == 1
+
+
+def test_entries_survive_reopening(cache, executors, tmp_path):
+    cache.put("k", "analysis")
+    reopened = AnalysisCache(executors, str(tmp_path / "llm.db"))
+    assert reopened.get("k") == "analysis"
+    reopened.close()
+
+
+def test_concurrent_identical_requests_share_one_call(cache):
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "generated"
+
+    async def main():
+        first = await asyncio.gather(*(cache.get_or_compute("k", compute) for _ in range(4)))
+        later = await cache.get_or_compute("k", compute)
+        return first, later
+
+    first, later = asyncio.run(main())
+    assert len(calls) == 1
+    assert sorted(first) == [("generated", False)] + [("generated", True)] * 3
+    assert later == ("generated", True)
+    assert cache.stats()["coalesced"] == 3
+    assert cache.stats()["inflight"] == 0
+
+
+def test_failures_reach_every_waiter_and_are_not_cached(cache):
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("provider down")
+
+    async def main():
+        return await asyncio.gather(
+            *(cache.get_or_compute("k", fail) for _ in range(2)), return_exceptions=True
+        )
+
+    results = asyncio.run(main())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert cache.get("k") is None
+
+
+def test_a_caller_going_away_does_not_cancel_the_shared_call(cache):
+    async def compute():
+        await asyncio.sleep(0.05)
+        return "generated"
+
+    async def main():
+        leaving = asyncio.ensure_future(cache.get_or_compute("k", compute))
+        await asyncio.sleep(0.01)
+        staying = asyncio.ensure_future(cache.get_or_compute("k", compute))
+        await asyncio.sleep(0.01)
+        leaving.cancel()
+        return await staying
+
+    assert asyncio.run(main()) == ("generated", True)
+    assert cache.get("k") == "generated"
+
+
+def test_invalid_settings_are_rejected(executors):
+    with pytest.raises(ValueError):
+        AnalysisCache(executors, ttl_s=0)
+    with pytest.raises(ValueError):
+        AnalysisCache(executors, max_entries=0)
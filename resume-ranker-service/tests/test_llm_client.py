@@ -0,0 +1,238 @@
+import asyncio
+import threading
+import time
+from typing import List, Optional
+
+import pytest
+
+from logic.llm_client import CircuitBreaker, LLMUnavailable, ResilientLLMClient, TokenBucket
+
+
+class TransientError(Exception):
+    """Provider failure the client should retry, like a 429 or 503."""
+
+    retryable = True
+
+
+class FakeProvider:
+    """Blocking provider that fails a given number of times, then answers."""
+
+    def __init__(self, failures: int = 0, error: Optional[Exception] = None, delay_s: float = 0.0):
+        self.failures = failures
+        self.error = error or TransientError("503")
+        self.delay_s = delay_s
+        self.calls = 0
+        self.timeouts: List[float] = []
+        self._lock = threading.Lock()
+
+    def __call__(self, prompt: str, timeout: float) -> str:
+        with self._lock:
+            self.calls += 1
+            self.timeouts.append(timeout)
+            fail = self.calls <= self.failures
+        if self.delay_s:
+            time.sleep(self.delay_s)
+        if fail:
+            raise self.error
+        return f"answer to {prompt}"
+
+    def stream(self, prompt: str, timeout: float):
+        self.timeouts.append(timeout)
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise self.error
+        for word in ("answer", "to", prompt):
+            yield word
+
+
+def make_client(executors, **kwargs) -> ResilientLLMClient:
+    kwargs.setdefault("backoff_base_s", 0.0)
+    return ResilientLLMClient(executors, **kwargs)
+
+
+def test_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout_s=60.0)
+    for _ in range(2):
+        assert breaker.allow()
+        breaker.record(False)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    assert breaker.allow()
+    breaker.record(False)
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.available()
+    assert not breaker.allow()
+    assert breaker.stats()["opened"] == 1
+    assert breaker.stats()["short_circuited"] == 1
+
+
+def test_breaker_success_resets_the_failure_count():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout_s=60.0)
+    breaker.record(False)
+    breaker.record(True)
+    breaker.record(False)
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.stats()["consecutive_failures"] == 1
+
+
+def test_half_open_breaker_lets_one_trial_through():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout_s=0.05)
+    breaker.record(False)
+    assert not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.available()
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow()
+
+    breaker.record(True)
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow()
+
+
+def test_failed_trial_reopens_the_breaker():
+    breaker = CircuitBreaker(failure_threshold=5, reset_timeout_s=0.05)
+    for _ in range(5):
+        breaker.record(False)
+    time.sleep(0.06)
+    assert breaker.allow()
+
+    breaker.record(False)
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+
+def test_cancelled_trial_is_handed_back():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout_s=0.05)
+    breaker.record(False)
+    time.sleep(0.06)
+    assert breaker.allow()
+
+    breaker.cancel()
+    assert breaker.allow()
+
+
+def test_token_bucket_refuses_tokens_past_the_deadline():
+    bucket = TokenBucket(rate_per_s=1.0, burst=1)
+
+    async def main():
+        await bucket.acquire(time.monotonic() + 5.0)
+        with pytest.raises(LLMUnavailable):
+            await bucket.acquire(time.monotonic() + 0.1)
+
+    asyncio.run(main())
+
+
+def test_call_passes_the_attempt_timeout_to_the_provider(executors):
+    provider = FakeProvider()
+    client = make_client(executors, call_timeout_s=2.0, deadline_s=10.0)
+
+    assert asyncio.run(client.call(provider, "q")) == "answer to q"
+    assert len(provider.timeouts) == 1
+    assert 0 < provider.timeouts[0] <= 2.0
+    assert client.stats()["succeeded"] == 1
+    assert client.stats()["in_flight"] == 0
+
+
+def test_transient_failures_are_retried(executors):
+    provider = FakeProvider(failures=2)
+    client = make_client(executors, max_retries=2)
+
+    assert asyncio.run(client.call(provider, "q")) == "answer to q"
+    assert provider.calls == 3
+    stats = client.stats()
+    assert stats["retries"] == 2
+    assert stats["succeeded"] == 1
+    assert stats["circuit"]["state"] == CircuitBreaker.CLOSED
+
+
+def test_exhausted_retries_raise_llm_unavailable(executors):
+    provider = FakeProvider(failures=10)
+    client = make_client(executors, max_retries=1, breaker=CircuitBreaker(failure_threshold=10))
+
+    with pytest.raises(LLMUnavailable):
+        asyncio.run(client.call(provider, "q"))
+    assert provider.calls == 2
+    assert client.stats()["unavailable"] == 1
+
+
+def test_permanent_errors_are_not_retried(executors):
+    provider = FakeProvider(failures=1, error=ValueError("bad request"))
+    client = make_client(executors, max_retries=3)
+
+    with pytest.raises(ValueError):
+        asyncio.run(client.call(provider, "q"))
+    assert provider.calls == 1
+    # A rejected request says nothing about the provider's health
+    assert client.breaker.state == CircuitBreaker.CLOSED
+    assert client.stats()["errors"] == 1
+
+
+def test_timed_out_call_keeps_its_slot_until_the_thread_returns(executors):
+    provider = FakeProvider(delay_s=0.3)
+    client = make_client(executors, call_timeout_s=0.05, deadline_s=0.1, max_retries=0)
+
+    async def main():
+        with pytest.raises(LLMUnavailable):
+            await client.call(provider, "q")
+        in_flight = client.stats()["in_flight"]
+        await asyncio.sleep(0.4)
+        return in_flight, client.stats()
+
+    in_flight, stats = asyncio.run(main())
+    assert in_flight == 1
+    assert stats["in_flight"] == 0
+    assert stats["timeouts"] == 1
+
+
+def test_open_circuit_fails_fast_without_calling_the_provider(executors):
+    provider = FakeProvider(failures=10)
+    client = make_client(executors, max_retries=0, breaker=CircuitBreaker(failure_threshold=1, reset_timeout_s=60.0))
+
+    async def main():
+        for _ in range(2):
+            with pytest.raises(LLMUnavailable):
+                await client.call(provider, "q")
+
+    asyncio.run(main())
+    assert provider.calls == 1
+    assert not client.available()
+    assert client.stats()["circuit"]["short_circuited"] == 1
+
+
+def test_stream_yields_chunks_and_passes_the_deadline_as_timeout(executors):
+    provider = FakeProvider()
+    client = make_client(executors, deadline_s=7.0)
+
+    async def main():
+        return [chunk async for chunk in client.stream(provider.stream, "q")]
+
+    assert asyncio.run(main()) == ["answer", "to", "q"]
+    assert provider.timeouts == [7.0]
+    assert client.stats()["succeeded"] == 1
+    assert client.stats()["in_flight"] == 0
+
+
+def test_stream_retries_failures_before_the_first_chunk(executors):
+    provider = FakeProvider(failures=1)
+    client = make_client(executors, max_retries=1)
+
+    async def main():
+        return [chunk async for chunk in client.stream(provider.stream, "q")]
+
+    assert asyncio.run(main()) == ["answer", "to", "q"]
+    assert provider.calls == 2
+    assert client.stats()["retries"] == 1
+
+
+@pytest.mark.parametrize("kwargs", [
+    {"max_concurrency": 0},
+    {"call_timeout_s": 0},
+    {"deadline_s": -1},
+    {"max_retries": -1},
+    {"backoff_base_s": -0.1},
+])
+def test_invalid_settings_are_rejected(executors, kwargs):
+    with pytest.raises(ValueError):
+        ResilientLLMClient(executors, **kwargs)
@@ -0,0 +1,207 @@
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from conftest import FakeAnalyzer
+
+
+def rank(client, make_pdf, resume: str, jd: str, **data):
+    return client.post(
+        "/rank",
+        files={
+            "resume": ("resume.pdf", make_pdf([resume]), "application/pdf"),
+            "job_description": ("jd.pdf", make_pdf([jd]), "application/pdf")
+        },
+        data=data
+    )
+
+
+def test_rank_scores_a_resume(client, make_pdf):
+    response = rank(client, make_pdf, "Python developer with AWS", "Python engineer, AWS")
+    assert response.status_code == 200
+    body = response.json()
+    assert 0.0 < body["similarity_score"] <= 1.0
+    assert body["llm_analysis"] == "Analysis of 4 resume words"
+
+
+def test_unreadable_pdf_is_rejected_with_400(client, make_pdf):
+    response = client.post(
+        "/rank",
+        files={
+            "resume": ("resume.pdf", b"not a pdf", "application/pdf"),
+            "job_description": ("jd.pdf", make_pdf(["Python engineer"]), "application/pdf")
+        }
+    )
+    assert response.status_code == 400
+    assert "Error extracting text from PDF" in response.json()["detail"]
+
+
+def test_unknown_mode_is_rejected_with_400(client, make_pdf):
+    response = rank(client, make_pdf, "Python developer", "Python engineer", embedding_mode="sideways")
+    assert response.status_code == 400
+
+
+def test_internal_value_errors_are_not_blamed_on_the_input(client, make_pdf, service, monkeypatch):
+    def broken(*args):
+        raise ValueError("shapes (3,) and (4,) not aligned")
+
+    monkeypatch.setattr(service, "hybrid_score", broken)
+    response = rank(client, make_pdf, "Go developer", "Go engineer")
+    assert response.status_code == 500
+    assert response.json()["detail"].startswith("Internal server error")
+
+
+def test_indexed_resumes_are_found_and_stats_are_served(client, make_pdf):
+    resumes = [
+        ("resumes", ("kotlin.pdf", make_pdf(["Kotlin Android developer"]), "application/pdf")),
+        ("resumes", ("cobol.pdf", make_pdf(["COBOL mainframe programmer"]), "application/pdf")),
+    ]
+    ingested = client.post("/index/resumes", files=resumes)
+    assert ingested.status_code == 200 and ingested.json()["indexed"] == 2
+
+    found = client.post(
+        "/index/search",
+        files={"job_description": ("jd.pdf", make_pdf(["Kotlin Android engineer"]), "application/pdf")},
+        data={"top_k": 1}
+    )
+    assert found.status_code == 200
+    assert found.json()["matches"][0]["metadata"]["filename"] == "kotlin.pdf"
+    assert client.get("/stats").json()["resume_index"]["live"] >= 2
+
+
+def rank_many(client, make_pdf, resumes, jd: str, **data):
+    return client.post(
+        "/rank/batch",
+        files=[("resumes", (f"r{i}.pdf", make_pdf([text]), "application/pdf")) for i, text in enumerate(resumes)]
+        + [("job_description", ("jd.pdf", make_pdf([jd]), "application/pdf"))],
+        data=data
+    )
+
+
+def test_prefilter_stays_off_without_lexical_weight(client, make_pdf, service, monkeypatch):
+    monkeypatch.setattr(service.settings, "lexical_prefilter_k", 2)
+    resumes = ["Rust systems engineer", "Rust embedded developer", "Haskell compiler writer"]
+
+    monkeypatch.setattr(service.settings, "hybrid_lexical_weight", 0.0)
+    body = rank_many(client, make_pdf, resumes, "Rust engineer").json()
+    assert body["ranked"] == 3 and body["prefiltered"] == 0
+
+    monkeypatch.setattr(service.settings, "hybrid_lexical_weight", 0.3)
+    body = rank_many(client, make_pdf, resumes, "Rust engineer").json()
+    assert body["ranked"] == 2 and body["prefiltered"] == 1
+    assert body["results"][-1]["filename"] == "r2.pdf" and body["results"][-1]["shortlisted"] is False
+
+
+def stream(client, make_pdf, resume: str, jd: str, **data):
+    response = client.post(
+        "/rank/stream",
+        files={
+            "resume": ("resume.pdf", make_pdf([resume]), "application/pdf"),
+            "job_description": ("jd.pdf", make_pdf([jd]), "application/pdf")
+        },
+        data=data
+    )
+    return response, [json.loads(line) for line in response.text.splitlines()]
+
+
+def test_stream_fails_before_any_work_without_an_analyzer(client, make_pdf, service, monkeypatch):
+    async def not_expected(*args):
+        raise AssertionError("scored without an analyzer")
+
+    monkeypatch.setattr(service, "score_resume", not_expected)
+    monkeypatch.setattr(service.services, "llm_analyzer", None)
+    response, _ = stream(client, make_pdf, "Elixir developer", "Elixir engineer")
+    assert response.status_code == 500
+    assert response.json()["detail"] == "LLM analyzer not initialized"
+
+
+def test_identical_streams_share_one_llm_call(client, make_pdf, service):
+    class SlowAnalyzer(FakeAnalyzer):
+        """Holds its stream open long enough for a second request to join it."""
+
+        def stream_analysis(self, resume_text, job_description, timeout=None):
+            time.sleep(0.3)
+            yield from super().stream_analysis(resume_text, job_description, timeout)
+
+    analyzer = service.services.llm_analyzer = SlowAnalyzer()
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        runs = list(pool.map(
+            lambda _: stream(client, make_pdf, "Scala data engineer", "Scala engineer")[1], range(2)
+        ))
+    assert analyzer.calls == 1
+    done = sorted((events[-1]["analysis_path"], events[-1]["analysis_cached"]) for events in runs)
+    assert done == [("cache", True), ("llm", False)]
+    # Both clients get the whole analysis, streamed or at once
+    assert {"".join(e["delta"] for e in events if e["event"] == "analysis") for events in runs} == {
+        "Analysis of 3 resume words"
+    }
+
+
+def test_top_k_policy_is_refused_with_several_workers(client, make_pdf, service, monkeypatch):
+    monkeypatch.setattr(service.settings, "web_workers", 2)
+    response = rank(client, make_pdf, "Perl developer", "Perl engineer", analysis_policy="top_k")
+    assert response.status_code == 400
+    assert "single web worker" in response.json()["detail"]
+    assert rank(client, make_pdf, "Perl developer", "Perl engineer", analysis_policy="threshold").status_code == 200
+
+
+def test_stream_sends_the_score_then_the_analysis_then_done(client, make_pdf):
+    response, events = stream(client, make_pdf, "Swift iOS developer", "Swift engineer")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert [event["event"] for event in events] == ["score", "analysis", "analysis", "done"]
+    assert 0.0 < events[0]["similarity_score"] <= 1.0
+    assert "".join(event["delta"] for event in events[1:3]) == "Analysis of 3 resume words"
+    assert events[-1]["analysis_length"] == len("Analysis of 3 resume words")
+    assert (events[-1]["analysis_path"], events[-1]["analysis_cached"]) == ("llm", False)
+
+
+def test_batch_reports_unreadable_resumes_and_ranks_the_rest(client, make_pdf):
+    files = [
+        ("resumes", ("good.pdf", make_pdf(["Ruby on Rails developer"]), "application/pdf")),
+        ("resumes", ("broken.pdf", b"not a pdf", "application/pdf")),
+        ("resumes", ("other.pdf", make_pdf(["Fortran numerics programmer"]), "application/pdf")),
+        ("job_description", ("jd.pdf", make_pdf(["Ruby on Rails engineer"]), "application/pdf")),
+    ]
+    response = client.post("/rank/batch", files=files, data={"analyze_top_k": 1})
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["total"], body["ranked"]) == (3, 2)
+    results = {result["filename"]: result for result in body["results"]}
+    assert results["broken.pdf"]["error"] and results["broken.pdf"]["rank"] is None
+    assert results["good.pdf"]["rank"] == 1 and results["good.pdf"]["llm_analysis"]
+    assert results["other.pdf"]["rank"] == 2 and results["other.pdf"]["llm_analysis"] is None
+
+
+def test_batch_analyze_top_k_bounds(client, make_pdf):
+    resumes = ["Clojure developer", "Clojure consultant"]
+    response = rank_many(client, make_pdf, resumes, "Clojure engineer", analyze_top_k=-1)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "analyze_top_k cannot be negative"
+
+    body = rank_many(client, make_pdf, resumes, "Clojure engineer", analyze_top_k=10).json()
+    assert body["ranked"] == 2
+    assert all(result["llm_analysis"] for result in body["results"])
+
+    body = rank_many(client, make_pdf, resumes, "Clojure engineer", analyze_top_k=0).json()
+    assert not any(result["llm_analysis"] for result in body["results"])
+
+
+def test_workers_reopen_their_resources_after_fork(service, tmp_path, monkeypatch):
+    metrics_dir = tmp_path / "multiproc"
+    monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(metrics_dir))
+    monkeypatch.setattr(service.gc, "freeze", lambda: None)
+    service.executors.start()
+
+    service.prepare_fork()
+    assert service.executors._storage is None
+    try:
+        service.after_fork()
+        assert service.executors._storage is not None
+        assert metrics_dir.is_dir()
+        # The stores answer on their new connections
+        assert service.analysis_cache.get("unknown") is None
+        assert service.jd_store.get("unknown") is None
+        assert service.job_queue.get("unknown") is None
+    finally:
+        service.executors.shutdown()
@@ -0,0 +1,103 @@
+import logging
+
+import pytest
+from prometheus_client import REGISTRY
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from logic.admission import AdmissionController, AdmissionMiddleware
+from logic.metrics import (
+    MetricsMiddleware,
+    current_request_id,
+    install_log_request_ids,
+    render_metrics,
+    stage
+)
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+async def timed(request):
+    with stage("test_parse"):
+        pass
+    return JSONResponse({"request_id": current_request_id()})
+
+
+@pytest.fixture
+def client():
+    app = Starlette(routes=[Route("/timed", timed)])
+    app.add_middleware(MetricsMiddleware)
+    return TestClient(app)
+
+
+def test_stage_durations_and_errors_are_recorded():
+    count = sample("ranker_stage_duration_seconds_count", stage="test_stage")
+    errors = sample("ranker_stage_errors_total", stage="test_stage")
+    with stage("test_stage"):
+        pass
+    with pytest.raises(RuntimeError):
+        with stage("test_stage"):
+            raise RuntimeError("boom")
+    assert sample("ranker_stage_duration_seconds_count", stage="test_stage") == count + 2
+    assert sample("ranker_stage_errors_total", stage="test_stage") == errors + 1
+    assert sample("ranker_stage_in_flight", stage="test_stage") == 0
+
+
+def test_requests_get_an_id_and_server_timing(client):
+    response = client.get("/timed")
+    request_id = response.headers["x-request-id"]
+    assert response.json() == {"request_id": request_id}
+    assert len(request_id) == 16
+    timing = response.headers["server-timing"]
+    assert timing.startswith("test_parse;dur=") and "total;dur=" in timing
+
+
+def test_valid_incoming_request_ids_are_kept(client):
+    assert client.get("/timed", headers={"X-Request-ID": "abc-123"}).headers["x-request-id"] == "abc-123"
+    replaced = client.get("/timed", headers={"X-Request-ID": "not valid!"}).headers["x-request-id"]
+    assert replaced != "not valid!"
+
+
+def test_requests_are_counted_by_endpoint_and_status(client):
+    before = sample("ranker_requests_total", endpoint="timed", status="200")
+    client.get("/timed")
+    assert sample("ranker_requests_total", endpoint="timed", status="200") == before + 1
+    body, content_type = render_metrics()
+    assert b"ranker_requests_total" in body
+    assert content_type.startswith("text/plain")
+
+
+def test_log_records_carry_the_request_id(caplog):
+    factory = logging.getLogRecordFactory()
+    install_log_request_ids()
+    try:
+        with caplog.at_level(logging.INFO):
+            logging.getLogger("test").info("hello")
+    finally:
+        logging.setLogRecordFactory(factory)
+    assert caplog.records[-1].request_id == "-"
+
+
+def test_upload_bodies_are_timed_as_upload_read():
+    async def upload(request):
+        form = await request.form()
+        return JSONResponse({"size": len(await form["file"].read())})
+
+    app = Starlette(routes=[Route("/upload", upload, methods=["POST"])])
+    app.add_middleware(
+        AdmissionMiddleware,
+        controller=AdmissionController(max_in_flight=1, max_queue=0, queue_timeout_s=1.0),
+        max_request_bytes=4096,
+        max_file_bytes=1024
+    )
+    app.add_middleware(MetricsMiddleware)
+    count = sample("ranker_stage_duration_seconds_count", stage="upload_read")
+
+    response = TestClient(app).post("/upload", files={"file": ("a.pdf", b"a" * 500, "application/pdf")})
+    assert response.json() == {"size": 500}
+    assert "upload_read;dur=" in response.headers["server-timing"]
+    assert sample("ranker_stage_duration_seconds_count", stage="upload_read") == count + 1
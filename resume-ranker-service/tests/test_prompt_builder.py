@@ -0,0 +1,106 @@
+from typing import List
+
+import numpy as np
+import pytest
+
+from logic.prompt_builder import GAP_MARKER, PromptBuilder, estimate_tokens, split_passages
+
+
+class KeywordEmbedder:
+    """Embeds a text as counts of a few topic words, and counts its encode calls."""
+
+    topics = ("python", "kubernetes", "cooking", "gardening")
+    dimension = len(topics)
+
+    def __init__(self):
+        self.calls = 0
+
+    def embed_batch(self, texts: List[str]) -> np.ndarray:
+        self.calls += 1
+        return np.array([[text.count(topic) + 0.01 for topic in self.topics] for text in texts])
+
+
+def lines(topic: str, count: int) -> str:
+    return "\n".join(f"{topic} experience line {i} {topic}" for i in range(count))
+
+
+def test_split_passages_groups_lines_and_cuts_long_ones():
+    text = "short one\nshort two\n" + "word " * 30
+    passages = split_passages(text, passage_tokens=5)
+    assert passages[0] == "short one\nshort two"
+    assert all(len(passage) <= 20 for passage in passages)
+    assert " ".join(passages[1:]).split() == ["word"] * 30
+
+
+def test_texts_within_budget_are_untouched():
+    embedder = KeywordEmbedder()
+    builder = PromptBuilder(embedder, token_budget=1000)
+    prompt = builder.build("resume", "jd", template="template")
+    assert not prompt.trimmed
+    assert (prompt.resume_text, prompt.jd_text) == ("resume", "jd")
+    assert prompt.prompt_tokens == estimate_tokens("resume") + estimate_tokens("jd") + estimate_tokens("template")
+    assert embedder.calls == 0
+
+
+def test_resume_keeps_the_passages_closest_to_the_job_description():
+    embedder = KeywordEmbedder()
+    builder = PromptBuilder(embedder, token_budget=120, passage_tokens=10, jd_share=0.3)
+    resume = "\n".join([lines("cooking", 6), lines("python", 3), lines("gardening", 6)])
+    prompt = builder.build(resume, "python developer wanted")
+
+    assert prompt.trimmed
+    assert prompt.prompt_tokens <= 120 < prompt.input_tokens
+    assert "python" in prompt.resume_text
+    assert prompt.resume_passages_kept < prompt.resume_passages_total
+    assert prompt.jd_text == "python developer wanted"
+    assert embedder.calls == 1
+
+
+def test_dropped_passages_leave_a_gap_marker():
+    builder = PromptBuilder(KeywordEmbedder(), token_budget=60, passage_tokens=10, jd_share=0.3)
+    resume = "\n".join([lines("python", 2), lines("cooking", 8), lines("python", 2)])
+    prompt = builder.build(resume, "python")
+    assert GAP_MARKER in prompt.resume_text
+
+
+def test_long_job_description_is_trimmed_to_its_share():
+    builder = PromptBuilder(KeywordEmbedder(), token_budget=200, passage_tokens=10, jd_share=0.25)
+    jd = "\n".join([lines("kubernetes", 12), lines("cooking", 2)])
+    prompt = builder.build(lines("kubernetes", 20), jd)
+    assert prompt.jd_passages_kept < prompt.jd_passages_total
+    assert estimate_tokens(prompt.jd_text) <= 50
+    assert prompt.prompt_tokens <= 200
+
+
+def test_prepared_jd_passages_are_reused():
+    embedder = KeywordEmbedder()
+    builder = PromptBuilder(embedder, token_budget=80, passage_tokens=10)
+    jd = lines("python", 4)
+    prepared = builder.prepare_jd(jd)
+    embedder.calls = 0
+
+    reused = builder.build(lines("cooking", 10) + "\n" + lines("python", 2), jd, jd_passages=prepared)
+    fresh = PromptBuilder(KeywordEmbedder(), token_budget=80, passage_tokens=10).build(
+        lines("cooking", 10) + "\n" + lines("python", 2), jd
+    )
+    assert embedder.calls == 1
+    assert (reused.resume_text, reused.jd_text) == (fresh.resume_text, fresh.jd_text)
+
+
+def test_invalid_settings_are_rejected():
+    with pytest.raises(ValueError):
+        PromptBuilder(KeywordEmbedder(), token_budget=0)
+    with pytest.raises(ValueError):
+        PromptBuilder(KeywordEmbedder(), passage_tokens=0)
+    with pytest.raises(ValueError):
+        PromptBuilder(KeywordEmbedder(), jd_share=1.0)
+
+
+@pytest.mark.parametrize("token_budget", [40, 75, 120, 200, 333])
+def test_trimmed_prompts_never_exceed_the_budget(token_budget):
+    builder = PromptBuilder(KeywordEmbedder(), token_budget=token_budget, passage_tokens=7, jd_share=0.3)
+    resume = "\n".join([lines("python", 9), lines("cooking", 9), lines("kubernetes", 9)])
+    jd = "\n".join([lines("kubernetes", 7), lines("gardening", 7)])
+    prompt = builder.build(resume, jd, template="Analyze this resume: {resume} for {jd}")
+    assert prompt.trimmed
+    assert prompt.prompt_tokens <= token_budget
@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+from logic.similarity import (
+    calculate_cosine_similarity,
+    hybrid_scores,
+    max_sim_scores,
+    mean_pool,
+    normalize,
+    similarity_matrix,
+    top_k_similar
+)
+
+
+def reference_cosine(a, b):
+    return float(np.clip(a @ b / (np.linalg.norm(a) * np.linalg.norm(b)), 0.0, 1.0))
+
+
+def test_normalize_keeps_zero_rows():
+    rows = normalize(np.array([[3.0, 4.0], [0.0, 0.0]]))
+    assert rows.dtype == np.float32
+    assert np.allclose(rows, [[0.6, 0.8], [0.0, 0.0]])
+
+
+def test_blocked_matrix_matches_pairwise_cosine():
+    rng = np.random.default_rng(0)
+    queries, embeddings = rng.normal(size=(3, 8)), rng.normal(size=(11, 8))
+    scores = similarity_matrix(queries, embeddings, block_rows=4)
+    expected = [[reference_cosine(q, e) for e in embeddings] for q in queries]
+    assert scores.shape == (3, 11)
+    assert np.allclose(scores, expected, atol=1e-5)
+    assert calculate_cosine_similarity(queries[0], embeddings[0]) == pytest.approx(expected[0][0], abs=1e-5)
+
+
+def test_top_k_matches_a_full_sort_across_blocks():
+    rng = np.random.default_rng(1)
+    query, embeddings = rng.normal(size=8), rng.normal(size=(50, 8))
+    rows, scores = top_k_similar(query, embeddings, 5, block_rows=7)
+    full = similarity_matrix(query, embeddings)[0]
+    assert rows.tolist() == np.argsort(-full, kind="stable")[:5].tolist()
+    assert np.allclose(scores, full[rows])
+
+
+def test_top_k_skips_excluded_rows_even_when_k_exceeds_the_rest():
+    embeddings = np.eye(3, dtype=np.float32)
+    exclude = np.array([True, False, True])
+    rows, scores = top_k_similar(np.array([1.0, 0.5, 0.0]), embeddings, 3, exclude=exclude, block_rows=2)
+    assert rows.tolist() == [1]
+    assert scores.shape == (1,)
+
+
+def test_max_sim_averages_the_best_match_of_each_query_chunk():
+    query = np.eye(2, dtype=np.float32)
+    covers_both = np.eye(2, dtype=np.float32)
+    covers_one = np.array([[1.0, 0.0], [1.0, 0.0]], dtype=np.float32)
+    scores = max_sim_scores(query, [covers_one, covers_both])
+    assert scores.tolist() == [pytest.approx(0.5), pytest.approx(1.0)]
+    assert max_sim_scores(query, []).shape == (0,)
+
+
+def test_mean_pool_is_unit_length():
+    pooled = mean_pool(np.array([[2.0, 0.0], [0.0, 2.0]]))
+    assert np.linalg.norm(pooled) == pytest.approx(1.0)
+
+
+def test_hybrid_scores_weight_the_lexical_side():
+    fused = hybrid_scores(np.array([1.0, 0.0]), np.array([0.0, 1.0]), 0.25)
+    assert fused.tolist() == [0.75, 0.25]
+    with pytest.raises(ValueError):
+        hybrid_scores(np.array([1.0]), np.array([1.0]), 1.5)
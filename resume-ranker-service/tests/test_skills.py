@@ -0,0 +1,52 @@
+import pytest
+
+from logic.skills import SkillDictionary, content_terms, tokenize
+
+
+@pytest.mark.parametrize("text, tokens", [
+    ("C++ and Node.js with CI/CD", ["c++", "and", "node.js", "with", "ci/cd"]),
+    ("scikit-learn, C#", ["scikit-learn", "c#"]),
+    ("Senior .NET developer", ["senior", ".net", "developer"]),
+    ("C#/.NET", ["c#", ".net"]),
+    ("net income", ["net", "income"]),
+    ("End of sentence. Next one", ["end", "of", "sentence", "next", "one"]),
+])
+def test_tokenize_keeps_technical_tokens(text, tokens):
+    assert tokenize(text) == tokens
+
+
+@pytest.mark.parametrize("text", [".NET", ".net core", "ASP.NET", ".NET Framework", "dotnet"])
+def test_dotnet_spellings_match(text):
+    assert SkillDictionary().extract(tokenize(text)) == ["dotnet"]
+
+
+def test_slash_separated_skills_are_both_found():
+    assert SkillDictionary().extract(tokenize("C#/.NET developer")) == ["c#", "dotnet"]
+
+
+def test_net_alone_is_not_dotnet():
+    assert SkillDictionary().extract(tokenize("net income and net promoter score")) == []
+
+
+def test_longest_phrase_wins_and_is_reported_once():
+    skills = SkillDictionary()
+    tokens = tokenize("Apache Kafka and Kafka Streams, Spring Boot, k8s and Kubernetes")
+    assert skills.extract(tokens) == ["kafka", "spring boot", "kubernetes"]
+
+
+def test_ambiguous_words_need_their_longer_form():
+    skills = SkillDictionary()
+    assert skills.extract(tokenize("Go to market, REST of the team, spring hiring")) == []
+    assert skills.extract(tokenize("golang and REST APIs")) == ["golang", "rest apis"]
+
+
+def test_custom_skills_file_extends_the_defaults(tmp_path):
+    path = tmp_path / "skills.txt"
+    path.write_text("# extra skills\n\nKubernetes|kube\nOpenTelemetry|otel\n", encoding="utf-8")
+    skills = SkillDictionary.from_file(str(path))
+    assert skills.extract(tokenize("kube, otel and python")) == ["kubernetes", "opentelemetry", "python"]
+    assert len(skills) == len(SkillDictionary()) + 1
+
+
+def test_content_terms_drop_stopwords_and_numbers():
+    assert content_terms(tokenize("The 5 years of Python with a team of 12")) == ["years", "python", "team"]
@@ -0,0 +1,107 @@
+import os
+
+import numpy as np
+import pytest
+
+from logic.vector_index import VectorIndex
+
+
+def unit(*values):
+    return np.array(values, dtype=np.float32)
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = VectorIndex(str(tmp_path), block_rows=2)
+    index.add(
+        np.stack([unit(1, 0, 0), unit(0, 1, 0), unit(0, 0, 1), unit(1, 1, 0)]),
+        ids=["x", "y", "z", "xy"],
+        metadata=[{"n": 0}, {"n": 1}, {"n": 2}, {"n": 3}]
+    )
+    return index
+
+
+def test_search_returns_best_matches_with_metadata(index):
+    results = index.search(unit(1, 0, 0), top_k=2)
+    assert [item_id for item_id, _, _ in results] == ["x", "xy"]
+    assert results[0][1] == pytest.approx(1.0)
+    assert results[1][1] == pytest.approx(np.sqrt(0.5))
+    assert results[0][2] == {"n": 0}
+
+
+def test_deleted_rows_are_tombstoned_and_skipped(index):
+    assert index.delete(["x", "missing", "x"]) == 1
+    assert [item_id for item_id, _, _ in index.search(unit(1, 0, 0), top_k=4)][0] == "xy"
+    assert index.get("x") is None
+    assert len(index) == 3
+    assert index.stats()["deleted"] == 1 and index.stats()["stored_rows"] == 4
+
+
+def test_adding_an_existing_id_replaces_it(index):
+    index.add(unit(0, 0, 1), ids=["x"], metadata=[{"n": 9}])
+    assert len(index) == 4
+    assert index.get("x") == {"n": 9}
+    assert index.search(unit(0, 0, 1), top_k=2)[0][0] in ("x", "z")
+    assert index.stats()["deleted"] == 1
+
+
+def test_score_reads_only_the_given_ids(index):
+    results = index.score(unit(0, 1, 0), ["xy", "y", "unknown"])
+    assert [item_id for item_id, _, _ in results] == ["y", "xy"]
+
+
+def test_metadata_filter_restricts_search_and_score(index):
+    index.add(unit(1, 0, 0), ids=["x2"], metadata=[{"n": 0, "mode": "mean"}])
+    assert [item_id for item_id, _, _ in index.search(unit(1, 0, 0), top_k=2, where={"mode": "mean"})] == ["x2"]
+    assert [item_id for item_id, _, _ in index.score(unit(1, 0, 0), ["x", "x2"], where={"n": 0})] == ["x", "x2"]
+    assert index.score(unit(1, 0, 0), ["x", "y"], where={"mode": "mean"}) == []
+
+
+def test_compaction_reclaims_tombstones_and_keeps_live_rows(index, tmp_path):
+    index.delete(["y", "z"])
+    assert index.compact() == 2
+    assert index.compact() == 0
+    stats = index.stats()
+    assert (stats["live"], stats["deleted"], stats["stored_rows"], stats["generation"]) == (2, 0, 2, 1)
+    assert [item_id for item_id, _, _ in index.search(unit(1, 0, 0), top_k=4)] == ["x", "xy"]
+    assert sorted(os.listdir(tmp_path)) == ["index.json", "index.lock", "rows-1.jsonl", "vectors-1.f32"]
+
+
+def test_reopening_reads_the_persisted_state(index, tmp_path):
+    index.delete(["z"])
+    index.compact()
+    index.add(unit(0, 1, 1), ids=["yz"])
+
+    reopened = VectorIndex(str(tmp_path))
+    assert len(reopened) == 4
+    assert reopened.get("z") is None
+    assert reopened.search(unit(0, 1, 1), top_k=1)[0][0] == "yz"
+
+
+def test_other_instances_see_compaction(index, tmp_path):
+    other = VectorIndex(str(tmp_path))
+    index.delete(["x"])
+    index.compact()
+    assert other.get("x") is None
+    assert [item_id for item_id, _, _ in other.search(unit(1, 0, 0), top_k=1)] == ["xy"]
+
+
+def test_torn_sidecar_write_is_truncated_on_open(index, tmp_path):
+    with open(tmp_path / "rows-0.jsonl", "ab") as f:
+        f.write(b'{"op": "add", "row": 4, "id": "torn"')
+    with open(tmp_path / "vectors-0.f32", "ab") as f:
+        f.write(unit(1, 1, 1).tobytes())
+
+    reopened = VectorIndex(str(tmp_path))
+    assert len(reopened) == 4
+    assert os.path.getsize(tmp_path / "vectors-0.f32") == 4 * 3 * 4
+    assert reopened.add(unit(1, 1, 1), ids=["whole"]) == ["whole"]
+
+
+def test_invalid_input_is_rejected(index):
+    with pytest.raises(ValueError):
+        index.add(unit(1, 0), ids=["short"])
+    with pytest.raises(ValueError):
+        index.add(np.stack([unit(1, 0, 0), unit(0, 1, 0)]), ids=["a", "a"])
+    with pytest.raises(ValueError):
+        index.search(unit(1, 0, 0), top_k=0)